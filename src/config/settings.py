@@ -77,6 +77,8 @@ DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 # ===== MinerU 配置 =====
 MINERU_API_KEY = os.getenv("MinerU_API_KEY", "")
 MINERU_API_URL = os.getenv("MinerU_API_URL", "")
+# 批量查询任务状态的接口（可选）：POST {"task_ids": [...]}，未配置时逐个任务查询
+MINERU_BATCH_STATUS_URL = os.getenv("MinerU_BATCH_STATUS_URL", "")
 
 
 # ===== OSS 配置 =====
@@ -84,6 +86,14 @@ OSS_ACCESS_KEY_ID = os.getenv("OSS_ACCESS_KEY_ID", "")
 OSS_ACCESS_KEY_SECRET = os.getenv("OSS_ACCESS_KEY_SECRET", "")
 OSS_ENDPOINT = os.getenv("OSS_ENDPOINT", "")
 OSS_BUCKET = os.getenv("OSS_BUCKET", "")
+# PDF 上传：超过阈值（字节）走分片上传，分片大小（字节）、并行上传分片的线程数、
+# 分片上传断点记录目录；按内容 SHA-256 去重，相同内容的 PDF 不重复上传
+OSS_MULTIPART_THRESHOLD = _get_env_int("OSS_MULTIPART_THRESHOLD", 10 * 1024 * 1024)
+OSS_PART_SIZE = _get_env_int("OSS_PART_SIZE", 8 * 1024 * 1024)
+OSS_UPLOAD_THREADS = _get_env_int("OSS_UPLOAD_THREADS", 4)
+OSS_UPLOAD_STATE_DIR = os.getenv(
+    "OSS_UPLOAD_STATE_DIR", str(PROJECT_ROOT / "files" / "oss_upload_state")
+)
 
 
 # ===== LLM 模型配置 =====
@@ -137,6 +147,40 @@ LLM_MODEL_HIGH_PRECISION_CONFIG = {
 }
 
 
+# ===== LLM 调用调度配置（令牌桶限流 + AIMD 并发 + 抖动退避重试） =====
+# 启用后 get_models 返回的 LLM 共享同一模型名的调度器，重试由调度器负责
+LLM_SCHEDULER_ENABLED = _get_env_bool("LLM_SCHEDULER_ENABLED", True)
+LLM_RATE_LIMIT_RPM = _get_env_float("LLM_RATE_LIMIT_RPM", None)
+LLM_RATE_LIMIT_TPM = _get_env_float("LLM_RATE_LIMIT_TPM", None)
+
+LLM_SCHEDULER_CONFIG = {
+    "enabled": LLM_SCHEDULER_ENABLED,
+    "requests_per_minute": LLM_RATE_LIMIT_RPM,
+    "tokens_per_minute": LLM_RATE_LIMIT_TPM,
+    "initial_concurrency": _get_env_int("LLM_SCHEDULER_INITIAL_CONCURRENCY", 8),
+    "min_concurrency": _get_env_int("LLM_SCHEDULER_MIN_CONCURRENCY", 1),
+    "max_concurrency": _get_env_int("LLM_SCHEDULER_MAX_CONCURRENCY", 64),
+    "max_retries": _get_env_int(
+        "LLM_SCHEDULER_MAX_RETRIES",
+        LLM_MODEL_MAX_RETRIES if LLM_MODEL_MAX_RETRIES is not None else 6,
+    ),
+    "backoff_base": _get_env_float("LLM_SCHEDULER_BACKOFF_BASE", 1.0),
+    "backoff_max": _get_env_float("LLM_SCHEDULER_BACKOFF_MAX", 60.0),
+}
+
+
+# ===== LLM 离线批处理配置（大批量图片描述 / 文档摘要回填） =====
+# openai：OpenAI Batch API；local：本地逐条执行的替身后端（测试或无 Batch API 的服务）
+LLM_BATCH_BACKEND = _get_env_choice("LLM_BATCH_BACKEND", {"openai", "local"}, "openai")
+LLM_BATCH_WORK_DIR = str(PROJECT_ROOT / "files" / "llm_batch")
+LLM_BATCH_COMPLETION_WINDOW = os.getenv("LLM_BATCH_COMPLETION_WINDOW") or "24h"
+LLM_BATCH_POLL_INTERVAL = _get_env_int("LLM_BATCH_POLL_INTERVAL", 30)
+LLM_BATCH_TIMEOUT = _get_env_int("LLM_BATCH_TIMEOUT", 86400)
+# 单个批处理文件的请求数与字节数上限（超过时自动拆分为多个批次）
+LLM_BATCH_MAX_REQUESTS = _get_env_int("LLM_BATCH_MAX_REQUESTS", 50000)
+LLM_BATCH_MAX_BYTES = _get_env_int("LLM_BATCH_MAX_BYTES", 180 * 1024 * 1024)
+
+
 # ===== 嵌入模型配置 =====
 EMBEDDING_PATH = str(
     PROJECT_ROOT
@@ -149,15 +193,66 @@ EMBEDDING_MODELN_CONFIG = {
     "model_name": EMBEDDING_PATH,
     "model_kwargs": {"device": DEVICE},
 }
+# 嵌入推理后端：torch（HuggingFaceEmbeddings，默认）；onnx 为 ONNX Runtime CPU 推理，
+# 模型从 EMBEDDING_PATH 导出到 EMBEDDING_ONNX_PATH（可选 int8 动态量化），线程数 0 为默认
+EMBEDDING_BACKEND = _get_env_choice("EMBEDDING_BACKEND", {"torch", "onnx"}, "torch")
+EMBEDDING_ONNX_PATH = str(
+    PROJECT_ROOT / "model" / "embeddings" / "onnx" / "all-mpnet-base-v2"
+)
+EMBEDDING_ONNX_QUANTIZE = _get_env_bool("EMBEDDING_ONNX_QUANTIZE", True)
+EMBEDDING_ONNX_THREADS = _get_env_int("EMBEDDING_ONNX_THREADS", 0)
+EMBEDDING_ONNX_BATCH_SIZE = _get_env_int("EMBEDDING_ONNX_BATCH_SIZE", 32)
+# 查询嵌入缓存（LRU + TTL）与并发请求微批合并；启用后 get_embedding_model 返回
+# CachedQueryEmbeddings，同一模型共享缓存，窗口内到达的 embed_query 合并为一次批量编码
+EMBEDDING_QUERY_CACHE_ENABLED = _get_env_bool("EMBEDDING_QUERY_CACHE_ENABLED", True)
+EMBEDDING_QUERY_CACHE_CONFIG = {
+    "max_entries": _get_env_int("EMBEDDING_QUERY_CACHE_MAX_ENTRIES", 10000),
+    "ttl_seconds": _get_env_float("EMBEDDING_QUERY_CACHE_TTL_SECONDS", 3600.0),
+    "batch_window_ms": _get_env_float("EMBEDDING_BATCH_WINDOW_MS", 3.0),
+    "max_batch_size": _get_env_int("EMBEDDING_BATCH_MAX_SIZE", 64),
+}
 
 
 # ===== 向量数据库配置 =====
 VECTOR_DB_PATH = str(PROJECT_ROOT / "files" / "vector_store" / "rag")
 VECTOR_DB_COLLECTION_NAME = os.getenv("VECTOR_DB_COLLECTION_NAME") or None
+# HNSW 索引延迟落盘（仅在新建 collection 时生效）：内存中累积多少条后并入索引、
+# 累积多少条后把索引写回磁盘；批量重建索引时调大可减少落盘次数
+VECTOR_DB_HNSW_BATCH_SIZE = _get_env_int("VECTOR_DB_HNSW_BATCH_SIZE", 1000)
+VECTOR_DB_HNSW_SYNC_THRESHOLD = _get_env_int("VECTOR_DB_HNSW_SYNC_THRESHOLD", 10000)
 VECTOR_DB_CONFIG = {
     "collection_name": VECTOR_DB_COLLECTION_NAME,
     "persist_directory": VECTOR_DB_PATH,
+    "collection_metadata": {
+        "hnsw:batch_size": VECTOR_DB_HNSW_BATCH_SIZE,
+        "hnsw:sync_threshold": VECTOR_DB_HNSW_SYNC_THRESHOLD,
+    },
 }
+# 批量写入：单次 upsert 的条数（不超过 Chroma 客户端的 max_batch_size）
+VECTOR_DB_INGEST_BATCH_SIZE = _get_env_int("VECTOR_DB_INGEST_BATCH_SIZE", 4096)
+# 向量库后端：chroma（默认）；faiss / hnswlib 为进程内 ANN 索引，存于 ANN_INDEX_PATH
+#（与 Chroma 目录同级），文档与元数据存于同目录的 SQLite
+# flat 为精确暴力检索，向量按 ANN_VECTOR_DTYPE 量化后常驻内存
+VECTOR_DB_BACKEND = _get_env_choice(
+    "VECTOR_DB_BACKEND", {"chroma", "faiss", "hnswlib", "flat"}, "chroma"
+)
+ANN_INDEX_PATH = str(PROJECT_ROOT / "files" / "vector_store" / "ann")
+# 累积多少条新写入后把 ANN 索引写回磁盘（其余在 persist() / close() 时写入）
+ANN_SAVE_EVERY = _get_env_int("ANN_SAVE_EVERY", 100000)
+# FAISS IVF-PQ：倒排列表数（0 为按数据量自动取 4*sqrt(N)）、PQ 子量化器数、查询探查列表数；
+# 只读打开时以内存映射加载索引（IO_FLAG_MMAP），常驻内存只有被访问的倒排列表
+ANN_FAISS_NLIST = _get_env_int("ANN_FAISS_NLIST", 0)
+ANN_FAISS_PQ_M = _get_env_int("ANN_FAISS_PQ_M", 64)
+ANN_FAISS_NPROBE = _get_env_int("ANN_FAISS_NPROBE", 16)
+ANN_FAISS_MMAP = _get_env_bool("ANN_FAISS_MMAP", True)
+# hnswlib HNSW：每个节点的邻居数、建图时与查询时的候选列表长度
+ANN_HNSW_M = _get_env_int("ANN_HNSW_M", 16)
+ANN_HNSW_EF_CONSTRUCTION = _get_env_int("ANN_HNSW_EF_CONSTRUCTION", 200)
+ANN_HNSW_EF_SEARCH = _get_env_int("ANN_HNSW_EF_SEARCH", 64)
+# 量化存储：flat 索引常驻内存的向量精度（float32 / float16 / int8，int8 按维度缩放）；
+# ANN_RESCORE_FACTOR > 0 时 SQLite 同时保存 float32 向量，检索多取 k*因子 个候选后精确重排
+ANN_VECTOR_DTYPE = _get_env_choice("ANN_VECTOR_DTYPE", {"float32", "float16", "int8"}, "float32")
+ANN_RESCORE_FACTOR = _get_env_int("ANN_RESCORE_FACTOR", 0)
 
 
 # ===== 关系型数据库配置 =====
@@ -169,6 +264,15 @@ TEXT_CHUNK_SON_SIZE = _get_env_int("TEXT_CHUNK_SON_SIZE", None)
 TEXT_CHUNK_SON_OVERLAP = _get_env_int("TEXT_CHUNK_SON_OVERLAP", None)
 IMG_CHUNK_SON_SIZE = _get_env_int("IMG_CHUNK_SON_SIZE", None)
 IMG_CHUNK_SON_OVERLAP = _get_env_int("IMG_CHUNK_SON_OVERLAP", None)
+# 父段落（small-to-big）：子块用于嵌入检索，命中后按章节取回父段落作为上下文；
+# 父段落最大字符数（超过时在元素边界处拆分），单个元素超长时不切分
+TEXT_CHUNK_PARENT_SIZE = _get_env_int("TEXT_CHUNK_PARENT_SIZE", 3000)
+# 切分长度单位：char 按字符数；token 按嵌入模型分词器的 token 数（此时 TEXT_CHUNK_SON_SIZE
+# 为 token 数，未设置时取编码窗口减去特殊 token，超过编码窗口时按窗口截断）
+TEXT_CHUNK_LENGTH_UNIT = _get_env_choice("TEXT_CHUNK_LENGTH_UNIT", {"char", "token"}, "char")
+# 语料切分：块存储目录（每篇文档一个 JSONL）、并行切分进程数（未设置时为 CPU 核数）
+CHUNK_STORE_PATH = str(PROJECT_ROOT / "files" / "file_store" / "chunk_store")
+CHUNK_WORKERS = _get_env_int("CHUNK_WORKERS", None)
 
 
 # ===== 图片识别配置 =====
@@ -178,6 +282,50 @@ PICTURE_MAX_CONCURRENT_TASKS = _get_env_int("PICTURE_MAX_CONCURRENT_TASKS", None
 PDF_TO_MD_MAX_CONCURRENT_TASKS = _get_env_int("PDF_TO_MD_MAX_CONCURRENT_TASKS", None)
 PDF_TO_MD_TASK_INTERVAL = _get_env_int("PDF_TO_MD_TASK_INTERVAL", None)
 PDF_TO_MD_TASK_TIMEOUT = _get_env_int("PDF_TO_MD_TASK_TIMEOUT", None)
+# 分阶段并发预算：OSS 上传并发数、下载与解压并发数（MinerU 在途任务数由
+# PDF_TO_MD_MAX_CONCURRENT_TASKS 控制），各阶段互不占用对方的名额
+PDF_TO_MD_UPLOAD_CONCURRENCY = _get_env_int("PDF_TO_MD_UPLOAD_CONCURRENCY", 4)
+PDF_TO_MD_DOWNLOAD_CONCURRENCY = _get_env_int("PDF_TO_MD_DOWNLOAD_CONCURRENCY", 4)
+# MinerU API 共享 HTTP 连接池：总连接数、单主机连接数、keep-alive 空闲保持秒数、DNS 缓存秒数
+PDF_TO_MD_HTTP_POOL_LIMIT = _get_env_int("PDF_TO_MD_HTTP_POOL_LIMIT", 100)
+PDF_TO_MD_HTTP_POOL_LIMIT_PER_HOST = _get_env_int("PDF_TO_MD_HTTP_POOL_LIMIT_PER_HOST", 20)
+PDF_TO_MD_HTTP_KEEPALIVE_TIMEOUT = _get_env_float("PDF_TO_MD_HTTP_KEEPALIVE_TIMEOUT", 30.0)
+PDF_TO_MD_HTTP_DNS_TTL = _get_env_int("PDF_TO_MD_HTTP_DNS_TTL", 300)
+# MinerU 任务状态集中轮询：最小/最大轮询间隔（秒）、间隔占已耗时的比例、
+# 按页数估算耗时的每页秒数、批量查询每批任务数、逐个查询时的并发数
+PDF_TO_MD_POLL_MAX_INTERVAL = _get_env_float("PDF_TO_MD_POLL_MAX_INTERVAL", 30.0)
+PDF_TO_MD_POLL_ELAPSED_FRACTION = _get_env_float("PDF_TO_MD_POLL_ELAPSED_FRACTION", 0.2)
+PDF_TO_MD_POLL_SECONDS_PER_PAGE = _get_env_float("PDF_TO_MD_POLL_SECONDS_PER_PAGE", 1.0)
+PDF_TO_MD_POLL_BATCH_SIZE = _get_env_int("PDF_TO_MD_POLL_BATCH_SIZE", 100)
+PDF_TO_MD_POLL_CONCURRENCY = _get_env_int("PDF_TO_MD_POLL_CONCURRENCY", 10)
+# 结果 zip 流式下载：失败重试次数（断点续传）、写盘缓冲字节数、单次读取超时（秒）
+PDF_TO_MD_DOWNLOAD_MAX_RETRIES = _get_env_int("PDF_TO_MD_DOWNLOAD_MAX_RETRIES", 3)
+PDF_TO_MD_DOWNLOAD_BUFFER_SIZE = _get_env_int("PDF_TO_MD_DOWNLOAD_BUFFER_SIZE", 1024 * 1024)
+PDF_TO_MD_DOWNLOAD_READ_TIMEOUT = _get_env_int("PDF_TO_MD_DOWNLOAD_READ_TIMEOUT", 60)
+# 结果 zip 解压范围：referenced 仅解压 content_list 引用的图片；all 全部解压；none 不解压图片
+PDF_TO_MD_EXTRACT_IMAGES = _get_env_choice(
+    "PDF_TO_MD_EXTRACT_IMAGES", {"referenced", "all", "none"}, "referenced"
+)
+# 超大 PDF 分段：页数超过阈值的 PDF 按每段页数拆分为多个 MinerU 任务并行解析，
+# 完成后拼接为一份结果（阈值为 0 时不拆分）
+PDF_TO_MD_SHARD_THRESHOLD = _get_env_int("PDF_TO_MD_SHARD_THRESHOLD", 300)
+PDF_TO_MD_SHARD_PAGES = _get_env_int("PDF_TO_MD_SHARD_PAGES", 100)
+# MinerU API 转换任务台账（SQLite）：记录 file_url / task_id / zip 地址，
+# 进程重启后继续轮询已创建的任务、只下载缺失的结果；
+# 台账是运行状态，单独存放（已在 .gitignore 中忽略），不写入受版本管理的 rag.db
+PDF_TO_MD_JOB_LEDGER = _get_env_bool("PDF_TO_MD_JOB_LEDGER", True)
+PDF_TO_MD_JOB_LEDGER_PATH = str(PROJECT_ROOT / "files" / "relation_store" / "jobs.db")
+# PDF 转换后端：api 走 OSS + MinerU 远程 API；local 在本机进程池中运行 MinerU（pipeline 后端）
+PDF_TO_MD_BACKEND = _get_env_choice("PDF_TO_MD_BACKEND", {"api", "local"}, "api")
+# 本地 MinerU：工作进程数、每个进程的计算线程数（未设置时按 CPU 核数均分）、
+# 超过该页数的 PDF 按页段拆分并行解析、运行设备、OCR 语言、是否识别公式 / 表格
+PDF_TO_MD_LOCAL_WORKERS = _get_env_int("PDF_TO_MD_LOCAL_WORKERS", 2)
+PDF_TO_MD_LOCAL_THREADS_PER_WORKER = _get_env_int("PDF_TO_MD_LOCAL_THREADS_PER_WORKER", None)
+PDF_TO_MD_LOCAL_SHARD_PAGES = _get_env_int("PDF_TO_MD_LOCAL_SHARD_PAGES", 40)
+PDF_TO_MD_LOCAL_DEVICE = os.getenv("PDF_TO_MD_LOCAL_DEVICE", "cpu")
+PDF_TO_MD_LOCAL_LANG = os.getenv("PDF_TO_MD_LOCAL_LANG", "ch")
+PDF_TO_MD_LOCAL_FORMULA = _get_env_bool("PDF_TO_MD_LOCAL_FORMULA", True)
+PDF_TO_MD_LOCAL_TABLE = _get_env_bool("PDF_TO_MD_LOCAL_TABLE", True)
 
 # ===== JSON 图片描述配置 =====
 JSON_IMAGE_DESCRIPTION_MAX_CONCURRENT = _get_env_int(
@@ -187,6 +335,18 @@ JSON_IMAGE_DESCRIPTION_TIMEOUT = _get_env_int("JSON_IMAGE_DESCRIPTION_TIMEOUT",
 JSON_IMAGE_DESCRIPTION_SUMMARY_LENGTH = _get_env_int(
     "JSON_IMAGE_DESCRIPTION_SUMMARY_LENGTH", 500000
 )
+# 发送给 Vision 模型前的图片预处理：最长边（像素）、编码后字节上限、JPEG 质量、
+# 预处理结果缓存条数（每条最多 MAX_BYTES 的 base64，仅供重试复用，保持很小）
+JSON_IMAGE_DESCRIPTION_MAX_EDGE = _get_env_int("JSON_IMAGE_DESCRIPTION_MAX_EDGE", 1568)
+JSON_IMAGE_DESCRIPTION_MAX_BYTES = _get_env_int(
+    "JSON_IMAGE_DESCRIPTION_MAX_BYTES", 1024 * 1024
+)
+JSON_IMAGE_DESCRIPTION_JPEG_QUALITY = _get_env_int(
+    "JSON_IMAGE_DESCRIPTION_JPEG_QUALITY", 85
+)
+JSON_IMAGE_DESCRIPTION_IMAGE_CACHE_SIZE = _get_env_int(
+    "JSON_IMAGE_DESCRIPTION_IMAGE_CACHE_SIZE", 8
+)
 
 
 # ===== 元数据抽取配置 =====
@@ -0,0 +1,361 @@
+import sys
+from pathlib import Path
+
+# 确保项目根目录在 Python 路径中
+_project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+"""
+本地 MinerU API 替身服务
+
+模拟 MinerU v4 精准解析接口，用于在无网络、无 API Key 的环境下联调 / 压测 MineruPdfConverter：
+
+- POST /api/v4/extract/task                  创建任务，返回 task_id
+- GET  /api/v4/extract/task/{task_id}        查询任务状态（pending → running → done，含 extract_progress）
+- POST /api/v4/extract/task/batch-status     批量查询任务状态（{"task_ids": [...]}）
+- GET  /files/{task_id}.zip                  下载结果 zip（支持 Range，ETag 为内容 MD5）
+
+任务耗时 = queue_seconds + 页数 × seconds_per_page；file_url 为本地 file:// 地址（如 LocalOssBucket）时
+页数取自该 PDF，否则为 default_pages。各接口的请求次数记录在 stats 中。
+interrupt_downloads > 0 时，前若干次下载只发送一半内容后断开连接，用于验证断点续传。
+
+用法：
+
+    async with FakeMineruServer(port=0) as server:
+        converter = MineruPdfConverter(..., mineru_api_url=server.task_url, ...)
+        ...
+        print(server.stats)
+"""
+
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+import uuid
+import zipfile
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Union
+from urllib.parse import unquote, urlparse
+
+from aiohttp import web
+
+from src.data_initialization.converters.pdf_to_md import count_pdf_pages
+
+# ---------------------- 类型与日志配置 ----------------------
+
+PathLike = Union[str, os.PathLike]
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------- 数据结构 ----------------------
+
+
+@dataclass
+class _FakeTask:
+    """替身服务中的任务。"""
+
+    task_id: str
+    file_url: str
+    created: float
+    total_pages: int
+
+
+# ---------------------- 辅助函数 ----------------------
+
+
+def build_fake_result_zip(total_pages: int = 1, title: str = "Fake Document") -> bytes:
+    """构造与 MinerU 结果结构一致的最小 zip（full.md、layout.json、content_list 等）。"""
+    content_list = [
+        {"type": "text", "text": title, "text_level": 1, "page_idx": 0, "bbox": [0, 0, 100, 20]}
+    ] + [
+        {"type": "text", "text": f"Paragraph on page {i + 1}.", "page_idx": i, "bbox": [0, 30, 100, 60]}
+        for i in range(total_pages)
+    ]
+    layout = {
+        "pdf_info": [
+            {"page_idx": i, "page_size": [612, 792], "para_blocks": []}
+            for i in range(total_pages)
+        ]
+    }
+    file_id = uuid.uuid4()
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(
+            "full.md",
+            f"# {title}\n\n"
+            + "\n\n".join(f"Paragraph on page {i + 1}." for i in range(total_pages)),
+        )
+        zf.writestr("layout.json", json.dumps(layout))
+        zf.writestr(
+            "content_list_v2.json",
+            json.dumps(
+                [
+                    [
+                        {
+                            "type": "paragraph",
+                            "content": {
+                                "paragraph_content": [
+                                    {"type": "text", "content": f"Paragraph on page {i + 1}."}
+                                ]
+                            },
+                            "bbox": [0, 30, 100, 60],
+                        }
+                    ]
+                    for i in range(total_pages)
+                ]
+            ),
+        )
+        zf.writestr(f"{file_id}_content_list.json", json.dumps(content_list))
+        zf.writestr(f"{file_id}_model.json", json.dumps([]))
+    return buffer.getvalue()
+
+
+# ---------------------- 替身服务 ----------------------
+
+
+class FakeMineruServer:
+    """
+    本地 MinerU API 替身服务（aiohttp）。
+
+    Args:
+        host: 监听地址
+        port: 监听端口（0 表示随机端口）
+        default_pages: 每个任务的页数
+        seconds_per_page: 每页解析耗时（秒）
+        queue_seconds: 任务排队耗时（秒）
+        zip_path: 下载时返回的 zip 文件；为 None 时按页数生成最小结果 zip
+        enable_batch_status: 是否提供批量状态接口
+        interrupt_downloads: 前若干次下载在发送一半内容后断开连接
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        default_pages: int = 10,
+        seconds_per_page: float = 0.1,
+        queue_seconds: float = 0.5,
+        zip_path: Optional[PathLike] = None,
+        enable_batch_status: bool = True,
+        interrupt_downloads: int = 0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.default_pages = default_pages
+        self.seconds_per_page = seconds_per_page
+        self.queue_seconds = queue_seconds
+        self.zip_path = Path(zip_path) if zip_path else None
+        self.enable_batch_status = enable_batch_status
+        self.interrupt_downloads = interrupt_downloads
+
+        self.tasks: Dict[str, _FakeTask] = {}
+        self.stats: Counter = Counter()
+        self._zip_cache: Dict[int, bytes] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    # ---------------------- 地址 ----------------------
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def task_url(self) -> str:
+        """创建任务接口地址（对应配置 MinerU_API_URL）。"""
+        return f"{self.base_url}/api/v4/extract/task"
+
+    @property
+    def batch_status_url(self) -> str:
+        """批量状态接口地址（对应配置 MinerU_BATCH_STATUS_URL）。"""
+        return f"{self.base_url}/api/v4/extract/task/batch-status"
+
+    # ---------------------- 生命周期 ----------------------
+
+    def _build_app(self) -> web.Application:
+        app = web.Application()
+        routes = [
+            web.post("/api/v4/extract/task", self._handle_create),
+            web.get("/api/v4/extract/task/{task_id}", self._handle_status),
+            web.get("/files/{task_id}.zip", self._handle_download),
+        ]
+        if self.enable_batch_status:
+            routes.insert(
+                1, web.post("/api/v4/extract/task/batch-status", self._handle_batch_status)
+            )
+        app.add_routes(routes)
+        return app
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self._build_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if self.port == 0:
+            self.port = site._server.sockets[0].getsockname()[1]
+        logger.info("MinerU 替身服务已启动：%s", self.base_url)
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeMineruServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.stop()
+
+    # ---------------------- 任务状态 ----------------------
+
+    def _task_data(self, task: _FakeTask) -> Dict[str, Any]:
+        """按创建后经过的时间计算任务状态。"""
+        elapsed = time.monotonic() - task.created
+        data: Dict[str, Any] = {"task_id": task.task_id}
+        if elapsed < self.queue_seconds:
+            data["state"] = "pending"
+            return data
+
+        extracted = int((elapsed - self.queue_seconds) / max(self.seconds_per_page, 1e-6))
+        if extracted < task.total_pages:
+            data["state"] = "running"
+            data["extract_progress"] = {
+                "extracted_pages": extracted,
+                "total_pages": task.total_pages,
+            }
+            return data
+
+        data["state"] = "done"
+        data["full_zip_url"] = f"{self.base_url}/files/{task.task_id}.zip"
+        return data
+
+    def _zip_bytes(self, task: _FakeTask) -> bytes:
+        if self.zip_path is not None:
+            return self.zip_path.read_bytes()
+        cached = self._zip_cache.get(task.total_pages)
+        if cached is None:
+            cached = build_fake_result_zip(task.total_pages)
+            self._zip_cache[task.total_pages] = cached
+        return cached
+
+    def _page_count(self, file_url: str) -> int:
+        """本地 file:// PDF 取实际页数，其余使用 default_pages。"""
+        parsed = urlparse(file_url)
+        if parsed.scheme == "file":
+            path = Path(unquote(parsed.path))
+            if path.is_file():
+                return count_pdf_pages(path) or self.default_pages
+        return self.default_pages
+
+    # ---------------------- 接口处理 ----------------------
+
+    async def _handle_create(self, request: web.Request) -> web.Response:
+        self.stats["create"] += 1
+        body = await request.json()
+        file_url = body.get("url")
+        if not file_url:
+            return web.json_response({"code": -1, "msg": "url is required"})
+        task_id = uuid.uuid4().hex
+        self.tasks[task_id] = _FakeTask(
+            task_id=task_id,
+            file_url=file_url,
+            created=time.monotonic(),
+            total_pages=self._page_count(file_url),
+        )
+        return web.json_response({"code": 0, "data": {"task_id": task_id}})
+
+    async def _handle_status(self, request: web.Request) -> web.Response:
+        self.stats["status"] += 1
+        task = self.tasks.get(request.match_info["task_id"])
+        if task is None:
+            return web.json_response({"code": -1, "msg": "task not found"})
+        return web.json_response({"code": 0, "data": self._task_data(task)})
+
+    async def _handle_batch_status(self, request: web.Request) -> web.Response:
+        self.stats["batch_status"] += 1
+        body = await request.json()
+        results = [
+            self._task_data(self.tasks[task_id])
+            for task_id in body.get("task_ids") or []
+            if task_id in self.tasks
+        ]
+        return web.json_response({"code": 0, "data": {"extract_result": results}})
+
+    async def _handle_download(self, request: web.Request) -> web.StreamResponse:
+        self.stats["download"] += 1
+        task = self.tasks.get(request.match_info["task_id"])
+        if task is None:
+            raise web.HTTPNotFound()
+        body = self._zip_bytes(task)
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+
+        start = 0
+        range_header = request.headers.get("Range", "")
+        if_range = request.headers.get("If-Range")
+        if range_header.startswith("bytes=") and (if_range is None or if_range == etag):
+            start = int(range_header[len("bytes=") :].split("-", 1)[0] or 0)
+            if start >= len(body):
+                raise web.HTTPRequestRangeNotSatisfiable(
+                    headers={"Content-Range": f"bytes */{len(body)}"}
+                )
+            self.stats["download_range"] += 1
+
+        payload = body[start:]
+        response = web.StreamResponse(status=206 if start else 200)
+        response.content_type = "application/zip"
+        response.content_length = len(payload)
+        response.headers["ETag"] = etag
+        response.headers["Accept-Ranges"] = "bytes"
+        if start:
+            response.headers["Content-Range"] = f"bytes {start}-{len(body) - 1}/{len(body)}"
+        await response.prepare(request)
+
+        if self.interrupt_downloads > 0:
+            # 模拟连接中断：只发送一半内容
+            self.interrupt_downloads -= 1
+            self.stats["download_interrupted"] += 1
+            await response.write(payload[: len(payload) // 2])
+            request.transport.close()
+            return response
+
+        await response.write(payload)
+        await response.write_eof()
+        return response
+
+
+# ---------------------- 独立运行 ----------------------
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
+    )
+
+    parser = argparse.ArgumentParser(description="本地 MinerU API 替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--seconds-per-page", type=float, default=0.1)
+    parser.add_argument("--zip", default=None, help="下载时返回的结果 zip")
+    args = parser.parse_args()
+
+    async def main() -> None:
+        async with FakeMineruServer(
+            host=args.host,
+            port=args.port,
+            default_pages=args.pages,
+            seconds_per_page=args.seconds_per_page,
+            zip_path=args.zip,
+        ) as server:
+            logger.info("MinerU_API_URL=%s", server.task_url)
+            logger.info("MinerU_BATCH_STATUS_URL=%s", server.batch_status_url)
+            await asyncio.Event().wait()
+
+    asyncio.run(main())
@@ -0,0 +1,374 @@
+import sys
+from pathlib import Path
+
+# 确保项目根目录在 Python 路径中
+_project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+"""
+本地 MinerU 转换后端（进程池，无需 GPU / OSS / 远程 API）
+
+在本机进程池中运行 MinerU pipeline 后端，输出布局与 API 路径完全一致：
+
+    md_output_dir/<doc>.md
+    work_dir/<doc>/full.md、layout.json、content_list_v2.json、
+                   {uuid}_content_list.json、{uuid}_model.json、images/
+
+- 每个工作进程启动时预加载模型（initializer），之后的解析复用已加载的模型
+- 每个工作进程的计算线程数按 CPU 核数均分，避免多进程下线程超订
+- 超过 shard_pages 页的 PDF 按页段拆分，各段作为独立任务进入进程池并行解析，
+  完成后用 utils.mineru_stitch 拼接并修正页码
+- 整批 PDF 的所有页段共用一个进程池，长文档不会独占
+
+用法：
+
+    with LocalMineruBackend(max_workers=4) as backend:
+        result = await backend.async_convert_pdf(pdf_path, md_dir, work_dir)
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from src.config.settings import (
+    PDF_TO_MD_LOCAL_DEVICE,
+    PDF_TO_MD_LOCAL_FORMULA,
+    PDF_TO_MD_LOCAL_LANG,
+    PDF_TO_MD_LOCAL_SHARD_PAGES,
+    PDF_TO_MD_LOCAL_TABLE,
+    PDF_TO_MD_LOCAL_THREADS_PER_WORKER,
+    PDF_TO_MD_LOCAL_WORKERS,
+)
+from src.data_initialization.converters.pdf_to_md import (
+    ConvertResult,
+    MineruCliError,
+    count_pdf_pages,
+)
+from src.data_initialization.utils.mineru_stitch import page_ranges, stitch_shard_dirs
+from src.data_initialization.utils.mineru_zip import (
+    CONTENT_LIST_V2_NAME,
+    FULL_MD_NAME,
+    LAYOUT_JSON_NAME,
+    locate_dir_artifacts,
+)
+
+# ---------------------- 类型与日志配置 ----------------------
+
+PathLike = Union[str, os.PathLike]
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------- 工作进程 ----------------------
+
+# 工作进程内的解析参数（由 initializer 写入）
+_WORKER_OPTIONS: Dict[str, Any] = {}
+
+
+def _init_worker(options: Dict[str, Any]) -> None:
+    """工作进程初始化：限制计算线程数、指定设备并预加载 MinerU 模型。"""
+    threads = str(options["threads"])
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = threads
+    os.environ["MINERU_DEVICE_MODE"] = options["device"]
+    _WORKER_OPTIONS.update(options)
+
+    try:
+        import torch
+
+        torch.set_num_threads(options["threads"])
+    except ImportError:
+        pass
+
+    if not options.get("preload"):
+        return
+    try:
+        from mineru.backend.pipeline.pipeline_analyze import ModelSingleton
+
+        ModelSingleton().get_model(
+            lang=options["lang"],
+            formula_enable=options["formula_enable"],
+            table_enable=options["table_enable"],
+        )
+        logger.info("工作进程 %d 已预加载 MinerU 模型", os.getpid())
+    except Exception as e:
+        # 预加载失败不影响解析，模型会在首次解析时加载
+        logger.warning("工作进程 %d 预加载 MinerU 模型失败：%r", os.getpid(), e)
+
+
+def _normalize_shard_output(raw_dir: Path, name: str) -> None:
+    """把 MinerU 本地输出的文件名改为与 API 结果 zip 一致的名称。"""
+    renames = {
+        f"{name}.md": FULL_MD_NAME,
+        f"{name}_middle.json": LAYOUT_JSON_NAME,
+        f"{name}_content_list_v2.json": CONTENT_LIST_V2_NAME,
+    }
+    for src_name, dst_name in renames.items():
+        src = raw_dir / src_name
+        if src.is_file():
+            os.replace(src, raw_dir / dst_name)
+    # 原始 PDF 与可视化文件不属于 API 结果布局
+    for extra in ("_origin.pdf", "_layout.pdf", "_span.pdf"):
+        leftover = raw_dir / f"{name}{extra}"
+        if leftover.is_file():
+            leftover.unlink()
+
+
+def _parse_shard(
+    pdf_path: str,
+    name: str,
+    start_page: int,
+    end_page: Optional[int],
+    output_dir: str,
+) -> str:
+    """在工作进程中解析 PDF 的 [start_page, end_page) 页，返回规范化后的结果目录。"""
+    from mineru.cli.common import do_parse, read_fn
+
+    options = _WORKER_OPTIONS
+    pdf_bytes = read_fn(Path(pdf_path))
+    do_parse(
+        output_dir=output_dir,
+        pdf_file_names=[name],
+        pdf_bytes_list=[pdf_bytes],
+        p_lang_list=[options["lang"]],
+        backend="pipeline",
+        parse_method="auto",
+        formula_enable=options["formula_enable"],
+        table_enable=options["table_enable"],
+        f_draw_layout_bbox=False,
+        f_draw_span_bbox=False,
+        f_dump_orig_pdf=False,
+        start_page_id=start_page,
+        end_page_id=None if end_page is None else end_page - 1,
+    )
+
+    middle_json = next(Path(output_dir).rglob(f"{name}_middle.json"), None)
+    if middle_json is None:
+        raise RuntimeError(f"MinerU 未生成 {name}_middle.json: {output_dir}")
+    raw_dir = middle_json.parent
+    _normalize_shard_output(raw_dir, name)
+    return str(raw_dir)
+
+
+# ---------------------- 辅助函数 ----------------------
+
+
+def _default_threads_per_worker(workers: int) -> int:
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+# ---------------------- 本地后端 ----------------------
+
+
+class LocalMineruBackend:
+    """
+    进程池版本地 MinerU 转换后端。
+
+    Args:
+        max_workers: 工作进程数（每个进程各自加载一份模型）
+        threads_per_worker: 每个进程的计算线程数，None 时按 CPU 核数均分
+        shard_pages: 超过该页数的 PDF 按页段拆分并行解析
+        device: 运行设备（cpu / cuda / mps 等）
+        lang: OCR 语言
+        formula_enable: 是否识别公式
+        table_enable: 是否识别表格
+        preload: 工作进程启动时是否预加载模型
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        threads_per_worker: Optional[int] = None,
+        shard_pages: Optional[int] = None,
+        device: Optional[str] = None,
+        lang: Optional[str] = None,
+        formula_enable: Optional[bool] = None,
+        table_enable: Optional[bool] = None,
+        preload: bool = True,
+    ) -> None:
+        self.max_workers = max(1, max_workers or PDF_TO_MD_LOCAL_WORKERS or 2)
+        self.shard_pages = max(1, shard_pages or PDF_TO_MD_LOCAL_SHARD_PAGES or 40)
+        self.options: Dict[str, Any] = {
+            "threads": threads_per_worker
+            or PDF_TO_MD_LOCAL_THREADS_PER_WORKER
+            or _default_threads_per_worker(self.max_workers),
+            "device": device or PDF_TO_MD_LOCAL_DEVICE or "cpu",
+            "lang": lang or PDF_TO_MD_LOCAL_LANG or "ch",
+            "formula_enable": (
+                PDF_TO_MD_LOCAL_FORMULA if formula_enable is None else formula_enable
+            ),
+            "table_enable": (
+                PDF_TO_MD_LOCAL_TABLE if table_enable is None else table_enable
+            ),
+            "preload": preload,
+        }
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    # ---------------------- 生命周期 ----------------------
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn：避免 fork 继承父进程的线程与 torch 状态
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.options,),
+            )
+            logger.info(
+                "启动本地 MinerU 进程池：%d 个进程，每进程 %d 线程，设备 %s",
+                self.max_workers,
+                self.options["threads"],
+                self.options["device"],
+            )
+        return self._executor
+
+    def close(self) -> None:
+        """关闭进程池（释放各进程加载的模型）。"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> "LocalMineruBackend":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    # ---------------------- 转换 ----------------------
+
+    async def _run_shard(
+        self, pdf_path: Path, name: str, start: int, end: Optional[int], output_dir: Path
+    ) -> Path:
+        loop = asyncio.get_running_loop()
+        raw_dir = await loop.run_in_executor(
+            self._get_executor(),
+            partial(_parse_shard, str(pdf_path), name, start, end, str(output_dir)),
+        )
+        return Path(raw_dir)
+
+    async def async_convert_pdf(
+        self,
+        pdf_path: PathLike,
+        md_output_dir: PathLike,
+        work_dir: PathLike,
+    ) -> ConvertResult:
+        """在进程池中转换单个 PDF，输出布局与 API 路径一致。"""
+        pdf_path_obj = Path(pdf_path).resolve()
+        if not await asyncio.to_thread(pdf_path_obj.is_file):
+            raise FileNotFoundError(f"PDF not found: {pdf_path_obj}")
+
+        name = pdf_path_obj.stem
+        md_output_dir = Path(md_output_dir)
+        work_dir = Path(work_dir)
+        md_path = md_output_dir / f"{name}.md"
+        doc_dir = work_dir / name
+
+        await asyncio.to_thread(md_output_dir.mkdir, parents=True, exist_ok=True)
+        await asyncio.to_thread(work_dir.mkdir, parents=True, exist_ok=True)
+
+        existing = await asyncio.to_thread(locate_dir_artifacts, doc_dir)
+        if existing.layout_json is not None and await asyncio.to_thread(md_path.is_file):
+            logger.info("目标文件已存在，跳过本地转换：%s -> %s", pdf_path_obj.name, md_path)
+            md_content = await asyncio.to_thread(md_path.read_text, encoding="utf-8")
+            return ConvertResult(
+                md_content=md_content, md_path=md_path, zip_path=None, artifacts=existing
+            )
+
+        total_pages = await asyncio.to_thread(count_pdf_pages, pdf_path_obj)
+        ranges: List[Tuple[int, Optional[int]]] = (
+            list(page_ranges(total_pages, self.shard_pages)) if total_pages else [(0, None)]
+        )
+        logger.info(
+            "开始本地转换 %s：%s 页，%d 个页段",
+            pdf_path_obj.name,
+            total_pages if total_pages else "未知",
+            len(ranges),
+        )
+
+        # 中间结果与拼接结果均在临时目录中完成，最后整体替换 work_dir/<doc>；
+        # 两个临时目录（. 开头，元素提取会跳过）无论成功与否都在 finally 中删除。
+        # partial_dir 须与 doc_dir 在同一文件系统上，os.replace 才能原子替换
+        scratch_dir = work_dir / f".{name}.local"
+        partial_dir = work_dir / f".{name}.partial"
+
+        def cleanup() -> None:
+            for tmp_dir in (scratch_dir, partial_dir):
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        await asyncio.to_thread(cleanup)
+        try:
+            try:
+                raw_dirs = await asyncio.gather(
+                    *(
+                        self._run_shard(
+                            pdf_path_obj, name, start, end, scratch_dir / f"shard_{i:04d}"
+                        )
+                        for i, (start, end) in enumerate(ranges)
+                    )
+                )
+            except Exception as e:
+                logger.error("本地 MinerU 解析失败：%s, 错误：%r", pdf_path_obj.name, e)
+                raise MineruCliError(f"本地 MinerU 解析失败: {pdf_path_obj}") from e
+
+            doc_uuid = str(uuid.uuid5(uuid.NAMESPACE_URL, name))
+            md_content = await asyncio.to_thread(
+                stitch_shard_dirs,
+                [(start, raw_dir) for (start, _), raw_dir in zip(ranges, raw_dirs)],
+                partial_dir,
+                doc_uuid,
+            )
+
+            def publish() -> None:
+                if doc_dir.exists():
+                    shutil.rmtree(doc_dir)
+                os.replace(partial_dir, doc_dir)
+                md_path.write_text(md_content, encoding="utf-8")
+
+            await asyncio.to_thread(publish)
+        finally:
+            await asyncio.to_thread(cleanup)
+
+        logger.info(
+            "%s 本地转换完成：md_len=%d, md=%s, work_dir=%s",
+            pdf_path_obj.name,
+            len(md_content),
+            md_path,
+            doc_dir,
+        )
+        artifacts = await asyncio.to_thread(locate_dir_artifacts, doc_dir)
+        return ConvertResult(
+            md_content=md_content, md_path=md_path, zip_path=None, artifacts=artifacts
+        )
+
+    async def async_batch_convert(
+        self,
+        pdf_paths: Sequence[PathLike],
+        md_output_dir: PathLike,
+        work_dir: PathLike,
+    ) -> List[Optional[ConvertResult]]:
+        """批量转换，所有 PDF 的页段共用进程池；失败的 PDF 对应位置为 None。"""
+
+        async def convert(pdf_path: PathLike) -> Optional[ConvertResult]:
+            try:
+                return await self.async_convert_pdf(pdf_path, md_output_dir, work_dir)
+            except Exception as e:
+                logger.error("处理失败：%s, 错误信息：%r", Path(pdf_path).name, e)
+                return None
+
+        results = await asyncio.gather(*(convert(p) for p in pdf_paths))
+        success = sum(1 for r in results if r is not None)
+        logger.info(
+            "本地批量转换完成：总数=%d, 成功=%d, 失败=%d",
+            len(results),
+            success,
+            len(results) - success,
+        )
+        return list(results)
@@ -7,16 +7,26 @@ if str(_project_root) not in sys.path:
     sys.path.insert(0, str(_project_root))
 
 import asyncio
+import base64
+import hashlib
+import json
 import logging
 import os
+import random
+import re
 import subprocess
+import shutil
+import sqlite3
 import time
+import uuid
 import zipfile
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from typing import List, Optional, Tuple, Union
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 from urllib.parse import quote
 
 import aiohttp
+import pymupdf
 import oss2
 import requests
 
@@ -26,11 +36,47 @@ from src.config.settings import (
     OSS_ENDPOINT,
     MINERU_API_KEY,
     MINERU_API_URL,
+    MINERU_BATCH_STATUS_URL,
     OSS_BUCKET,
     PROJECT_ROOT,
     PDF_TO_MD_MAX_CONCURRENT_TASKS,
     PDF_TO_MD_TASK_INTERVAL,
     PDF_TO_MD_TASK_TIMEOUT,
+    PDF_TO_MD_UPLOAD_CONCURRENCY,
+    PDF_TO_MD_DOWNLOAD_CONCURRENCY,
+    PDF_TO_MD_HTTP_POOL_LIMIT,
+    PDF_TO_MD_HTTP_POOL_LIMIT_PER_HOST,
+    PDF_TO_MD_HTTP_KEEPALIVE_TIMEOUT,
+    PDF_TO_MD_HTTP_DNS_TTL,
+    PDF_TO_MD_POLL_MAX_INTERVAL,
+    PDF_TO_MD_POLL_ELAPSED_FRACTION,
+    PDF_TO_MD_POLL_SECONDS_PER_PAGE,
+    PDF_TO_MD_POLL_BATCH_SIZE,
+    PDF_TO_MD_POLL_CONCURRENCY,
+    PDF_TO_MD_DOWNLOAD_MAX_RETRIES,
+    PDF_TO_MD_DOWNLOAD_BUFFER_SIZE,
+    PDF_TO_MD_DOWNLOAD_READ_TIMEOUT,
+    PDF_TO_MD_EXTRACT_IMAGES,
+    PDF_TO_MD_BACKEND,
+    PDF_TO_MD_SHARD_THRESHOLD,
+    PDF_TO_MD_SHARD_PAGES,
+    PDF_TO_MD_JOB_LEDGER,
+)
+from src.data_initialization.utils.job_ledger import ConversionJobLedger, JobState
+from src.data_initialization.utils.mineru_stitch import page_ranges, stitch_shard_dirs
+from src.data_initialization.utils.mineru_zip import (
+    LAYOUT_JSON_NAME,
+    MineruArtifacts,
+    extract_members,
+    find_mineru_members,
+    locate_dir_artifacts,
+    locate_zip_artifacts,
+    referenced_image_members,
+)
+from src.data_initialization.utils.oss_upload import (
+    LocalOssBucket,
+    OssUploader,
+    OssUploadError,
 )
 
 # ---------------------- 类型与日志配置 ----------------------
@@ -53,6 +99,83 @@ def _win_long_path(path: Path) -> str:
     return "\\\\?\\" + s
 
 
+# PDF 页对象标记（排除 /Type /Pages 页树节点）
+_PDF_PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+
+
+def _estimate_pdf_page_count(pdf_path: Path) -> Optional[int]:
+    """通过扫描页对象标记粗略估算 PDF 页数（分块读取，不整体载入内存）。
+
+    页对象位于压缩对象流中时无法统计，返回 None。
+    """
+    overlap = 32
+    count = 0
+    tail = b""
+    try:
+        with pdf_path.open("rb") as f:
+            while True:
+                chunk = f.read(1024 * 1024)
+                if not chunk:
+                    count += len(_PDF_PAGE_PATTERN.findall(tail))
+                    break
+                buf = tail + chunk
+                limit = len(buf) - overlap
+                count += sum(1 for m in _PDF_PAGE_PATTERN.finditer(buf) if m.start() < limit)
+                tail = buf[limit:]
+    except OSError:
+        return None
+    return count or None
+
+
+def count_pdf_pages(pdf_path: PathLike) -> Optional[int]:
+    """PDF 页数：用 PyMuPDF 读取，打开失败时按文件内容估算。"""
+    try:
+        with pymupdf.open(str(pdf_path)) as doc:
+            return doc.page_count
+    except Exception as e:
+        logger.warning("PyMuPDF 读取页数失败，按文件内容估算：%s, 错误：%s", pdf_path, e)
+        return _estimate_pdf_page_count(Path(pdf_path))
+
+
+def _split_pdf_sync(
+    pdf_path: Path, ranges: List[Tuple[int, int]], output_dir: Path
+) -> List[Path]:
+    """按页段 [start, end) 拆分 PDF，已存在的分段文件直接复用。"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    shard_paths = [
+        output_dir / f"{pdf_path.stem}.p{start + 1:04d}-{end:04d}.pdf"
+        for start, end in ranges
+    ]
+    if all(p.is_file() for p in shard_paths):
+        return shard_paths
+
+    with pymupdf.open(str(pdf_path)) as src:
+        for (start, end), shard_path in zip(ranges, shard_paths):
+            if shard_path.is_file():
+                continue
+            tmp_path = shard_path.with_name(shard_path.name + ".tmp")
+            with pymupdf.open() as shard:
+                shard.insert_pdf(src, from_page=start, to_page=end - 1)
+                shard.save(str(tmp_path), garbage=3, deflate=True)
+            os.replace(tmp_path, shard_path)
+    return shard_paths
+
+
+def _write_dir_to_zip_sync(src_dir: Path, zip_path: Path) -> None:
+    """把目录打包为 zip（图片不再压缩），先写临时文件再替换。"""
+    tmp_path = zip_path.with_name(zip_path.name + ".tmp")
+    with zipfile.ZipFile(tmp_path, "w") as zf:
+        for path in sorted(src_dir.rglob("*")):
+            if not path.is_file():
+                continue
+            name = path.relative_to(src_dir).as_posix()
+            compress = (
+                zipfile.ZIP_STORED if name.startswith("images/") else zipfile.ZIP_DEFLATED
+            )
+            zf.write(path, name, compress_type=compress)
+    os.replace(tmp_path, zip_path)
+
+
 # ---------------------- 自定义异常 ----------------------
 
 
@@ -95,7 +218,8 @@ class ConvertResult:
 
     md_content: str
     md_path: Path
-    zip_path: Path
+    zip_path: Optional[Path]  # 本地 MinerU 后端无 zip，为 None
+    artifacts: Optional[MineruArtifacts] = None  # 解压后各产物的本地路径
 
 
 @dataclass
@@ -106,16 +230,476 @@ class PdfToMdResult:
     Attributes:
         md_content: Markdown文本内容
         md_path: Markdown文件路径
-        zip_path: MinerU生成的zip文件路径
+        zip_path: MinerU生成的zip文件路径（本地 MinerU 后端为 None）
         layout_json_path: layout.json文件路径（如果存在）
         work_dir: MinerU工作目录路径
+        artifacts: 转换时记录的各产物路径（full.md、content_list、layout.json 等）
     """
 
     md_content: str
     md_path: Path
-    zip_path: Path
+    zip_path: Optional[Path]
     layout_json_path: Optional[Path]
     work_dir: Path
+    artifacts: Optional[MineruArtifacts] = None
+
+
+# ---------------------- 分阶段并发调度 ----------------------
+
+
+class ConversionPhaseScheduler:
+    """
+    PDF 转换的分阶段并发预算。
+
+    单个 PDF 依次经过 upload（上传 OSS）、mineru（创建任务并等待解析完成）、
+    download（下载结果 zip 并解压）三个阶段，每个阶段有独立的并发上限，
+    进入下一阶段前释放上一阶段的名额：上传慢的 PDF 不会占住下载名额，
+    等待 MinerU 的 PDF 也不会阻塞后续 PDF 的上传。
+
+    Args:
+        upload: 同时上传的 PDF 数
+        mineru: 同时在 MinerU 中解析的任务数
+        download: 同时下载 / 解压的结果数
+    """
+
+    PHASES = ("upload", "mineru", "download")
+
+    def __init__(self, upload: int, mineru: int, download: int) -> None:
+        self.limits: Dict[str, int] = {
+            "upload": max(1, upload),
+            "mineru": max(1, mineru),
+            "download": max(1, download),
+        }
+        # 信号量按事件循环创建：同步包装每次 asyncio.run 都是新的循环，
+        # 在旧循环中发生过争用的信号量不能在新循环中使用
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.active: Dict[str, int] = {name: 0 for name in self.PHASES}
+        self.peak: Dict[str, int] = {name: 0 for name in self.PHASES}
+        self.busy_seconds: Dict[str, float] = {name: 0.0 for name in self.PHASES}
+
+    def _get_semaphores(self) -> Dict[str, asyncio.Semaphore]:
+        """当前事件循环的各阶段信号量（循环变化时重建）。"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphores = {
+                name: asyncio.Semaphore(limit) for name, limit in self.limits.items()
+            }
+            self._loop = loop
+        return self._semaphores
+
+    @asynccontextmanager
+    async def phase(self, name: str) -> AsyncIterator[None]:
+        """占用指定阶段的一个名额。"""
+        async with self._get_semaphores()[name]:
+            self.active[name] += 1
+            self.peak[name] = max(self.peak[name], self.active[name])
+            started = time.monotonic()
+            try:
+                yield
+            finally:
+                self.active[name] -= 1
+                self.busy_seconds[name] += time.monotonic() - started
+
+    def summary(self) -> str:
+        """各阶段的并发上限、峰值与累计占用时间。"""
+        return ", ".join(
+            f"{name}={self.peak[name]}/{self.limits[name]}"
+            f"({self.busy_seconds[name]:.1f}s)"
+            for name in self.PHASES
+        )
+
+
+# ---------------------- MinerU 任务状态集中轮询 ----------------------
+
+
+@dataclass
+class _PolledTask:
+    """轮询中的 MinerU 任务。"""
+
+    task_id: str
+    future: asyncio.Future
+    started: float
+    deadline: float
+    timeout: float
+    min_interval: float
+    page_count: Optional[int] = None
+    next_poll: float = 0.0
+    last_delay: float = 0.0
+    polls: int = 0
+    query_errors: int = 0
+    state: str = ""
+    extracted_pages: Optional[int] = None
+    total_pages: Optional[int] = None
+    running_since: Optional[float] = None
+
+
+class MineruTaskPoller:
+    """
+    MinerU 任务状态集中轮询器。
+
+    所有在途任务登记到同一个轮询器，由一个后台协程统一调度：
+
+    1. 自适应间隔：间隔随已耗时增长（elapsed_fraction × 已耗时，限制在 [min, max] 内）；
+       按页数估算的预计耗时未到之前降低查询频率；任务返回 extract_progress 时
+       按已解析页数推算剩余时间；
+    2. 批量查询：配置了批量状态接口时每个周期一次请求查询一批任务（已过半个等待间隔的
+       任务提前合并进同一批，周期不短于最小间隔），接口不可用时自动退回逐个查询
+       （并发受 concurrency 限制）；
+    3. 偶发查询失败不会立即判定任务失败，连续失败 max_query_errors 次才放弃。
+
+    轮询器绑定创建它的事件循环，没有在途任务时后台协程自动退出。
+    """
+
+    def __init__(
+        self,
+        converter: "MineruPdfConverter",
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        elapsed_fraction: Optional[float] = None,
+        seconds_per_page: Optional[float] = None,
+        batch_status_url: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        max_query_errors: int = 3,
+    ) -> None:
+        self.converter = converter
+        self.min_interval = float(min_interval or PDF_TO_MD_TASK_INTERVAL or 3)
+        self.max_interval = max(
+            self.min_interval, float(max_interval or PDF_TO_MD_POLL_MAX_INTERVAL or 30.0)
+        )
+        self.elapsed_fraction = (
+            elapsed_fraction
+            if elapsed_fraction is not None
+            else (PDF_TO_MD_POLL_ELAPSED_FRACTION or 0.2)
+        )
+        self.seconds_per_page = (
+            seconds_per_page
+            if seconds_per_page is not None
+            else (PDF_TO_MD_POLL_SECONDS_PER_PAGE or 0.0)
+        )
+        self.batch_status_url = (
+            batch_status_url if batch_status_url is not None else MINERU_BATCH_STATUS_URL
+        ) or ""
+        self.batch_size = batch_size or PDF_TO_MD_POLL_BATCH_SIZE or 100
+        self.concurrency = concurrency or PDF_TO_MD_POLL_CONCURRENCY or 10
+        self.max_query_errors = max_query_errors
+
+        self.loop = asyncio.get_running_loop()
+        self._tasks: Dict[str, _PolledTask] = {}
+        self._wakeup = asyncio.Event()
+        self._runner: Optional[asyncio.Task] = None
+
+        # 统计：状态查询 HTTP 请求数
+        self.request_count = 0
+
+    # ---------------------- 对外接口 ----------------------
+
+    async def wait(
+        self,
+        task_id: str,
+        timeout: float,
+        min_interval: Optional[float] = None,
+        page_count: Optional[int] = None,
+    ) -> str:
+        """登记任务并等待完成，返回 full_zip_url。
+
+        Args:
+            task_id: MinerU 任务 id
+            timeout: 最长等待时间（秒）
+            min_interval: 该任务的最小轮询间隔，默认取轮询器配置
+            page_count: PDF 页数（可选，用于估算解析耗时）
+
+        Returns:
+            full_zip_url
+        """
+        now = time.monotonic()
+        task = _PolledTask(
+            task_id=task_id,
+            future=self.loop.create_future(),
+            started=now,
+            deadline=now + timeout,
+            timeout=timeout,
+            min_interval=float(min_interval or self.min_interval),
+            page_count=page_count,
+        )
+        self._set_next_poll(task, now)
+        self._tasks[task_id] = task
+        self._wakeup.set()
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run())
+
+        logger.info("开始轮询 MinerU 任务状态，task_id=%s, pages=%s", task_id, page_count)
+        try:
+            return await task.future
+        finally:
+            self._tasks.pop(task_id, None)
+
+    # ---------------------- 轮询调度 ----------------------
+
+    def _next_delay(self, task: _PolledTask, now: float) -> float:
+        """计算下次查询前的等待时间。"""
+        elapsed = now - task.started
+        delay = max(task.min_interval, elapsed * self.elapsed_fraction)
+
+        if (
+            task.running_since is not None
+            and task.total_pages
+            and task.extracted_pages
+            and task.extracted_pages < task.total_pages
+        ):
+            # 按实际解析速度推算剩余时间，预计完成前查询一次
+            per_page = (now - task.running_since) / task.extracted_pages
+            remaining = (task.total_pages - task.extracted_pages) * per_page
+            delay = max(task.min_interval, min(delay, remaining))
+        elif task.page_count and self.seconds_per_page:
+            # 预计耗时的前半段降低查询频率
+            expected = task.page_count * self.seconds_per_page
+            if elapsed < expected:
+                delay = max(delay, (expected - elapsed) / 2)
+
+        delay = min(delay, self.max_interval, max(0.0, task.deadline - now))
+        return max(0.0, delay * random.uniform(0.9, 1.1))
+
+    async def _run(self) -> None:
+        """后台轮询循环：查询到期任务，睡眠到最早的下次查询时间或有新任务登记。"""
+        last_batch_at = float("-inf")
+        while self._tasks:
+            now = time.monotonic()
+            due = self._due_tasks(now)
+            if due and self.batch_status_url:
+                # 批量查询周期不短于最小间隔
+                wait = last_batch_at + self.min_interval - now
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+                last_batch_at = now
+            if due:
+                try:
+                    await self._poll(due)
+                except Exception as e:
+                    # 兜底：本轮查询整体失败时按查询失败处理
+                    logger.exception("MinerU 任务状态轮询异常")
+                    for task in due:
+                        self._on_query_error(task, e, time.monotonic())
+
+            pending = [t for t in self._tasks.values() if not t.future.done()]
+            if not pending:
+                await asyncio.sleep(0)
+                continue
+            next_at = min(t.next_poll for t in pending)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=max(0.0, next_at - time.monotonic())
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, due: List[_PolledTask]) -> None:
+        """查询一批到期任务的状态。"""
+        async with self.converter.http_session() as session:
+            if self.batch_status_url:
+                for i in range(0, len(due), self.batch_size):
+                    chunk = due[i : i + self.batch_size]
+                    try:
+                        results = await self._query_batch(session, chunk)
+                    except MineruApiError as e:
+                        logger.warning(
+                            "批量状态接口不可用，改为逐个查询任务状态：%s", str(e)
+                        )
+                        self.batch_status_url = ""
+                        await self._poll_individually(session, due[i:])
+                        return
+                    now = time.monotonic()
+                    for task in chunk:
+                        data = results.get(task.task_id)
+                        if data is None:
+                            self._on_query_error(
+                                task, MineruApiError("批量状态响应中缺少该任务"), now
+                            )
+                        else:
+                            self._apply_status(task, data, now)
+            else:
+                await self._poll_individually(session, due)
+
+    async def _poll_individually(
+        self, session: aiohttp.ClientSession, due: List[_PolledTask]
+    ) -> None:
+        """逐个查询任务状态（并发受 concurrency 限制）。"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def query(task: _PolledTask) -> None:
+            async with semaphore:
+                try:
+                    data = await self._query_single(session, task.task_id)
+                except Exception as e:
+                    self._on_query_error(task, e, time.monotonic())
+                    return
+                self._apply_status(task, data, time.monotonic())
+
+        await asyncio.gather(*(query(task) for task in due))
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.converter.mineru_api_key}",
+        }
+
+    async def _query_single(
+        self, session: aiohttp.ClientSession, task_id: str
+    ) -> Dict[str, Any]:
+        """查询单个任务状态，返回响应中的 data。"""
+        url = f"{self.converter.mineru_api_url}/{task_id}"
+        self.request_count += 1
+        async with session.get(
+            url, headers=self._headers(), timeout=aiohttp.ClientTimeout(total=30)
+        ) as response:
+            response.raise_for_status()
+            j = await response.json()
+        if j.get("code") != 0:
+            raise MineruApiError(f"query task failed for task_id={task_id}: {j}")
+        return j.get("data") or {}
+
+    async def _query_batch(
+        self, session: aiohttp.ClientSession, tasks: List[_PolledTask]
+    ) -> Dict[str, Dict[str, Any]]:
+        """通过批量状态接口查询一批任务，返回 {task_id: data}。"""
+        self.request_count += 1
+        try:
+            async with session.post(
+                self.batch_status_url,
+                headers=self._headers(),
+                json={"task_ids": [t.task_id for t in tasks]},
+                timeout=aiohttp.ClientTimeout(total=30),
+            ) as response:
+                response.raise_for_status()
+                j = await response.json()
+        except Exception as e:
+            raise MineruApiError(f"批量查询任务状态失败: {e}") from e
+        if j.get("code") != 0:
+            raise MineruApiError(f"批量查询任务状态失败: {j}")
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for item in (j.get("data") or {}).get("extract_result") or []:
+            if isinstance(item, dict) and item.get("task_id"):
+                results[item["task_id"]] = item
+        return results
+
+    # ---------------------- 状态处理 ----------------------
+
+    def _apply_status(self, task: _PolledTask, data: Dict[str, Any], now: float) -> None:
+        """根据查询结果完成任务或安排下次查询。"""
+        if task.future.done():
+            return
+        task.polls += 1
+        task.query_errors = 0
+        state = data.get("state")
+        task.state = state or ""
+        logger.debug("MinerU 任务状态，task_id=%s, state=%s", task.task_id, state)
+
+        if state == "done":
+            full_zip_url = data.get("full_zip_url")
+            if not full_zip_url:
+                logger.error(
+                    "state=done 但 data 中无 full_zip_url，task_id=%s, data=%s",
+                    task.task_id,
+                    data,
+                )
+                task.future.set_exception(
+                    MineruApiError(
+                        f"state=done but no full_zip_url in data for task_id={task.task_id}: {data}"
+                    )
+                )
+                return
+            logger.info(
+                "MinerU 任务完成，task_id=%s, zip_url=%s, 耗时=%.1fs, 查询次数=%d",
+                task.task_id,
+                full_zip_url,
+                now - task.started,
+                task.polls,
+            )
+            task.future.set_result(full_zip_url)
+            return
+
+        if state in ("failed", "error"):
+            err_msg = data.get("err_msg", "")
+            logger.error(
+                "MinerU 任务失败，task_id=%s, state=%s, err_msg=%s",
+                task.task_id,
+                state,
+                err_msg,
+            )
+            task.future.set_exception(
+                MineruApiError(
+                    f"task failed: task_id={task.task_id}, state={state}, err_msg={err_msg}"
+                )
+            )
+            return
+
+        progress = data.get("extract_progress") or {}
+        if state == "running" and task.running_since is None:
+            task.running_since = now
+        if isinstance(progress, dict):
+            task.extracted_pages = progress.get("extracted_pages") or task.extracted_pages
+            task.total_pages = progress.get("total_pages") or task.total_pages
+
+        self._schedule_next(task, now)
+
+    def _on_query_error(self, task: _PolledTask, error: Exception, now: float) -> None:
+        """单次查询失败：连续失败超过上限时判定任务失败，否则按间隔重试。"""
+        if task.future.done():
+            return
+        task.query_errors += 1
+        if task.query_errors >= self.max_query_errors:
+            logger.error(
+                "查询 MinerU 任务状态连续失败 %d 次，task_id=%s: %s",
+                task.query_errors,
+                task.task_id,
+                error,
+            )
+            task.future.set_exception(
+                MineruApiError(f"query task failed for task_id={task.task_id}: {error}")
+            )
+            return
+        logger.warning(
+            "查询 MinerU 任务状态失败（第 %d 次），task_id=%s: %s",
+            task.query_errors,
+            task.task_id,
+            error,
+        )
+        self._schedule_next(task, now)
+
+    def _schedule_next(self, task: _PolledTask, now: float) -> None:
+        if now >= task.deadline:
+            logger.error(
+                "等待 MinerU 任务超时，task_id=%s, last_state=%s", task.task_id, task.state
+            )
+            task.future.set_exception(
+                MineruPdfConverterError(
+                    f"wait task timeout for task_id={task.task_id}, last state={task.state}"
+                )
+            )
+            return
+        self._set_next_poll(task, now)
+
+    def _set_next_poll(self, task: _PolledTask, now: float) -> None:
+        task.last_delay = self._next_delay(task, now)
+        task.next_poll = now + task.last_delay
+
+    def _due_tasks(self, now: float) -> List[_PolledTask]:
+        """本轮需要查询的任务；批量模式下已过半个等待间隔的任务提前合并查询。"""
+        if self.batch_status_url:
+            if not any(t.next_poll <= now for t in self._tasks.values()):
+                return []
+            return [
+                t
+                for t in self._tasks.values()
+                if not t.future.done() and t.next_poll - t.last_delay / 2 <= now
+            ]
+        return [
+            t for t in self._tasks.values() if t.next_poll <= now and not t.future.done()
+        ]
 
 
 # ---------------------- MinerU PDF 转换器（原 preprocessing 逻辑） ----------------------
@@ -127,6 +711,13 @@ class MineruPdfConverter:
 
     功能：上传 PDF 到 OSS、调用 MinerU API、下载 zip、解压得到 full.md，
     支持单文件/批量、同步/异步。供 PdfToMdConverter 复用。
+
+    MinerU API 的创建任务、轮询与下载共用一个带连接池的 aiohttp 会话（见 http_session），
+    批量转换时整批只建立一次，连接在各 PDF 之间复用：
+
+        async with converter.http_session():
+            await converter.async_pdf_to_md_mineru_api(...)
+            await converter.async_pdf_to_md_mineru_api(...)
     """
 
     def __init__(
@@ -139,14 +730,22 @@ class MineruPdfConverter:
         mineru_api_key: str,
         session: Optional[requests.Session] = None,
         max_concurrent_tasks: Optional[int] = None,
+        bucket: Optional[Any] = None,
+        upload_concurrency: Optional[int] = None,
+        download_concurrency: Optional[int] = None,
+        ledger: Optional[ConversionJobLedger] = None,
     ) -> None:
         self.access_key_id = access_key_id
         self.access_key_secret = access_key_secret
         self.endpoint = endpoint
         self.bucket_name = bucket_name
 
-        auth = oss2.Auth(self.access_key_id, self.access_key_secret)
-        self.bucket = oss2.Bucket(auth, self.endpoint, self.bucket_name)
+        # bucket 可传入 LocalOssBucket 等替身，未传入时连接真实 OSS
+        if bucket is None:
+            auth = oss2.Auth(self.access_key_id, self.access_key_secret)
+            bucket = oss2.Bucket(auth, self.endpoint, self.bucket_name)
+        self.bucket = bucket
+        self.uploader = OssUploader(self.bucket)
 
         self.mineru_api_url = mineru_api_url.rstrip("/")
         self.mineru_api_key = mineru_api_key
@@ -159,26 +758,103 @@ class MineruPdfConverter:
             if max_concurrent_tasks is not None
             else (PDF_TO_MD_MAX_CONCURRENT_TASKS or 5)
         )
-        self.semaphore = asyncio.Semaphore(self.max_concurrent_tasks)
+        # 分阶段并发预算：上传 / MinerU 在途任务 / 下载解压
+        self.phases = ConversionPhaseScheduler(
+            upload=upload_concurrency or PDF_TO_MD_UPLOAD_CONCURRENCY or 4,
+            mineru=self.max_concurrent_tasks,
+            download=download_concurrency or PDF_TO_MD_DOWNLOAD_CONCURRENCY or 4,
+        )
+
+        # 共享 aiohttp 会话（按事件循环创建，引用计数归零时关闭）
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self._http_session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._http_session_users = 0
+
+        # MinerU 任务状态集中轮询器（按事件循环懒创建）
+        self._task_poller: Optional[MineruTaskPoller] = None
+
+        # 转换任务台账（SQLite）：重启后继续已创建的 MinerU 任务
+        if ledger is None and PDF_TO_MD_JOB_LEDGER:
+            try:
+                ledger = ConversionJobLedger()
+            except sqlite3.Error as e:
+                logger.warning("打开转换任务台账失败，本次不记录任务进度：%s", e)
+        self.ledger = ledger
+
+    def _create_http_session(self) -> aiohttp.ClientSession:
+        """创建带连接池的 aiohttp 会话（总连接数 / 单主机连接数上限、keep-alive、DNS 缓存）。"""
+        connector = aiohttp.TCPConnector(
+            limit=PDF_TO_MD_HTTP_POOL_LIMIT or 100,
+            limit_per_host=PDF_TO_MD_HTTP_POOL_LIMIT_PER_HOST or 20,
+            keepalive_timeout=PDF_TO_MD_HTTP_KEEPALIVE_TIMEOUT or 30.0,
+            ttl_dns_cache=PDF_TO_MD_HTTP_DNS_TTL or 300,
+            enable_cleanup_closed=True,
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    @asynccontextmanager
+    async def http_session(self) -> AsyncIterator[aiohttp.ClientSession]:
+        """获取共享的 aiohttp 会话。
+
+        首个进入者创建会话，嵌套或并发进入时复用同一会话，最后一个退出者关闭会话；
+        因此批量方法在外层进入一次即可让整批转换共享连接池。
+        """
+        loop = asyncio.get_running_loop()
+        session = self._http_session
+        if session is None or session.closed or self._http_session_loop is not loop:
+            if session is not None and not session.closed:
+                # 上一个事件循环遗留的会话无法在当前循环中关闭，只能丢弃
+                logger.warning("丢弃其他事件循环创建的 MinerU HTTP 会话")
+            session = self._create_http_session()
+            self._http_session = session
+            self._http_session_loop = loop
+            self._http_session_users = 0
+            logger.debug("创建 MinerU HTTP 会话（连接池）")
+
+        self._http_session_users += 1
+        try:
+            yield session
+        finally:
+            self._http_session_users -= 1
+            if self._http_session_users == 0 and self._http_session is session:
+                self._http_session = None
+                self._http_session_loop = None
+                await session.close()
+                logger.debug("关闭 MinerU HTTP 会话（连接池）")
+
+    def _object_url(self, object_key: str) -> str:
+        """OSS 对象的公网 URL。"""
+        if isinstance(self.bucket, LocalOssBucket):
+            return self.bucket.object_url(object_key)
+        endpoint_host = self.endpoint.split("://", 1)[1]
+        encoded_key = quote(object_key)
+        return f"https://{self.bucket_name}.{endpoint_host}/{encoded_key}"
 
     def _upload_pdf_and_get_url_sync(self, local_path: PathLike) -> str:
-        """同步上传本地 PDF 到 OSS，返回公网可访问的 URL。"""
+        """同步上传本地 PDF 到 OSS，返回公网可访问的 URL。
+
+        对象键包含内容哈希，相同内容的 PDF 只上传一次；大文件并行分片上传并支持断点续传。
+        """
         p = Path(local_path).resolve()
         if not p.is_file():
             raise FileNotFoundError(f"PDF not found: {p}")
 
-        object_key = f"mineru_pdfs/{p.name}"
-        logger.info("开始上传 PDF 到 OSS：%s -> %s", p, object_key)
-
+        logger.info("开始上传 PDF 到 OSS：%s", p)
         try:
-            self.bucket.put_object_from_file(object_key, str(p))
-        except Exception as e:
+            result = self.uploader.upload_file(p, key_prefix="mineru_pdfs")
+        except OssUploadError as e:
             logger.exception("上传到 OSS 失败：%s", p)
             raise MineruPdfConverterError(f"上传 PDF 到 OSS 失败: {p}") from e
 
-        endpoint_host = self.endpoint.split("://", 1)[1]
-        encoded_key = quote(object_key)
-        url = f"https://{self.bucket_name}.{endpoint_host}/{encoded_key}"
+        if not result.skipped:
+            logger.info(
+                "PDF 上传完成：%s -> %s（%d 字节%s）",
+                p.name,
+                result.key,
+                result.size,
+                f"，{result.parts} 个分片" if result.parts else "",
+            )
+        url = self._object_url(result.key)
         logger.debug("OSS 文件 URL: %s", url)
         return url
 
@@ -190,8 +866,14 @@ class MineruPdfConverter:
         self,
         zip_path: PathLike,
         extract_dir: PathLike,
-    ) -> str:
-        """同步解压 zip，找到 full.md，返回其内容。Windows 下使用长路径前缀避免超过 260 字符。"""
+    ) -> Tuple[str, MineruArtifacts]:
+        """同步按需解压 zip，返回 full.md 内容与各产物的本地路径。Windows 下使用长路径前缀避免超过 260 字符。
+
+        根据 zip 中央目录定位 full.md 与各 JSON 产物，只解压后续阶段需要的文件：
+        full.md、JSON 产物，以及按 PDF_TO_MD_EXTRACT_IMAGES 选择的图片（默认仅
+        content_list 引用的图片）；已存在且大小一致的文件不重复写出。
+        产物路径直接由 zip 成员名得到，无需在解压目录中查找。
+        """
         zip_path = Path(zip_path)
         extract_dir = Path(extract_dir)
         extract_dir_io = _win_long_path(extract_dir)
@@ -200,40 +882,45 @@ class MineruPdfConverter:
         logger.info("解压 zip 文件：%s -> %s", zip_path, extract_dir)
         try:
             with zipfile.ZipFile(zip_path, "r") as zf:
-                zf.extractall(extract_dir_io)
-        except Exception as e:
-            logger.exception("解压 zip 文件失败：%s", zip_path)
-            raise MineruPdfConverterError(f"解压 zip 文件失败: {zip_path}") from e
+                members = find_mineru_members(zf.namelist())
+                if members.full_md is None:
+                    logger.error(
+                        "full.md 未在 zip 中找到，zip=%s, extract_dir=%s",
+                        zip_path,
+                        extract_dir,
+                    )
+                    raise FileNotFoundError("full.md not found in zip")
 
-        full_md_path: Optional[Path] = None
-        for root, _, files in os.walk(extract_dir_io):
-            if "full.md" in files:
-                full_md_path = Path(root) / "full.md"
-                break
+                to_extract = [members.full_md] + members.json_members
+                if PDF_TO_MD_EXTRACT_IMAGES == "all":
+                    to_extract = [n for n in zf.namelist() if not n.endswith("/")]
+                elif PDF_TO_MD_EXTRACT_IMAGES == "referenced":
+                    to_extract += referenced_image_members(zf, members)
 
-        if full_md_path is None or not full_md_path.is_file():
-            logger.error(
-                "full.md 未在解压目录中找到，zip=%s, extract_dir=%s",
-                zip_path,
-                extract_dir,
-            )
-            raise FileNotFoundError("full.md not found in extracted zip")
-
-        try:
-            content = full_md_path.read_text(encoding="utf-8")
+                written = extract_members(
+                    zf, to_extract, extract_dir, long_path=_win_long_path
+                )
+                content = zf.read(members.full_md).decode("utf-8")
+        except FileNotFoundError:
+            raise
         except Exception as e:
-            logger.exception("读取 full.md 失败：%s", full_md_path)
-            raise MineruPdfConverterError(f"读取 full.md 失败: {full_md_path}") from e
+            logger.exception("解压 zip 文件失败：%s", zip_path)
+            raise MineruPdfConverterError(f"解压 zip 文件失败: {zip_path}") from e
 
-        logger.debug("full.md 读取成功，长度=%d", len(content))
-        return content
+        logger.debug(
+            "zip 解压完成：成员 %d 个，写出 %d 个，full.md 长度=%d",
+            len(to_extract),
+            len(written),
+            len(content),
+        )
+        return content, MineruArtifacts.from_members(members, extract_dir)
 
     async def _async_extract_full_md_from_zip(
         self,
         zip_path: PathLike,
         extract_dir: PathLike,
-    ) -> str:
-        """异步解压 zip，找到 full.md，返回其内容。"""
+    ) -> Tuple[str, MineruArtifacts]:
+        """异步解压 zip，返回 full.md 内容与各产物的本地路径。"""
         return await asyncio.to_thread(
             self._extract_full_md_from_zip_sync, zip_path, extract_dir
         )
@@ -416,102 +1103,215 @@ class MineruPdfConverter:
         logger.info("MinerU 任务创建成功，task_id=%s", task_id)
         return task_id
 
+    def _get_task_poller(self) -> MineruTaskPoller:
+        """获取当前事件循环的任务状态轮询器（按事件循环懒创建）。"""
+        loop = asyncio.get_running_loop()
+        if self._task_poller is None or self._task_poller.loop is not loop:
+            self._task_poller = MineruTaskPoller(self)
+        return self._task_poller
+
     async def _async_wait_mineru_done_and_get_zip_url(
         self,
         task_id: str,
-        session: aiohttp.ClientSession,
+        session: Optional[aiohttp.ClientSession] = None,
         timeout: int = PDF_TO_MD_TASK_TIMEOUT or 600,
         interval: int = PDF_TO_MD_TASK_INTERVAL or 3,
+        page_count: Optional[int] = None,
     ) -> str:
-        """异步轮询 MinerU 任务状态，直到 state == 'done'，返回 full_zip_url。"""
-        url = f"{self.mineru_api_url}/{task_id}"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.mineru_api_key}",
-        }
-
-        logger.info("开始轮询 MinerU 任务状态，task_id=%s", task_id)
-        start = time.time()
-
-        while True:
-            try:
-                async with session.get(
-                    url, headers=headers, timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    response.raise_for_status()
-                    j = await response.json()
-            except Exception as e:
-                logger.exception("查询 MinerU 任务状态失败，task_id=%s", task_id)
-                raise MineruApiError(f"query task failed for task_id={task_id}") from e
-
-            if j.get("code") != 0:
-                logger.error("MinerU 任务状态查询失败，task_id=%s, 响应=%s", task_id, j)
-                raise MineruPdfConverterError(f"query task failed for task_id={task_id}: {j}")
-
-            data = j.get("data") or {}
-            state = data.get("state")
-            err_msg = data.get("err_msg", "")
-
-            logger.debug("MinerU 任务状态，task_id=%s, state=%s", task_id, state)
+        """等待 MinerU 任务完成（state == 'done'），返回 full_zip_url。
+
+        任务登记到集中轮询器（MineruTaskPoller），由其按自适应间隔统一查询；
+        interval 为该任务的最小轮询间隔。session 参数保留兼容，查询使用共享会话。
+        """
+        return await self._get_task_poller().wait(
+            task_id,
+            timeout=timeout,
+            min_interval=interval,
+            page_count=page_count,
+        )
 
-            if state == "done":
-                full_zip_url = data.get("full_zip_url")
-                if not full_zip_url:
-                    logger.error(
-                        "state=done 但 data 中无 full_zip_url，task_id=%s, data=%s",
-                        task_id,
-                        data,
-                    )
-                    raise MineruApiError(
-                        f"state=done but no full_zip_url in data for task_id={task_id}: {data}"
-                    )
-                logger.info(
-                    "MinerU 任务完成，task_id=%s, zip_url=%s", task_id, full_zip_url
-                )
-                return full_zip_url
+    @staticmethod
+    def _download_state_path(part_path: Path) -> Path:
+        """断点续传状态文件（记录 ETag 与总大小），与 .part 文件同目录。"""
+        return part_path.with_name(part_path.name + ".json")
 
-            if state in ("failed", "error"):
-                logger.error(
-                    "MinerU 任务失败，task_id=%s, state=%s, err_msg=%s",
-                    task_id,
-                    state,
-                    err_msg,
-                )
-                raise MineruApiError(
-                    f"task failed: task_id={task_id}, state={state}, err_msg={err_msg}"
-                )
+    @staticmethod
+    def _load_download_state(part_path: Path) -> Dict[str, Any]:
+        """读取断点续传状态；.part 或状态文件缺失时返回空字典。"""
+        state_path = MineruPdfConverter._download_state_path(part_path)
+        if not part_path.exists() or not state_path.exists():
+            return {}
+        try:
+            return json.loads(state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
 
-            if time.time() - start > timeout:
-                logger.error(
-                    "等待 MinerU 任务超时，task_id=%s, last_state=%s", task_id, state
-                )
+    @staticmethod
+    def _verify_download_sync(
+        part_path: Path,
+        expected_size: Optional[int],
+        expected_md5: Optional[str],
+        require_zip: bool,
+    ) -> None:
+        """校验下载结果：大小、MD5（服务端提供时）、zip 结构完整性。"""
+        size = part_path.stat().st_size
+        if expected_size is not None and size != expected_size:
+            raise MineruPdfConverterError(
+                f"下载文件大小不一致: {size} != {expected_size}"
+            )
+        if expected_md5:
+            digest = hashlib.md5()
+            with part_path.open("rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            if digest.hexdigest() != expected_md5:
                 raise MineruPdfConverterError(
-                    f"wait task timeout for task_id={task_id}, last state={state}"
+                    f"下载文件 MD5 校验失败: {digest.hexdigest()} != {expected_md5}"
                 )
+        if require_zip and not zipfile.is_zipfile(part_path):
+            raise MineruPdfConverterError("下载文件不是有效的 zip")
 
-            await asyncio.sleep(interval)
+    @staticmethod
+    def _expected_md5(response: aiohttp.ClientResponse) -> Optional[str]:
+        """从响应头取整体内容的 MD5：Content-MD5（仅完整响应），或非分片上传对象的 ETag。"""
+        content_md5 = response.headers.get("Content-MD5")
+        if content_md5 and response.status == 200:
+            try:
+                return base64.b64decode(content_md5).hex()
+            except ValueError:
+                pass
+        etag = response.headers.get("ETag") or ""
+        if etag.startswith("W/"):
+            return None
+        etag = etag.strip('"').lower()
+        if re.fullmatch(r"[0-9a-f]{32}", etag):
+            return etag
+        return None
 
     async def _async_download_file(
         self, url: str, save_path: PathLike, session: aiohttp.ClientSession
     ) -> None:
-        """异步下载远程文件到本地。"""
+        """流式下载远程文件到本地，支持断点续传。
+
+        数据按块写入同目录的 .part 临时文件（内存占用与文件大小无关）；中断后重试或
+        重新运行时以 Range 请求从已下载位置继续（ETag 变化时从头下载）。下载完成后
+        校验大小、MD5（服务端提供时）与 zip 结构，通过后原子重命名为目标文件。
+        """
         save_path = Path(save_path)
+        part_path = save_path.with_name(save_path.name + ".part")
+        state_path = self._download_state_path(part_path)
         await asyncio.to_thread(save_path.parent.mkdir, parents=True, exist_ok=True)
 
+        max_retries = PDF_TO_MD_DOWNLOAD_MAX_RETRIES or 0
+        buffer_size = PDF_TO_MD_DOWNLOAD_BUFFER_SIZE or 1024 * 1024
+        timeout = aiohttp.ClientTimeout(
+            total=None,
+            sock_connect=30,
+            sock_read=PDF_TO_MD_DOWNLOAD_READ_TIMEOUT or 60,
+        )
+        require_zip = save_path.suffix.lower() == ".zip"
+
         logger.info("开始下载文件：%s -> %s", url, save_path)
-        try:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=60)) as r:
-                r.raise_for_status()
-                chunks = []
-                async for chunk in r.content.iter_chunked(8192):
-                    if chunk:
-                        chunks.append(chunk)
+        for attempt in range(max_retries + 1):
+            state = await asyncio.to_thread(self._load_download_state, part_path)
+            offset = (
+                await asyncio.to_thread(lambda: part_path.stat().st_size)
+                if state
+                else 0
+            )
+            headers: Dict[str, str] = {}
+            if offset > 0:
+                headers["Range"] = f"bytes={offset}-"
+                if state.get("etag"):
+                    headers["If-Range"] = state["etag"]
+
+            try:
+                async with session.get(url, headers=headers, timeout=timeout) as r:
+                    if r.status == 416 and offset > 0:
+                        # 已下载部分与服务端不一致（或已完整），从头开始
+                        raise MineruPdfConverterError("Range 请求无法满足")
+                    r.raise_for_status()
+
+                    if r.status == 206:
+                        start, expected_size = self._parse_content_range(r)
+                        if start != offset:
+                            raise MineruPdfConverterError(
+                                f"Content-Range 起始位置与断点不一致: {start} != {offset}"
+                            )
+                        logger.info("断点续传：%s，从 %d 字节继续", save_path.name, offset)
+                        mode = "ab"
+                    else:
+                        offset = 0
+                        expected_size = r.content_length
+                        mode = "wb"
+                    etag = r.headers.get("ETag")
+                    expected_md5 = self._expected_md5(r)
+                    await asyncio.to_thread(
+                        state_path.write_text,
+                        json.dumps({"url": url, "etag": etag, "size": expected_size}),
+                        encoding="utf-8",
+                    )
+
+                    f = await asyncio.to_thread(part_path.open, mode)
+                    buffer = bytearray()
+                    try:
+                        async for chunk in r.content.iter_chunked(64 * 1024):
+                            buffer += chunk
+                            if len(buffer) >= buffer_size:
+                                await asyncio.to_thread(f.write, bytes(buffer))
+                                buffer.clear()
+                    finally:
+                        # 中断时也把已收到的数据写入 .part，断点续传不丢失缓冲区中的字节
+                        try:
+                            if buffer:
+                                await asyncio.to_thread(f.write, bytes(buffer))
+                        finally:
+                            await asyncio.to_thread(f.close)
+
                 await asyncio.to_thread(
-                    lambda: save_path.write_bytes(b"".join(chunks))
+                    self._verify_download_sync,
+                    part_path,
+                    expected_size,
+                    expected_md5,
+                    require_zip,
                 )
-        except Exception as e:
-            logger.exception("下载文件失败：%s", url)
-            raise MineruPdfConverterError(f"下载文件失败: {url}") from e
+                await asyncio.to_thread(os.replace, part_path, save_path)
+                await asyncio.to_thread(state_path.unlink, missing_ok=True)
+                logger.info("下载完成：%s", save_path)
+                return
+
+            except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                # 连接中断：保留 .part，下次从断点继续
+                if attempt >= max_retries:
+                    logger.exception("下载文件失败：%s", url)
+                    raise MineruPdfConverterError(f"下载文件失败: {url}") from e
+                logger.warning(
+                    "下载中断（第 %d 次），将断点续传：%s, 错误：%r", attempt + 1, url, e
+                )
+            except Exception as e:
+                # 校验失败、Range 不可用或 HTTP 错误：丢弃 .part 从头下载
+                await asyncio.to_thread(part_path.unlink, missing_ok=True)
+                await asyncio.to_thread(state_path.unlink, missing_ok=True)
+                if attempt >= max_retries:
+                    logger.exception("下载文件失败：%s", url)
+                    raise MineruPdfConverterError(f"下载文件失败: {url}") from e
+                logger.warning(
+                    "下载失败（第 %d 次），将重新下载：%s, 错误：%r", attempt + 1, url, e
+                )
+            await asyncio.sleep(min(2 ** attempt, 30))
+
+    @staticmethod
+    def _parse_content_range(
+        response: aiohttp.ClientResponse,
+    ) -> Tuple[Optional[int], Optional[int]]:
+        """从 Content-Range（bytes start-end/total）解析起始位置与文件总大小。"""
+        match = re.match(
+            r"bytes\s+(\d+)-\d+/(\d+|\*)", response.headers.get("Content-Range", "")
+        )
+        if not match:
+            return None, None
+        total = match.group(2)
+        return int(match.group(1)), (int(total) if total != "*" else None)
 
     async def async_pdf_to_md_mineru_api(
         self,
@@ -542,6 +1342,7 @@ class MineruPdfConverter:
         md_path = md_output_dir / f"{base_name}.md"
         zip_path = zip_output_dir / f"{base_name}.zip"
 
+        extract_dir = work_dir / base_name
         md_exists = await asyncio.to_thread(md_path.exists)
         md_is_file = await asyncio.to_thread(md_path.is_file) if md_exists else False
 
@@ -559,6 +1360,9 @@ class MineruPdfConverter:
                     md_content=md_content,
                     md_path=md_path,
                     zip_path=zip_path,
+                    artifacts=await self._async_locate_artifacts(
+                        pdf_path_obj, zip_path, extract_dir
+                    ),
                 )
             except Exception as e:
                 logger.warning(
@@ -567,33 +1371,47 @@ class MineruPdfConverter:
                     str(e),
                 )
 
-        async with aiohttp.ClientSession() as session:
-            file_url = await self._async_upload_pdf_and_get_url(pdf_path_obj)
-            task_id = await self._async_create_mineru_task(file_url, session)
-            full_zip_url = await self._async_wait_mineru_done_and_get_zip_url(
-                task_id=task_id,
-                session=session,
-                timeout=task_timeout,
-                interval=task_interval,
-            )
-
+        # 各阶段分别占用 self.phases 中对应的名额，阶段结束即释放
+        async with self.http_session() as session:
             zip_exists = await asyncio.to_thread(zip_path.exists)
             if not zip_exists:
-                await self._async_download_file(full_zip_url, zip_path, session)
+                page_count = await asyncio.to_thread(count_pdf_pages, pdf_path_obj)
+                if self._should_shard(page_count):
+                    await self._async_fetch_sharded_result_zip(
+                        pdf_path=pdf_path_obj,
+                        page_count=page_count,
+                        zip_path=zip_path,
+                        session=session,
+                        task_timeout=task_timeout,
+                        task_interval=task_interval,
+                    )
+                else:
+                    await self._async_fetch_result_zip(
+                        pdf_path=pdf_path_obj,
+                        zip_path=zip_path,
+                        session=session,
+                        page_count=page_count,
+                        task_timeout=task_timeout,
+                        task_interval=task_interval,
+                    )
             else:
-                logger.info("ZIP 文件已存在，跳过下载：%s", zip_path)
+                logger.info("ZIP 文件已存在，跳过上传与解析：%s", zip_path)
 
-        extract_dir = work_dir / base_name
-        md_content = await self._async_extract_full_md_from_zip(zip_path, extract_dir)
+            async with self.phases.phase("download"):
+                md_content, artifacts = await self._async_extract_full_md_from_zip(
+                    zip_path, extract_dir
+                )
 
-        md_path = md_output_dir / f"{base_name}.md"
-        try:
-            await asyncio.to_thread(
-                md_path.write_text, md_content, encoding="utf-8"
-            )
-        except Exception as e:
-            logger.exception("写入 markdown 文件失败：%s", md_path)
-            raise MineruPdfConverterError(f"写入 markdown 文件失败: {md_path}") from e
+                md_path = md_output_dir / f"{base_name}.md"
+                try:
+                    await asyncio.to_thread(
+                        md_path.write_text, md_content, encoding="utf-8"
+                    )
+                except Exception as e:
+                    logger.exception("写入 markdown 文件失败：%s", md_path)
+                    raise MineruPdfConverterError(
+                        f"写入 markdown 文件失败: {md_path}"
+                    ) from e
 
         logger.info(
             "%s 转换完成：md_len=%d, md=%s, zip=%s",
@@ -603,12 +1421,225 @@ class MineruPdfConverter:
             zip_path,
         )
 
+        await self._ledger_call("record_artifacts", pdf_path_obj, artifacts)
+
         return ConvertResult(
             md_content=md_content,
             md_path=md_path,
             zip_path=zip_path,
+            artifacts=artifacts,
         )
 
+    async def _async_locate_artifacts(
+        self, pdf_path: Path, zip_path: Path, extract_dir: Path
+    ) -> Optional[MineruArtifacts]:
+        """已转换的 PDF：取台账记录的产物路径，缺失或已失效时按结果 zip 的成员名推算。"""
+        artifacts = await self._ledger_call("get_artifacts", pdf_path)
+        if artifacts is not None and await asyncio.to_thread(artifacts.exists):
+            return artifacts
+        if not await asyncio.to_thread(zip_path.is_file):
+            return None
+        try:
+            artifacts = await asyncio.to_thread(locate_zip_artifacts, zip_path, extract_dir)
+        except (OSError, zipfile.BadZipFile) as e:
+            logger.warning("读取结果 zip 目录失败：%s, 错误：%s", zip_path, e)
+            return None
+        if not await asyncio.to_thread(artifacts.exists):
+            return None
+        await self._ledger_call("record_artifacts", pdf_path, artifacts)
+        return artifacts
+
+    async def _ledger_call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        """调用任务台账；未启用或写入失败时不影响转换。"""
+        if self.ledger is None:
+            return None
+        try:
+            return await asyncio.to_thread(getattr(self.ledger, method), *args, **kwargs)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("转换任务台账 %s 失败：%s", method, e)
+            return None
+
+    async def _async_fetch_result_zip(
+        self,
+        pdf_path: Path,
+        zip_path: Path,
+        session: aiohttp.ClientSession,
+        page_count: Optional[int],
+        task_timeout: int,
+        task_interval: int,
+    ) -> None:
+        """上传 PDF、等待 MinerU 解析完成并下载结果 zip（各阶段分别占用名额）。
+
+        每一步都写入任务台账；台账中已有 task_id 时直接继续轮询该任务，
+        任务已完成时直接下载，已上传时跳过上传。
+        """
+        job = await self._ledger_call("get", pdf_path)
+        file_url = job.file_url if job else None
+        task_id = job.task_id if job else None
+        full_zip_url = job.zip_url if job and job.state == JobState.DONE else None
+
+        if full_zip_url:
+            logger.info("任务台账：%s 的 MinerU 任务已完成，直接下载结果", pdf_path.name)
+            try:
+                async with self.phases.phase("download"):
+                    await self._async_download_file(full_zip_url, zip_path, session)
+                await self._ledger_call("record_downloaded", pdf_path, zip_path)
+                return
+            except Exception as e:
+                logger.warning(
+                    "按台账中的结果地址下载失败，重新查询任务：%s, 错误：%r", pdf_path.name, e
+                )
+                full_zip_url = None
+
+        if task_id:
+            logger.info("任务台账：%s 继续等待 MinerU 任务 %s", pdf_path.name, task_id)
+            try:
+                async with self.phases.phase("mineru"):
+                    full_zip_url = await self._async_wait_mineru_done_and_get_zip_url(
+                        task_id=task_id,
+                        session=session,
+                        timeout=task_timeout,
+                        interval=task_interval,
+                        page_count=page_count,
+                    )
+            except MineruApiError as e:
+                # 任务失败或已无法查询：清除 task_id，重新提交
+                logger.warning(
+                    "台账中的 MinerU 任务不可用，重新提交：%s, task_id=%s, 错误：%r",
+                    pdf_path.name,
+                    task_id,
+                    e,
+                )
+                await self._ledger_call("record_failed", pdf_path, repr(e), clear_task=True)
+                task_id = None
+
+        if not task_id:
+            if not file_url:
+                async with self.phases.phase("upload"):
+                    file_url = await self._async_upload_pdf_and_get_url(pdf_path)
+                await self._ledger_call("record_upload", pdf_path, file_url)
+
+            async with self.phases.phase("mineru"):
+                task_id = await self._async_create_mineru_task(file_url, session)
+                await self._ledger_call("record_task", pdf_path, task_id)
+                try:
+                    full_zip_url = await self._async_wait_mineru_done_and_get_zip_url(
+                        task_id=task_id,
+                        session=session,
+                        timeout=task_timeout,
+                        interval=task_interval,
+                        page_count=page_count,
+                    )
+                except MineruApiError as e:
+                    await self._ledger_call(
+                        "record_failed", pdf_path, repr(e), clear_task=True
+                    )
+                    raise
+
+        await self._ledger_call("record_done", pdf_path, full_zip_url)
+        async with self.phases.phase("download"):
+            await self._async_download_file(full_zip_url, zip_path, session)
+        await self._ledger_call("record_downloaded", pdf_path, zip_path)
+
+    @staticmethod
+    def _should_shard(page_count: Optional[int]) -> bool:
+        threshold = PDF_TO_MD_SHARD_THRESHOLD or 0
+        return bool(threshold and page_count and page_count > threshold)
+
+    async def _async_fetch_sharded_result_zip(
+        self,
+        pdf_path: Path,
+        page_count: int,
+        zip_path: Path,
+        session: aiohttp.ClientSession,
+        task_timeout: int,
+        task_interval: int,
+    ) -> None:
+        """超大 PDF：按页段拆分为多个 MinerU 任务并行解析，拼接为一份结果 zip。
+
+        各分段的结果 zip 保存在 zip_output_dir/<doc>.shards/ 中，部分分段失败时保留已完成的
+        分段，重跑只处理缺失的分段；拼接结果写为 zip_path，布局与单个任务的结果 zip 一致，
+        后续解压与元素提取无需区分。
+
+        分段 PDF、分段解压与拼接的临时文件放在 <doc>.shards/scratch/ 下，不放进 work_dir
+        （元素提取把 work_dir 的每个子目录当作一篇文档）。分段失败时只删除解压目录、
+        保留分段 PDF：台账按路径 + 大小 + mtime 记录分段任务，重写分段 PDF 会使在途或
+        已完成未下载的分段重新提交；分段 PDF 与其台账记录在拼接成功后才清理。
+        """
+        base_name = pdf_path.stem
+        ranges = page_ranges(page_count, PDF_TO_MD_SHARD_PAGES or 100)
+        shard_zip_dir = zip_path.parent / f"{base_name}.shards"
+        shard_pdf_dir = shard_zip_dir / "scratch"
+        await asyncio.to_thread(shard_zip_dir.mkdir, parents=True, exist_ok=True)
+
+        logger.info(
+            "%s 共 %d 页，拆分为 %d 个分段（每段 %d 页）",
+            pdf_path.name,
+            page_count,
+            len(ranges),
+            PDF_TO_MD_SHARD_PAGES or 100,
+        )
+        shard_pdfs = await asyncio.to_thread(
+            _split_pdf_sync, pdf_path, ranges, shard_pdf_dir
+        )
+
+        async def process_shard(start: int, end: int, shard_pdf: Path) -> Tuple[int, Path]:
+            shard_zip = shard_zip_dir / f"{shard_pdf.stem}.zip"
+            if not await asyncio.to_thread(shard_zip.exists):
+                await self._async_fetch_result_zip(
+                    pdf_path=shard_pdf,
+                    zip_path=shard_zip,
+                    session=session,
+                    page_count=end - start,
+                    task_timeout=task_timeout,
+                    task_interval=task_interval,
+                )
+            extract_dir = shard_pdf_dir / shard_pdf.stem
+            await asyncio.to_thread(shutil.rmtree, extract_dir, True)
+            async with self.phases.phase("download"):
+                await self._async_extract_full_md_from_zip(shard_zip, extract_dir)
+            return start, extract_dir
+
+        results = await asyncio.gather(
+            *(
+                process_shard(start, end, shard_pdf)
+                for (start, end), shard_pdf in zip(ranges, shard_pdfs)
+            ),
+            return_exceptions=True,
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+
+            def remove_extract_dirs() -> None:
+                for shard_pdf in shard_pdfs:
+                    shutil.rmtree(shard_pdf_dir / shard_pdf.stem, ignore_errors=True)
+
+            await asyncio.to_thread(remove_extract_dirs)
+            raise MineruPdfConverterError(
+                f"{len(errors)}/{len(ranges)} 个分段转换失败，已完成的分段保留在 "
+                f"{shard_zip_dir}，重跑时续传: {pdf_path}"
+            ) from errors[0]
+
+        stitched_dir = shard_pdf_dir / "stitched"
+        doc_uuid = str(uuid.uuid5(uuid.NAMESPACE_URL, base_name))
+
+        def stitch_and_pack() -> None:
+            shutil.rmtree(stitched_dir, ignore_errors=True)
+            stitch_shard_dirs(results, stitched_dir, doc_uuid)
+            _write_dir_to_zip_sync(stitched_dir, zip_path)
+            if self.ledger is not None:
+                try:
+                    for shard_pdf in shard_pdfs:
+                        self.ledger.forget(shard_pdf)
+                except sqlite3.Error as e:
+                    logger.warning("清理分段的台账记录失败：%s", e)
+            # scratch 在 shard_zip_dir 之内，一并删除
+            shutil.rmtree(shard_zip_dir, ignore_errors=True)
+
+        async with self.phases.phase("download"):
+            await asyncio.to_thread(stitch_and_pack)
+        logger.info("%s 分段结果已拼接：%s", pdf_path.name, zip_path)
+
     async def async_batch_pdf_to_md_mineru_api(
         self,
         pdf_dir: PathLike,
@@ -641,33 +1672,35 @@ class MineruPdfConverter:
         file_names = ", ".join([p.name for p in pdf_paths])
         logger.info("开始批量转换 %s，共找到 %d 个文件", file_names, total)
 
+        # 并发由 async_pdf_to_md_mineru_api 内的分阶段预算（self.phases）控制
         async def process_single_pdf(pdf_path: Path) -> Tuple[bool, bool]:
-            async with self.semaphore:
-                try:
-                    base_name = pdf_path.stem
-                    md_path = md_output_dir_path / f"{base_name}.md"
-                    md_exists = await asyncio.to_thread(md_path.exists)
-                    md_is_file = await asyncio.to_thread(md_path.is_file) if md_exists else False
-
-                    if md_exists and md_is_file:
-                        logger.info("跳过（文件已存在）：%s", pdf_path.name)
-                        return (True, True)
-
-                    await self.async_pdf_to_md_mineru_api(
-                        pdf_path=pdf_path,
-                        zip_output_dir=zip_output_dir_path,
-                        md_output_dir=md_output_dir_path,
-                        work_dir=work_dir_path,
-                        task_timeout=task_timeout,
-                        task_interval=task_interval,
-                    )
-                    return (True, False)
-                except Exception as e:
-                    logger.error("处理失败：%s, 错误信息：%r", pdf_path.name, e)
-                    return (False, False)
+            try:
+                base_name = pdf_path.stem
+                md_path = md_output_dir_path / f"{base_name}.md"
+                md_exists = await asyncio.to_thread(md_path.exists)
+                md_is_file = await asyncio.to_thread(md_path.is_file) if md_exists else False
+
+                if md_exists and md_is_file:
+                    logger.info("跳过（文件已存在）：%s", pdf_path.name)
+                    return (True, True)
+
+                await self.async_pdf_to_md_mineru_api(
+                    pdf_path=pdf_path,
+                    zip_output_dir=zip_output_dir_path,
+                    md_output_dir=md_output_dir_path,
+                    work_dir=work_dir_path,
+                    task_timeout=task_timeout,
+                    task_interval=task_interval,
+                )
+                return (True, False)
+            except Exception as e:
+                logger.error("处理失败：%s, 错误信息：%r", pdf_path.name, e)
+                return (False, False)
 
-        tasks = [process_single_pdf(pdf_path) for pdf_path in pdf_paths]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # 整批共享一个 HTTP 会话，连接在各 PDF 的创建任务、轮询、下载之间复用
+        async with self.http_session():
+            tasks = [process_single_pdf(pdf_path) for pdf_path in pdf_paths]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
 
         success_count = 0
         skip_count = 0
@@ -691,6 +1724,7 @@ class MineruPdfConverter:
             skip_count,
             fail_count,
         )
+        logger.info("各阶段并发（峰值/上限）：%s", self.phases.summary())
 
 
 # ---------------------- 数据初始化专用：带 layout.json 的 PDF -> MD 转换器 ----------------------
@@ -700,8 +1734,12 @@ class PdfToMdConverter:
     """
     PDF -> Markdown 转换工具类（数据初始化专用）。
 
-    功能：将 PDF 转为 MD，并在 MinerU 工作目录中查找 layout.json，
-    返回 MD 路径与 layout.json 路径供后续处理使用。内部复用 MineruPdfConverter。
+    功能：将 PDF 转为 MD，返回 MD 路径与 layout.json 等产物路径供后续处理使用。
+    产物路径由转换步骤在解压时直接记录（并写入任务台账），不在工作目录中查找；
+    路径缺失的历史数据可用 repair_layout_json_path 显式修复。
+
+    backend 为 api 时内部复用 MineruPdfConverter（OSS + MinerU 远程 API）；
+    为 local 时使用 LocalMineruBackend 在本机进程池中解析，输出布局相同。
     """
 
     def __init__(
@@ -713,7 +1751,16 @@ class PdfToMdConverter:
         mineru_api_url: str,
         mineru_api_key: str,
         max_concurrent_tasks: Optional[int] = None,
+        bucket: Optional[Any] = None,
+        upload_concurrency: Optional[int] = None,
+        download_concurrency: Optional[int] = None,
+        backend: Optional[str] = None,
     ) -> None:
+        self.backend = (backend or PDF_TO_MD_BACKEND or "api").lower()
+        if self.backend not in ("api", "local"):
+            raise ValueError(f"不支持的 PDF 转换后端: {backend}")
+        self._local_backend = None
+
         self.mineru_converter = MineruPdfConverter(
             access_key_id=access_key_id,
             access_key_secret=access_key_secret,
@@ -722,31 +1769,52 @@ class PdfToMdConverter:
             mineru_api_url=mineru_api_url,
             mineru_api_key=mineru_api_key,
             max_concurrent_tasks=max_concurrent_tasks,
+            bucket=bucket,
+            upload_concurrency=upload_concurrency,
+            download_concurrency=download_concurrency,
         )
 
-    def _find_layout_json_in_work_dir(
-        self, work_dir: Path, pdf_name: Optional[str] = None
+    def _get_local_backend(self):
+        """懒创建本地 MinerU 后端（mineru_local 依赖本模块，需在此处导入）。"""
+        if self._local_backend is None:
+            from src.data_initialization.converters.mineru_local import (
+                LocalMineruBackend,
+            )
+
+            self._local_backend = LocalMineruBackend()
+        return self._local_backend
+
+    def close(self) -> None:
+        """释放本地 MinerU 进程池（仅 local 后端）。"""
+        if self._local_backend is not None:
+            self._local_backend.close()
+            self._local_backend = None
+
+    def repair_layout_json_path(
+        self, pdf_path: PathLike, work_dir: PathLike
     ) -> Optional[Path]:
-        """在 MinerU 工作目录中查找 layout.json 文件。"""
-        if pdf_name:
-            pdf_dir = work_dir / pdf_name
-            layout_path = pdf_dir / "layout.json"
-            if layout_path.exists() and layout_path.is_file():
-                logger.debug("在PDF目录找到layout.json: %s", layout_path)
-                return layout_path
-
-        layout_path = work_dir / "layout.json"
-        if layout_path.exists() and layout_path.is_file():
-            logger.debug("在工作目录根目录找到layout.json: %s", layout_path)
-            return layout_path
-
-        for root, dirs, files in os.walk(work_dir):
-            if "layout.json" in files:
-                found_path = Path(root) / "layout.json"
-                logger.debug("递归查找到layout.json: %s", found_path)
-                return found_path
-
-        logger.warning("未在工作目录中找到layout.json: %s", work_dir)
+        """
+        修复工具：在 work_dir/<pdf 名> 下递归查找 layout.json，并把找到的产物路径写入任务台账。
+
+        正常转换流程不会调用本方法（产物路径在解压时已记录）；仅用于旧版本生成、
+        台账中没有产物路径的工作目录。查找范围限定在该 PDF 自己的目录内，
+        不会误取其他文档的 layout.json。
+        """
+        pdf_path_obj = Path(pdf_path).resolve()
+        doc_dir = Path(work_dir) / pdf_path_obj.stem
+        for root, dirs, files in os.walk(doc_dir):
+            dirs.sort()
+            if LAYOUT_JSON_NAME in files:
+                artifacts = locate_dir_artifacts(root)
+                logger.info("修复：找到 layout.json：%s", artifacts.layout_json)
+                if self.mineru_converter.ledger is not None and pdf_path_obj.is_file():
+                    try:
+                        self.mineru_converter.ledger.record_artifacts(pdf_path_obj, artifacts)
+                    except sqlite3.Error as e:
+                        logger.warning("修复：写入任务台账失败：%s", e)
+                return artifacts.layout_json
+
+        logger.warning("修复：未在 %s 中找到 layout.json", doc_dir)
         return None
 
     async def async_convert_pdf_to_md_with_layout(
@@ -774,27 +1842,33 @@ class PdfToMdConverter:
         logger.info("开始转换PDF（数据初始化模式）: %s", pdf_path_obj.name)
 
         try:
-            convert_result = await self.mineru_converter.async_pdf_to_md_mineru_api(
-                pdf_path=pdf_path_obj,
-                zip_output_dir=zip_output_dir_path
-                or md_output_dir_path.parent / "zip_store",
-                md_output_dir=md_output_dir_path,
-                work_dir=work_dir_path,
-                task_timeout=task_timeout or (PDF_TO_MD_TASK_TIMEOUT or 600),
-                task_interval=task_interval or (PDF_TO_MD_TASK_INTERVAL or 3),
-            )
+            if self.backend == "local":
+                convert_result = await self._get_local_backend().async_convert_pdf(
+                    pdf_path=pdf_path_obj,
+                    md_output_dir=md_output_dir_path,
+                    work_dir=work_dir_path,
+                )
+            else:
+                convert_result = await self.mineru_converter.async_pdf_to_md_mineru_api(
+                    pdf_path=pdf_path_obj,
+                    zip_output_dir=zip_output_dir_path
+                    or md_output_dir_path.parent / "zip_store",
+                    md_output_dir=md_output_dir_path,
+                    work_dir=work_dir_path,
+                    task_timeout=task_timeout or (PDF_TO_MD_TASK_TIMEOUT or 600),
+                    task_interval=task_interval or (PDF_TO_MD_TASK_INTERVAL or 3),
+                )
         except Exception as e:
             logger.exception("MinerU转换失败: %s", pdf_path_obj)
             raise MineruConversionError(f"MinerU转换失败: {pdf_path_obj}") from e
 
-        pdf_name = pdf_path_obj.stem
-        layout_json_path = await asyncio.to_thread(
-            self._find_layout_json_in_work_dir, work_dir_path, pdf_name
-        )
+        artifacts = convert_result.artifacts
+        layout_json_path = artifacts.layout_json if artifacts else None
 
         if layout_json_path is None:
             logger.warning(
-                "转换完成但未找到layout.json，PDF: %s, work_dir: %s",
+                "转换完成但未记录layout.json，PDF: %s, work_dir: %s"
+                "（历史数据可调用 repair_layout_json_path 修复）",
                 pdf_path_obj.name,
                 work_dir_path,
             )
@@ -812,6 +1886,7 @@ class PdfToMdConverter:
             zip_path=convert_result.zip_path,
             layout_json_path=layout_json_path,
             work_dir=work_dir_path,
+            artifacts=artifacts,
         )
 
     async def async_batch_convert_pdfs_with_layout(
@@ -864,35 +1939,36 @@ class PdfToMdConverter:
         success_count = 0
         fail_count = 0
 
-        semaphore = asyncio.Semaphore(
-            self.mineru_converter.max_concurrent_tasks
-            or PDF_TO_MD_MAX_CONCURRENT_TASKS
-            or 5
-        )
-
+        # 并发由 MineruPdfConverter 的分阶段预算控制（上传 / MinerU 在途 / 下载解压），
+        # local 后端由进程池控制，此处不再额外加一层信号量
         async def process_single_pdf(
             pdf_path: Path, index: int
         ) -> Optional[PdfToMdResult]:
-            async with semaphore:
-                logger.info("[%d/%d] 处理: %s", index, total, pdf_path.name)
-                try:
-                    result = await self.async_convert_pdf_to_md_with_layout(
-                        pdf_path=pdf_path,
-                        md_output_dir=md_output_dir_path,
-                        work_dir=work_dir_path,
-                        zip_output_dir=zip_output_dir_path,
-                        task_timeout=task_timeout,
-                        task_interval=task_interval,
-                    )
-                    return result
-                except Exception as e:
-                    logger.error("处理失败: %s, 错误: %r", pdf_path.name, e)
-                    return None
+            logger.info("[%d/%d] 处理: %s", index, total, pdf_path.name)
+            try:
+                result = await self.async_convert_pdf_to_md_with_layout(
+                    pdf_path=pdf_path,
+                    md_output_dir=md_output_dir_path,
+                    work_dir=work_dir_path,
+                    zip_output_dir=zip_output_dir_path,
+                    task_timeout=task_timeout,
+                    task_interval=task_interval,
+                )
+                return result
+            except Exception as e:
+                logger.error("处理失败: %s, 错误: %r", pdf_path.name, e)
+                return None
 
-        tasks = [
-            process_single_pdf(pdf_path, i + 1) for i, pdf_path in enumerate(pdf_paths)
-        ]
-        task_results = await asyncio.gather(*tasks, return_exceptions=True)
+        # 整批共享 MinerU HTTP 会话（连接池）；local 后端整批结束后关闭进程池
+        try:
+            async with self.mineru_converter.http_session():
+                tasks = [
+                    process_single_pdf(pdf_path, i + 1)
+                    for i, pdf_path in enumerate(pdf_paths)
+                ]
+                task_results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            await asyncio.to_thread(self.close)
 
         for r in task_results:
             if isinstance(r, Exception):
@@ -910,6 +1986,10 @@ class PdfToMdConverter:
             success_count,
             fail_count,
         )
+        if self.backend == "api":
+            logger.info(
+                "各阶段并发（峰值/上限）：%s", self.mineru_converter.phases.summary()
+            )
 
         return results
 
@@ -19,6 +19,7 @@ JSON 图片描述生成器
 3. 根据语言选择提示词（中/英文）
 4. 调用 LLM Vision 模型生成图片描述
 5. 更新 JSON 文件的 content.description 字段
+6. 大批量回填可走离线批处理模式（batch_process_offline，经 LLM 批处理接口提交）
 
 与 _02_pictureprecesser.py 的区别：
 - 输入格式：JSON 文件（而非 Markdown）
@@ -28,16 +29,20 @@ JSON 图片描述生成器
 
 import asyncio
 import base64
+import io
 import json
 import logging
 import os
 import re
-from dataclasses import dataclass
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 from langchain_core.messages import HumanMessage
 from langchain_openai import ChatOpenAI
+from PIL import Image
 
 from src.config.prompts.preprocessing_prompts import (
     DOCUMENT_SUMMARY_PROMPT_EN,
@@ -53,8 +58,21 @@ from src.config.settings import (
     PROJECT_ROOT,
     JSON_IMAGE_DESCRIPTION_MAX_CONCURRENT,
     JSON_IMAGE_DESCRIPTION_SUMMARY_LENGTH,
+    JSON_IMAGE_DESCRIPTION_MAX_EDGE,
+    JSON_IMAGE_DESCRIPTION_MAX_BYTES,
+    JSON_IMAGE_DESCRIPTION_JPEG_QUALITY,
+    JSON_IMAGE_DESCRIPTION_IMAGE_CACHE_SIZE,
+    LLM_BATCH_WORK_DIR,
 )
 from src.models.get_models import get_vision_llm_model, get_fast_llm_model
+from src.models.llm_batch import (
+    LlmBatchBackend,
+    arun_batch_files,
+    build_chat_request,
+    get_llm_batch_backend,
+    llm_model_name,
+    write_batch_files,
+)
 from src.config.settings import (
     STAGE_IMAGE_DESCRIPTION,
 )
@@ -120,6 +138,110 @@ def _get_text_value(text_field: Any) -> str:
     return str(text_field).strip()
 
 
+# 常见图片格式的文件头（magic bytes）
+_IMAGE_SIGNATURES: Tuple[Tuple[bytes, str], ...] = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+)
+
+
+def _detect_mime_type(image_bytes: bytes) -> Optional[str]:
+    """根据文件头检测图片 MIME 类型，无法识别时返回 None。"""
+    if image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, mime_type in _IMAGE_SIGNATURES:
+        if image_bytes.startswith(signature):
+            return mime_type
+    return None
+
+
+# 超出字节上限时逐级降低的 JPEG 质量下限与每轮缩小比例
+_MIN_JPEG_QUALITY = 50
+_SHRINK_RATIO = 0.75
+
+
+def _encode_jpeg(img: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def _prepare_image_bytes(
+    image_bytes: bytes, max_edge: int, jpeg_quality: int, max_bytes: int = 0
+) -> Tuple[bytes, str]:
+    """将图片缩放到最长边不超过 max_edge、字节数不超过 max_bytes，并重新编码为 JPEG。
+
+    原图尺寸与字节数均未超限、且本身为 JPEG/PNG 时保持原样（避免无谓的重编码）；
+    重编码后仍超出 max_bytes 时先逐级降低质量（不低于 _MIN_JPEG_QUALITY），
+    再按 _SHRINK_RATIO 缩小尺寸，直到满足上限；重编码后反而更大时保留原图。
+
+    Args:
+        image_bytes: 原始图片字节
+        max_edge: 最长边上限（像素），<= 0 表示不缩放
+        jpeg_quality: JPEG 质量（1-95）
+        max_bytes: 编码后字节上限，<= 0 表示不限制
+
+    Returns:
+        Tuple[bytes, str]: 处理后的图片字节和 MIME 类型
+    """
+    original_mime = _detect_mime_type(image_bytes)
+    over_budget = max_bytes > 0 and len(image_bytes) > max_bytes
+
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        width, height = img.size
+        needs_resize = max_edge > 0 and max(width, height) > max_edge
+        if (
+            not needs_resize
+            and not over_budget
+            and original_mime in ("image/jpeg", "image/png")
+        ):
+            return image_bytes, original_mime
+
+        if needs_resize:
+            img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+        # JPEG 不支持透明通道：铺白底后转 RGB
+        if img.mode in ("RGBA", "LA") or (
+            img.mode == "P" and "transparency" in img.info
+        ):
+            rgba = img.convert("RGBA")
+            background = Image.new("RGB", rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.split()[-1])
+            rgb = background
+        else:
+            rgb = img.convert("RGB")
+
+    quality = jpeg_quality
+    encoded = _encode_jpeg(rgb, quality)
+    while max_bytes > 0 and len(encoded) > max_bytes:
+        if quality > _MIN_JPEG_QUALITY:
+            quality = max(quality - 10, _MIN_JPEG_QUALITY)
+        elif min(rgb.size) > 64:
+            rgb = rgb.resize(
+                (
+                    max(int(rgb.width * _SHRINK_RATIO), 1),
+                    max(int(rgb.height * _SHRINK_RATIO), 1),
+                ),
+                Image.LANCZOS,
+            )
+        else:
+            break
+        encoded = _encode_jpeg(rgb, quality)
+
+    if (
+        not needs_resize
+        and original_mime is not None
+        and len(encoded) >= len(image_bytes)
+    ):
+        return image_bytes, original_mime
+    return encoded, "image/jpeg"
+
+
 # ---------------------- 主工具类 ----------------------
 
 PathLike = Union[str, os.PathLike]
@@ -170,6 +292,24 @@ class ElementInfo:
     section_title: Optional[str]
     language: str
     type: str = ""  # 元素类型（figure/equation/table）
+    index: int = -1  # 元素在 json_data["elements"] 中的下标（用于 O(1) 写回）
+    description: str = ""  # 已有的 content.description
+
+
+@dataclass
+class _DocumentJob:
+    """单个文档的图片描述任务（跨文档图片队列中按文档汇总、写回）。"""
+
+    json_path: Path
+    output_path: Path
+    doc_id: str
+    language: str
+    json_data: Dict
+    all_elements: List[ElementInfo]
+    pending: List[ElementInfo]
+    document_summary: str = ""
+    remaining: int = 0
+    descriptions: Dict[int, str] = field(default_factory=dict)  # 元素下标 -> 描述
 
 
 # ---------------------- 主工具类 ----------------------
@@ -204,6 +344,9 @@ class JsonImageDescriptionProcessor:
         )
     """
 
+    # 已完成文档的图片数量清单（位于输出目录，按行追加）
+    MANIFEST_FILE_NAME = "image_description_manifest.jsonl"
+
     def __init__(
         self,
         llm_vision: Optional[ChatOpenAI] = None,
@@ -218,19 +361,27 @@ class JsonImageDescriptionProcessor:
         Args:
             llm_vision: ChatOpenAI 实例，用于图片描述生成。若为 None，则使用默认配置创建。
             llm_summary: ChatOpenAI 实例，用于摘要生成。若为 None，则使用默认配置创建。
-            max_concurrent_tasks: 最大并发任务数。若为 None，则使用配置中的默认值。
+            max_concurrent_tasks: 最大并发任务数。若为 None：LLM 经调度器（ScheduledChatOpenAI）
+                                  调用时取调度器的并发上界，由调度器按限流情况自适应；
+                                  否则使用配置中的默认值。
             json_store_dir: JSON 文件存储目录。
                            若为 None，则默认使用 PROJECT_ROOT/files/file_store/json_store。
             output_dir: 输出目录（处理后的 JSON 保存目录）。
                        若为 None，则默认与 json_store_dir 相同。
         """
-        self.max_concurrent_tasks = max_concurrent_tasks or (
-            JSON_IMAGE_DESCRIPTION_MAX_CONCURRENT or 5
-        )
-        self.semaphore = asyncio.Semaphore(self.max_concurrent_tasks)
         self.llm_vision = llm_vision or get_vision_llm_model()
         self.llm_summary = llm_summary or get_fast_llm_model()
 
+        scheduler = getattr(self.llm_vision, "scheduler", None)
+        if max_concurrent_tasks:
+            self.max_concurrent_tasks = max_concurrent_tasks
+        elif scheduler is not None:
+            # 实际并发由调度器的 AIMD 上限控制，这里只作为在途请求的上界
+            self.max_concurrent_tasks = scheduler.max_concurrency
+        else:
+            self.max_concurrent_tasks = JSON_IMAGE_DESCRIPTION_MAX_CONCURRENT or 5
+        self.semaphore = asyncio.Semaphore(self.max_concurrent_tasks)
+
         # 设置目录路径
         if json_store_dir is None:
             self.json_store_dir = PROJECT_ROOT / "files" / "file_store" / "json_store"
@@ -242,6 +393,14 @@ class JsonImageDescriptionProcessor:
         else:
             self.output_dir = Path(output_dir).resolve()
 
+        # 图片预处理配置与缓存（key: (路径, mtime_ns, size)）
+        self.image_max_edge = JSON_IMAGE_DESCRIPTION_MAX_EDGE or 0
+        self.image_max_bytes = JSON_IMAGE_DESCRIPTION_MAX_BYTES or 0
+        self.image_jpeg_quality = JSON_IMAGE_DESCRIPTION_JPEG_QUALITY or 85
+        self.image_cache_size = JSON_IMAGE_DESCRIPTION_IMAGE_CACHE_SIZE or 0
+        self._image_payload_cache: "OrderedDict[Tuple[str, int, int], Tuple[str, Optional[str]]]" = OrderedDict()
+        self._image_payload_lock = threading.Lock()
+
         # 当前处理的提示词和语言（在处理文件时动态设置）
         self.prompt: str = FIGURE_DESCRIPTION_PROMPT_EN
         self.current_language: Optional[str] = None
@@ -264,7 +423,7 @@ class JsonImageDescriptionProcessor:
 
         language = json_data.get("metadata", {}).get("language", "en")
 
-        for element in json_data["elements"]:
+        for index, element in enumerate(json_data["elements"]):
             if not isinstance(element, dict):
                 continue
 
@@ -281,6 +440,10 @@ class JsonImageDescriptionProcessor:
                 section_title=source.get("section_title"),
                 language=language,
                 type=element.get("type", ""),
+                index=index,
+                description=_get_text_value(
+                    (element.get("content") or {}).get("description", "")
+                ),
             )
             elements.append(element_info)
 
@@ -382,34 +545,69 @@ class JsonImageDescriptionProcessor:
 
     # ---------------------- LLM 调用相关 ----------------------
 
-    async def _read_image(self, image_path: Path) -> Tuple[bytes, Optional[str]]:
-        """同步读取本地图片文件。
+    def _prepare_image_payload_sync(self, image_path: Path) -> Tuple[str, Optional[str]]:
+        """读取、缩放并编码图片为 base64（同步，供线程池调用）。
+
+        结果按 (路径, mtime, size) 缓存，同一张图片重试时不再读盘和重编码
+        （每张图片通常只描述一次，缓存条数保持很小）。
 
         Args:
             image_path: 图片文件路径
 
         Returns:
-            Tuple[bytes, Optional[str]]: 图片文件字节和 MIME 类型
+            Tuple[str, Optional[str]]: base64 编码字符串和 MIME 类型
         """
-        if not image_path.exists() or not image_path.is_file():
-            return b"", None
+        if not image_path.is_file():
+            return "", None
+
+        stat = image_path.stat()
+        cache_key = (str(image_path), stat.st_mtime_ns, stat.st_size)
+        with self._image_payload_lock:
+            cached = self._image_payload_cache.get(cache_key)
+            if cached is not None:
+                self._image_payload_cache.move_to_end(cache_key)
+                return cached
+
+        image_bytes = image_path.read_bytes()
+        if not image_bytes:
+            return "", None
 
         try:
-            with image_path.open("rb") as f:
-                image_bytes = f.read()
-            # 简单判断图片类型
-            if image_bytes[:2] == b"\xff\xd8":
-                mime_type = "image/jpeg"
-            elif image_bytes[:4] == b"\x89PNG":
-                mime_type = "image/png"
-            else:
-                mime_type = "image/jpeg"  # 默认
-            return (image_bytes, mime_type) if image_bytes else (b"", None)
-        except Exception:
-            return b"", None
+            prepared, mime_type = _prepare_image_bytes(
+                image_bytes,
+                self.image_max_edge,
+                self.image_jpeg_quality,
+                self.image_max_bytes,
+            )
+        except Exception as e:
+            # Pillow 无法解码时退回原图；原图超出字节上限时不发送
+            if 0 < self.image_max_bytes < len(image_bytes):
+                logger.warning(
+                    "图片预处理失败且原图超出 %d 字节上限，跳过 (%s): %s",
+                    self.image_max_bytes,
+                    image_path,
+                    str(e),
+                )
+                return "", None
+            logger.warning("图片预处理失败，使用原图 (%s): %s", image_path, str(e))
+            prepared, mime_type = image_bytes, _detect_mime_type(image_bytes) or "image/jpeg"
+
+        if len(prepared) < len(image_bytes):
+            logger.debug(
+                "图片预处理：%s %d -> %d 字节", image_path.name, len(image_bytes), len(prepared)
+            )
+
+        payload = (base64.b64encode(prepared).decode(), mime_type)
+        with self._image_payload_lock:
+            self._image_payload_cache[cache_key] = payload
+            while len(self._image_payload_cache) > self.image_cache_size:
+                self._image_payload_cache.popitem(last=False)
+        return payload
 
     async def _image_to_base64(self, image_path: str) -> Tuple[str, Optional[str]]:
-        """将图片转换为 base64 编码字符串。
+        """将图片预处理（缩放、重编码）并转换为 base64 编码字符串。
+
+        读盘与编码均在线程池中完成，不阻塞事件循环。
 
         Args:
             image_path: 图片路径
@@ -418,12 +616,9 @@ class JsonImageDescriptionProcessor:
             Tuple[str, Optional[str]]: base64 编码字符串和 MIME 类型
         """
         try:
-            path = Path(image_path)
-            image_bytes, mime_type = await self._read_image(path)
-            if not image_bytes:
-                return "", None
-            base64_str = base64.b64encode(image_bytes).decode()
-            return base64_str, mime_type
+            return await asyncio.to_thread(
+                self._prepare_image_payload_sync, Path(image_path)
+            )
         except Exception as e:
             logger.exception("图片转换为 base64 失败 (%s): %s", image_path, str(e))
             return "", None
@@ -444,12 +639,13 @@ class JsonImageDescriptionProcessor:
         Returns:
             图片描述文本
         """
+        # 图片预处理在获取并发名额之前完成，不占用 LLM 调用槽位
+        base64_image, mime_type = await self._image_to_base64(image_path)
+        if not base64_image:
+            return ""
+
         async with self.semaphore:
             try:
-                base64_image, mime_type = await self._image_to_base64(image_path)
-                if not base64_image:
-                    return ""
-
                 data_url = f"data:{mime_type or 'image/jpeg'};base64,{base64_image}"
 
                 prompt_text = prompt.format(document_summary=document_summary)
@@ -472,13 +668,13 @@ class JsonImageDescriptionProcessor:
                 )
                 return ""
 
-    async def _generate_document_summary(
+    def _build_summary_prompt(
         self,
         json_data: Dict,
         language: str,
         file_name: str,
     ) -> str:
-        """使用 LLM 生成文档概要。
+        """拼接文档全文并生成文档概要提示词；无有效文本时返回空字符串。
 
         Args:
             json_data: JSON 数据
@@ -486,7 +682,7 @@ class JsonImageDescriptionProcessor:
             file_name: 文件名
 
         Returns:
-            文档概要
+            提示词文本
         """
         # 提取所有文本内容
         text_lines = []
@@ -509,15 +705,37 @@ class JsonImageDescriptionProcessor:
             logger.warning("无法提取有效文本生成文档概要：%s", file_name)
             return ""
 
+        summary_prompt_template = self._get_summary_prompt_by_language(language)
+        return summary_prompt_template.format(
+            text=full_text[:JSON_IMAGE_DESCRIPTION_SUMMARY_LENGTH]
+        )  # 限制文本长度
+
+    async def _generate_document_summary(
+        self,
+        json_data: Dict,
+        language: str,
+        file_name: str,
+    ) -> str:
+        """使用 LLM 生成文档概要。
+
+        Args:
+            json_data: JSON 数据
+            language: 语言代码
+            file_name: 文件名
+
+        Returns:
+            文档概要
+        """
         try:
-            summary_prompt_template = self._get_summary_prompt_by_language(language)
-            prompt_text = summary_prompt_template.format(
-                text=full_text[:JSON_IMAGE_DESCRIPTION_SUMMARY_LENGTH]
-            )  # 限制文本长度
+            prompt_text = self._build_summary_prompt(json_data, language, file_name)
+            if not prompt_text:
+                return ""
 
-            response = await self.llm_summary.ainvoke(
-                [HumanMessage(content=prompt_text)]
-            )
+            # 与图片描述共享同一个并发限制
+            async with self.semaphore:
+                response = await self.llm_summary.ainvoke(
+                    [HumanMessage(content=prompt_text)]
+                )
             summary = response.content.strip()
 
             logger.info(
@@ -531,6 +749,206 @@ class JsonImageDescriptionProcessor:
             logger.exception("文档概要生成失败：%s", str(e))
             return ""
 
+    # ---------------------- 文档任务准备与写回 ----------------------
+
+    def _load_document_job(self, json_path: Path, output_path: Path) -> _DocumentJob:
+        """读取 JSON 文件，整理出需要生成描述的图片元素（同步，供线程池调用）。
+
+        Args:
+            json_path: JSON 文件路径
+            output_path: 处理后 JSON 的保存路径
+
+        Returns:
+            _DocumentJob 文档任务
+        """
+        if not json_path.exists():
+            raise ImageDescriptionError(f"JSON 文件不存在：{json_path}")
+
+        with json_path.open("r", encoding="utf-8") as f:
+            json_data = json.load(f)
+
+        # 获取文档信息
+        doc_id = json_data.get("metadata", {}).get("doc_id", json_path.stem)
+        language = json_data.get("metadata", {}).get("language", "en")
+
+        # 查找包含 image_path 的元素
+        all_elements = self._find_elements_with_image_path(json_data)
+
+        # 过滤出需要处理的图片（没有 description 或 description 为空）
+        pending = [elem for elem in all_elements if not elem.description]
+
+        return _DocumentJob(
+            json_path=json_path,
+            output_path=output_path,
+            doc_id=doc_id,
+            language=language,
+            json_data=json_data,
+            all_elements=all_elements,
+            pending=pending,
+            remaining=len(pending),
+        )
+
+    async def _resolve_document_summary(self, job: _DocumentJob) -> str:
+        """提取或生成文档摘要：优先使用 metadata.abstract，没有则调用 LLM。"""
+        abstract = self._extract_abstract_from_json(job.json_data, job.language)
+        if abstract:
+            logger.debug("使用 JSON 中的摘要")
+            return abstract
+
+        document_summary = await self._generate_document_summary(
+            job.json_data, job.language, job.doc_id
+        )
+        return document_summary or "无法获取文档摘要"
+
+    async def _describe_element(self, job: _DocumentJob, element: ElementInfo) -> str:
+        """按图片类型选择提示词，为单个元素生成描述。"""
+        img_type = _detect_image_type(element.image_path, element.type)
+        prompt = self._get_prompt_by_language_and_type(job.language, img_type)
+        return await self._call_llm_for_description(
+            element.image_path,
+            job.document_summary,
+            prompt,
+        )
+
+    def _apply_descriptions(self, job: _DocumentJob) -> None:
+        """将 job.descriptions 写入 JSON 中对应元素的 content.description。
+
+        按 ElementInfo.index 直接定位元素；仅当下标与 id 不一致时才构建一次 id→下标映射。
+        """
+        elements = job.json_data["elements"]
+        id_to_index: Optional[Dict[str, int]] = None
+
+        for element in job.pending:
+            index = element.index
+            if not (
+                0 <= index < len(elements)
+                and isinstance(elements[index], dict)
+                and elements[index].get("id", "") == element.id
+            ):
+                if id_to_index is None:
+                    id_to_index = {
+                        elem.get("id", ""): i
+                        for i, elem in enumerate(elements)
+                        if isinstance(elem, dict)
+                    }
+                index = id_to_index.get(element.id, -1)
+                if index < 0:
+                    logger.warning("%s 未找到元素 %s，跳过写回", job.doc_id, element.id)
+                    continue
+
+            elem = elements[index]
+            if "content" not in elem:
+                elem["content"] = {}
+            elem["content"]["description"] = job.descriptions.get(element.index, "")
+
+    def _save_document_job(self, job: _DocumentJob) -> None:
+        """保存处理后的 JSON（同步，供线程池调用）。"""
+        job.output_path.parent.mkdir(parents=True, exist_ok=True)
+        with job.output_path.open("w", encoding="utf-8") as f:
+            json.dump(job.json_data, f, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def _count_image_descriptions(job: _DocumentJob) -> Tuple[int, int, int]:
+        """统计文档图片数量：(总数, 有描述数, 无描述数)，只遍历图片元素。"""
+        total = len(job.all_elements)
+        described = total - len(job.pending) + sum(
+            1 for element in job.pending if job.descriptions.get(element.index)
+        )
+        return total, described, total - described
+
+    # ---------------------- 图片数量清单（manifest） ----------------------
+
+    def _manifest_path(self, output_dir: Path) -> Path:
+        """图片描述清单路径（.jsonl 后缀，不会被按 *.json 扫描的各阶段误读）。"""
+        return output_dir / self.MANIFEST_FILE_NAME
+
+    def _load_manifest(self, output_dir: Path) -> Dict[str, Dict[str, Any]]:
+        """读取清单：{文件名: 记录}，同一文件多条记录以最后一条为准。
+
+        清单只追加，重复处理会不断累积过期记录；读取后若存在重复或无效行，
+        则压缩为每个文件一条最新记录（同步阻塞，异步调用方应放入线程池）。
+        """
+        manifest_path = self._manifest_path(output_dir)
+        manifest: Dict[str, Dict[str, Any]] = {}
+        if not manifest_path.exists():
+            return manifest
+        line_count = 0
+        try:
+            with manifest_path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    line_count += 1
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if isinstance(record, dict) and record.get("file"):
+                        manifest[record["file"]] = record
+        except OSError as e:
+            logger.warning("读取图片描述清单失败：%s, 错误：%s", manifest_path, e)
+            return manifest
+        if line_count > len(manifest):
+            self._compact_manifest(manifest_path, manifest)
+        return manifest
+
+    @staticmethod
+    def _compact_manifest(
+        manifest_path: Path, manifest: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """以每个文件的最新记录重写清单（先写临时文件再原子替换）。"""
+        tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8") as f:
+                for record in manifest.values():
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, manifest_path)
+        except OSError as e:
+            logger.warning("压缩图片描述清单失败：%s, 错误：%s", manifest_path, e)
+            tmp_path.unlink(missing_ok=True)
+
+    def _append_manifest(
+        self,
+        output_dir: Path,
+        json_path: Path,
+        total_images: int,
+        success_images: int,
+        fail_images: int,
+    ) -> None:
+        """追加一条已完成文档的清单记录（含文件 mtime/size，用于判断是否仍然有效）。"""
+        try:
+            stat = json_path.stat()
+            record = {
+                "file": json_path.name,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "total_images": total_images,
+                "success_images": success_images,
+                "fail_images": fail_images,
+            }
+            output_dir.mkdir(parents=True, exist_ok=True)
+            with self._manifest_path(output_dir).open("a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning("写入图片描述清单失败：%s, 错误：%s", json_path.name, e)
+
+    @staticmethod
+    def _manifest_entry_is_current(
+        entry: Optional[Dict[str, Any]], json_path: Path
+    ) -> bool:
+        """清单记录是否与文件当前状态一致（文件未被改动过）。"""
+        if not entry:
+            return False
+        try:
+            stat = json_path.stat()
+        except OSError:
+            return False
+        return (
+            entry.get("mtime_ns") == stat.st_mtime_ns
+            and entry.get("size") == stat.st_size
+        )
+
     # ---------------------- 核心处理方法 ----------------------
 
     async def process_single_json(
@@ -550,22 +968,15 @@ class JsonImageDescriptionProcessor:
         output_path = Path(output_dir) / json_path.name if output_dir else json_path
 
         try:
-            # 读取 JSON 文件
-            if not json_path.exists():
-                raise ImageDescriptionError(f"JSON 文件不存在：{json_path}")
-
-            with json_path.open("r", encoding="utf-8") as f:
-                json_data = json.load(f)
-
-            # 获取文档信息
-            doc_id = json_data.get("metadata", {}).get("doc_id", json_path.stem)
-            language = json_data.get("metadata", {}).get("language", "en")
+            job = await asyncio.to_thread(
+                self._load_document_job, json_path, output_path
+            )
+            doc_id = job.doc_id
+            language = job.language
 
             logger.info("开始处理 %s (语言: %s)", doc_id, language)
 
-            # 查找包含 image_path 的元素
-            all_elements = self._find_elements_with_image_path(json_data)
-            if not all_elements:
+            if not job.all_elements:
                 logger.info("%s 没有需要处理的图片元素", doc_id)
                 return ImageDescriptionResult(
                     element_id="",
@@ -574,22 +985,8 @@ class JsonImageDescriptionProcessor:
                     error_message="无图片元素",
                 )
 
-            # 过滤出需要处理的图片（没有 description 或 description 为空）
-            # 注意：elem 是 ElementInfo 对象，需要通过 id 从原始 JSON 中查找 description
-            elements_to_process = []
-            for elem in all_elements:
-                # 在原始 JSON 中查找对应元素以获取 description
-                existing_desc = ""
-                for original_elem in json_data.get("elements", []):
-                    if isinstance(original_elem, dict) and original_elem.get("id") == elem.id:
-                        existing_desc = original_elem.get("content", {}).get("description", "")
-                        break
-
-                if not existing_desc or not existing_desc.strip():
-                    elements_to_process.append(elem)
-
-            if not elements_to_process:
-                logger.info("%s 所有 %d 个图片已有描述，跳过处理", doc_id, len(all_elements))
+            if not job.pending:
+                logger.info("%s 所有 %d 个图片已有描述，跳过处理", doc_id, len(job.all_elements))
                 return ImageDescriptionResult(
                     element_id=doc_id,
                     description="",
@@ -597,19 +994,9 @@ class JsonImageDescriptionProcessor:
                     error_message="所有图片已有描述",
                 )
 
-            logger.info("%s 找到 %d 个图片元素，其中 %d 个需要处理", doc_id, len(all_elements), len(elements_to_process))
+            logger.info("%s 找到 %d 个图片元素，其中 %d 个需要处理", doc_id, len(job.all_elements), len(job.pending))
 
-            # 提取或生成文档摘要
-            abstract = self._extract_abstract_from_json(json_data, language)
-            if abstract:
-                document_summary = abstract
-                logger.debug("使用 JSON 中的摘要")
-            else:
-                document_summary = await self._generate_document_summary(
-                    json_data, language, doc_id
-                )
-                if not document_summary:
-                    document_summary = "无法获取文档摘要"
+            job.document_summary = await self._resolve_document_summary(job)
 
             # 设置提示词（针对第一个元素设置提示词，后续按类型选择）
             original_prompt = self.prompt
@@ -619,58 +1006,34 @@ class JsonImageDescriptionProcessor:
 
             try:
                 # 并发处理需要处理的图片（根据每张图片的类型选择对应提示词）
-                tasks = []
-                for element in elements_to_process:
-                    img_type = _detect_image_type(element.image_path, element.type)
-                    prompt = self._get_prompt_by_language_and_type(language, img_type)
-                    tasks.append(
-                        self._call_llm_for_description(
-                            element.image_path,
-                            document_summary,
-                            prompt,
-                        )
-                    )
-
+                tasks = [self._describe_element(job, element) for element in job.pending]
                 descriptions = await asyncio.gather(*tasks, return_exceptions=True)
 
                 # 只更新需要处理的元素的 description 字段
-                for element, desc in zip(elements_to_process, descriptions):
+                for element, desc in zip(job.pending, descriptions):
                     if isinstance(desc, Exception):
                         logger.warning(
                             "处理元素 %s 失败: %s",
                             element.id,
                             str(desc),
                         )
-                        desc_result = ""
-                    else:
-                        desc_result = desc
-
-                    # 更新 JSON 中对应元素的 description
-                    for elem in json_data["elements"]:
-                        if not isinstance(elem, dict):
-                            continue
-                        elem_id = elem.get("id", "")
-                        if elem_id == element.id:
-                            if "content" not in elem:
-                                elem["content"] = {}
-                            elem["content"]["description"] = desc_result
-                            break
+                        desc = ""
+                    job.descriptions[element.index] = desc
+                self._apply_descriptions(job)
 
             finally:
                 self.prompt = original_prompt
                 self.current_language = original_language
 
             # 保存处理后的 JSON
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            with output_path.open("w", encoding="utf-8") as f:
-                json.dump(json_data, f, ensure_ascii=False, indent=2)
+            await asyncio.to_thread(self._save_document_job, job)
 
             logger.info(
                 "%s 处理完成：共 %d 个图片，%d 个已有描述，%d 个新处理",
                 doc_id,
-                len(all_elements),
-                len(all_elements) - len(elements_to_process),
-                len(elements_to_process),
+                len(job.all_elements),
+                len(job.all_elements) - len(job.pending),
+                len(job.pending),
             )
 
             return ImageDescriptionResult(
@@ -690,6 +1053,164 @@ class JsonImageDescriptionProcessor:
 
     # ---------------------- 批量处理方法 ----------------------
 
+    @staticmethod
+    def _list_json_files(input_path: Path) -> List[Path]:
+        """列出目录下所有 JSON 文件（不递归，按文件名排序）。"""
+        return sorted(
+            p.resolve()
+            for p in input_path.iterdir()
+            if p.is_file() and p.suffix.lower() == ".json"
+        )
+
+    def _read_image_elements(self, json_file: Path) -> List[ElementInfo]:
+        """读取 JSON 并返回带 image_path 的元素（同步，供线程池调用）。"""
+        with json_file.open("r", encoding="utf-8") as f:
+            existing_data = json.load(f)
+        return self._find_elements_with_image_path(existing_data)
+
+    async def _load_pending_job(
+        self,
+        json_file: Path,
+        output_path: Path,
+        manifest: Dict[str, Dict[str, Any]],
+        skip_existing: bool,
+        stats: BatchProcessResult,
+    ) -> Optional[_DocumentJob]:
+        """加载文档任务；已完成或无需处理的文档计入 stats 并返回 None。
+
+        Args:
+            json_file: JSON 文件路径
+            output_path: 输出目录
+            manifest: 图片数量清单（_load_manifest 的结果）
+            skip_existing: 是否跳过已处理的文件
+            stats: 批量处理统计（原地累加）
+
+        Returns:
+            有待处理图片的文档任务，否则为 None
+        """
+        # 清单记录与文件一致：该文档已完成，直接使用记录中的图片数量
+        entry = manifest.get(json_file.name)
+        if skip_existing and self._manifest_entry_is_current(entry, json_file):
+            logger.info("跳过（清单记录已完成）：%s", json_file.name)
+            stats.skip_count += 1
+            stats.total_images += int(entry.get("total_images", 0))
+            stats.success_images += int(entry.get("success_images", 0))
+            stats.fail_images += int(entry.get("fail_images", 0))
+            return None
+
+        # 根据 parse_stage 判断是否跳过
+        if await asyncio.to_thread(
+            should_skip_stage, json_file, STAGE_IMAGE_DESCRIPTION, skip_existing
+        ):
+            logger.info("跳过（parse_stage 已完成）：%s", json_file.name)
+            stats.skip_count += 1
+
+            # 清单中没有记录时统计一次图片数量并补记
+            try:
+                images = await asyncio.to_thread(self._read_image_elements, json_file)
+                stats.total_images += len(images)
+                stats.success_images += len(images)
+                await asyncio.to_thread(
+                    self._append_manifest,
+                    output_path,
+                    json_file,
+                    len(images),
+                    len(images),
+                    0,
+                )
+            except Exception:
+                pass
+            return None
+
+        try:
+            job = await asyncio.to_thread(
+                self._load_document_job, json_file, output_path / json_file.name
+            )
+            if not job.all_elements:
+                logger.info("%s 没有需要处理的图片元素", job.doc_id)
+                stats.skip_count += 1
+                await asyncio.to_thread(
+                    self._append_manifest, output_path, json_file, 0, 0, 0
+                )
+                return None
+            if not job.pending:
+                logger.info(
+                    "%s 所有 %d 个图片已有描述，跳过处理",
+                    job.doc_id,
+                    len(job.all_elements),
+                )
+                await asyncio.to_thread(
+                    update_parse_stage, str(json_file), STAGE_IMAGE_DESCRIPTION
+                )
+                stats.skip_count += 1
+                stats.total_images += len(job.all_elements)
+                stats.success_images += len(job.all_elements)
+                await asyncio.to_thread(
+                    self._append_manifest,
+                    output_path,
+                    json_file,
+                    len(job.all_elements),
+                    len(job.all_elements),
+                    0,
+                )
+                return None
+        except Exception as e:
+            logger.error("处理失败：%s, 错误信息：%r", json_file.name, e)
+            stats.fail_count += 1
+            return None
+
+        logger.info(
+            "%s 找到 %d 个图片元素，其中 %d 个需要处理",
+            job.doc_id,
+            len(job.all_elements),
+            len(job.pending),
+        )
+        return job
+
+    async def _finish_document_job(
+        self, job: _DocumentJob, output_path: Path, stats: BatchProcessResult
+    ) -> None:
+        """写回文档描述、更新 parse_stage 与清单，并计入 stats。"""
+        try:
+            self._apply_descriptions(job)
+            await asyncio.to_thread(self._save_document_job, job)
+            await asyncio.to_thread(
+                update_parse_stage, str(job.json_path), STAGE_IMAGE_DESCRIPTION
+            )
+        except Exception as e:
+            logger.error("写回失败：%s, 错误信息：%r", job.json_path.name, e)
+            stats.fail_count += 1
+            return
+
+        stats.success_count += 1
+        images, described, missing = self._count_image_descriptions(job)
+        stats.total_images += images
+        stats.success_images += described
+        stats.fail_images += missing
+        await asyncio.to_thread(
+            self._append_manifest, output_path, job.json_path, images, described, missing
+        )
+        logger.info(
+            "%s 处理完成：共 %d 个图片，%d 个已有描述，%d 个新处理",
+            job.doc_id,
+            len(job.all_elements),
+            len(job.all_elements) - len(job.pending),
+            len(job.pending),
+        )
+
+    @staticmethod
+    def _log_batch_result(stats: BatchProcessResult) -> None:
+        logger.info(
+            "批量处理完成：文件总数=%d, 成功=%d, 跳过=%d, 失败=%d, 图片总数=%d, 成功=%d, 失败=%d",
+            stats.total_files,
+            stats.success_count,
+            stats.skip_count,
+            stats.fail_count,
+            stats.total_images,
+            stats.success_images,
+            stats.fail_images,
+        )
+
     async def batch_process(
         self,
         input_dir: Optional[PathLike] = None,
@@ -698,6 +1219,10 @@ class JsonImageDescriptionProcessor:
     ) -> BatchProcessResult:
         """批量处理目录下所有 JSON 文件。
 
+        所有文档的待处理图片进入同一个全局队列，由 max_concurrent_tasks 个 worker
+        共享同一个并发限制（self.semaphore，摘要生成也受其约束）消费；
+        某个文档的图片全部完成后立即写回该文档，不必等待其他文档。
+
         Args:
             input_dir: 输入目录（JSON 文件所在目录）
             output_dir: 输出目录
@@ -713,138 +1238,283 @@ class JsonImageDescriptionProcessor:
             raise ImageDescriptionError(f"输入目录不存在：{input_path}")
 
         # 查找所有 JSON 文件
-        json_files = [
-            p.resolve()
-            for p in input_path.iterdir()
-            if p.is_file() and p.suffix.lower() == ".json"
-        ]
+        json_files = self._list_json_files(input_path)
+        stats = BatchProcessResult(
+            total_files=len(json_files),
+            success_count=0,
+            skip_count=0,
+            fail_count=0,
+            total_images=0,
+            success_images=0,
+            fail_images=0,
+        )
 
         if not json_files:
             logger.warning("在 %s 中未找到 JSON 文件", input_path)
-            return BatchProcessResult(
-                total_files=0,
-                success_count=0,
-                skip_count=0,
-                fail_count=0,
-                total_images=0,
-                success_images=0,
-                fail_images=0,
-            )
+            return stats
 
         logger.info("开始批量处理，共找到 %d 个 JSON 文件", len(json_files))
 
-        # 顺序处理每个文件
-        success_count = 0
-        skip_count = 0
-        fail_count = 0
-        total_images = 0
-        success_images = 0
-        fail_images = 0
+        # 全局图片队列：(文档任务, 图片元素)；有界队列对文档加载形成背压
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_concurrent_tasks * 4)
+        prepare_semaphore = asyncio.Semaphore(self.max_concurrent_tasks)
 
-        for i, json_file in enumerate(sorted(json_files), start=1):
-            logger.info("[%d/%d] 处理：%s", i, len(json_files), json_file.name)
+        # 已完成文档的图片数量清单：文件未改动时直接复用，不再重新读取 JSON
+        manifest = await asyncio.to_thread(self._load_manifest, output_path)
 
-            # 根据 parse_stage 判断是否跳过
-            if should_skip_stage(json_file, STAGE_IMAGE_DESCRIPTION, skip_existing):
-                logger.info(
-                    "跳过（parse_stage 已完成）：%s (当前阶段: %s)",
-                    json_file.name,
-                    (
-                        json_file.parent / json_file.name
-                        if hasattr(json_file, "parent")
-                        else json_file
-                    ),
-                )
-                skip_count += 1
+        async def prepare_document(index: int, json_file: Path) -> None:
+            """加载文档、准备摘要，并将待处理图片放入全局队列。"""
+            logger.info("[%d/%d] 处理：%s", index, len(json_files), json_file.name)
 
-                # 统计已处理文件中的图片数量
+            async with prepare_semaphore:
+                job = await self._load_pending_job(
+                    json_file, output_path, manifest, skip_existing, stats
+                )
+                if job is None:
+                    return
                 try:
-                    with json_file.open("r", encoding="utf-8") as f:
-                        existing_data = json.load(f)
-                    images = self._find_elements_with_image_path(existing_data)
-                    total_images += len(images)
-                    success_images += len(images)
-                except Exception:
-                    pass
-                continue
-
-            try:
-                result = await self.process_single_json(
-                    json_path=json_file,
-                    output_dir=output_path,
+                    job.document_summary = await self._resolve_document_summary(job)
+                except Exception as e:
+                    logger.error("处理失败：%s, 错误信息：%r", json_file.name, e)
+                    stats.fail_count += 1
+                    return
+
+            for element in job.pending:
+                await queue.put((job, element))
+
+        async def image_worker() -> None:
+            """消费全局图片队列，文档的最后一张图片完成时触发写回。"""
+            while True:
+                item = await queue.get()
+                if item is None:
+                    queue.task_done()
+                    return
+                job, element = item
+                try:
+                    desc = await self._describe_element(job, element)
+                except Exception as e:
+                    logger.warning("处理元素 %s 失败: %s", element.id, str(e))
+                    desc = ""
+                job.descriptions[element.index] = desc
+                job.remaining -= 1
+                if job.remaining == 0:
+                    await self._finish_document_job(job, output_path, stats)
+                queue.task_done()
+
+        workers = [
+            asyncio.create_task(image_worker())
+            for _ in range(self.max_concurrent_tasks)
+        ]
+        try:
+            await asyncio.gather(
+                *(
+                    prepare_document(i, json_file)
+                    for i, json_file in enumerate(json_files, start=1)
+                )
+            )
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                if not worker.done():
+                    worker.cancel()
+
+        for llm in (self.llm_vision, self.llm_summary):
+            scheduler = getattr(llm, "scheduler", None)
+            if scheduler is not None:
+                logger.info("LLM 调度器状态：%s", scheduler.stats())
+
+        self._log_batch_result(stats)
+        return stats
+
+    # ---------------------- 离线批处理方法 ----------------------
+
+    @staticmethod
+    def _description_custom_id(job: _DocumentJob, element: ElementInfo) -> str:
+        return f"{job.json_path.name}::{element.index}"
+
+    def _iter_description_requests(
+        self, jobs: List[_DocumentJob]
+    ) -> Iterator[Dict[str, Any]]:
+        """逐条生成图片描述的批处理请求（同步，供线程池调用；图片读取后立即写出）。
+
+        custom_id 为 "{JSON 文件名}::{元素下标}"（元素 id 可能为空或重复，下标在文档内唯一），
+        结果按元素下标写回对应文档。
+        """
+        for job in jobs:
+            for element in job.pending:
+                base64_image, mime_type = self._prepare_image_payload_sync(
+                    Path(element.image_path)
+                )
+                if not base64_image:
+                    logger.warning("图片不存在或无法读取，跳过：%s", element.image_path)
+                    continue
+                img_type = _detect_image_type(element.image_path, element.type)
+                prompt = self._get_prompt_by_language_and_type(job.language, img_type)
+                data_url = f"data:{mime_type or 'image/jpeg'};base64,{base64_image}"
+                yield build_chat_request(
+                    self._description_custom_id(job, element),
+                    self.llm_vision,
+                    [
+                        {
+                            "type": "text",
+                            "text": prompt.format(document_summary=job.document_summary),
+                        },
+                        {"type": "image_url", "image_url": {"url": data_url}},
+                    ],
                 )
 
-                # 处理成功后更新 parse_stage
-                if result.success and result.error_message != "无图片元素":
-                    update_parse_stage(str(json_file), STAGE_IMAGE_DESCRIPTION)
-
-                if result.success:
-                    if result.error_message in ("无图片元素", "所有图片已有描述"):
-                        skip_count += 1
-                        # 统计已跳过文件中的图片数量
-                        try:
-                            output_file = output_path / json_file.name
-                            with output_file.open("r", encoding="utf-8") as f:
-                                processed_data = json.load(f)
-                            images = self._find_elements_with_image_path(processed_data)
-                            total_images += len(images)
-                            success_images += len(images)
-                        except Exception:
-                            pass
-                    else:
-                        success_count += 1
-                        # 统计图片数量
-                        output_file = output_path / json_file.name
-                        if output_file.exists():
-                            try:
-                                with output_file.open("r", encoding="utf-8") as f:
-                                    processed_data = json.load(f)
-                                images = self._find_elements_with_image_path(
-                                    processed_data
-                                )
-                                total_images += len(images)
-                                # 正确统计：遍历元素，检查每个元素的 description
-                                for element in processed_data.get("elements", []):
-                                    if not isinstance(element, dict):
-                                        continue
-                                    source = element.get("source", {})
-                                    if source.get("image_path"):
-                                        desc = element.get("content", {}).get(
-                                            "description", ""
-                                        )
-                                        if desc:
-                                            success_images += 1
-                                        else:
-                                            fail_images += 1
-                            except Exception:
-                                pass
-                else:
-                    fail_count += 1
+    async def batch_process_offline(
+        self,
+        input_dir: Optional[PathLike] = None,
+        output_dir: Optional[PathLike] = None,
+        skip_existing: bool = True,
+        backend: Optional[LlmBatchBackend] = None,
+        work_dir: Optional[PathLike] = None,
+    ) -> BatchProcessResult:
+        """离线批处理模式：通过 LLM 批处理接口回填全库的文档摘要与图片描述。
 
-            except Exception as e:
-                logger.error("处理失败：%s, 错误信息：%r", json_file.name, e)
-                fail_count += 1
+        分两个阶段提交：
+        1. 缺少 metadata.abstract 的文档生成摘要（custom_id 为 "summary::{JSON 文件名}"）；
+        2. 所有待处理图片生成描述（custom_id 为 "{JSON 文件名}::{元素下标}"）。
 
-        logger.info(
-            "批量处理完成：文件总数=%d, 成功=%d, 跳过=%d, 失败=%d, 图片总数=%d, 成功=%d, 失败=%d",
-            len(json_files),
-            success_count,
-            skip_count,
-            fail_count,
-            total_images,
-            success_images,
-            fail_images,
+        每个阶段的任务文件与结果保存在 work_dir 下，中断后重新运行会继续等待已提交的批次。
+        批处理请求不经过交互式调用的调度器，不占用在线请求的限流配额。
+
+        Args:
+            input_dir: 输入目录（JSON 文件所在目录）
+            output_dir: 输出目录
+            skip_existing: 是否跳过已处理的文件（根据 parse_stage 判断）
+            backend: 批处理后端，默认按配置 LLM_BATCH_BACKEND 创建
+            work_dir: 任务文件目录，默认 LLM_BATCH_WORK_DIR/image_description
+
+        Returns:
+            BatchProcessResult 批量处理结果统计
+        """
+        input_path = Path(input_dir) if input_dir else self.json_store_dir
+        output_path = Path(output_dir) if output_dir else self.output_dir
+        batch_dir = (
+            Path(work_dir)
+            if work_dir
+            else Path(LLM_BATCH_WORK_DIR) / "image_description"
         )
 
-        return BatchProcessResult(
+        if not input_path.exists():
+            raise ImageDescriptionError(f"输入目录不存在：{input_path}")
+
+        if backend is None:
+            backend = get_llm_batch_backend(
+                llms={
+                    llm_model_name(self.llm_vision): self.llm_vision,
+                    llm_model_name(self.llm_summary): self.llm_summary,
+                }
+            )
+
+        json_files = self._list_json_files(input_path)
+        stats = BatchProcessResult(
             total_files=len(json_files),
-            success_count=success_count,
-            skip_count=skip_count,
-            fail_count=fail_count,
-            total_images=total_images,
-            success_images=success_images,
-            fail_images=fail_images,
+            success_count=0,
+            skip_count=0,
+            fail_count=0,
+            total_images=0,
+            success_images=0,
+            fail_images=0,
         )
+        if not json_files:
+            logger.warning("在 %s 中未找到 JSON 文件", input_path)
+            return stats
+
+        logger.info(
+            "开始离线批处理（%s 后端），共找到 %d 个 JSON 文件", backend.name, len(json_files)
+        )
+
+        manifest = await asyncio.to_thread(self._load_manifest, output_path)
+        prepare_semaphore = asyncio.Semaphore(self.max_concurrent_tasks)
+
+        async def load(json_file: Path) -> Optional[_DocumentJob]:
+            async with prepare_semaphore:
+                return await self._load_pending_job(
+                    json_file, output_path, manifest, skip_existing, stats
+                )
+
+        jobs = [job for job in await asyncio.gather(*map(load, json_files)) if job]
+        if not jobs:
+            self._log_batch_result(stats)
+            return stats
+
+        # 阶段一：文档摘要
+        summary_requests: List[Dict[str, Any]] = []
+        for job in jobs:
+            abstract = self._extract_abstract_from_json(job.json_data, job.language)
+            if abstract:
+                job.document_summary = abstract
+                continue
+            prompt_text = self._build_summary_prompt(
+                job.json_data, job.language, job.doc_id
+            )
+            if prompt_text:
+                summary_requests.append(
+                    build_chat_request(
+                        f"summary::{job.json_path.name}", self.llm_summary, prompt_text
+                    )
+                )
+
+        if summary_requests:
+            logger.info("阶段一：提交 %d 个文档摘要请求", len(summary_requests))
+            summary_files = await asyncio.to_thread(
+                write_batch_files, summary_requests, batch_dir, "summary"
+            )
+            summaries = await arun_batch_files(backend, summary_files)
+            for job in jobs:
+                result = summaries.get(f"summary::{job.json_path.name}")
+                if result is not None and not result.success:
+                    logger.warning("%s 摘要生成失败：%s", job.doc_id, result.error)
+                elif result is not None:
+                    job.document_summary = result.content
+        for job in jobs:
+            if not job.document_summary:
+                job.document_summary = "无法获取文档摘要"
+
+        # 阶段二：图片描述（图片在写出任务文件时逐张读取、预处理，不在内存中汇总）
+        description_files = await asyncio.to_thread(
+            write_batch_files, self._iter_description_requests(jobs), batch_dir, "image"
+        )
+        logger.info("阶段二：提交图片描述请求，共 %d 个任务文件", len(description_files))
+        descriptions = await arun_batch_files(backend, description_files)
+
+        # 按元素下标写回；只有全部待处理图片都拿到描述的文档才写回并标记完成，
+        # 其余文档不改动 parse_stage 与清单，重新运行时会再次提交
+        failed = 0
+        incomplete = 0
+        for job in jobs:
+            missing = 0
+            for element in job.pending:
+                result = descriptions.get(self._description_custom_id(job, element))
+                if result is None or not result.success:
+                    missing += 1
+                    if result is not None:
+                        logger.warning("处理元素 %s 失败: %s", element.id, result.error)
+                else:
+                    job.descriptions[element.index] = result.content
+            if missing:
+                failed += missing
+                incomplete += 1
+                stats.fail_count += 1
+                stats.total_images += len(job.all_elements)
+                stats.success_images += len(job.all_elements) - missing
+                stats.fail_images += missing
+                continue
+            await self._finish_document_job(job, output_path, stats)
+        if failed:
+            logger.warning(
+                "离线批处理有 %d 张图片未生成描述（%d 个文档未写回），可重新运行补齐",
+                failed,
+                incomplete,
+            )
+
+        self._log_batch_result(stats)
+        return stats
 
     # ---------------------- 同步接口（兼容性） ----------------------
 
@@ -852,6 +1522,10 @@ class JsonImageDescriptionProcessor:
         """执行批量处理的主流程（同步版本）。"""
         asyncio.run(self.batch_process(skip_existing=True))
 
+    def run_offline(self) -> None:
+        """执行离线批处理模式的主流程（同步版本）。"""
+        asyncio.run(self.batch_process_offline(skip_existing=True))
+
 
 # ---------------------- 独立运行调试示例 ----------------------
 
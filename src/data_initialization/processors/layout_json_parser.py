@@ -53,10 +53,17 @@ import json
 import logging
 import os
 import re
+import zipfile
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from src.config.settings import PROJECT_ROOT, STAGE_LAYOUT_JSON_PARSED
+from src.data_initialization.utils.mineru_zip import (
+    extract_members,
+    find_mineru_members,
+    read_zip_json,
+    referenced_image_members,
+)
 
 # ---------------------- 类型与日志配置 ----------------------
 
@@ -374,7 +381,7 @@ class ElementExtractor:
     从 MinerU 生成的多个 JSON 文件中融合数据，提取文档元素。
 
     功能：
-    1. 并行加载 4 个 JSON 文件
+    1. 并行加载 4 个 JSON 文件（可直接从 MinerU 结果 zip 中读取，见 read_from_zip）
     2. 融合多源数据（content_list_v2.json 为主，其他为辅）
     3. 生成符合 RAG 嵌入数据格式的 JSON
 
@@ -415,13 +422,17 @@ class ElementExtractor:
         self,
         output_dir: Optional[PathLike] = None,
         work_dir: Optional[PathLike] = None,
+        zip_dir: Optional[PathLike] = None,
+        read_from_zip: bool = False,
     ) -> None:
         """
         初始化 ElementExtractor。
 
         Args:
             output_dir: 输出目录（默认：PROJECT_ROOT/files/file_store/json_store）
-            work_dir: MinerU work 目录（用于查找 JSON 文件）
+            work_dir: MinerU work 目录（用于查找 JSON 文件；从 zip 读取时作为图片解压目录）
+            zip_dir: MinerU 结果 zip 目录（默认：PROJECT_ROOT/files/file_store/zip_store/minerU_zip）
+            read_from_zip: 是否直接从 zip_dir/{doc_name}.zip 读取 JSON（zip 不存在时回退到 work 目录）
         """
         self._project_root = PROJECT_ROOT
         self.output_dir = (
@@ -438,6 +449,12 @@ class ElementExtractor:
             / "md_store"
             / "minerU_work"
         )
+        self.zip_dir = (
+            Path(zip_dir)
+            if zip_dir
+            else self._project_root / "files" / "file_store" / "zip_store" / "minerU_zip"
+        )
+        self.read_from_zip = read_from_zip
 
     # ---------------------- 文件加载 ----------------------
 
@@ -514,6 +531,36 @@ class ElementExtractor:
             for key, result in zip(tasks.keys(), results)
         }
 
+    def _load_all_json_files_from_zip_sync(
+        self, zip_path: Path, doc_dir: Path
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        从 MinerU 结果 zip 中读取所有 JSON 文件（同步，供线程池调用）。
+
+        按 zip 中央目录定位各 JSON，只打开一次 zip；content_list 引用的图片按需解压到
+        doc_dir（已存在且大小一致时跳过），保证元素的 image_path 可用。
+
+        Returns:
+            (与 _load_all_json_files 相同结构的数据, uuid)
+        """
+        with zipfile.ZipFile(zip_path, "r") as zf:
+            members = find_mineru_members(zf.namelist())
+            content_list_v2 = read_zip_json(zf, members.content_list_v2)
+            content_list_json = read_zip_json(zf, members.content_list)
+            model_json = read_zip_json(zf, members.model_json)
+            layout_json = read_zip_json(zf, members.layout_json)
+            extract_members(zf, referenced_image_members(zf, members), doc_dir)
+
+        return (
+            {
+                "content_list_v2": content_list_v2 if isinstance(content_list_v2, list) else [],
+                "content_list_json": content_list_json if isinstance(content_list_json, list) else [],
+                "model_json": model_json if isinstance(model_json, list) else [],
+                "layout_json": layout_json if isinstance(layout_json, dict) else {},
+            },
+            members.uuid,
+        )
+
     # ---------------------- 元素提取核心逻辑 ----------------------
 
     def _extract_table_info(self, element: Dict, doc_dir: Path) -> Dict[str, Any]:
@@ -1012,35 +1059,47 @@ class ElementExtractor:
         self,
         doc_name: str,
         work_dir: Optional[PathLike] = None,
+        zip_path: Optional[PathLike] = None,
     ) -> ExtractionResult:
         """
-        从文档目录提取所有元素。
+        从文档目录（或 MinerU 结果 zip）提取所有元素。
 
         Args:
             doc_name: 文档目录名（如 "基于遗传算法的校园路径规划研究"）
             work_dir: MinerU work 目录（默认使用初始化时的目录）
+            zip_path: MinerU 结果 zip；为 None 且 read_from_zip 时使用 zip_dir/{doc_name}.zip
 
         Returns:
             ExtractionResult：包含元素列表和文档元数据
         """
         doc_dir = (Path(work_dir) if work_dir else self.work_dir) / doc_name
 
-        if not doc_dir.exists():
-            raise ElementExtractorError(f"文档目录不存在：{doc_dir}")
+        if zip_path is None and self.read_from_zip:
+            zip_path = self.zip_dir / f"{doc_name}.zip"
+        zip_file = Path(zip_path) if zip_path else None
 
-        # 查找 UUID（用于构建 content_list.json 和 model.json 文件名）
-        uuid = ""
-        for item in doc_dir.iterdir():
-            if item.is_file() and item.name.endswith("_content_list.json"):
-                uuid = item.name.replace("_content_list.json", "")
-                break
+        if zip_file is not None and await asyncio.to_thread(zip_file.is_file):
+            # 直接从 zip 读取 JSON，无需事先解压
+            json_data, uuid = await asyncio.to_thread(
+                self._load_all_json_files_from_zip_sync, zip_file, doc_dir
+            )
+        else:
+            if not doc_dir.exists():
+                raise ElementExtractorError(f"文档目录不存在：{doc_dir}")
+
+            # 查找 UUID（用于构建 content_list.json 和 model.json 文件名）
+            uuid = ""
+            for item in doc_dir.iterdir():
+                if item.is_file() and item.name.endswith("_content_list.json"):
+                    uuid = item.name.replace("_content_list.json", "")
+                    break
+
+            # 加载所有 JSON 文件
+            json_data = await self._load_all_json_files(doc_dir, uuid)
 
         if not uuid:
             logger.warning("未找到 {uuid}_content_list.json 文件，将跳过部分字段补充")
 
-        # 加载所有 JSON 文件
-        json_data = await self._load_all_json_files(doc_dir, uuid)
-
         content_list_v2 = json_data.get("content_list_v2", [])
         content_list_json = json_data.get("content_list_json", [])
         layout_json = json_data.get("layout_json", {})
@@ -1226,7 +1285,7 @@ class ElementExtractor:
         """
         dir_path = Path(work_dir) if work_dir else self.work_dir
 
-        if not dir_path.exists():
+        if not dir_path.exists() and not self.read_from_zip:
             raise ElementExtractorError(f"目录不存在：{dir_path}")
 
         # 确定输出目录
@@ -1240,11 +1299,21 @@ class ElementExtractor:
         fail_count = 0
         skip_count = 0
 
-        for doc_dir in sorted(dir_path.iterdir()):
-            if not doc_dir.is_dir():
-                continue
+        # 文档列表：work 目录下的子目录（跳过 . 开头的临时目录），
+        # 从 zip 读取时再加上 zip_dir 下的 *.zip
+        doc_names = (
+            {p.name for p in dir_path.iterdir() if p.is_dir() and not p.name.startswith(".")}
+            if dir_path.exists()
+            else set()
+        )
+        if self.read_from_zip and self.zip_dir.exists():
+            doc_names.update(
+                p.stem
+                for p in self.zip_dir.iterdir()
+                if p.is_file() and p.suffix.lower() == ".zip"
+            )
 
-            doc_name = doc_dir.name
+        for doc_name in sorted(doc_names):
 
             # 检查是否已存在（文件名与 md 文件一致）
             output_file = output_dir / f"{doc_name}.json"
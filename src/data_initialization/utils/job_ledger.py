@@ -0,0 +1,272 @@
+# src/data_initialization/utils/job_ledger.py
+
+"""
+PDF 转换任务台账（SQLite）
+
+记录每个 PDF（或超大 PDF 的每个分段）在 MinerU API 转换中的进度，进程崩溃或重启后据此续跑：
+
+    pending → uploaded（已上传，记录 file_url）
+            → submitted（已创建 MinerU 任务，记录 task_id）
+            → done（任务完成，记录 zip_url）
+            → downloaded（结果 zip 已下载，记录 zip_path；解压后记录各产物路径 artifacts）
+    任一阶段失败 → failed（记录错误，保留已有的 file_url 等字段）
+
+- 台账存放在 PDF_TO_MD_JOB_LEDGER_PATH（独立的 SQLite 文件，不进版本管理）的 pdf_conversion_jobs 表
+- 以 PDF 绝对路径为键，并记录文件大小与修改时间；PDF 变化后旧记录自动作废
+- 每次状态变化立即提交（WAL 模式），崩溃时最多丢失正在进行的一步
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from src.config.settings import PDF_TO_MD_JOB_LEDGER_PATH
+from src.data_initialization.utils.mineru_zip import MineruArtifacts
+
+# ---------------------- 类型与日志配置 ----------------------
+
+PathLike = Union[str, os.PathLike]
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------- 数据结构 ----------------------
+
+
+class JobState:
+    """转换任务状态。"""
+
+    PENDING = "pending"
+    UPLOADED = "uploaded"
+    SUBMITTED = "submitted"
+    DONE = "done"
+    DOWNLOADED = "downloaded"
+    FAILED = "failed"
+
+
+@dataclass
+class ConversionJob:
+    """台账中的一条转换任务记录。"""
+
+    pdf_path: str
+    file_size: int
+    mtime_ns: int
+    state: str = JobState.PENDING
+    file_url: Optional[str] = None
+    task_id: Optional[str] = None
+    zip_url: Optional[str] = None
+    zip_path: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    updated_at: float = 0.0
+    artifacts: Optional[str] = None  # MineruArtifacts.to_dict() 的 JSON
+
+
+_COLUMNS = (
+    "pdf_path",
+    "file_size",
+    "mtime_ns",
+    "state",
+    "file_url",
+    "task_id",
+    "zip_url",
+    "zip_path",
+    "error",
+    "attempts",
+    "updated_at",
+    "artifacts",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pdf_conversion_jobs (
+    pdf_path   TEXT PRIMARY KEY,
+    file_size  INTEGER NOT NULL,
+    mtime_ns   INTEGER NOT NULL,
+    state      TEXT NOT NULL,
+    file_url   TEXT,
+    task_id    TEXT,
+    zip_url    TEXT,
+    zip_path   TEXT,
+    error      TEXT,
+    attempts   INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    artifacts  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pdf_conversion_jobs_state ON pdf_conversion_jobs(state);
+"""
+
+
+# ---------------------- 台账 ----------------------
+
+
+class ConversionJobLedger:
+    """
+    PDF 转换任务台账。
+
+    方法均为同步调用（SQLite），异步代码中通过 asyncio.to_thread 调用；
+    内部共用一个连接并加锁，可在多个线程中使用。
+
+    Args:
+        db_path: SQLite 文件路径，默认 PDF_TO_MD_JOB_LEDGER_PATH
+    """
+
+    def __init__(self, db_path: Optional[PathLike] = None) -> None:
+        self.db_path = Path(db_path or PDF_TO_MD_JOB_LEDGER_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._migrate()
+            self._conn.commit()
+
+    def _migrate(self) -> None:
+        """为旧版本创建的表补充新增列。"""
+        existing = {
+            row["name"]
+            for row in self._conn.execute("PRAGMA table_info(pdf_conversion_jobs)")
+        }
+        if "artifacts" not in existing:
+            self._conn.execute("ALTER TABLE pdf_conversion_jobs ADD COLUMN artifacts TEXT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ---------------------- 查询 ----------------------
+
+    @staticmethod
+    def _key(pdf_path: PathLike) -> str:
+        return str(Path(pdf_path).resolve())
+
+    def get(self, pdf_path: PathLike) -> Optional[ConversionJob]:
+        """返回 PDF 的任务记录；PDF 已变化（大小或修改时间不同）时返回 None。"""
+        key = self._key(pdf_path)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM pdf_conversion_jobs WHERE pdf_path = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        job = ConversionJob(**dict(row))
+        try:
+            stat = os.stat(key)
+        except OSError:
+            return job
+        if stat.st_size != job.file_size or stat.st_mtime_ns != job.mtime_ns:
+            logger.info("PDF 已变化，忽略旧的转换记录：%s", key)
+            return None
+        return job
+
+    def get_artifacts(self, pdf_path: PathLike) -> Optional[MineruArtifacts]:
+        """返回台账记录的产物路径；无记录或未记录产物时返回 None。"""
+        job = self.get(pdf_path)
+        if job is None or not job.artifacts:
+            return None
+        try:
+            return MineruArtifacts.from_dict(json.loads(job.artifacts))
+        except (ValueError, TypeError) as e:
+            logger.warning("台账中的产物路径无法解析：%s, 错误：%s", pdf_path, e)
+            return None
+
+    def list_jobs(self, state: Optional[str] = None) -> List[ConversionJob]:
+        """列出任务记录（可按状态过滤）。"""
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM pdf_conversion_jobs"
+        params: tuple = ()
+        if state:
+            sql += " WHERE state = ?"
+            params = (state,)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY updated_at", params).fetchall()
+        return [ConversionJob(**dict(row)) for row in rows]
+
+    # ---------------------- 状态更新 ----------------------
+
+    def _update(
+        self, pdf_path: PathLike, state: str, new_attempt: bool = False, **fields: Any
+    ) -> None:
+        """写入一次状态变化；PDF 变化时先清空旧记录中的其余字段。"""
+        key = self._key(pdf_path)
+        stat = os.stat(key)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file_size, mtime_ns FROM pdf_conversion_jobs WHERE pdf_path = ?",
+                (key,),
+            ).fetchone()
+            if row is not None and (
+                row["file_size"] != stat.st_size or row["mtime_ns"] != stat.st_mtime_ns
+            ):
+                self._conn.execute("DELETE FROM pdf_conversion_jobs WHERE pdf_path = ?", (key,))
+                row = None
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO pdf_conversion_jobs "
+                    "(pdf_path, file_size, mtime_ns, state, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, stat.st_size, stat.st_mtime_ns, JobState.PENDING, now, now),
+                )
+
+            assignments: Dict[str, Any] = {"state": state, "updated_at": now, **fields}
+            sql = ", ".join(f"{column} = ?" for column in assignments)
+            if new_attempt:
+                sql += ", attempts = attempts + 1"
+            self._conn.execute(
+                f"UPDATE pdf_conversion_jobs SET {sql} WHERE pdf_path = ?",
+                (*assignments.values(), key),
+            )
+            self._conn.commit()
+
+    def record_upload(self, pdf_path: PathLike, file_url: str) -> None:
+        self._update(pdf_path, JobState.UPLOADED, file_url=file_url, error=None)
+
+    def record_task(self, pdf_path: PathLike, task_id: str) -> None:
+        self._update(
+            pdf_path,
+            JobState.SUBMITTED,
+            new_attempt=True,
+            task_id=task_id,
+            zip_url=None,
+            error=None,
+        )
+
+    def record_done(self, pdf_path: PathLike, zip_url: str) -> None:
+        self._update(pdf_path, JobState.DONE, zip_url=zip_url, error=None)
+
+    def record_downloaded(self, pdf_path: PathLike, zip_path: PathLike) -> None:
+        self._update(pdf_path, JobState.DOWNLOADED, zip_path=str(zip_path), error=None)
+
+    def record_artifacts(self, pdf_path: PathLike, artifacts: MineruArtifacts) -> None:
+        """记录结果解压后各产物的本地路径（full.md、layout.json 等）。"""
+        self._update(
+            pdf_path,
+            JobState.DOWNLOADED,
+            artifacts=json.dumps(artifacts.to_dict(), ensure_ascii=False),
+            error=None,
+        )
+
+    def record_failed(self, pdf_path: PathLike, error: str, clear_task: bool = False) -> None:
+        """记录失败；clear_task 为 True 时清除 task_id / zip_url，下次重新提交任务。"""
+        fields: Dict[str, Any] = {"error": error[:2000]}
+        if clear_task:
+            fields.update(task_id=None, zip_url=None)
+        self._update(pdf_path, JobState.FAILED, **fields)
+
+    def forget(self, pdf_path: PathLike) -> None:
+        """删除记录（如超大 PDF 拼接完成后删除各分段的记录）。"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM pdf_conversion_jobs WHERE pdf_path = ?", (self._key(pdf_path),)
+            )
+            self._conn.commit()
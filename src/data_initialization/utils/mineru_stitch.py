@@ -0,0 +1,171 @@
+# src/data_initialization/utils/mineru_stitch.py
+
+"""
+MinerU 分段结果拼接工具
+
+长 PDF 按页段拆分后分别解析，每段得到一份与 API 结果 zip 布局一致的目录
+（full.md、content_list_v2.json、{uuid}_content_list.json、{uuid}_model.json、
+layout.json、images/），页码均从 0 开始。本模块把各段按页序拼接为一份完整结果：
+
+- content_list_v2.json / {uuid}_model.json：按页的列表，直接按段顺序拼接
+- {uuid}_content_list.json：各元素 page_idx 加上段起始页
+- layout.json：pdf_info 各页 page_idx 加上段起始页，其余字段取第一段
+- full.md：按段顺序拼接
+- images/：合并（图片名为内容哈希，各段不会冲突）
+
+本地 MinerU 后端与 API 分段上传共用。
+"""
+
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from src.data_initialization.utils.mineru_zip import (
+    CONTENT_LIST_SUFFIX,
+    CONTENT_LIST_V2_NAME,
+    FULL_MD_NAME,
+    LAYOUT_JSON_NAME,
+    MODEL_JSON_SUFFIX,
+    locate_dir_artifacts,
+)
+
+# ---------------------- 类型与日志配置 ----------------------
+
+PathLike = Union[str, os.PathLike]
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------- 页段划分 ----------------------
+
+
+def page_ranges(total_pages: int, shard_pages: int) -> List[Tuple[int, int]]:
+    """把 [0, total_pages) 划分为不超过 shard_pages 页的左闭右开区间。"""
+    if total_pages <= 0:
+        return [(0, 0)]
+    shard_pages = max(1, shard_pages)
+    return [
+        (start, min(start + shard_pages, total_pages))
+        for start in range(0, total_pages, shard_pages)
+    ]
+
+
+# ---------------------- 读取 ----------------------
+
+
+def _read_json(path: Optional[Path]) -> Any:
+    if path is None or not path.is_file():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        logger.warning("读取 JSON 失败：%s, 错误：%s", path, e)
+        return None
+
+
+def _write_json(path: Path, data: Any) -> None:
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+# ---------------------- 拼接 ----------------------
+
+
+def _merge_images(src_dir: Path, dst_dir: Path) -> int:
+    """把分段的 images/ 合并到目标目录，同名文件只保留一份。"""
+    if not src_dir.is_dir():
+        return 0
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    moved = 0
+    for src in src_dir.iterdir():
+        dst = dst_dir / src.name
+        if src.is_file() and not dst.exists():
+            shutil.move(str(src), str(dst))
+            moved += 1
+    return moved
+
+
+def stitch_shard_dirs(
+    shards: Sequence[Tuple[int, PathLike]],
+    output_dir: PathLike,
+    uuid: str,
+) -> str:
+    """
+    把各页段的结果目录拼接为一份完整结果，写入 output_dir。
+
+    分段目录中的图片会被移动到 output_dir/images，其余文件保持不变。
+
+    Args:
+        shards: (段起始页, 段结果目录) 列表
+        output_dir: 输出目录（需为空目录或不存在）
+        uuid: 输出 {uuid}_content_list.json / {uuid}_model.json 使用的前缀
+
+    Returns:
+        拼接后的 full.md 内容
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    md_parts: List[str] = []
+    content_list_v2: List[Any] = []
+    content_list: List[Dict[str, Any]] = []
+    model_json: List[Any] = []
+    layout: Dict[str, Any] = {}
+    layout_pages: List[Dict[str, Any]] = []
+    image_count = 0
+
+    for page_offset, shard_dir in sorted(shards, key=lambda s: s[0]):
+        shard_path = Path(shard_dir)
+        files = locate_dir_artifacts(shard_path)
+
+        if files.full_md is not None:
+            md_parts.append(files.full_md.read_text(encoding="utf-8").strip("\n"))
+
+        shard_layout = _read_json(files.layout_json) or {}
+        pages = shard_layout.get("pdf_info") or []
+        for page in pages:
+            page = dict(page)
+            page["page_idx"] = int(page.get("page_idx", 0)) + page_offset
+            layout_pages.append(page)
+        if not layout:
+            layout = {k: v for k, v in shard_layout.items() if k != "pdf_info"}
+
+        shard_v2 = _read_json(files.content_list_v2)
+        if isinstance(shard_v2, list):
+            content_list_v2.extend(shard_v2)
+        else:
+            # 缺少 content_list_v2 时按页数补空页，保持后续段页码对齐
+            logger.warning("分段缺少 content_list_v2.json，以空页补齐：%s", shard_path)
+            content_list_v2.extend([] for _ in pages)
+
+        for item in _read_json(files.content_list) or []:
+            item = dict(item)
+            if item.get("page_idx") is not None:
+                item["page_idx"] = int(item["page_idx"]) + page_offset
+            content_list.append(item)
+
+        shard_model = _read_json(files.model_json)
+        if isinstance(shard_model, list):
+            model_json.extend(shard_model)
+
+        image_count += _merge_images(shard_path / "images", output_path / "images")
+
+    layout["pdf_info"] = layout_pages
+    full_md = "\n\n".join(part for part in md_parts if part) + "\n"
+
+    (output_path / FULL_MD_NAME).write_text(full_md, encoding="utf-8")
+    _write_json(output_path / CONTENT_LIST_V2_NAME, content_list_v2)
+    _write_json(output_path / f"{uuid}{CONTENT_LIST_SUFFIX}", content_list)
+    _write_json(output_path / f"{uuid}{MODEL_JSON_SUFFIX}", model_json)
+    _write_json(output_path / LAYOUT_JSON_NAME, layout)
+
+    logger.debug(
+        "拼接完成：%d 段，%d 页，%d 张图片 -> %s",
+        len(shards),
+        len(layout_pages),
+        image_count,
+        output_path,
+    )
+    return full_md
@@ -0,0 +1,265 @@
+# src/data_initialization/utils/mineru_zip.py
+
+"""
+MinerU 结果 zip 读取工具
+
+按 zip 中央目录（namelist）定位 MinerU 产物，无需整体解压或遍历目录：
+
+- full.md
+- content_list_v2.json、{uuid}_content_list.json、{uuid}_model.json、layout.json
+- 被 content_list 引用的图片（images/...）
+
+提供按需解压（已存在且大小一致的文件不重复写出）与直接读取 zip 内 JSON 的能力，
+供 pdf_to_md（解压）与 layout_json_parser（从 zip 读取 JSON）共用。
+
+解压后各产物的本地路径由 MineruArtifacts 描述，转换结果与任务台账直接记录该路径，
+后续阶段无需再在工作目录中查找 layout.json 等文件。
+"""
+
+import json
+import logging
+import os
+import re
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+# ---------------------- 类型与日志配置 ----------------------
+
+PathLike = Union[str, os.PathLike]
+
+logger = logging.getLogger(__name__)
+
+# MinerU 产物文件名
+FULL_MD_NAME = "full.md"
+CONTENT_LIST_V2_NAME = "content_list_v2.json"
+LAYOUT_JSON_NAME = "layout.json"
+CONTENT_LIST_SUFFIX = "_content_list.json"
+MODEL_JSON_SUFFIX = "_model.json"
+
+# content_list 中引用图片的相对路径
+_IMAGE_REF_PATTERN = re.compile(r"images/[^\"\\\s]+")
+
+
+# ---------------------- 数据结构 ----------------------
+
+
+@dataclass
+class MineruZipMembers:
+    """MinerU 结果 zip 中各产物对应的成员名（不存在时为 None）。"""
+
+    full_md: Optional[str] = None
+    content_list_v2: Optional[str] = None
+    content_list: Optional[str] = None
+    model_json: Optional[str] = None
+    layout_json: Optional[str] = None
+    uuid: str = ""
+    images: List[str] = field(default_factory=list)
+
+    @property
+    def json_members(self) -> List[str]:
+        """所有 JSON 产物的成员名。"""
+        return [
+            name
+            for name in (
+                self.content_list_v2,
+                self.content_list,
+                self.model_json,
+                self.layout_json,
+            )
+            if name
+        ]
+
+
+@dataclass
+class MineruArtifacts:
+    """MinerU 产物在本地的路径（不存在时为 None）。"""
+
+    full_md: Optional[Path] = None
+    content_list_v2: Optional[Path] = None
+    content_list: Optional[Path] = None
+    model_json: Optional[Path] = None
+    layout_json: Optional[Path] = None
+    uuid: str = ""
+
+    _PATH_FIELDS = ("full_md", "content_list_v2", "content_list", "model_json", "layout_json")
+
+    @classmethod
+    def from_members(
+        cls, members: MineruZipMembers, extract_dir: PathLike
+    ) -> "MineruArtifacts":
+        """zip 成员解压到 extract_dir 后对应的本地路径。"""
+        root = Path(extract_dir)
+        return cls(
+            **{
+                name: root / getattr(members, name) if getattr(members, name) else None
+                for name in cls._PATH_FIELDS
+            },
+            uuid=members.uuid,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MineruArtifacts":
+        return cls(
+            **{
+                name: Path(data[name]) if data.get(name) else None
+                for name in cls._PATH_FIELDS
+            },
+            uuid=data.get("uuid") or "",
+        )
+
+    def to_dict(self) -> Dict[str, Optional[str]]:
+        data: Dict[str, Optional[str]] = {
+            name: str(getattr(self, name)) if getattr(self, name) else None
+            for name in self._PATH_FIELDS
+        }
+        data["uuid"] = self.uuid
+        return data
+
+    def exists(self) -> bool:
+        """full.md 与 layout.json 均存在于磁盘上。"""
+        return bool(
+            self.full_md
+            and self.layout_json
+            and self.full_md.is_file()
+            and self.layout_json.is_file()
+        )
+
+
+# ---------------------- 成员定位 ----------------------
+
+
+def _pick_shallowest(names: Iterable[str]) -> Optional[str]:
+    """同名文件出现在多个目录时取层级最浅的一个。"""
+    candidates = sorted(names, key=lambda n: (n.count("/"), len(n)))
+    return candidates[0] if candidates else None
+
+
+def find_mineru_members(names: Iterable[str]) -> MineruZipMembers:
+    """根据 zip 的成员名列表定位 MinerU 产物。"""
+    names = [n for n in names if not n.endswith("/")]
+    basename = lambda n: n.rsplit("/", 1)[-1]
+
+    members = MineruZipMembers(
+        full_md=_pick_shallowest(n for n in names if basename(n) == FULL_MD_NAME),
+        content_list_v2=_pick_shallowest(
+            n for n in names if basename(n) == CONTENT_LIST_V2_NAME
+        ),
+        content_list=_pick_shallowest(
+            n for n in names if basename(n).endswith(CONTENT_LIST_SUFFIX)
+        ),
+        model_json=_pick_shallowest(
+            n for n in names if basename(n).endswith(MODEL_JSON_SUFFIX)
+        ),
+        layout_json=_pick_shallowest(
+            n for n in names if basename(n) == LAYOUT_JSON_NAME
+        ),
+        images=[n for n in names if "images/" in n],
+    )
+    if members.content_list:
+        members.uuid = basename(members.content_list)[: -len(CONTENT_LIST_SUFFIX)]
+    return members
+
+
+def locate_zip_artifacts(zip_path: PathLike, extract_dir: PathLike) -> MineruArtifacts:
+    """只读取 zip 中央目录，返回其解压到 extract_dir 后各产物的路径（不解压）。"""
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        members = find_mineru_members(zf.namelist())
+    return MineruArtifacts.from_members(members, extract_dir)
+
+
+def locate_dir_artifacts(doc_dir: PathLike) -> MineruArtifacts:
+    """定位结果目录（布局与结果 zip 一致）顶层的各产物，不递归遍历。"""
+    root = Path(doc_dir)
+    if not root.is_dir():
+        return MineruArtifacts()
+    names = [p.name for p in root.iterdir() if p.is_file()]
+    return MineruArtifacts.from_members(find_mineru_members(names), root)
+
+
+def _member_prefix(member: Optional[str]) -> str:
+    """成员所在目录前缀（含末尾的 /），位于根目录时为空字符串。"""
+    if not member or "/" not in member:
+        return ""
+    return member.rsplit("/", 1)[0] + "/"
+
+
+def read_zip_json(zf: zipfile.ZipFile, member: Optional[str]) -> Any:
+    """读取 zip 中的 JSON 成员；成员不存在或解析失败时返回 None。"""
+    if not member:
+        return None
+    try:
+        return json.loads(zf.read(member).decode("utf-8"))
+    except (KeyError, ValueError, UnicodeDecodeError) as e:
+        logger.warning("读取 zip 内 JSON 失败：%s, 错误：%s", member, e)
+        return None
+
+
+def referenced_image_members(
+    zf: zipfile.ZipFile, members: MineruZipMembers
+) -> List[str]:
+    """content_list / content_list_v2 中引用到的图片成员名（按 zip 中实际存在的过滤）。"""
+    available = set(members.images)
+    referenced: List[str] = []
+    seen = set()
+    for member in (members.content_list, members.content_list_v2):
+        if not member:
+            continue
+        prefix = _member_prefix(member)
+        text = zf.read(member).decode("utf-8", errors="ignore")
+        for ref in _IMAGE_REF_PATTERN.findall(text):
+            name = prefix + ref
+            if name in available and name not in seen:
+                seen.add(name)
+                referenced.append(name)
+    return referenced
+
+
+# ---------------------- 解压 ----------------------
+
+
+def extract_members(
+    zf: zipfile.ZipFile,
+    members: Iterable[str],
+    extract_dir: PathLike,
+    long_path: Optional[Any] = None,
+) -> List[Path]:
+    """解压指定成员到 extract_dir（保留 zip 内相对路径）。
+
+    目标文件已存在且大小与 zip 记录一致时跳过；拒绝解压到 extract_dir 之外的成员。
+
+    Args:
+        zf: 已打开的 ZipFile
+        members: 成员名
+        extract_dir: 解压目录
+        long_path: 可选的路径转换函数（如 Windows 长路径前缀），接收 Path 返回 str
+
+    Returns:
+        实际写出的文件路径列表
+    """
+    extract_root = Path(extract_dir).resolve()
+    written: List[Path] = []
+    for name in members:
+        info = zf.getinfo(name)
+        target = (extract_root / name).resolve()
+        if extract_root != target and extract_root not in target.parents:
+            logger.warning("跳过不安全的 zip 成员路径：%s", name)
+            continue
+
+        target_io = long_path(target) if long_path else str(target)
+        try:
+            if os.path.getsize(target_io) == info.file_size:
+                continue
+        except OSError:
+            pass
+
+        os.makedirs(os.path.dirname(target_io), exist_ok=True)
+        with zf.open(info) as src, open(target_io, "wb") as dst:
+            while True:
+                block = src.read(1024 * 1024)
+                if not block:
+                    break
+                dst.write(block)
+        written.append(target)
+    return written
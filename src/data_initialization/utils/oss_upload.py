@@ -0,0 +1,520 @@
+# src/data_initialization/utils/oss_upload.py
+
+"""
+OSS 文件上传工具
+
+- 按内容 SHA-256 去重：对象键为 {prefix}/{sha256[:16]}/{文件名}，完整哈希写入对象元数据
+  x-oss-meta-content-sha256；已存在且哈希、大小一致的对象直接复用，不再上传
+- 小文件单次 put_object_from_file；超过阈值的文件走分片上传，多线程并行上传分片
+- 分片上传断点续传：upload_id 记录在本地状态文件中，中断后重跑只补传缺失的分片
+- LocalOssBucket：基于本地目录的 OSS 替身，接口与 oss2.Bucket 中用到的方法一致，供联调 / 测试使用
+
+用法：
+
+    uploader = OssUploader(oss2.Bucket(auth, endpoint, bucket_name))
+    result = uploader.upload_file("a.pdf", key_prefix="mineru_pdfs")
+    print(result.key, result.skipped)
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.config.settings import (
+    OSS_MULTIPART_THRESHOLD,
+    OSS_PART_SIZE,
+    OSS_UPLOAD_STATE_DIR,
+    OSS_UPLOAD_THREADS,
+)
+
+# ---------------------- 类型与日志配置 ----------------------
+
+PathLike = Union[str, os.PathLike]
+
+logger = logging.getLogger(__name__)
+
+# 对象元数据中记录内容哈希的请求头
+CONTENT_SHA256_HEADER = "x-oss-meta-content-sha256"
+
+# OSS 分片上传限制：分片数上限、最小分片大小
+_MAX_PARTS = 10000
+_MIN_PART_SIZE = 100 * 1024
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+# ---------------------- 异常与数据结构 ----------------------
+
+
+class OssUploadError(Exception):
+    """OSS 上传失败。"""
+
+
+@dataclass
+class UploadResult:
+    """单个文件的上传结果。"""
+
+    key: str
+    sha256: str
+    size: int
+    skipped: bool = False  # 相同内容的对象已存在，未上传
+    parts: int = 0  # 分片上传的分片数（单次上传为 0）
+    resumed_parts: int = 0  # 断点续传时复用的已上传分片数
+
+
+# ---------------------- 辅助函数 ----------------------
+
+
+def file_sha256(path: PathLike) -> str:
+    """流式计算文件 SHA-256。"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(_HASH_BLOCK_SIZE)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_object_key(key_prefix: str, sha256: str, filename: str) -> str:
+    """按内容哈希生成对象键，保留原文件名便于识别。"""
+    prefix = key_prefix.strip("/")
+    return f"{prefix}/{sha256[:16]}/{filename}" if prefix else f"{sha256[:16]}/{filename}"
+
+
+def _header_value(headers: Any, name: str) -> Optional[str]:
+    """大小写不敏感地读取响应头。"""
+    if not headers:
+        return None
+    value = headers.get(name)
+    if value is None:
+        lowered = name.lower()
+        for key, val in headers.items():
+            if key.lower() == lowered:
+                return val
+    return value
+
+
+# ---------------------- 上传器 ----------------------
+
+
+class OssUploader:
+    """
+    按内容哈希去重、支持并行分片与断点续传的 OSS 上传器。
+
+    Args:
+        bucket: oss2.Bucket 或 LocalOssBucket
+        multipart_threshold: 超过该字节数走分片上传
+        part_size: 分片大小（字节），分片数超过上限时自动放大
+        num_threads: 并行上传分片的线程数
+        state_dir: 分片上传断点记录目录
+    """
+
+    def __init__(
+        self,
+        bucket: Any,
+        multipart_threshold: Optional[int] = None,
+        part_size: Optional[int] = None,
+        num_threads: Optional[int] = None,
+        state_dir: Optional[PathLike] = None,
+    ) -> None:
+        self.bucket = bucket
+        self.multipart_threshold = multipart_threshold or OSS_MULTIPART_THRESHOLD or 10 * 1024 * 1024
+        self.part_size = max(part_size or OSS_PART_SIZE or 8 * 1024 * 1024, _MIN_PART_SIZE)
+        self.num_threads = max(1, num_threads or OSS_UPLOAD_THREADS or 4)
+        self.state_dir = Path(state_dir or OSS_UPLOAD_STATE_DIR)
+
+        # 文件哈希缓存：(路径, 大小, 修改时间) -> sha256
+        self._hash_cache: Dict[Tuple[str, int, int], str] = {}
+        # 同一内容的并发上传串行化，避免重复上传与断点记录互相覆盖
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    # ---------------------- 对外接口 ----------------------
+
+    def upload_file(self, local_path: PathLike, key_prefix: str = "") -> UploadResult:
+        """上传本地文件；相同内容的对象已存在时跳过上传。"""
+        path = Path(local_path).resolve()
+        if not path.is_file():
+            raise FileNotFoundError(f"File not found: {path}")
+
+        size = path.stat().st_size
+        sha256 = self._file_sha256(path)
+        key = content_object_key(key_prefix, sha256, path.name)
+
+        with self._key_lock(sha256):
+            if self._object_matches(key, sha256, size):
+                logger.info("OSS 已存在相同内容的对象，跳过上传：%s -> %s", path.name, key)
+                return UploadResult(key=key, sha256=sha256, size=size, skipped=True)
+
+            headers = {CONTENT_SHA256_HEADER: sha256}
+            try:
+                if size < self.multipart_threshold:
+                    self.bucket.put_object_from_file(key, str(path), headers=headers)
+                    return UploadResult(key=key, sha256=sha256, size=size)
+                return self._multipart_upload(path, key, size, sha256, headers)
+            except OssUploadError:
+                raise
+            except Exception as e:
+                raise OssUploadError(f"上传到 OSS 失败: {path} -> {key}") from e
+
+    # ---------------------- 去重 ----------------------
+
+    def _file_sha256(self, path: Path) -> str:
+        stat = path.stat()
+        cache_key = (str(path), stat.st_size, stat.st_mtime_ns)
+        cached = self._hash_cache.get(cache_key)
+        if cached is None:
+            cached = file_sha256(path)
+            self._hash_cache[cache_key] = cached
+        return cached
+
+    def _key_lock(self, sha256: str) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(sha256)
+            if lock is None:
+                lock = threading.Lock()
+                self._key_locks[sha256] = lock
+            return lock
+
+    def _object_matches(self, key: str, sha256: str, size: int) -> bool:
+        """对象已存在且元数据中的哈希、大小与本地文件一致。"""
+        try:
+            if not self.bucket.object_exists(key):
+                return False
+            meta = self.bucket.head_object(key)
+        except Exception as e:
+            logger.warning("查询 OSS 对象失败，按不存在处理：%s, 错误：%s", key, e)
+            return False
+
+        remote_sha256 = _header_value(getattr(meta, "headers", None), CONTENT_SHA256_HEADER)
+        remote_size = getattr(meta, "content_length", None)
+        if remote_sha256 != sha256 or (remote_size is not None and int(remote_size) != size):
+            logger.warning("OSS 对象内容与本地不一致，将重新上传：%s", key)
+            return False
+        return True
+
+    # ---------------------- 分片上传 ----------------------
+
+    def _effective_part_size(self, size: int) -> int:
+        return max(self.part_size, math.ceil(size / _MAX_PARTS))
+
+    def _state_path(self, sha256: str) -> Path:
+        return self.state_dir / f"{sha256}.json"
+
+    def _load_state(self, sha256: str, key: str, size: int, part_size: int) -> Optional[str]:
+        """读取断点记录，与当前对象键、大小、分片大小一致时返回 upload_id。"""
+        state_path = self._state_path(sha256)
+        try:
+            state = json.loads(state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if (
+            state.get("key") != key
+            or state.get("size") != size
+            or state.get("part_size") != part_size
+        ):
+            return None
+        return state.get("upload_id") or None
+
+    def _save_state(self, sha256: str, key: str, size: int, part_size: int, upload_id: str) -> None:
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        state_path = self._state_path(sha256)
+        tmp_path = state_path.with_suffix(".json.tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {"key": key, "size": size, "part_size": part_size, "upload_id": upload_id},
+                ensure_ascii=False,
+            ),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, state_path)
+
+    def _clear_state(self, sha256: str) -> None:
+        try:
+            self._state_path(sha256).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _list_uploaded_parts(self, key: str, upload_id: str) -> Dict[int, Any]:
+        """列出已上传的分片：part_number -> PartInfo。"""
+        uploaded: Dict[int, Any] = {}
+        marker = ""
+        while True:
+            result = self.bucket.list_parts(key, upload_id, marker=marker)
+            for part in result.parts:
+                uploaded[part.part_number] = part
+            if not result.is_truncated:
+                return uploaded
+            marker = result.next_marker
+
+    def _multipart_upload(
+        self,
+        path: Path,
+        key: str,
+        size: int,
+        sha256: str,
+        headers: Dict[str, str],
+    ) -> UploadResult:
+        part_size = self._effective_part_size(size)
+        part_count = math.ceil(size / part_size)
+
+        def expected_size(part_number: int) -> int:
+            return min(part_size, size - (part_number - 1) * part_size)
+
+        # 断点续传：复用上次的 upload_id 与已上传且大小正确的分片
+        uploaded: Dict[int, Any] = {}
+        upload_id = self._load_state(sha256, key, size, part_size)
+        if upload_id:
+            try:
+                uploaded = {
+                    number: part
+                    for number, part in self._list_uploaded_parts(key, upload_id).items()
+                    if number <= part_count
+                    and (part.size is None or part.size == expected_size(number))
+                }
+                logger.info(
+                    "继续分片上传：%s，已完成 %d/%d 个分片", key, len(uploaded), part_count
+                )
+            except Exception as e:
+                logger.warning("断点记录已失效，重新开始分片上传：%s, 错误：%s", key, e)
+                upload_id = None
+                uploaded = {}
+        if not upload_id:
+            upload_id = self.bucket.init_multipart_upload(key, headers=headers).upload_id
+            self._save_state(sha256, key, size, part_size, upload_id)
+
+        def upload_part(part_number: int) -> Any:
+            with open(path, "rb") as f:
+                f.seek((part_number - 1) * part_size)
+                data = f.read(expected_size(part_number))
+            result = self.bucket.upload_part(key, upload_id, part_number, data)
+            return _part_info(part_number, result.etag, len(data))
+
+        pending = [n for n in range(1, part_count + 1) if n not in uploaded]
+        logger.info(
+            "分片上传 %s：%d 个分片（每片 %d 字节），待上传 %d 个，线程数 %d",
+            key,
+            part_count,
+            part_size,
+            len(pending),
+            self.num_threads,
+        )
+        first_error: Optional[BaseException] = None
+        with ThreadPoolExecutor(
+            max_workers=min(self.num_threads, max(1, len(pending))),
+            thread_name_prefix="oss-part",
+        ) as executor:
+            futures = [executor.submit(upload_part, n) for n in pending]
+            for future in as_completed(futures):
+                try:
+                    part = future.result()
+                except Exception as e:
+                    first_error = first_error or e
+                    continue
+                uploaded[part.part_number] = part
+        if first_error is not None:
+            # 保留断点记录与已上传的分片，下次重跑时续传
+            raise OssUploadError(
+                f"分片上传失败（已完成 {len(uploaded)}/{part_count}，可重跑续传）: {key}"
+            ) from first_error
+
+        parts = [_part_info(n, uploaded[n].etag, expected_size(n)) for n in range(1, part_count + 1)]
+        self.bucket.complete_multipart_upload(key, upload_id, parts)
+        self._clear_state(sha256)
+        return UploadResult(
+            key=key,
+            sha256=sha256,
+            size=size,
+            parts=part_count,
+            resumed_parts=part_count - len(pending),
+        )
+
+
+def _part_info(part_number: int, etag: str, size: int) -> Any:
+    """构造分片信息（oss2 可用时使用 oss2.models.PartInfo）。"""
+    try:
+        from oss2.models import PartInfo
+    except ImportError:
+        return SimpleNamespace(part_number=part_number, etag=etag, size=size)
+    return PartInfo(part_number, etag, size=size)
+
+
+# ---------------------- 本地 OSS 替身 ----------------------
+
+
+class LocalOssBucket:
+    """
+    基于本地目录的 OSS 替身，实现 OssUploader 用到的 oss2.Bucket 方法。
+
+    对象存放在 root/{key}，元数据存放在 root/.meta/{key}.json，未完成的分片存放在
+    root/.uploads/{upload_id}/。各方法调用次数记录在 stats 中；fail_parts > 0 时，
+    接下来若干次 upload_part 抛出异常，用于验证断点续传。
+
+    Args:
+        root: 存储根目录
+        fail_parts: 模拟失败的分片上传次数
+    """
+
+    def __init__(self, root: PathLike, fail_parts: int = 0) -> None:
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.fail_parts = fail_parts
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+
+    # ---------------------- 路径 ----------------------
+
+    def _object_path(self, key: str) -> Path:
+        target = (self.root / key).resolve()
+        if self.root not in target.parents:
+            raise ValueError(f"非法对象键: {key}")
+        return target
+
+    def _meta_path(self, key: str) -> Path:
+        return self.root / ".meta" / f"{key}.json"
+
+    def _upload_dir(self, upload_id: str) -> Path:
+        return self.root / ".uploads" / upload_id
+
+    def object_url(self, key: str) -> str:
+        """对象的本地 file:// URL。"""
+        return self._object_path(key).as_uri()
+
+    def _write_meta(self, key: str, headers: Optional[Dict[str, str]]) -> None:
+        meta_path = self._meta_path(key)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {k.lower(): v for k, v in (headers or {}).items() if k.lower().startswith("x-oss-meta-")}
+        meta_path.write_text(json.dumps(meta), encoding="utf-8")
+
+    # ---------------------- 对象 ----------------------
+
+    def object_exists(self, key: str) -> bool:
+        self.stats["object_exists"] += 1
+        return self._object_path(key).is_file()
+
+    def head_object(self, key: str) -> SimpleNamespace:
+        self.stats["head_object"] += 1
+        path = self._object_path(key)
+        if not path.is_file():
+            raise FileNotFoundError(key)
+        try:
+            headers = json.loads(self._meta_path(key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            headers = {}
+        return SimpleNamespace(headers=headers, content_length=path.stat().st_size)
+
+    def put_object_from_file(
+        self, key: str, filename: PathLike, headers: Optional[Dict[str, str]] = None
+    ) -> SimpleNamespace:
+        self.stats["put_object"] += 1
+        path = self._object_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        shutil.copyfile(filename, tmp_path)
+        os.replace(tmp_path, path)
+        self._write_meta(key, headers)
+        return SimpleNamespace(etag=file_sha256(path))
+
+    # ---------------------- 分片上传 ----------------------
+
+    def init_multipart_upload(
+        self, key: str, headers: Optional[Dict[str, str]] = None
+    ) -> SimpleNamespace:
+        self.stats["init_multipart_upload"] += 1
+        upload_id = uuid.uuid4().hex
+        upload_dir = self._upload_dir(upload_id)
+        upload_dir.mkdir(parents=True, exist_ok=True)
+        (upload_dir / "upload.json").write_text(
+            json.dumps({"key": key, "headers": headers or {}}), encoding="utf-8"
+        )
+        return SimpleNamespace(upload_id=upload_id)
+
+    def _load_upload(self, key: str, upload_id: str) -> Dict[str, Any]:
+        try:
+            upload = json.loads(
+                (self._upload_dir(upload_id) / "upload.json").read_text(encoding="utf-8")
+            )
+        except (OSError, ValueError):
+            raise KeyError(f"NoSuchUpload: {upload_id}") from None
+        if upload.get("key") != key:
+            raise KeyError(f"NoSuchUpload: {upload_id}")
+        return upload
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, data: bytes) -> SimpleNamespace:
+        self.stats["upload_part"] += 1
+        self._load_upload(key, upload_id)
+        with self._lock:
+            if self.fail_parts > 0:
+                self.fail_parts -= 1
+                self.stats["upload_part_failed"] += 1
+                raise ConnectionError(f"模拟分片上传失败: part {part_number}")
+        part_path = self._upload_dir(upload_id) / f"{part_number:05d}.part"
+        tmp_path = part_path.with_suffix(".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, part_path)
+        return SimpleNamespace(etag=hashlib.md5(data).hexdigest().upper())
+
+    def list_parts(
+        self, key: str, upload_id: str, marker: str = "", max_parts: int = 1000
+    ) -> SimpleNamespace:
+        self.stats["list_parts"] += 1
+        self._load_upload(key, upload_id)
+        start = int(marker or 0)
+        parts: List[SimpleNamespace] = []
+        for part_path in sorted(self._upload_dir(upload_id).glob("*.part")):
+            number = int(part_path.stem)
+            if number <= start:
+                continue
+            data = part_path.read_bytes()
+            parts.append(
+                SimpleNamespace(
+                    part_number=number,
+                    etag=hashlib.md5(data).hexdigest().upper(),
+                    size=len(data),
+                )
+            )
+        truncated = len(parts) > max_parts
+        parts = parts[:max_parts]
+        return SimpleNamespace(
+            parts=parts,
+            is_truncated=truncated,
+            next_marker=str(parts[-1].part_number) if truncated else "",
+        )
+
+    def complete_multipart_upload(
+        self, key: str, upload_id: str, parts: List[Any], headers: Optional[Dict[str, str]] = None
+    ) -> SimpleNamespace:
+        self.stats["complete_multipart_upload"] += 1
+        upload = self._load_upload(key, upload_id)
+        upload_dir = self._upload_dir(upload_id)
+
+        path = self._object_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as out:
+            for part in sorted(parts, key=lambda p: p.part_number):
+                data = (upload_dir / f"{part.part_number:05d}.part").read_bytes()
+                if hashlib.md5(data).hexdigest().upper() != str(part.etag).strip('"').upper():
+                    raise ValueError(f"InvalidPart: {part.part_number}")
+                out.write(data)
+        os.replace(tmp_path, path)
+        self._write_meta(key, upload.get("headers"))
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        return SimpleNamespace(etag=file_sha256(path))
+
+    def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        self.stats["abort_multipart_upload"] += 1
+        shutil.rmtree(self._upload_dir(upload_id), ignore_errors=True)
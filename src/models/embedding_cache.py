@@ -0,0 +1,329 @@
+"""
+查询嵌入缓存与请求合并
+
+交互式子问题、HyDE 假设文档与 step-back 查询在会话之间经常重复或只差空白，
+每次都重新编码会占用 CPU 上的嵌入模型。本模块在 embed_query 前加两层：
+
+1. QueryEmbeddingCache：按模型名共享的进程内 LRU 缓存（条数上限 + TTL），
+   键为折叠空白后的查询文本；
+2. EmbeddingMicroBatcher：并发到达的编码请求在几毫秒的窗口内合并为一次批量编码，
+   同一文本的并发请求只编码一次（在途合并）。
+
+get_models.get_embedding_model() 在 EMBEDDING_QUERY_CACHE_ENABLED 时返回
+CachedQueryEmbeddings，调用方无需改动；embed_documents 直接透传，文档嵌入不进缓存。
+
+缓存与合并器均不绑定事件循环（内部状态由 threading.Lock 保护），
+同步 embed_query 与异步 aembed_query 共用同一份缓存与同一个后台编码线程。
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from src.config.settings import EMBEDDING_QUERY_CACHE_CONFIG
+
+# ---------------------- 类型与日志配置 ----------------------
+
+Vector = List[float]
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """缓存键：折叠连续空白并去掉首尾空白。"""
+    return " ".join(text.split())
+
+
+# ---------------------- LRU + TTL 缓存 ----------------------
+
+
+class QueryEmbeddingCache:
+    """
+    线程安全的查询嵌入 LRU 缓存。
+
+    Args:
+        max_entries: 最多缓存的条数，超出时淘汰最久未使用的条目
+        ttl_seconds: 条目有效期（秒），None 或 0 为不过期
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: Optional[float] = 3600.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds or None
+        self._entries: "OrderedDict[str, Tuple[float, Vector]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Vector]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, vector = entry
+                if self.ttl_seconds is None or time.monotonic() - stored_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vector: Vector) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+# ---------------------- 微批合并 ----------------------
+
+
+class EmbeddingMicroBatcher:
+    """
+    把并发的单条编码请求合并为批量编码。
+
+    后台线程取到第一条请求后，再等待至多 window_ms 毫秒收集后续请求（不超过
+    max_batch_size 条），去重后调用一次 embed_batch；模型编码期间到达的请求
+    在下一批中一并处理。
+
+    Args:
+        embed_batch: 批量编码函数，texts -> vectors
+        window_ms: 合并窗口（毫秒），0 为只合并已排队的请求
+        max_batch_size: 单批最多条数
+    """
+
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], List[Vector]],
+        window_ms: float = 3.0,
+        max_batch_size: int = 64,
+    ) -> None:
+        self.embed_batch = embed_batch
+        self.window = max(window_ms, 0.0) / 1000.0
+        self.max_batch_size = max(max_batch_size, 1)
+        self._queue: "queue.SimpleQueue[Tuple[str, Future]]" = queue.SimpleQueue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+
+    def submit(self, text: str) -> Future:
+        """提交一条编码请求，返回 concurrent.futures.Future。"""
+        future: Future = Future()
+        self._queue.put((text, future))
+        self._ensure_worker()
+        return future
+
+    def embed(self, text: str) -> Vector:
+        return self.submit(text).result()
+
+    async def aembed(self, text: str) -> Vector:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="embedding-micro-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            # 已取消的请求不再编码
+            batch = [
+                (text, future) for text, future in batch if future.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = dict(zip(texts, self.embed_batch(texts)))
+            except BaseException as e:  # noqa: BLE001 - 异常交给各调用方
+                logger.warning("批量编码失败（%d 条）：%s", len(texts), e)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += len(batch)
+            for text, future in batch:
+                future.set_result(vectors[text])
+
+
+# ---------------------- 带缓存的 Embeddings ----------------------
+
+
+def _query_batch_function(
+    embeddings: Embeddings,
+) -> Optional[Callable[[List[str]], List[Vector]]]:
+    """
+    查询的批量编码函数。
+
+    HuggingFaceEmbeddings 未单独配置 query_encode_kwargs 时 embed_query 与
+    embed_documents 的编码方式相同，可直接批量编码；否则返回 None（逐条 embed_query）。
+    """
+    if getattr(embeddings, "query_encode_kwargs", None):
+        return None
+    return embeddings.embed_documents
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    embed_query 经缓存、在途合并与微批编码的 Embeddings 包装。
+
+    Args:
+        embeddings: 底层 LangChain Embeddings（如 HuggingFaceEmbeddings）
+        cache: 查询嵌入缓存，默认按 settings 新建
+        window_ms: 微批合并窗口（毫秒）
+        max_batch_size: 单批最多条数
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache: Optional[QueryEmbeddingCache] = None,
+        window_ms: Optional[float] = None,
+        max_batch_size: Optional[int] = None,
+    ) -> None:
+        self.embeddings = embeddings
+        self.cache = cache or QueryEmbeddingCache(
+            EMBEDDING_QUERY_CACHE_CONFIG["max_entries"],
+            EMBEDDING_QUERY_CACHE_CONFIG["ttl_seconds"],
+        )
+        batch_function = _query_batch_function(embeddings)
+        if batch_function is None:
+            # 查询与文档编码参数不同：逐条编码，仍享有缓存与在途合并
+            max_batch_size = 1
+            batch_function = lambda texts: [embeddings.embed_query(t) for t in texts]  # noqa: E731
+        self.batcher = EmbeddingMicroBatcher(
+            batch_function,
+            window_ms=(
+                EMBEDDING_QUERY_CACHE_CONFIG["batch_window_ms"] if window_ms is None else window_ms
+            ),
+            max_batch_size=(
+                EMBEDDING_QUERY_CACHE_CONFIG["max_batch_size"]
+                if max_batch_size is None
+                else max_batch_size
+            ),
+        )
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self.coalesced = 0
+
+    def __getattr__(self, name: str) -> Any:
+        # 其余属性（model_name、client 等）取自底层模型
+        if name == "embeddings":
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    def _lookup(self, text: str) -> Tuple[str, Optional[Vector], Optional[Future]]:
+        """返回 (缓存键, 缓存命中的向量, 在途或新提交的 Future)。"""
+        key = normalize_query(text)
+        vector = self.cache.get(key)
+        if vector is not None:
+            return key, vector, None
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return key, None, future
+            future = self.batcher.submit(key)
+            self._inflight[key] = future
+        future.add_done_callback(lambda f, key=key: self._finish(key, f))
+        return key, None, future
+
+    def _finish(self, key: str, future: Future) -> None:
+        with self._inflight_lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+
+    def embed_query(self, text: str) -> Vector:
+        _, vector, future = self._lookup(text)
+        if vector is None:
+            vector = future.result()
+        return list(vector)
+
+    async def aembed_query(self, text: str) -> Vector:
+        _, vector, future = self._lookup(text)
+        if vector is None:
+            # future 由同一文本的所有等待方共享：shield 使单个调用方被取消
+            # （如 wait_for 超时）时不会取消共享的编码请求
+            vector = await asyncio.shield(asyncio.wrap_future(future))
+        return list(vector)
+
+    def embed_documents(self, texts: List[str]) -> List[Vector]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[Vector]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存命中率、在途合并次数与微批平均大小。"""
+        batches = self.batcher.batches
+        return {
+            **self.cache.stats(),
+            "coalesced": self.coalesced,
+            "batches": batches,
+            "avg_batch_size": self.batcher.requests / batches if batches else 0.0,
+        }
+
+
+# ---------------------- 缓存注册表 ----------------------
+
+_CACHES: Dict[str, QueryEmbeddingCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_query_embedding_cache(name: str) -> QueryEmbeddingCache:
+    """按名称（一般为嵌入模型路径）获取共享的查询嵌入缓存，不存在时按 settings 创建。"""
+    with _CACHES_LOCK:
+        cache = _CACHES.get(name)
+        if cache is None:
+            cache = QueryEmbeddingCache(
+                EMBEDDING_QUERY_CACHE_CONFIG["max_entries"],
+                EMBEDDING_QUERY_CACHE_CONFIG["ttl_seconds"],
+            )
+            _CACHES[name] = cache
+        return cache
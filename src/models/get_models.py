@@ -18,9 +18,15 @@ from src.config.settings import (
     LLM_MODEL_VISION_CONFIG,
     LLM_MODEL_HIGH_PRECISION_CONFIG,
     EMBEDDING_MODELN_CONFIG,
+    EMBEDDING_BACKEND,
+    EMBEDDING_QUERY_CACHE_ENABLED,
     VECTOR_DB_CONFIG,
+    VECTOR_DB_BACKEND,
     RELATION_DB_PATH,
+    LLM_SCHEDULER_ENABLED,
 )
+from src.models.embedding_cache import CachedQueryEmbeddings, get_query_embedding_cache
+from src.models.llm_scheduler import ScheduledChatOpenAI, get_llm_scheduler
 
 
 
@@ -28,25 +34,35 @@ from src.config.settings import (
 # ===================================
 # 获取 LLM 模型
 # ===================================
+def _build_chat_model(config: dict) -> ChatOpenAI:
+    """按配置创建 ChatOpenAI；启用调度时接入同一模型名共享的 LlmCallScheduler。"""
+    if not LLM_SCHEDULER_ENABLED:
+        return ChatOpenAI(**config)
+    scheduler = get_llm_scheduler(config.get("model") or "default")
+    # 重试交由调度器负责，避免与客户端内置重试叠加
+    config = {**config, "max_retries": 0}
+    return ScheduledChatOpenAI(**config, scheduler=scheduler)
+
+
 def get_fast_llm_model():
     config = {
         k: v for k, v in LLM_MODEL_FAST_CONFIG.items() if v is not None and v != ""
     }
-    return ChatOpenAI(**config)
+    return _build_chat_model(config)
 
 
 def get_main_llm_model():
     config = {
         k: v for k, v in LLM_MODEL_MAIN_CONFIG.items() if v is not None and v != ""
     }
-    return ChatOpenAI(**config)
+    return _build_chat_model(config)
 
 
 def get_vision_llm_model():
     config = {
         k: v for k, v in LLM_MODEL_VISION_CONFIG.items() if v is not None and v != ""
     }
-    return ChatOpenAI(**config)
+    return _build_chat_model(config)
 
 
 def get_high_precision_llm_model():
@@ -55,7 +71,7 @@ def get_high_precision_llm_model():
         for k, v in LLM_MODEL_HIGH_PRECISION_CONFIG.items()
         if v is not None and v != ""
     }
-    return ChatOpenAI(**config)
+    return _build_chat_model(config)
 
 
 # ===================================
@@ -65,13 +81,35 @@ def get_embedding_model():
     config = {
         k: v for k, v in EMBEDDING_MODELN_CONFIG.items() if v is not None and v != ""
     }
-    return HuggingFaceEmbeddings(**config)
+    if EMBEDDING_BACKEND == "onnx":
+        # ONNX Runtime CPU 推理；ONNX 文件不存在时先从本地模型导出
+        from src.models.onnx_embeddings import OnnxEmbeddings, export_onnx
+
+        embeddings = OnnxEmbeddings(
+            model_path=config["model_name"], onnx_path=export_onnx(config["model_name"])
+        )
+    else:
+        embeddings = HuggingFaceEmbeddings(**config)
+    if not EMBEDDING_QUERY_CACHE_ENABLED:
+        return embeddings
+    # 查询嵌入经共享缓存与微批合并；文档嵌入直接透传
+    return CachedQueryEmbeddings(
+        embeddings, cache=get_query_embedding_cache(config["model_name"])
+    )
 
 
 # ===================================
 # 获取 向量数据库
 # ===================================
 def get_vector_db():
+    if VECTOR_DB_BACKEND != "chroma":
+        # 进程内 ANN 索引（faiss / hnswlib / flat），存于 ANN_INDEX_PATH
+        from src.rag.indexing.vector_index import LocalAnnVectorStore
+
+        return LocalAnnVectorStore(
+            backend=VECTOR_DB_BACKEND, embedding_function=get_embedding_model()
+        )
+
     config = {k: v for k, v in VECTOR_DB_CONFIG.items() if v is not None and v != ""}
     client_settings = Settings(
         persist_directory=config["persist_directory"],
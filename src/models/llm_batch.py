@@ -0,0 +1,487 @@
+"""
+LLM 离线批处理
+
+大批量回填（全库图片描述、文档摘要）不需要交互式延迟，可以走批处理接口：
+
+1. 将待处理请求序列化为 JSONL 任务文件（OpenAI Batch API 的输入格式，
+   每行 {"custom_id", "method", "url", "body"}），超过请求数 / 字节数上限时自动拆分；
+2. 通过可插拔的批处理后端提交任务并轮询状态：
+   - OpenAIBatchBackend：OpenAI Batch API（/v1/chat/completions）；
+   - LocalBatchBackend：本地逐条执行的替身后端，用于测试或不支持 Batch API 的服务；
+3. 下载结果 JSONL，按 custom_id 解析为 BatchResult，由调用方写回文档。
+
+任务文件名包含内容摘要；批次提交后会在任务文件旁记录 batch_id（*.batch_id），
+进程中断后重新运行（请求相同）时继续轮询同一批次而不是重复提交，结果文件已存在时直接读取。
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from src.config.settings import (
+    LLM_BATCH_BACKEND,
+    LLM_BATCH_COMPLETION_WINDOW,
+    LLM_BATCH_MAX_BYTES,
+    LLM_BATCH_MAX_REQUESTS,
+    LLM_BATCH_POLL_INTERVAL,
+    LLM_BATCH_TIMEOUT,
+    LLM_MODEL_API_KEY,
+)
+
+# ---------------------- 类型与日志配置 ----------------------
+
+PathLike = Union[str, os.PathLike]
+
+logger = logging.getLogger(__name__)
+
+# 批处理请求使用的接口路径
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+
+# 批次的终止状态（OpenAI Batch API 的状态取值）
+_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+# ---------------------- 自定义异常 ----------------------
+
+
+class LlmBatchError(Exception):
+    """LLM 批处理过程中的统一异常基类。"""
+
+    pass
+
+
+# ---------------------- 数据结构 ----------------------
+
+
+@dataclass
+class BatchResult:
+    """单条批处理请求的结果"""
+
+    custom_id: str
+    content: str
+    error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.error is None and bool(self.content)
+
+
+# ---------------------- 请求构造与读写 ----------------------
+
+
+def llm_model_name(llm: Any) -> str:
+    """获取 ChatOpenAI 实例的模型名。"""
+    return getattr(llm, "model_name", None) or getattr(llm, "model", None) or ""
+
+
+def build_chat_request(
+    custom_id: str,
+    llm: Any,
+    content: Union[str, List[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    """按 ChatOpenAI 实例的模型参数构造一条批处理请求（单条 user 消息）。
+
+    Args:
+        custom_id: 请求标识，结果按此回填
+        llm: ChatOpenAI 实例（提供模型名、max_tokens、temperature）
+        content: 消息内容（纯文本，或 text / image_url 组成的多模态列表）
+
+    Returns:
+        批处理 JSONL 的一行
+    """
+    body: Dict[str, Any] = {
+        "model": llm_model_name(llm),
+        "messages": [{"role": "user", "content": content}],
+    }
+    max_tokens = getattr(llm, "max_tokens", None)
+    if max_tokens:
+        body["max_tokens"] = max_tokens
+    temperature = getattr(llm, "temperature", None)
+    if temperature is not None:
+        body["temperature"] = temperature
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": CHAT_COMPLETIONS_URL,
+        "body": body,
+    }
+
+
+def write_batch_files(
+    requests: Iterable[Dict[str, Any]],
+    work_dir: PathLike,
+    prefix: str,
+    max_requests: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> List[Path]:
+    """流式写出批处理任务文件，超过请求数或字节数上限时拆分为多个文件。
+
+    文件名包含内容摘要（{prefix}_{序号}_{sha256 前 12 位}.jsonl）：请求完全相同时
+    文件名不变，可复用已提交批次或已有结果；请求变化时不会误用旧结果。
+
+    Args:
+        requests: 请求迭代器（逐条生成，不在内存中汇总）
+        work_dir: 任务文件目录
+        prefix: 文件名前缀
+        max_requests: 单个文件最大请求数，默认取配置
+        max_bytes: 单个文件最大字节数，默认取配置
+
+    Returns:
+        生成的任务文件路径列表（无请求时为空）
+    """
+    max_requests = max_requests or LLM_BATCH_MAX_REQUESTS or 50000
+    max_bytes = max_bytes or LLM_BATCH_MAX_BYTES or 180 * 1024 * 1024
+    work_dir = Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    paths: List[Path] = []
+    handle = None
+    digest = None
+    tmp_path: Optional[Path] = None
+    count = 0
+    size = 0
+
+    def close_current() -> None:
+        handle.close()
+        path = work_dir / f"{prefix}_{len(paths):04d}_{digest.hexdigest()[:12]}.jsonl"
+        os.replace(tmp_path, path)
+        paths.append(path)
+
+    try:
+        for request in requests:
+            line = (json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8")
+            if handle is None or count >= max_requests or (
+                count and size + len(line) > max_bytes
+            ):
+                if handle is not None:
+                    close_current()
+                tmp_path = work_dir / f"{prefix}_{len(paths):04d}.jsonl.part"
+                handle = tmp_path.open("wb")
+                digest = hashlib.sha256()
+                count = 0
+                size = 0
+            handle.write(line)
+            digest.update(line)
+            count += 1
+            size += len(line)
+        if handle is not None:
+            close_current()
+            handle = None
+    finally:
+        if handle is not None:
+            handle.close()
+            tmp_path.unlink(missing_ok=True)
+    return paths
+
+
+def _parse_result_line(record: Dict[str, Any]) -> BatchResult:
+    """解析结果 JSONL 的一行（OpenAI Batch API 输出 / 错误文件格式）。"""
+    custom_id = str(record.get("custom_id", ""))
+    error = record.get("error")
+    if error:
+        message = error.get("message") if isinstance(error, dict) else str(error)
+        return BatchResult(custom_id=custom_id, content="", error=message or "未知错误")
+
+    response = record.get("response") or {}
+    status_code = response.get("status_code", 200)
+    body = response.get("body") or {}
+    if status_code != 200:
+        message = (body.get("error") or {}).get("message") if isinstance(body, dict) else None
+        return BatchResult(
+            custom_id=custom_id,
+            content="",
+            error=message or f"HTTP {status_code}",
+        )
+
+    try:
+        content = body["choices"][0]["message"]["content"] or ""
+    except (KeyError, IndexError, TypeError):
+        return BatchResult(custom_id=custom_id, content="", error="响应中没有 choices")
+    return BatchResult(custom_id=custom_id, content=content.strip())
+
+
+def _count_requests(path: PathLike) -> int:
+    """任务文件中的请求条数（非空行数）。"""
+    with Path(path).open("r", encoding="utf-8") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def read_batch_results(path: PathLike) -> Dict[str, BatchResult]:
+    """读取结果 JSONL：{custom_id: BatchResult}。"""
+    results: Dict[str, BatchResult] = {}
+    with Path(path).open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning("跳过无法解析的批处理结果行：%s", line[:200])
+                continue
+            result = _parse_result_line(record)
+            if result.custom_id:
+                results[result.custom_id] = result
+    return results
+
+
+# ---------------------- 批处理后端 ----------------------
+
+
+class LlmBatchBackend:
+    """批处理后端接口：提交任务文件、查询状态、下载结果。"""
+
+    name = "base"
+
+    def submit(self, input_path: Path) -> str:
+        """提交任务文件，返回 batch_id。"""
+        raise NotImplementedError
+
+    def get_status(self, batch_id: str) -> str:
+        """查询批次状态（validating / in_progress / finalizing / completed / failed / expired / cancelled）。"""
+        raise NotImplementedError
+
+    def download_results(self, batch_id: str, output_path: Path) -> Path:
+        """下载结果（成功与失败的请求合并为一个 JSONL）到 output_path。"""
+        raise NotImplementedError
+
+
+class OpenAIBatchBackend(LlmBatchBackend):
+    """OpenAI Batch API 后端（base_url 等连接参数沿用 OpenAI 客户端的环境变量）。"""
+
+    name = "openai"
+
+    def __init__(
+        self,
+        client: Optional[Any] = None,
+        completion_window: Optional[str] = None,
+    ) -> None:
+        if client is None:
+            from openai import OpenAI
+
+            client = OpenAI(api_key=LLM_MODEL_API_KEY or None)
+        self.client = client
+        self.completion_window = completion_window or LLM_BATCH_COMPLETION_WINDOW
+
+    def submit(self, input_path: Path) -> str:
+        with Path(input_path).open("rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=CHAT_COMPLETIONS_URL,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def get_status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def download_results(self, batch_id: str, output_path: Path) -> Path:
+        batch = self.client.batches.retrieve(batch_id)
+        tmp_path = Path(str(output_path) + ".part")
+        with tmp_path.open("wb") as f:
+            # 过期批次也可能有部分结果，输出文件与错误文件都要取回
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    f.write(self.client.files.content(file_id).read())
+        os.replace(tmp_path, output_path)
+        return Path(output_path)
+
+
+class LocalBatchBackend(LlmBatchBackend):
+    """本地替身后端：提交时逐条同步执行请求，结果格式与 OpenAI Batch API 一致。
+
+    请求由 responder(body) -> str 处理；未提供时按 body["model"] 在 llms 中查找
+    ChatOpenAI 实例并调用 invoke。结果写在任务文件旁，batch_id 即结果文件路径
+    （"local:{路径}"），进程重启后仍可按记录的 batch_id 取回结果。
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        llms: Optional[Dict[str, Any]] = None,
+        responder: Optional[Callable[[Dict[str, Any]], str]] = None,
+    ) -> None:
+        self.llms = dict(llms or {})
+        self.responder = responder
+
+    def _respond(self, body: Dict[str, Any]) -> str:
+        if self.responder is not None:
+            return self.responder(body)
+
+        from langchain_core.messages import HumanMessage
+
+        llm = self.llms.get(body.get("model", ""))
+        if llm is None:
+            raise LlmBatchError(f"本地批处理后端未配置模型：{body.get('model')}")
+        messages = [HumanMessage(content=m.get("content", "")) for m in body["messages"]]
+        return llm.invoke(messages).content
+
+    def submit(self, input_path: Path) -> str:
+        input_path = Path(input_path)
+        output_path = input_path.with_name(f"{input_path.stem}.local_{uuid.uuid4().hex}.out.jsonl")
+        tmp_path = Path(str(output_path) + ".part")
+        with input_path.open("r", encoding="utf-8") as src, tmp_path.open(
+            "w", encoding="utf-8"
+        ) as dst:
+            for line in src:
+                line = line.strip()
+                if not line:
+                    continue
+                request = json.loads(line)
+                record: Dict[str, Any] = {"custom_id": request.get("custom_id")}
+                try:
+                    content = self._respond(request.get("body") or {})
+                    record["response"] = {
+                        "status_code": 200,
+                        "body": {"choices": [{"message": {"content": content}}]},
+                    }
+                except Exception as e:
+                    record["error"] = {"message": str(e)}
+                dst.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, output_path)
+        return f"local:{output_path}"
+
+    @staticmethod
+    def _result_path(batch_id: str) -> Optional[Path]:
+        if not batch_id.startswith("local:"):
+            return None
+        path = Path(batch_id[len("local:") :])
+        return path if path.is_file() else None
+
+    def get_status(self, batch_id: str) -> str:
+        return "completed" if self._result_path(batch_id) is not None else "failed"
+
+    def download_results(self, batch_id: str, output_path: Path) -> Path:
+        source = self._result_path(batch_id)
+        if source is None:
+            raise LlmBatchError(f"本地批处理结果不存在：{batch_id}")
+        shutil.move(str(source), str(output_path))
+        return Path(output_path)
+
+
+def get_llm_batch_backend(
+    name: Optional[str] = None, llms: Optional[Dict[str, Any]] = None
+) -> LlmBatchBackend:
+    """按名称（默认取配置 LLM_BATCH_BACKEND）创建批处理后端。
+
+    Args:
+        name: openai / local
+        llms: 本地后端使用的 {模型名: ChatOpenAI}
+    """
+    name = (name or LLM_BATCH_BACKEND or "openai").lower()
+    if name == "openai":
+        return OpenAIBatchBackend()
+    if name == "local":
+        return LocalBatchBackend(llms=llms)
+    raise LlmBatchError(f"未知的 LLM 批处理后端：{name}")
+
+
+# ---------------------- 批次执行 ----------------------
+
+
+async def arun_batch_file(
+    backend: LlmBatchBackend,
+    input_path: PathLike,
+    poll_interval: Optional[float] = None,
+    timeout: Optional[float] = None,
+) -> Dict[str, BatchResult]:
+    """提交一个任务文件并等待完成，返回 {custom_id: BatchResult}。
+
+    结果保存在任务文件旁的 *.results.jsonl；batch_id 记录在 *.batch_id，
+    中断后再次运行会继续等待同一批次，结果文件已存在时不再提交。
+    结果不完整（批次未完成或有失败的请求）时读取后删除结果文件，
+    重新运行同一任务文件会重新提交，而不是复用失败的结果。
+
+    Args:
+        backend: 批处理后端
+        input_path: 任务文件
+        poll_interval: 轮询间隔（秒），默认取配置
+        timeout: 最长等待时间（秒），默认取配置
+
+    Returns:
+        {custom_id: BatchResult}
+    """
+    input_path = Path(input_path)
+    output_path = input_path.with_suffix(".results.jsonl")
+    state_path = input_path.with_suffix(".batch_id")
+    poll_interval = poll_interval if poll_interval is not None else (LLM_BATCH_POLL_INTERVAL or 30)
+    timeout = timeout if timeout is not None else (LLM_BATCH_TIMEOUT or 86400)
+
+    if output_path.exists():
+        logger.info("批处理结果已存在，直接读取：%s", output_path.name)
+        return await asyncio.to_thread(read_batch_results, output_path)
+
+    batch_id = ""
+    if state_path.exists():
+        batch_id = state_path.read_text(encoding="utf-8").strip()
+    if batch_id:
+        logger.info("继续等待已提交的批次：%s (%s)", input_path.name, batch_id)
+    else:
+        batch_id = await asyncio.to_thread(backend.submit, input_path)
+        state_path.write_text(batch_id, encoding="utf-8")
+        logger.info("批次已提交：%s -> %s (%s)", input_path.name, batch_id, backend.name)
+
+    start = time.monotonic()
+    while True:
+        status = await asyncio.to_thread(backend.get_status, batch_id)
+        if status in _TERMINAL_STATUSES:
+            break
+        if time.monotonic() - start > timeout:
+            raise LlmBatchError(
+                f"等待批次超时（{timeout} 秒）：{batch_id}，状态：{status}；重新运行将继续等待"
+            )
+        logger.debug("批次 %s 状态：%s", batch_id, status)
+        await asyncio.sleep(poll_interval)
+
+    if status != "completed":
+        logger.warning("批次 %s 结束状态为 %s，仅回填已返回的结果", batch_id, status)
+
+    try:
+        await asyncio.to_thread(backend.download_results, batch_id, output_path)
+    except Exception as e:
+        if status == "completed":
+            raise LlmBatchError(f"下载批次结果失败：{batch_id}，错误：{e}") from e
+        # 失败 / 取消的批次可能没有任何结果文件
+        logger.warning("批次 %s 没有可下载的结果：%s", batch_id, e)
+        state_path.unlink(missing_ok=True)
+        return {}
+
+    state_path.unlink(missing_ok=True)
+    results = await asyncio.to_thread(read_batch_results, output_path)
+    succeeded = sum(1 for r in results.values() if r.success)
+    logger.info(
+        "批次完成：%s，结果 %d 条（成功 %d 条）", input_path.name, len(results), succeeded
+    )
+    if status != "completed" or succeeded < await asyncio.to_thread(
+        _count_requests, input_path
+    ):
+        output_path.unlink(missing_ok=True)
+    return results
+
+
+async def arun_batch_files(
+    backend: LlmBatchBackend,
+    input_paths: Iterable[PathLike],
+    poll_interval: Optional[float] = None,
+    timeout: Optional[float] = None,
+) -> Dict[str, BatchResult]:
+    """并发提交并等待多个任务文件，合并结果。"""
+    results: Dict[str, BatchResult] = {}
+    for partial in await asyncio.gather(
+        *(
+            arun_batch_file(backend, path, poll_interval=poll_interval, timeout=timeout)
+            for path in input_paths
+        )
+    ):
+        results.update(partial)
+    return results
@@ -0,0 +1,743 @@
+"""
+LLM 调用调度器
+
+为项目内所有 LLM 调用提供统一的限流、并发控制与重试：
+
+1. 令牌桶：按每分钟请求数（RPM）与每分钟 token 数（TPM）限流；
+2. AIMD 并发调整：调用成功时缓慢增加并发上限，遇到 429 / 超时时按比例收缩；
+3. 抖动退避重试：对 429、超时、连接错误与 5xx 进行指数退避（full jitter），
+   优先遵循响应中的 Retry-After；
+4. 运行状态：stats() 返回当前并发上限、在途请求数、排队数与最近一分钟的请求/token 速率。
+
+同一模型名共享一个调度器（见 get_llm_scheduler），由 get_models 中的各 get_*_llm_model
+返回 ScheduledChatOpenAI，调用方无需改动即可接入。
+
+调度器本身不绑定事件循环（内部状态由 threading.Lock 保护），
+同一实例可在多次 asyncio.run 之间、以及同步 invoke 与异步 ainvoke 之间共享。
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from langchain_core.prompt_values import PromptValue
+from langchain_openai import ChatOpenAI
+from pydantic import Field
+
+from src.config.settings import LLM_SCHEDULER_CONFIG
+
+# ---------------------- 类型与日志配置 ----------------------
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# 估算 token 时每张图片按固定值计（与 OpenAI 高分辨率图片的量级相当）
+_IMAGE_TOKEN_ESTIMATE = 850
+# 未配置 max_tokens 时预留的输出 token 数
+_DEFAULT_COMPLETION_TOKENS = 512
+
+# 限流信号：触发 AIMD 收缩
+_THROTTLE = "throttle"
+# 可重试但不代表限流（连接错误、5xx）
+_TRANSIENT = "transient"
+# 不可重试
+_FATAL = "fatal"
+
+
+# ---------------------- 令牌桶 ----------------------
+
+
+class _RateBucket:
+    """按分钟配额平滑补充的令牌桶。
+
+    reserve() 立即扣减令牌并返回需要等待的秒数（令牌可以透支为负），
+    不持有任何事件循环对象，同步与异步调用方均可使用。
+    """
+
+    def __init__(self, per_minute: Optional[float]) -> None:
+        self.per_minute = per_minute
+        self.capacity = float(per_minute) if per_minute else 0.0
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.per_minute)
+
+    def _refill_locked(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """扣减 amount 个令牌，返回调用方需要等待的秒数。"""
+        if not self.enabled or amount <= 0:
+            return 0.0
+        with self._lock:
+            self._refill_locked()
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def adjust(self, delta: float) -> None:
+        """按实际用量修正已扣减的令牌（delta > 0 表示实际比预估多用）。"""
+        if not self.enabled or not delta:
+            return
+        with self._lock:
+            self._refill_locked()
+            self.tokens -= delta
+
+
+# ---------------------- 并发槽位 ----------------------
+
+
+class _SlotWaiter:
+    """排队等待并发槽位的调用方（异步为 Future，同步为 Event）。"""
+
+    __slots__ = ("loop", "future", "event", "granted")
+
+    def __init__(
+        self,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        future: Optional[asyncio.Future] = None,
+        event: Optional[threading.Event] = None,
+    ) -> None:
+        self.loop = loop
+        self.future = future
+        self.event = event
+        self.granted = False
+
+
+# ---------------------- 调度器 ----------------------
+
+
+class LlmCallScheduler:
+    """
+    LLM 调用调度器：令牌桶限流 + AIMD 并发 + 抖动退避重试。
+
+    用法：
+
+        scheduler = LlmCallScheduler(name="gpt-4o-mini", requests_per_minute=500)
+        result = await scheduler.arun(lambda: llm.ainvoke(messages), estimated_tokens=1200)
+        print(scheduler.stats())
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        initial_concurrency: int = 8,
+        min_concurrency: int = 1,
+        max_concurrency: int = 64,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+        decrease_cooldown: float = 2.0,
+        max_retries: int = 6,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+    ) -> None:
+        """
+        初始化 LlmCallScheduler。
+
+        Args:
+            name: 调度器名称（一般为模型名），用于日志
+            requests_per_minute: 每分钟请求数上限，None 表示不限
+            tokens_per_minute: 每分钟 token 数上限，None 表示不限
+            initial_concurrency: 初始并发上限
+            min_concurrency: 并发上限下界
+            max_concurrency: 并发上限上界
+            increase_step: 每个“并发窗口”成功后增加的并发数（加性增）
+            decrease_factor: 遇到限流 / 超时时并发上限的收缩系数（乘性减）
+            decrease_cooldown: 两次收缩之间的最小间隔（秒），避免同一波 429 连续收缩
+            max_retries: 最大重试次数（不含首次调用）
+            backoff_base: 退避基数（秒）
+            backoff_max: 单次退避上限（秒）
+        """
+        self.name = name
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._request_bucket = _RateBucket(requests_per_minute)
+        self._token_bucket = _RateBucket(tokens_per_minute)
+
+        self._lock = threading.Lock()
+        self._limit = float(
+            min(self.max_concurrency, max(self.min_concurrency, initial_concurrency))
+        )
+        self._in_flight = 0
+        self._waiters: Deque[_SlotWaiter] = deque()
+        self._last_decrease = 0.0
+
+        # 最近 60 秒的完成记录：(时间戳, token 数)
+        self._recent: Deque[Tuple[float, int]] = deque()
+        self._total_requests = 0
+        self._total_retries = 0
+        self._total_throttled = 0
+        self._total_failures = 0
+
+    # ---------------------- 并发槽位管理 ----------------------
+
+    def _current_limit_locked(self) -> int:
+        return max(self.min_concurrency, int(self._limit))
+
+    def _grant_waiters_locked(self) -> None:
+        """在并发上限允许的范围内按 FIFO 唤醒排队者。"""
+        while self._waiters and self._in_flight < self._current_limit_locked():
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+            self._in_flight += 1
+            if waiter.event is not None:
+                waiter.event.set()
+            else:
+                waiter.loop.call_soon_threadsafe(self._resolve_waiter, waiter)
+
+    @staticmethod
+    def _resolve_waiter(waiter: _SlotWaiter) -> None:
+        if not waiter.future.done():
+            waiter.future.set_result(None)
+
+    async def _acquire_slot(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._waiters and self._in_flight < self._current_limit_locked():
+                self._in_flight += 1
+                return
+            waiter = _SlotWaiter(loop=loop, future=loop.create_future())
+            self._waiters.append(waiter)
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    self._in_flight -= 1
+                    self._grant_waiters_locked()
+                else:
+                    try:
+                        self._waiters.remove(waiter)
+                    except ValueError:
+                        pass
+            raise
+
+    def _acquire_slot_sync(self) -> None:
+        with self._lock:
+            if not self._waiters and self._in_flight < self._current_limit_locked():
+                self._in_flight += 1
+                return
+            waiter = _SlotWaiter(event=threading.Event())
+            self._waiters.append(waiter)
+        waiter.event.wait()
+
+    def _release_slot(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._grant_waiters_locked()
+
+    # ---------------------- AIMD ----------------------
+
+    def _on_success(self, tokens: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            # 仅在并发已用满（或有排队）时增长：每完成约一个并发窗口的请求，上限增加 increase_step
+            if self._waiters or self._in_flight + 1 >= self._current_limit_locked():
+                self._limit = min(
+                    float(self.max_concurrency),
+                    self._limit + self.increase_step / max(self._limit, 1.0),
+                )
+            self._total_requests += 1
+            self._recent.append((now, tokens))
+            self._trim_recent_locked(now)
+            self._grant_waiters_locked()
+
+    def _on_throttle(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._total_throttled += 1
+            if now - self._last_decrease < self.decrease_cooldown:
+                return
+            old_limit = self._current_limit_locked()
+            self._limit = max(
+                float(self.min_concurrency), self._limit * self.decrease_factor
+            )
+            self._last_decrease = now
+            new_limit = self._current_limit_locked()
+        if new_limit != old_limit:
+            logger.info(
+                "LLM 调度器 %s 遇到限流，并发上限 %d -> %d",
+                self.name,
+                old_limit,
+                new_limit,
+            )
+
+    def _trim_recent_locked(self, now: float) -> None:
+        while self._recent and now - self._recent[0][0] > 60.0:
+            self._recent.popleft()
+
+    # ---------------------- 错误分类与退避 ----------------------
+
+    @staticmethod
+    def _classify_error(exc: BaseException) -> str:
+        """将异常归类为限流 / 可重试 / 不可重试。"""
+        if isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+            return _THROTTLE
+
+        status = getattr(exc, "status_code", None)
+        if status is None:
+            status = getattr(getattr(exc, "response", None), "status_code", None)
+        if status == 429:
+            return _THROTTLE
+        if isinstance(status, int) and (status >= 500 or status == 408):
+            return _TRANSIENT
+
+        name = type(exc).__name__
+        if "RateLimit" in name or "Timeout" in name:
+            return _THROTTLE
+        if "APIConnection" in name or "InternalServer" in name:
+            return _TRANSIENT
+        if isinstance(exc, ConnectionError):
+            return _TRANSIENT
+        return _FATAL
+
+    @staticmethod
+    def _retry_after_seconds(exc: BaseException) -> Optional[float]:
+        """读取响应头中的 Retry-After（秒），没有则返回 None。"""
+        headers = getattr(getattr(exc, "response", None), "headers", None)
+        if not headers:
+            return None
+        raw = headers.get("retry-after-ms")
+        if raw:
+            try:
+                return float(raw) / 1000.0
+            except ValueError:
+                pass
+        raw = headers.get("retry-after")
+        if raw:
+            try:
+                return float(raw)
+            except ValueError:
+                return None
+        return None
+
+    def _backoff_delay(self, attempt: int, exc: BaseException) -> float:
+        """full jitter 指数退避；Retry-After 作为下限。"""
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        delay = random.uniform(0, ceiling)
+        retry_after = self._retry_after_seconds(exc)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def _handle_failure(self, attempt: int, exc: BaseException) -> Optional[float]:
+        """记录失败并返回下次重试前的等待秒数；不应重试时返回 None。"""
+        kind = self._classify_error(exc)
+        if kind == _THROTTLE:
+            self._on_throttle()
+        if kind == _FATAL or attempt >= self.max_retries:
+            with self._lock:
+                self._total_failures += 1
+            return None
+        with self._lock:
+            self._total_retries += 1
+        delay = self._backoff_delay(attempt, exc)
+        logger.warning(
+            "LLM 调用失败，%.1f 秒后重试（%s, 第 %d/%d 次）：%r",
+            delay,
+            self.name,
+            attempt + 1,
+            self.max_retries,
+            exc,
+        )
+        return delay
+
+    # ---------------------- 限流等待 ----------------------
+    # 先在令牌桶中预留配额并等待，再占用并发槽位：被限流的调用不占槽位空等，
+    # 并发上限与 AIMD 只反映真正在途的请求
+
+    def _reserve_rate(self, estimated_tokens: int) -> float:
+        return max(
+            self._request_bucket.reserve(1),
+            self._token_bucket.reserve(estimated_tokens),
+        )
+
+    def _refund_rate(self, estimated_tokens: int) -> None:
+        self._request_bucket.adjust(-1)
+        self._token_bucket.adjust(-estimated_tokens)
+
+    async def _wait_for_rate(self, estimated_tokens: int) -> None:
+        wait = self._reserve_rate(estimated_tokens)
+        if wait <= 0:
+            return
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            # 未发出的请求归还预留的配额
+            self._refund_rate(estimated_tokens)
+            raise
+
+    def _wait_for_rate_sync(self, estimated_tokens: int) -> None:
+        wait = self._reserve_rate(estimated_tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    # ---------------------- 对外调用接口 ----------------------
+
+    async def arun(
+        self,
+        call: Callable[[], Awaitable[T]],
+        estimated_tokens: int = 0,
+        usage_getter: Optional[Callable[[T], Optional[int]]] = None,
+    ) -> T:
+        """在调度器控制下执行一次异步 LLM 调用（含限流、并发控制与重试）。
+
+        Args:
+            call: 无参协程工厂，每次重试都会重新调用
+            estimated_tokens: 本次调用预估的 token 数（输入 + 输出），用于 TPM 限流
+            usage_getter: 从结果中读取实际 token 用量的函数，用于修正 TPM 令牌
+
+        Returns:
+            call() 的返回值
+        """
+        attempt = 0
+        while True:
+            await self._wait_for_rate(estimated_tokens)
+            await self._acquire_slot()
+            try:
+                result = await call()
+            except asyncio.CancelledError:
+                self._release_slot()
+                raise
+            except Exception as exc:
+                self._release_slot()
+                delay = self._handle_failure(attempt, exc)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            self._release_slot()
+            self._on_success(self._settle_tokens(result, estimated_tokens, usage_getter))
+            return result
+
+    def run(
+        self,
+        call: Callable[[], T],
+        estimated_tokens: int = 0,
+        usage_getter: Optional[Callable[[T], Optional[int]]] = None,
+    ) -> T:
+        """arun 的同步版本，供同步 invoke 使用。"""
+        attempt = 0
+        while True:
+            self._wait_for_rate_sync(estimated_tokens)
+            self._acquire_slot_sync()
+            try:
+                result = call()
+            except Exception as exc:
+                self._release_slot()
+                delay = self._handle_failure(attempt, exc)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+
+            self._release_slot()
+            self._on_success(self._settle_tokens(result, estimated_tokens, usage_getter))
+            return result
+
+    async def astream(
+        self,
+        call: Callable[[], AsyncIterator[T]],
+        estimated_tokens: int = 0,
+        usage_getter: Optional[Callable[[T], Optional[int]]] = None,
+    ) -> AsyncIterator[T]:
+        """在调度器控制下执行一次流式异步调用。
+
+        整个流期间占用一个并发槽位；尚未产出任何分块时失败按 arun 的规则重试，
+        已产出分块后失败直接抛出（无法对调用方撤回已产出的内容）。
+        usage_getter 作用于每个分块，各分块用量之和用于修正 TPM 令牌。
+        """
+        attempt = 0
+        while True:
+            await self._wait_for_rate(estimated_tokens)
+            await self._acquire_slot()
+            emitted = False
+            used: Optional[int] = None
+            try:
+                async for chunk in call():
+                    emitted = True
+                    used = _add_usage(used, usage_getter, chunk)
+                    yield chunk
+            except Exception as exc:
+                self._release_slot()
+                delay = self._handle_failure(self.max_retries if emitted else attempt, exc)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # 取消或调用方提前结束迭代
+                self._release_slot()
+                raise
+
+            self._release_slot()
+            self._on_success(self._settle_tokens(used, estimated_tokens, lambda u: u))
+            return
+
+    def stream(
+        self,
+        call: Callable[[], Iterator[T]],
+        estimated_tokens: int = 0,
+        usage_getter: Optional[Callable[[T], Optional[int]]] = None,
+    ) -> Iterator[T]:
+        """astream 的同步版本，供同步 stream 使用。"""
+        attempt = 0
+        while True:
+            self._wait_for_rate_sync(estimated_tokens)
+            self._acquire_slot_sync()
+            emitted = False
+            used: Optional[int] = None
+            try:
+                for chunk in call():
+                    emitted = True
+                    used = _add_usage(used, usage_getter, chunk)
+                    yield chunk
+            except Exception as exc:
+                self._release_slot()
+                delay = self._handle_failure(self.max_retries if emitted else attempt, exc)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self._release_slot()
+                raise
+
+            self._release_slot()
+            self._on_success(self._settle_tokens(used, estimated_tokens, lambda u: u))
+            return
+
+    def _settle_tokens(
+        self,
+        result: Any,
+        estimated_tokens: int,
+        usage_getter: Optional[Callable[[Any], Optional[int]]],
+    ) -> int:
+        """用实际 token 用量修正 TPM 令牌桶，返回计入统计的 token 数。"""
+        actual = None
+        if usage_getter is not None:
+            try:
+                actual = usage_getter(result)
+            except Exception:
+                actual = None
+        if actual is None:
+            return estimated_tokens
+        self._token_bucket.adjust(actual - estimated_tokens)
+        return actual
+
+    def stats(self) -> Dict[str, Any]:
+        """返回调度器运行状态。
+
+        Returns:
+            {
+                "name", "concurrency_limit", "in_flight", "queue_depth",
+                "requests_per_minute", "tokens_per_minute",
+                "total_requests", "total_retries", "total_throttled", "total_failures"
+            }
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._trim_recent_locked(now)
+            return {
+                "name": self.name,
+                "concurrency_limit": self._current_limit_locked(),
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "requests_per_minute": len(self._recent),
+                "tokens_per_minute": sum(tokens for _, tokens in self._recent),
+                "total_requests": self._total_requests,
+                "total_retries": self._total_retries,
+                "total_throttled": self._total_throttled,
+                "total_failures": self._total_failures,
+            }
+
+
+def _add_usage(
+    used: Optional[int], usage_getter: Optional[Callable[[Any], Optional[int]]], chunk: Any
+) -> Optional[int]:
+    """累加流式分块中的 token 用量（无用量信息的分块不计）。"""
+    if usage_getter is None:
+        return used
+    try:
+        tokens = usage_getter(chunk)
+    except Exception:
+        return used
+    if tokens is None:
+        return used
+    return (used or 0) + tokens
+
+
+# ---------------------- 调度器注册表 ----------------------
+
+_SCHEDULERS: Dict[str, LlmCallScheduler] = {}
+_SCHEDULERS_LOCK = threading.Lock()
+
+
+def get_llm_scheduler(name: str) -> LlmCallScheduler:
+    """按名称（一般为模型名）获取共享的调度器，不存在时按 settings 创建。"""
+    with _SCHEDULERS_LOCK:
+        scheduler = _SCHEDULERS.get(name)
+        if scheduler is None:
+            config = {
+                k: v for k, v in LLM_SCHEDULER_CONFIG.items() if v is not None
+            }
+            config.pop("enabled", None)
+            scheduler = LlmCallScheduler(name=name, **config)
+            _SCHEDULERS[name] = scheduler
+        return scheduler
+
+
+def get_llm_scheduler_stats() -> Dict[str, Dict[str, Any]]:
+    """返回所有已创建调度器的运行状态：{名称: stats}。"""
+    with _SCHEDULERS_LOCK:
+        schedulers = list(_SCHEDULERS.values())
+    return {scheduler.name: scheduler.stats() for scheduler in schedulers}
+
+
+# ---------------------- token 估算 ----------------------
+
+
+def _estimate_text_tokens(text: str) -> int:
+    """粗略估算文本 token 数：英文约 4 字符 / token，中文约 1 字 / token。"""
+    if not text:
+        return 0
+    cjk = sum(1 for ch in text if "\u4e00" <= ch <= "\u9fff")
+    return cjk + (len(text) - cjk) // 4 + 1
+
+
+def estimate_prompt_tokens(messages: Any, max_tokens: Optional[int] = None) -> int:
+    """估算一次调用的 token 数（输入 + 预留输出），用于 TPM 预扣。"""
+    total = 0
+    # prompt | llm 传入的是 PromptValue，先展开为消息列表
+    if isinstance(messages, PromptValue):
+        messages = messages.to_messages()
+    if isinstance(messages, str):
+        total += _estimate_text_tokens(messages)
+    else:
+        items = messages if isinstance(messages, (list, tuple)) else [messages]
+        for message in items:
+            content = getattr(message, "content", message)
+            if isinstance(content, str):
+                total += _estimate_text_tokens(content)
+            elif isinstance(content, list):
+                for part in content:
+                    if isinstance(part, dict):
+                        if part.get("type") == "image_url":
+                            total += _IMAGE_TOKEN_ESTIMATE
+                        else:
+                            total += _estimate_text_tokens(str(part.get("text", "")))
+                    else:
+                        total += _estimate_text_tokens(str(part))
+            elif isinstance(content, tuple) and len(content) == 2:
+                total += _estimate_text_tokens(str(content[1]))
+    return total + (max_tokens or _DEFAULT_COMPLETION_TOKENS)
+
+
+def _usage_total_tokens(result: Any) -> Optional[int]:
+    """从 AIMessage.usage_metadata 读取实际 token 用量。"""
+    usage = getattr(result, "usage_metadata", None)
+    if isinstance(usage, dict) and usage.get("total_tokens") is not None:
+        return int(usage["total_tokens"])
+    return None
+
+
+# ---------------------- 经调度的 ChatOpenAI ----------------------
+
+
+class ScheduledChatOpenAI(ChatOpenAI):
+    """
+    经 LlmCallScheduler 调度的 ChatOpenAI。
+
+    invoke / ainvoke（以及基于它们的 batch / abatch、bind_tools 等绑定调用）与
+    stream / astream 都会经过共享调度器；重试由调度器负责，底层客户端的 max_retries 应设为 0。
+    """
+
+    scheduler: Optional[Any] = Field(default=None, exclude=True)
+
+    def invoke(self, input: Any, config: Any = None, *, stop: Any = None, **kwargs: Any) -> Any:
+        if self.scheduler is None:
+            return super().invoke(input, config, stop=stop, **kwargs)
+        return self.scheduler.run(
+            lambda: super(ScheduledChatOpenAI, self).invoke(
+                input, config, stop=stop, **kwargs
+            ),
+            estimated_tokens=estimate_prompt_tokens(input, self.max_tokens),
+            usage_getter=_usage_total_tokens,
+        )
+
+    async def ainvoke(
+        self, input: Any, config: Any = None, *, stop: Any = None, **kwargs: Any
+    ) -> Any:
+        if self.scheduler is None:
+            return await super().ainvoke(input, config, stop=stop, **kwargs)
+        return await self.scheduler.arun(
+            lambda: super(ScheduledChatOpenAI, self).ainvoke(
+                input, config, stop=stop, **kwargs
+            ),
+            estimated_tokens=estimate_prompt_tokens(input, self.max_tokens),
+            usage_getter=_usage_total_tokens,
+        )
+
+    def stream(
+        self, input: Any, config: Any = None, *, stop: Any = None, **kwargs: Any
+    ) -> Iterator[Any]:
+        if self.scheduler is None:
+            yield from super().stream(input, config, stop=stop, **kwargs)
+            return
+        yield from self.scheduler.stream(
+            lambda: super(ScheduledChatOpenAI, self).stream(input, config, stop=stop, **kwargs),
+            estimated_tokens=estimate_prompt_tokens(input, self.max_tokens),
+            usage_getter=_usage_total_tokens,
+        )
+
+    async def astream(
+        self, input: Any, config: Any = None, *, stop: Any = None, **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        if self.scheduler is None:
+            async for chunk in super().astream(input, config, stop=stop, **kwargs):
+                yield chunk
+            return
+        async for chunk in self.scheduler.astream(
+            lambda: super(ScheduledChatOpenAI, self).astream(input, config, stop=stop, **kwargs),
+            estimated_tokens=estimate_prompt_tokens(input, self.max_tokens),
+            usage_getter=_usage_total_tokens,
+        ):
+            yield chunk
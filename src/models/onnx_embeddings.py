@@ -0,0 +1,392 @@
+"""
+ONNX Runtime 嵌入模型（CPU 推理路径）
+
+CPU 节点上 PyTorch 版 sentence-transformers 是索引与查询编码的吞吐瓶颈。本模块：
+
+1. export_onnx：把 model/embeddings/ 下的本地模型（transformer 部分）导出为 ONNX，
+   可选再做 int8 动态量化（onnxruntime.quantization.quantize_dynamic，只量化权重，
+   不需要校准数据）；
+2. OnnxEmbeddings：以 ONNX Runtime 推理（EMBEDDING_ONNX_THREADS 个 intra-op 线程），
+   按 sentence-transformers 的模块配置在 numpy 中做池化（mean / cls / max）与归一化，
+   输出与 HuggingFaceEmbeddings 一致；批内按文本长度排序以减少 padding；
+3. verify_agreement：与 PyTorch 路径逐条比较余弦相似度，量化后需确认一致性再上线。
+
+EMBEDDING_BACKEND=onnx 时 get_models.get_embedding_model() 返回 OnnxEmbeddings
+（ONNX 文件不存在时先导出）。onnxruntime / onnx 为可选依赖，仅在使用时导入。
+
+用法：
+
+    python src/models/onnx_embeddings.py --export --quantize --verify
+"""
+
+import sys
+from pathlib import Path
+
+# 确保项目根目录在 Python 路径中
+_project_root = Path(__file__).resolve().parent.parent.parent
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.config.settings import (
+    EMBEDDING_ONNX_BATCH_SIZE,
+    EMBEDDING_ONNX_PATH,
+    EMBEDDING_ONNX_QUANTIZE,
+    EMBEDDING_ONNX_THREADS,
+    EMBEDDING_PATH,
+)
+
+# ---------------------- 类型与日志配置 ----------------------
+
+PathLike = Union[str, os.PathLike]
+
+logger = logging.getLogger(__name__)
+
+FP32_FILE_NAME = "model.onnx"
+INT8_FILE_NAME = "model.int8.onnx"
+# 导出时使用的 opset 版本
+_OPSET = 14
+# 无法从模型配置得到编码窗口时的默认值
+_DEFAULT_MAX_SEQ_LENGTH = 512
+# 一致性校验的默认文本
+_VERIFY_TEXTS = [
+    "What is retrieval-augmented generation?",
+    "检索增强生成如何结合向量检索与大语言模型？",
+    "Table 3 reports the ablation results on the validation set.",
+    "图 2 展示了模型在不同数据规模下的召回率变化。",
+    "The quick brown fox jumps over the lazy dog.",
+]
+
+
+def _import_onnxruntime() -> Any:
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise ImportError("EMBEDDING_BACKEND=onnx 需要安装 onnxruntime") from e
+    return onnxruntime
+
+
+# ---------------------- sentence-transformers 模块配置 ----------------------
+
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def read_pipeline_config(model_path: PathLike) -> Dict[str, Any]:
+    """
+    读取 sentence-transformers 模型目录中的编码窗口、池化方式与是否归一化。
+
+    Returns:
+        {"max_seq_length": int, "pooling": "mean" | "cls" | "max", "normalize": bool}
+    """
+    model_path = Path(model_path)
+    max_seq_length = _read_json(model_path / "sentence_bert_config.json").get("max_seq_length")
+
+    pooling, normalize = "mean", False
+    modules = _read_json(model_path / "modules.json")
+    for module in modules if isinstance(modules, list) else []:
+        module_type = module.get("type", "")
+        if module_type.endswith("Pooling"):
+            config = _read_json(model_path / module.get("path", "") / "config.json")
+            if config.get("pooling_mode_cls_token"):
+                pooling = "cls"
+            elif config.get("pooling_mode_max_tokens"):
+                pooling = "max"
+        elif module_type.endswith("Normalize"):
+            normalize = True
+    return {
+        "max_seq_length": int(max_seq_length or _DEFAULT_MAX_SEQ_LENGTH),
+        "pooling": pooling,
+        "normalize": normalize,
+    }
+
+
+def _pool(hidden: np.ndarray, attention_mask: np.ndarray, pooling: str) -> np.ndarray:
+    """按注意力掩码池化 token 向量，形状 (batch, seq, dim) -> (batch, dim)。"""
+    if pooling == "cls":
+        return hidden[:, 0]
+    mask = attention_mask[:, :, None].astype(hidden.dtype)
+    if pooling == "max":
+        return np.where(mask > 0, hidden, -1e9).max(axis=1)
+    return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+
+# ---------------------- 导出 ----------------------
+
+
+def onnx_file(onnx_dir: Optional[PathLike] = None, quantized: Optional[bool] = None) -> Path:
+    """ONNX 模型文件路径。"""
+    quantized = EMBEDDING_ONNX_QUANTIZE if quantized is None else quantized
+    return Path(onnx_dir or EMBEDDING_ONNX_PATH) / (
+        INT8_FILE_NAME if quantized else FP32_FILE_NAME
+    )
+
+
+def export_onnx(
+    model_path: Optional[PathLike] = None,
+    onnx_dir: Optional[PathLike] = None,
+    quantize: Optional[bool] = None,
+    overwrite: bool = False,
+) -> Path:
+    """
+    把本地 sentence-transformers 模型的 transformer 部分导出为 ONNX。
+
+    输入为 tokenizer 输出的 input_ids / attention_mask（及 token_type_ids，若模型使用），
+    输出为 last_hidden_state，批大小与序列长度均为动态维度；池化与归一化在推理侧完成。
+
+    Args:
+        model_path: 模型目录，默认 EMBEDDING_PATH
+        onnx_dir: 输出目录，默认 EMBEDDING_ONNX_PATH
+        quantize: 同时生成 int8 动态量化模型，默认 EMBEDDING_ONNX_QUANTIZE
+        overwrite: 已存在时重新导出
+
+    Returns:
+        推理应使用的模型文件（quantize 时为 int8 模型）
+    """
+    model_path = Path(model_path or EMBEDDING_PATH)
+    onnx_dir = Path(onnx_dir or EMBEDDING_ONNX_PATH)
+    quantize = EMBEDDING_ONNX_QUANTIZE if quantize is None else quantize
+    onnx_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path = onnx_dir / FP32_FILE_NAME
+
+    if overwrite or not fp32_path.is_file():
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(str(model_path))
+        model = AutoModel.from_pretrained(str(model_path)).eval()
+        sample = tokenizer(
+            ["export sample", "a longer export sample text"], padding=True, return_tensors="pt"
+        )
+        input_names = [
+            name
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in sample
+        ]
+
+        class _Encoder(torch.nn.Module):
+            def __init__(self) -> None:
+                super().__init__()
+                self.model = model
+
+            def forward(self, *tensors: Any) -> Any:
+                return self.model(**dict(zip(input_names, tensors))).last_hidden_state
+
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+        tmp_path = fp32_path.with_name(fp32_path.name + ".tmp")
+        logger.info("导出 ONNX 模型：%s -> %s", model_path, fp32_path)
+        with torch.no_grad():
+            torch.onnx.export(
+                _Encoder(),
+                tuple(sample[name] for name in input_names),
+                str(tmp_path),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=_OPSET,
+                do_constant_folding=True,
+            )
+        os.replace(tmp_path, fp32_path)
+
+    if not quantize:
+        return fp32_path
+
+    int8_path = onnx_dir / INT8_FILE_NAME
+    if overwrite or not int8_path.is_file():
+        _import_onnxruntime()
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        tmp_path = int8_path.with_name(int8_path.name + ".tmp")
+        logger.info("int8 动态量化：%s -> %s", fp32_path, int8_path)
+        quantize_dynamic(str(fp32_path), str(tmp_path), weight_type=QuantType.QInt8)
+        os.replace(tmp_path, int8_path)
+    return int8_path
+
+
+# ---------------------- 推理 ----------------------
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    以 ONNX Runtime 推理的 LangChain Embeddings，输出与 HuggingFaceEmbeddings 一致。
+
+    Args:
+        model_path: 原模型目录（分词器与池化配置），默认 EMBEDDING_PATH
+        onnx_path: ONNX 模型文件，默认按 EMBEDDING_ONNX_QUANTIZE 取 EMBEDDING_ONNX_PATH 下的文件
+        threads: intra-op 线程数，默认 EMBEDDING_ONNX_THREADS（0 为 ONNX Runtime 默认值）
+        batch_size: 单次推理的文本条数，默认 EMBEDDING_ONNX_BATCH_SIZE
+    """
+
+    def __init__(
+        self,
+        model_path: Optional[PathLike] = None,
+        onnx_path: Optional[PathLike] = None,
+        threads: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> None:
+        from transformers import AutoTokenizer
+
+        ort = _import_onnxruntime()
+        self.model_path = Path(model_path or EMBEDDING_PATH)
+        self.onnx_path = Path(onnx_path) if onnx_path else onnx_file()
+        if not self.onnx_path.is_file():
+            raise FileNotFoundError(
+                f"ONNX 模型不存在：{self.onnx_path}（先运行 export_onnx 导出）"
+            )
+        self.batch_size = max(batch_size or EMBEDDING_ONNX_BATCH_SIZE, 1)
+        threads = EMBEDDING_ONNX_THREADS if threads is None else threads
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            str(self.onnx_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.model_path))
+        pipeline = read_pipeline_config(self.model_path)
+        self.max_seq_length = pipeline["max_seq_length"]
+        self.pooling = pipeline["pooling"]
+        self.normalize = pipeline["normalize"]
+        logger.info(
+            "ONNX 嵌入模型：%s（线程 %s，池化 %s，归一化 %s）",
+            self.onnx_path,
+            threads or "默认",
+            self.pooling,
+            self.normalize,
+        )
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np",
+        )
+        feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        (hidden,) = self.session.run(["last_hidden_state"], feeds)
+        vectors = _pool(hidden, encoded["attention_mask"], self.pooling)
+        if self.normalize:
+            vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors.astype(np.float32)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """批量编码，返回 (条数, 维度) 的 float32 数组；按长度排序分批以减少 padding。"""
+        texts = [text.replace("\n", " ") for text in texts]
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        batches = [
+            self._encode_batch([texts[i] for i in order[start : start + self.batch_size]])
+            for start in range(0, len(order), self.batch_size)
+        ]
+        vectors = np.empty((len(texts), batches[0].shape[1]), dtype=np.float32)
+        vectors[order] = np.concatenate(batches)
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+
+# ---------------------- 一致性校验 ----------------------
+
+
+def verify_agreement(
+    candidate: Embeddings,
+    reference: Embeddings,
+    texts: Optional[Sequence[str]] = None,
+) -> Dict[str, float]:
+    """
+    逐条比较两个嵌入模型的输出，返回余弦相似度的最小值与平均值及各自耗时（秒）。
+
+    Args:
+        candidate: 待校验的模型（如 OnnxEmbeddings）
+        reference: 参照模型（PyTorch 版 HuggingFaceEmbeddings）
+        texts: 校验文本，默认内置的中英文样例
+    """
+    texts = list(texts or _VERIFY_TEXTS)
+    start = time.perf_counter()
+    expected = np.asarray(reference.embed_documents(texts), dtype=np.float32)
+    reference_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = np.asarray(candidate.embed_documents(texts), dtype=np.float32)
+    candidate_seconds = time.perf_counter() - start
+
+    cosine = (expected * actual).sum(axis=1) / np.maximum(
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1), 1e-12
+    )
+    return {
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean()),
+        "reference_seconds": reference_seconds,
+        "candidate_seconds": candidate_seconds,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
+    )
+    parser = argparse.ArgumentParser(description="导出并校验 ONNX 嵌入模型")
+    parser.add_argument("--export", action="store_true", help="导出 ONNX 模型")
+    parser.add_argument("--overwrite", action="store_true", help="已存在时重新导出")
+    parser.add_argument(
+        "--quantize",
+        action=argparse.BooleanOptionalAction,
+        default=EMBEDDING_ONNX_QUANTIZE,
+        help="使用 int8 动态量化模型",
+    )
+    parser.add_argument("--verify", action="store_true", help="与 PyTorch 路径比较余弦相似度")
+    parser.add_argument("--texts", type=str, default=None, help="校验文本文件（每行一条）")
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="校验通过的最小余弦相似度")
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.export:
+        path = export_onnx(quantize=args.quantize, overwrite=args.overwrite)
+        print(f"ONNX 模型：{path}")
+
+    if args.verify:
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        from src.config.settings import EMBEDDING_MODELN_CONFIG
+
+        texts = None
+        if args.texts:
+            lines = Path(args.texts).read_text(encoding="utf-8").splitlines()
+            texts = [line for line in lines if line.strip()]
+        candidate = OnnxEmbeddings(
+            onnx_path=onnx_file(quantized=args.quantize), threads=args.threads
+        )
+        reference = HuggingFaceEmbeddings(**EMBEDDING_MODELN_CONFIG)
+        # 预热，避免首批的初始化开销计入耗时
+        verify_agreement(candidate, reference, texts=["warm up"])
+        result = verify_agreement(candidate, reference, texts=texts)
+        print(
+            f"余弦相似度 min={result['min_cosine']:.5f} mean={result['mean_cosine']:.5f}；"
+            f"PyTorch {result['reference_seconds']:.3f}s / ONNX {result['candidate_seconds']:.3f}s"
+            f"（{result['reference_seconds'] / max(result['candidate_seconds'], 1e-9):.1f}x）"
+        )
+        if result["min_cosine"] < args.min_cosine:
+            sys.exit(f"一致性校验未通过：min_cosine < {args.min_cosine}")
@@ -0,0 +1,310 @@
+"""
+ANN 索引基准：recall@k 与查询延迟、索引大小。
+
+以精确内积检索（numpy 分块矩阵乘）为真值，对 faiss（Flat 对照 / IVF-PQ 不同 nprobe）、
+hnswlib（不同 ef_search）与量化 flat 索引（float32 / float16 / int8）逐一测量：
+
+- 建索引耗时、落盘后的索引文件大小（近似常驻内存；faiss 内存映射时更低）
+- recall@k：ANN 前 k 个结果中真值前 k 个所占比例的平均值
+- 单条查询延迟 p50 / p95（毫秒）与 QPS
+- 有损索引（IVF-PQ、float16 / int8）另测 "+rescore"：取 k*rescore 个候选，
+  以 float32 原始向量精确重排（与 LocalAnnVectorStore 的 ANN_RESCORE_FACTOR 一致）
+
+同一后端的不同查询参数共用一份建好的索引。向量来源：synthetic（带簇结构的随机向量）
+或 chroma（当前 Chroma collection 中的向量）。
+
+用法：
+
+    python src/rag/indexing/ann_benchmark.py --source synthetic -n 200000 --dim 768
+    python src/rag/indexing/ann_benchmark.py --source chroma --limit 500000
+    python src/rag/indexing/ann_benchmark.py --backends flat --dtypes float16,int8 --rescore 4
+"""
+
+import sys
+from pathlib import Path
+
+# 确保项目根目录在 Python 路径中
+_project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+import argparse
+import logging
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.rag.indexing.quantization import VECTOR_DTYPES, rescore_exact
+from src.rag.indexing.vector_index import AnnIndex, FaissIndex, FlatIndex, HnswIndex, normalize
+
+# ---------------------- 日志配置 ----------------------
+
+logger = logging.getLogger(__name__)
+
+# 精确检索时每块的查询条数
+_EXACT_BLOCK = 256
+# 建索引时每次写入的条数
+_ADD_BATCH = 10000
+
+
+# ---------------------- 数据结构 ----------------------
+
+
+@dataclass
+class BenchmarkResult:
+    """一个索引配置的测量结果。"""
+
+    name: str
+    build_seconds: float
+    index_bytes: int
+    recall: float
+    p50_ms: float
+    p95_ms: float
+    qps: float
+
+
+# ---------------------- 向量来源 ----------------------
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int = 256, seed: int = 0) -> np.ndarray:
+    """带簇结构的随机向量（归一化），比均匀随机向量更接近真实嵌入的分布。"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    assignment = rng.integers(0, clusters, n)
+    noise = rng.standard_normal((n, dim)).astype(np.float32) * 0.6
+    return normalize(centers[assignment] + noise)
+
+
+def chroma_vectors(limit: Optional[int] = None, page_size: int = 5000) -> np.ndarray:
+    """分页读取当前 Chroma collection 中的向量。"""
+    from src.models.get_models import get_vector_db
+
+    collection = get_vector_db()._collection
+    total = collection.count() if limit is None else min(limit, collection.count())
+    pages: List[np.ndarray] = []
+    for offset in range(0, total, page_size):
+        page = collection.get(
+            include=["embeddings"], limit=min(page_size, total - offset), offset=offset
+        )
+        pages.append(np.asarray(page["embeddings"], dtype=np.float32))
+    if not pages:
+        raise ValueError("Chroma collection 中没有向量")
+    return normalize(np.concatenate(pages))
+
+
+def split_queries(
+    vectors: np.ndarray, num_queries: int, seed: int = 1
+) -> Tuple[np.ndarray, np.ndarray]:
+    """从向量中留出查询集（不参与建索引），返回 (base, queries)。"""
+    order = np.random.default_rng(seed).permutation(len(vectors))
+    return vectors[order[num_queries:]], vectors[order[:num_queries]]
+
+
+def exact_topk(base: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """精确内积检索的前 k 个下标（真值）。"""
+    result = np.empty((len(queries), k), dtype=np.int64)
+    for start in range(0, len(queries), _EXACT_BLOCK):
+        scores = queries[start : start + _EXACT_BLOCK] @ base.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+        result[start : start + _EXACT_BLOCK] = np.take_along_axis(top, order, axis=1)
+    return result
+
+
+# ---------------------- 测量 ----------------------
+
+
+def _build(
+    make_index: Callable[[], AnnIndex], base: np.ndarray, path: Path
+) -> Tuple[AnnIndex, float]:
+    """建索引并落盘，返回 (索引, 耗时)。"""
+    start = time.perf_counter()
+    index = make_index()
+    labels = np.arange(len(base), dtype=np.int64)
+    for offset in range(0, len(base), _ADD_BATCH):
+        index.add(labels[offset : offset + _ADD_BATCH], base[offset : offset + _ADD_BATCH])
+    index.save(path)
+    return index, time.perf_counter() - start
+
+
+def _query(
+    name: str,
+    index: AnnIndex,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    build_seconds: float,
+    index_bytes: int,
+    base: Optional[np.ndarray] = None,
+    rescore: int = 0,
+) -> BenchmarkResult:
+    """逐条查询，测量 recall@k 与延迟；rescore > 0 时以 base 中的 float32 向量精确重排。"""
+    k = truth.shape[1]
+    latencies: List[float] = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        if rescore > 0:
+            _, candidates = index.search(query.reshape(1, -1), k * rescore)
+            candidates = candidates[0]
+            _, found = rescore_exact(query, candidates, base[np.maximum(candidates, 0)], k)
+            found = found.reshape(1, -1)
+        else:
+            _, found = index.search(query.reshape(1, -1), k)
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(found[0].tolist()) & set(expected.tolist()))
+
+    latencies_ms = np.asarray(latencies) * 1000
+    return BenchmarkResult(
+        name=name,
+        build_seconds=build_seconds,
+        index_bytes=index_bytes,
+        recall=hits / truth.size,
+        p50_ms=float(np.percentile(latencies_ms, 50)),
+        p95_ms=float(np.percentile(latencies_ms, 95)),
+        qps=len(queries) / max(sum(latencies), 1e-9),
+    )
+
+
+def run_benchmark(
+    base: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    nprobes: Sequence[int] = (4, 16, 64),
+    ef_searches: Sequence[int] = (16, 64, 256),
+    backends: Sequence[str] = ("faiss", "hnswlib", "flat"),
+    dtypes: Sequence[str] = VECTOR_DTYPES,
+    rescore: int = 4,
+) -> List[BenchmarkResult]:
+    """
+    对各索引配置测量 recall@k 与延迟（base 中的下标即 label）。
+
+    rescore 为有损索引精确重排的候选倍数，0 为不测重排。
+    """
+    truth = exact_topk(base, queries, k)
+    dim = base.shape[1]
+    results: List[BenchmarkResult] = []
+
+    with tempfile.TemporaryDirectory(prefix="ann_benchmark_") as tmp:
+        work_dir = Path(tmp)
+        if "faiss" in backends:
+            path = work_dir / "flat.faiss"
+            flat, seconds = _build(lambda: FaissIndex(dim, ivf_pq=False), base, path)
+            results.append(
+                _query("faiss Flat", flat, queries, truth, seconds, path.stat().st_size)
+            )
+            del flat
+
+            path = work_dir / "ivfpq.faiss"
+            _, seconds = _build(lambda: FaissIndex(dim), base, path)
+            # 以内存映射方式重新加载，与只读部署时一致
+            ivf = FaissIndex.load(path, dim, read_only=True)
+            for nprobe in nprobes:
+                ivf.set_nprobe(nprobe)
+                results.append(
+                    _query(
+                        f"faiss IVF-PQ nprobe={nprobe}",
+                        ivf,
+                        queries,
+                        truth,
+                        seconds,
+                        path.stat().st_size,
+                    )
+                )
+                if rescore > 0:
+                    results.append(
+                        _query(
+                            f"  +rescore x{rescore}",
+                            ivf,
+                            queries,
+                            truth,
+                            seconds,
+                            path.stat().st_size,
+                            base=base,
+                            rescore=rescore,
+                        )
+                    )
+
+        if "hnswlib" in backends:
+            path = work_dir / "graph.hnsw"
+            graph, seconds = _build(lambda: HnswIndex(dim), base, path)
+            for ef in ef_searches:
+                graph.ef_search = ef
+                results.append(
+                    _query(
+                        f"hnswlib ef={ef}", graph, queries, truth, seconds, path.stat().st_size
+                    )
+                )
+            del graph
+
+        if "flat" in backends:
+            for dtype in dtypes:
+                path = work_dir / f"flat_{dtype}.npz"
+                flat, seconds = _build(lambda: FlatIndex(dim, dtype=dtype), base, path)
+                size = path.stat().st_size
+                results.append(_query(f"flat {dtype}", flat, queries, truth, seconds, size))
+                if rescore > 0 and dtype != "float32":
+                    results.append(
+                        _query(
+                            f"  +rescore x{rescore}",
+                            flat,
+                            queries,
+                            truth,
+                            seconds,
+                            size,
+                            base=base,
+                            rescore=rescore,
+                        )
+                    )
+                del flat
+    return results
+
+
+def format_results(results: Sequence[BenchmarkResult], k: int) -> str:
+    header = (
+        f"{'索引':<26}{'建索引(s)':>10}{'大小(MB)':>10}"
+        f"{f'recall@{k}':>11}{'p50(ms)':>9}{'p95(ms)':>9}{'QPS':>9}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.name:<26}{r.build_seconds:>10.1f}{r.index_bytes / 2**20:>10.1f}"
+            f"{r.recall:>11.3f}{r.p50_ms:>9.2f}{r.p95_ms:>9.2f}{r.qps:>9.0f}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
+    )
+    parser = argparse.ArgumentParser(description="ANN 索引 recall@k / 延迟基准")
+    parser.add_argument("--source", choices=["synthetic", "chroma"], default="synthetic")
+    parser.add_argument("-n", type=int, default=100000, help="synthetic 向量条数")
+    parser.add_argument("--dim", type=int, default=768, help="synthetic 向量维度")
+    parser.add_argument("--limit", type=int, default=None, help="chroma 最多读取的向量条数")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--backends", default="faiss,hnswlib,flat")
+    parser.add_argument("--dtypes", default=",".join(VECTOR_DTYPES), help="flat 索引的存储精度")
+    parser.add_argument("--rescore", type=int, default=4, help="精确重排的候选倍数，0 为不测")
+    args = parser.parse_args()
+
+    if args.source == "chroma":
+        vectors = chroma_vectors(args.limit)
+    else:
+        vectors = synthetic_vectors(args.n + args.queries, args.dim)
+    base, queries = split_queries(vectors, args.queries)
+    logger.info("基准数据：%d 条向量，%d 条查询，维度 %d", len(base), len(queries), base.shape[1])
+    results = run_benchmark(
+        base,
+        queries,
+        k=args.k,
+        backends=args.backends.split(","),
+        dtypes=args.dtypes.split(","),
+        rescore=args.rescore,
+    )
+    print(format_results(results, args.k))
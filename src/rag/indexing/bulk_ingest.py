@@ -0,0 +1,278 @@
+"""
+向量库批量写入（Chroma；本地 ANN 后端 LocalAnnVectorStore 同样适用）。
+
+逐条 add_documents 时每次调用都单独嵌入并写入一次 chroma.sqlite3，全量重建索引的耗时
+主要花在大量小事务上。本模块按大批次写入：
+
+- 嵌入在当前线程按批计算（记录中已有 embedding 时直接使用），写入交给后台线程，
+  第 n 批写入与第 n+1 批嵌入并行，重建速度取决于嵌入速度
+- 单次 upsert 不超过 VECTOR_DB_INGEST_BATCH_SIZE 与 Chroma 客户端的 max_batch_size
+- 以块 id（{元素 id}_chunk_{n}，同一文档与配置重复切分得到相同 id）upsert；写入块存储时
+  先按 doc_id 删除该文档已有的向量，内容或切分配置变化后块 id 改变、块数变少时也不会残留
+  旧块，重复执行结果不变
+- 统计并记录写入条数与每秒行数
+
+用法：
+
+    stats = ChromaBulkWriter().ingest_chunk_store(ChunkStore())
+"""
+
+import sys
+from pathlib import Path
+
+# 确保项目根目录在 Python 路径中
+_project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from src.config.settings import VECTOR_DB_INGEST_BATCH_SIZE
+from src.rag.splitting.corpus_chunker import ChunkStore
+
+# ---------------------- 日志配置 ----------------------
+
+logger = logging.getLogger(__name__)
+
+# 无法从客户端读取 max_batch_size 时的上限（Chroma 的 SQLite 后端默认约 5461）
+_DEFAULT_MAX_BATCH_SIZE = 5000
+# 每写入多少批记录一次进度
+_LOG_EVERY_BATCHES = 20
+
+
+# ---------------------- 数据结构 ----------------------
+
+
+@dataclass
+class BulkIngestStats:
+    """一次批量写入的统计。"""
+
+    rows: int = 0
+    batches: int = 0
+    embed_seconds: float = 0.0
+    write_seconds: float = 0.0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def write_rows_per_second(self) -> float:
+        return self.rows / self.write_seconds if self.write_seconds else 0.0
+
+
+def _batched(
+    records: Iterable[Dict[str, Any]], size: int
+) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ---------------------- 批量写入 ----------------------
+
+
+class ChromaBulkWriter:
+    """
+    Chroma 批量 upsert。
+
+    Args:
+        vector_db: langchain_chroma.Chroma 实例（写入其底层 collection）或 LocalAnnVectorStore，
+            默认 get_vector_db()
+        embedding: LangChain Embeddings（需 embed_documents），默认 get_embedding_model()；
+            记录已带 embedding 时不使用
+        batch_size: 单次 upsert 的条数，默认 VECTOR_DB_INGEST_BATCH_SIZE，不超过客户端上限
+    """
+
+    def __init__(
+        self,
+        vector_db: Optional[Any] = None,
+        embedding: Optional[Any] = None,
+        batch_size: Optional[int] = None,
+    ) -> None:
+        if vector_db is None:
+            from src.models.get_models import get_vector_db
+
+            vector_db = get_vector_db()
+        self.vector_db = vector_db
+        # Chroma 写入底层 collection；LocalAnnVectorStore 自身提供同样的 upsert 接口
+        self.collection = getattr(vector_db, "_collection", vector_db)
+        self._embedding = embedding
+        self.max_batch_size = self._client_max_batch_size()
+        self.batch_size = max(
+            1, min(batch_size or VECTOR_DB_INGEST_BATCH_SIZE, self.max_batch_size)
+        )
+
+    def _client_max_batch_size(self) -> int:
+        client = getattr(self.vector_db, "_client", None)
+        get_max = getattr(client, "get_max_batch_size", None)
+        if get_max is None:
+            return _DEFAULT_MAX_BATCH_SIZE
+        try:
+            return int(get_max())
+        except Exception as e:
+            logger.warning(
+                "读取 Chroma max_batch_size 失败，使用 %d：%s", _DEFAULT_MAX_BATCH_SIZE, e
+            )
+            return _DEFAULT_MAX_BATCH_SIZE
+
+    @property
+    def embedding(self) -> Any:
+        if self._embedding is None:
+            self._embedding = getattr(self.vector_db, "embeddings", None)
+        if self._embedding is None:
+            from src.models.get_models import get_embedding_model
+
+            self._embedding = get_embedding_model()
+        return self._embedding
+
+    # ---------------------- 写入 ----------------------
+
+    def upsert_embeddings(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+    ) -> int:
+        """
+        写入预先计算的向量（按 batch_size 分批 upsert），返回写入条数。
+
+        同一批内重复的 id 只保留最后一条（Chroma 拒绝单次请求中的重复 id）。
+        """
+        lengths = {len(ids), len(embeddings)}
+        lengths.update(len(values) for values in (documents, metadatas) if values is not None)
+        if len(lengths) != 1:
+            raise ValueError("ids / embeddings / documents / metadatas 长度不一致")
+
+        positions = sorted({record_id: i for i, record_id in enumerate(ids)}.values())
+        if len(positions) < len(ids):
+            logger.debug("批内重复 id %d 条，保留最后一条", len(ids) - len(positions))
+
+        for start in range(0, len(positions), self.batch_size):
+            batch = positions[start : start + self.batch_size]
+            kwargs: Dict[str, Any] = {
+                "ids": [ids[i] for i in batch],
+                "embeddings": [list(embeddings[i]) for i in batch],
+            }
+            if documents is not None:
+                kwargs["documents"] = [documents[i] for i in batch]
+            if metadatas is not None:
+                # Chroma 元数据不接受 None 值
+                kwargs["metadatas"] = [
+                    {k: v for k, v in (metadatas[i] or {}).items() if v is not None}
+                    for i in batch
+                ]
+            self.collection.upsert(**kwargs)
+        return len(positions)
+
+    def delete_document(self, doc_id: str) -> None:
+        """删除一篇文档在向量库中已有的全部向量（按元数据 doc_id）。"""
+        self.collection.delete(where={"doc_id": doc_id})
+
+    def ingest(
+        self,
+        records: Iterable[Dict[str, Any]],
+        stats: Optional[BulkIngestStats] = None,
+    ) -> BulkIngestStats:
+        """
+        批量嵌入并写入记录（{"id", "text", "metadata"[, "embedding"]}，与块存储格式一致）。
+
+        嵌入在当前线程执行，写入在后台线程执行，最多一批在写，嵌入与写入重叠。
+        """
+        stats = stats if stats is not None else BulkIngestStats()
+        start = time.perf_counter()
+        pending: Optional[Future] = None
+
+        def write(batch: List[Dict[str, Any]], embeddings: List[List[float]]) -> float:
+            write_start = time.perf_counter()
+            self.upsert_embeddings(
+                ids=[record["id"] for record in batch],
+                embeddings=embeddings,
+                documents=[record["text"] for record in batch],
+                metadatas=[record.get("metadata") or {} for record in batch],
+            )
+            return time.perf_counter() - write_start
+
+        def collect(future: Future) -> None:
+            stats.write_seconds += future.result()
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="chroma-upsert") as executor:
+            try:
+                for batch in _batched(records, self.batch_size):
+                    embed_start = time.perf_counter()
+                    if all(record.get("embedding") is not None for record in batch):
+                        embeddings = [record["embedding"] for record in batch]
+                    else:
+                        embeddings = self.embedding.embed_documents(
+                            [record["text"] for record in batch]
+                        )
+                    stats.embed_seconds += time.perf_counter() - embed_start
+
+                    # 上一批写完再提交下一批，写入失败时立即停止
+                    if pending is not None:
+                        collect(pending)
+                    pending = executor.submit(write, batch, embeddings)
+                    stats.rows += len(batch)
+                    stats.batches += 1
+                    if stats.batches % _LOG_EVERY_BATCHES == 0:
+                        elapsed = time.perf_counter() - start
+                        logger.info(
+                            "向量库写入进度：%d 条，%.0f 行/秒",
+                            stats.rows,
+                            stats.rows / elapsed,
+                        )
+                if pending is not None:
+                    collect(pending)
+                    pending = None
+                # 本地 ANN 后端：写入结束后索引落盘
+                persist = getattr(self.collection, "persist", None)
+                if persist is not None:
+                    persist()
+            finally:
+                stats.seconds += time.perf_counter() - start
+
+        logger.info(
+            "向量库写入完成：%d 条 / %d 批，耗时 %.2fs（%.0f 行/秒；嵌入 %.2fs，写入 %.2fs，"
+            "写入 %.0f 行/秒）",
+            stats.rows,
+            stats.batches,
+            stats.seconds,
+            stats.rows_per_second,
+            stats.embed_seconds,
+            stats.write_seconds,
+            stats.write_rows_per_second,
+        )
+        return stats
+
+    def ingest_chunk_store(
+        self,
+        store: Optional[ChunkStore] = None,
+        names: Optional[Iterable[str]] = None,
+    ) -> BulkIngestStats:
+        """
+        把语料切分阶段的块存储整体写入向量库。
+
+        每篇文档的块进入写入批次之前，先删除该文档已有的向量（替换而非合并）。
+        """
+        store = store or ChunkStore()
+        names = sorted(store.manifest) if names is None else list(names)
+
+        def records() -> Iterator[Dict[str, Any]]:
+            for name in names:
+                doc_id = store.manifest.get(name, {}).get("doc_id") or name
+                self.delete_document(doc_id)
+                if store.doc_path(name).is_file():
+                    yield from store.iter_doc_chunks(name)
+
+        return self.ingest(records())
@@ -0,0 +1,345 @@
+"""
+父子双粒度索引（small-to-big）。
+
+小块检索精确、大块上下文完整，二者各取所长：
+
+- 子块（ElementChunk，TEXT_CHUNK_SON_SIZE）写入向量库，只有子块参与嵌入
+- 父段落（ParentPassage，按章节聚合，TEXT_CHUNK_PARENT_SIZE）写入 SQLite 键值表
+  chunk_parents（RELATION_DB_PATH），不做嵌入
+- 检索时先取 fetch_k 个子块，按排名收集不重复的 parent_id，
+  再以一次 SELECT ... WHERE parent_id IN (...) 取回前 k 个父段落
+
+用法：
+
+    index = ParentChildIndex()
+    index.index_chunk_store(ChunkStore())      # 子块经 ChromaBulkWriter 批量写入
+    index.index_document(doc)                  # 或逐篇切分并写入
+    hits = index.search("问题", k=4)
+"""
+
+import sys
+from pathlib import Path
+
+# 确保项目根目录在 Python 路径中
+_project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from src.config.settings import RELATION_DB_PATH
+from src.rag.indexing.bulk_ingest import BulkIngestStats, ChromaBulkWriter
+from src.rag.splitting.corpus_chunker import ChunkStore
+from src.rag.splitting.get_splitting_components import get_structural_chunker
+from src.rag.splitting.structural_chunker import ParentPassage, StructuralChunker
+
+# ---------------------- 类型与日志配置 ----------------------
+
+PathLike = Union[str, os.PathLike]
+
+logger = logging.getLogger(__name__)
+
+# 单条 SQL 中 IN (...) 的参数个数上限（SQLite 默认变量上限为 999）
+_SQL_IN_BATCH = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunk_parents (
+    parent_id     TEXT PRIMARY KEY,
+    doc_id        TEXT NOT NULL,
+    section_title TEXT,
+    text          TEXT NOT NULL,
+    element_ids   TEXT,
+    pages         TEXT,
+    updated_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chunk_parents_doc ON chunk_parents(doc_id);
+"""
+
+
+# ---------------------- 数据结构 ----------------------
+
+
+@dataclass
+class ParentHit:
+    """
+    一条父段落检索结果。
+
+    Attributes:
+        parent_id: 父段落 id（子块未关联父段落时为空，text 为子块文本）
+        text: 父段落文本
+        score: 排名最靠前的子块得分（向量库返回的原始得分）
+        child_ids: 命中的子块 id（按排名）
+        doc_id: 文档 id
+        section_title: 章节标题
+        pages: 页码
+    """
+
+    parent_id: str
+    text: str
+    score: float
+    child_ids: List[str] = field(default_factory=list)
+    doc_id: str = ""
+    section_title: str = ""
+    pages: List[int] = field(default_factory=list)
+
+    def to_document(self) -> Any:
+        """转为 LangChain Document（供下游 prompt 组装）。"""
+        from langchain_core.documents import Document
+
+        return Document(
+            page_content=self.text,
+            metadata={
+                "parent_id": self.parent_id,
+                "doc_id": self.doc_id,
+                "section_title": self.section_title,
+                "pages": ",".join(str(p) for p in self.pages),
+                "child_ids": ",".join(self.child_ids),
+                "score": self.score,
+            },
+        )
+
+
+# ---------------------- 父段落存储 ----------------------
+
+
+class ParentStore:
+    """
+    父段落键值存储（SQLite 表 chunk_parents）。
+
+    方法均为同步调用，内部共用一个连接并加锁，可在多个线程中使用。
+
+    Args:
+        db_path: SQLite 文件路径，默认 RELATION_DB_PATH
+    """
+
+    def __init__(self, db_path: Optional[PathLike] = None) -> None:
+        self.db_path = Path(db_path or RELATION_DB_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row(parent: ParentPassage, now: float) -> Tuple[Any, ...]:
+        return (
+            parent.parent_id,
+            parent.doc_id,
+            parent.section_title,
+            parent.text,
+            json.dumps(parent.element_ids, ensure_ascii=False),
+            json.dumps(parent.pages),
+            now,
+        )
+
+    def replace_document(self, doc_id: str, parents: Iterable[ParentPassage]) -> int:
+        """在一个事务内替换文档的全部父段落（删除重新切分后已不存在的旧段落），返回写入条数。"""
+        now = time.time()
+        rows = [self._row(parent, now) for parent in parents]
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM chunk_parents WHERE doc_id = ?", (doc_id,))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO chunk_parents "
+                    "(parent_id, doc_id, section_title, text, element_ids, pages, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+        return len(rows)
+
+    def get_many(self, parent_ids: Sequence[str]) -> Dict[str, ParentPassage]:
+        """按 id 批量取回父段落（不存在的 id 不出现在结果中）。"""
+        ids = list(dict.fromkeys(pid for pid in parent_ids if pid))
+        found: Dict[str, ParentPassage] = {}
+        with self._lock:
+            for start in range(0, len(ids), _SQL_IN_BATCH):
+                batch = ids[start : start + _SQL_IN_BATCH]
+                placeholders = ", ".join("?" * len(batch))
+                rows = self._conn.execute(
+                    "SELECT parent_id, doc_id, section_title, text, element_ids, pages "
+                    f"FROM chunk_parents WHERE parent_id IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for row in rows:
+                    found[row["parent_id"]] = ParentPassage(
+                        parent_id=row["parent_id"],
+                        text=row["text"],
+                        element_ids=json.loads(row["element_ids"] or "[]"),
+                        doc_id=row["doc_id"],
+                        section_title=row["section_title"] or "",
+                        pages=json.loads(row["pages"] or "[]"),
+                    )
+        return found
+
+    def delete_document(self, doc_id: str) -> None:
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM chunk_parents WHERE doc_id = ?", (doc_id,))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunk_parents").fetchone()[0]
+
+
+# ---------------------- 双粒度索引 ----------------------
+
+
+class ParentChildIndex:
+    """
+    子块嵌入检索 + 父段落取回。
+
+    Args:
+        vector_store: LangChain VectorStore（需支持 add_texts / similarity_search_with_score），
+            默认 get_vector_db()
+        parent_store: 父段落存储，默认 ParentStore()
+        chunker: 结构切分器，默认 get_structural_chunker()
+        parent_size: 父段落最大字符数，默认 TEXT_CHUNK_PARENT_SIZE
+    """
+
+    def __init__(
+        self,
+        vector_store: Optional[Any] = None,
+        parent_store: Optional[ParentStore] = None,
+        chunker: Optional[StructuralChunker] = None,
+        parent_size: Optional[int] = None,
+    ) -> None:
+        self._vector_store = vector_store
+        self.parent_store = parent_store or ParentStore()
+        self._chunker = chunker
+        self.parent_size = parent_size
+
+    @property
+    def vector_store(self) -> Any:
+        if self._vector_store is None:
+            from src.models.get_models import get_vector_db
+
+            self._vector_store = get_vector_db()
+        return self._vector_store
+
+    @property
+    def chunker(self) -> StructuralChunker:
+        if self._chunker is None:
+            self._chunker = get_structural_chunker()
+        return self._chunker
+
+    # ---------------------- 建索引 ----------------------
+
+    def index_document(self, doc: Dict[str, Any]) -> Tuple[int, int]:
+        """切分一篇 json_store 文档：子块写入向量库，父段落写入父段落存储。返回 (子块数, 父段落数)。"""
+        chunks, parents = self.chunker.chunk_with_parents(doc, self.parent_size)
+        doc_id = (doc.get("metadata") or {}).get("doc_id", "")
+        # 先写父段落：子块一旦可被检索，其父段落必然已存在
+        self.parent_store.replace_document(doc_id, parents)
+        # 重新切分后块 id 可能改变或变少：先删除该文档已有的子块，避免残留指向已删除父段落的旧子块
+        self.vector_store.delete(where={"doc_id": doc_id})
+        if chunks:
+            self.vector_store.add_texts(
+                texts=[chunk.text for chunk in chunks],
+                metadatas=[chunk.to_metadata() for chunk in chunks],
+                ids=[chunk.chunk_id for chunk in chunks],
+            )
+        return len(chunks), len(parents)
+
+    def index_chunk_store(
+        self,
+        store: Optional[ChunkStore] = None,
+        names: Optional[Iterable[str]] = None,
+        writer: Optional[ChromaBulkWriter] = None,
+    ) -> Tuple[BulkIngestStats, int]:
+        """
+        从语料切分阶段的块存储建索引（子块与父段落均已生成，不再切分）。
+
+        子块经 ChromaBulkWriter 批量嵌入并 upsert（默认写入 self.vector_store），
+        写入前按 doc_id 删除各文档已有的子块。
+
+        Returns:
+            (子块写入统计, 父段落数)
+        """
+        store = store or ChunkStore()
+        names = sorted(store.manifest) if names is None else list(names)
+        writer = writer or ChromaBulkWriter(self.vector_store)
+
+        parent_count = 0
+        for name in names:
+            parents = [ParentPassage(**p) for p in store.iter_doc_parents(name)]
+            doc_id = store.manifest.get(name, {}).get("doc_id") or name
+            parent_count += self.parent_store.replace_document(doc_id, parents)
+
+        stats = writer.ingest_chunk_store(store, names)
+        logger.info("父子索引：写入 %d 个子块，%d 个父段落", stats.rows, parent_count)
+        return stats, parent_count
+
+    # ---------------------- 检索 ----------------------
+
+    def search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: Optional[int] = None,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[ParentHit]:
+        """
+        检索子块并返回其父段落。
+
+        Args:
+            query: 查询文本
+            k: 返回的父段落数
+            fetch_k: 检索的子块数（多个子块可能属于同一父段落），默认 4 * k
+            filter: 传给向量库的元数据过滤条件
+
+        Returns:
+            按最佳子块排名排序、不重复的父段落（最多 k 个）
+        """
+        fetch_k = fetch_k or 4 * k
+        kwargs = {"filter": filter} if filter else {}
+        children = self.vector_store.similarity_search_with_score(
+            query, k=fetch_k, **kwargs
+        )
+
+        # 向量库已按相关度排序：按子块排名收集父段落，保留首次出现的得分
+        hits: Dict[str, ParentHit] = {}
+        for child, score in children:
+            metadata = child.metadata or {}
+            child_id = metadata.get("chunk_id", "")
+            parent_id = metadata.get("parent_id", "")
+            # 未关联父段落的子块（旧索引）以子块自身作为结果
+            key = parent_id or f"child:{child_id}"
+            hit = hits.get(key)
+            if hit is None:
+                if len(hits) >= k:
+                    continue
+                hit = hits[key] = ParentHit(
+                    parent_id=parent_id,
+                    text=child.page_content,
+                    score=score,
+                    doc_id=metadata.get("doc_id", ""),
+                    section_title=metadata.get("section_title", ""),
+                )
+            hit.child_ids.append(child_id)
+
+        parents = self.parent_store.get_many([h.parent_id for h in hits.values()])
+        for hit in hits.values():
+            parent = parents.get(hit.parent_id)
+            if parent is None:
+                if hit.parent_id:
+                    logger.warning("父段落不存在，返回子块文本：%s", hit.parent_id)
+                continue
+            hit.text = parent.text
+            hit.section_title = parent.section_title
+            hit.pages = parent.pages
+        return list(hits.values())
@@ -0,0 +1,162 @@
+"""
+向量标量量化（float16 / int8），供进程内 flat 索引与基准使用。
+
+768 维 float32 向量每条 3 KB，500 万块约 15 GB；量化后常驻内存的只有编码：
+
+- float16：每维 2 字节（减半），不需要训练，精度损失极小
+- int8：每维 1 字节（1/4），按维度记录最小值与步长（per-dimension scale），
+  编码为 0..255 的 uint8；取值范围须由至少 MIN_TRAIN_VECTORS 条向量拟合
+  （样本过少时范围偏窄，之后的向量被大量截断，召回率骤降），之后超出范围的值截断到边界
+
+内积按非对称方式计算：查询保持 float32，只对库向量解码，
+int8 时 q·x ≈ q·min + (q*scale)·code，无需整体解码。
+量化检索的前若干名再以原始 float32 向量精确重排（rescore_exact），恢复召回率。
+"""
+
+import sys
+from pathlib import Path
+
+# 确保项目根目录在 Python 路径中
+_project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+# 支持的存储精度
+VECTOR_DTYPES = ("float32", "float16", "int8")
+# int8 拟合取值范围所需的最少向量数
+MIN_TRAIN_VECTORS = 10000
+# 逐块打分时每块的库向量条数（控制解码临时数组的大小）
+_SCORE_BLOCK = 16384
+
+
+class ScalarQuantizer:
+    """
+    逐维标量量化器。
+
+    Args:
+        dim: 向量维度
+        dtype: float32（不量化）/ float16 / int8
+        min_train: int8 拟合取值范围所需的最少向量数
+    """
+
+    def __init__(
+        self, dim: int, dtype: str = "float32", min_train: int = MIN_TRAIN_VECTORS
+    ) -> None:
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"未知的向量存储精度：{dtype}（可选 {', '.join(VECTOR_DTYPES)}）")
+        self.dim = dim
+        self.dtype = dtype
+        self.min_train = min_train
+        # int8：每维最小值与步长
+        self.vmin: Optional[np.ndarray] = None
+        self.scale: Optional[np.ndarray] = None
+
+    @property
+    def code_dtype(self) -> np.dtype:
+        return np.dtype({"float32": np.float32, "float16": np.float16, "int8": np.uint8}[self.dtype])
+
+    @property
+    def bytes_per_vector(self) -> int:
+        return self.dim * self.code_dtype.itemsize
+
+    @property
+    def is_trained(self) -> bool:
+        return self.dtype != "int8" or self.scale is not None
+
+    def train(self, vectors: np.ndarray) -> None:
+        """按维度拟合 int8 的取值范围（float32 / float16 无需训练），样本不足 min_train 条时拒绝。"""
+        if self.dtype != "int8":
+            return
+        if len(vectors) < self.min_train:
+            raise ValueError(
+                f"int8 量化至少需要 {self.min_train} 条向量拟合取值范围，当前 {len(vectors)} 条"
+            )
+        vmin = vectors.min(axis=0).astype(np.float32)
+        vmax = vectors.max(axis=0).astype(np.float32)
+        span = vmax - vmin
+        span[span <= 0] = 1e-6
+        self.vmin = vmin
+        self.scale = span / 255.0
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        if self.dtype == "float32":
+            return np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.dtype == "float16":
+            return vectors.astype(np.float16)
+        if not self.is_trained:
+            raise ValueError("int8 量化尚未拟合取值范围，先调用 train()")
+        codes = np.rint((vectors - self.vmin) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        if self.dtype == "int8":
+            return self.vmin + codes.astype(np.float32) * self.scale
+        return codes.astype(np.float32)
+
+    def inner_product(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """float32 查询与一块编码的内积，形状 (查询数, 编码数)。"""
+        if self.dtype == "int8":
+            bias = queries @ self.vmin
+            return (queries * self.scale) @ codes.astype(np.float32).T + bias[:, None]
+        return queries @ codes.astype(np.float32, copy=False).T
+
+    def search(
+        self,
+        queries: np.ndarray,
+        codes: np.ndarray,
+        k: int,
+        valid: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        逐块扫描编码，返回每条查询得分最高的 k 个 (内积, 行号)，按得分降序；
+        valid 为 False 的行不参与排名，不足 k 个时行号为 -1。
+        """
+        n = len(codes)
+        k = min(k, n)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        rows = np.full((len(queries), k), -1, dtype=np.int64)
+        if k <= 0:
+            return scores, rows
+        for start in range(0, n, _SCORE_BLOCK):
+            block = self.inner_product(queries, codes[start : start + _SCORE_BLOCK])
+            if valid is not None:
+                block[:, ~valid[start : start + _SCORE_BLOCK]] = -np.inf
+            merged_scores = np.concatenate([scores, block], axis=1)
+            block_rows = np.arange(start, start + block.shape[1], dtype=np.int64)
+            merged_rows = np.concatenate(
+                [rows, np.broadcast_to(block_rows, block.shape)], axis=1
+            )
+            top = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(merged_scores, top, axis=1)
+            rows = np.take_along_axis(merged_rows, top, axis=1)
+        order = np.argsort(-scores, axis=1)
+        scores = np.take_along_axis(scores, order, axis=1)
+        rows = np.take_along_axis(rows, order, axis=1)
+        rows[~np.isfinite(scores)] = -1
+        return scores, rows
+
+
+def rescore_exact(
+    query: np.ndarray, candidates: np.ndarray, vectors: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    以 float32 原始向量对候选精确重排。
+
+    Args:
+        query: 归一化的查询向量（一维）
+        candidates: 候选 label（-1 为空位，跳过）
+        vectors: 与 candidates 一一对应的 float32 向量（空位对应的行任意）
+        k: 保留的条数
+
+    Returns:
+        (余弦距离, label)，距离升序
+    """
+    keep = candidates >= 0
+    labels = candidates[keep]
+    distances = 1.0 - vectors[keep] @ query
+    order = np.argsort(distances, kind="stable")[:k]
+    return distances[order], labels[order]
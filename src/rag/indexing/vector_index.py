@@ -0,0 +1,920 @@
+"""
+进程内 ANN 向量索引（FAISS IVF-PQ / hnswlib / 量化 flat），作为 Chroma 之外的可选向量库后端。
+
+Chroma 不暴露召回率、延迟与内存之间的取舍参数；百万级以上的块数下，
+VECTOR_DB_BACKEND=faiss / hnswlib / flat 时 get_vector_db() 返回 LocalAnnVectorStore：
+
+    ANN_INDEX_PATH/<后端>/<collection>/
+        index.faiss | index.hnsw | index.npz   向量索引
+        meta.json                              维度、下一个可用 label、条数
+        docs.sqlite3                           label ↔ 块 id、文本与元数据（及 float32 向量）
+
+- faiss：块数较少时为精确的 IDMap2,Flat 索引；落盘时块数达到训练下限则转为
+  IVF{nlist},PQ{m}（内积 / 余弦），向量压缩为 m 字节；查询探查 ANN_FAISS_NPROBE 个倒排列表；
+  只读打开时以内存映射加载（ANN_FAISS_MMAP）
+- hnswlib：HNSW 图（ANN_HNSW_M / ANN_HNSW_EF_*），整体加载到内存，召回率高、延迟低
+- flat：精确暴力检索，向量按 ANN_VECTOR_DTYPE 以 float16 / int8（按维度缩放）常驻内存，
+  768 维每条 1.5 KB / 768 字节（float32 为 3 KB）
+- ANN_RESCORE_FACTOR > 0 时 float32 向量另存于 SQLite（只在磁盘上），检索多取候选后精确重排
+- 向量按 L2 归一化后比较，得分为余弦距离（1 - cos，越小越相关）
+- 写入以块 id upsert；索引每累积 ANN_SAVE_EVERY 条新写入落盘一次，
+  SQLite 中的文本与元数据与索引同时提交，中断时二者保持一致
+
+FAISS / hnswlib 为可选依赖，仅在使用对应后端时导入。
+"""
+
+import sys
+from pathlib import Path
+
+# 确保项目根目录在 Python 路径中
+_project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from src.config.settings import (
+    ANN_FAISS_MMAP,
+    ANN_FAISS_NLIST,
+    ANN_FAISS_NPROBE,
+    ANN_FAISS_PQ_M,
+    ANN_HNSW_EF_CONSTRUCTION,
+    ANN_HNSW_EF_SEARCH,
+    ANN_HNSW_M,
+    ANN_INDEX_PATH,
+    ANN_RESCORE_FACTOR,
+    ANN_SAVE_EVERY,
+    ANN_VECTOR_DTYPE,
+    VECTOR_DB_BACKEND,
+    VECTOR_DB_COLLECTION_NAME,
+)
+from src.rag.indexing.quantization import ScalarQuantizer, rescore_exact
+
+# ---------------------- 类型与日志配置 ----------------------
+
+PathLike = Union[str, os.PathLike]
+
+logger = logging.getLogger(__name__)
+
+# 与 langchain_chroma 相同的默认 collection 名
+DEFAULT_COLLECTION_NAME = "langchain"
+# 单条 SQL 中 IN (...) 的参数个数上限（SQLite 默认变量上限为 999）
+_SQL_IN_BATCH = 900
+# IVF-PQ 训练所需的最少向量数（PQ 每个子量化器 256 个中心）
+_FAISS_MIN_TRAIN = 10000
+# 带过滤条件检索时多取的候选倍数
+_FILTER_FETCH_FACTOR = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vectors (
+    label    INTEGER PRIMARY KEY,
+    id       TEXT NOT NULL UNIQUE,
+    document TEXT,
+    metadata TEXT,
+    embedding BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_vectors_doc ON vectors(json_extract(metadata, '$.doc_id'));
+"""
+
+
+def normalize(vectors: Any) -> np.ndarray:
+    """转为 float32 二维数组并按行 L2 归一化（余弦相似度 = 内积）。"""
+    array = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+    if array.ndim == 1:
+        array = array.reshape(1, -1)
+    norms = np.linalg.norm(array, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return array / norms
+
+
+# ---------------------- 索引后端 ----------------------
+
+
+class AnnIndex:
+    """
+    ANN 索引后端接口：按 int64 label 增删向量、批量查询。
+
+    输入向量均已归一化；search 返回 (余弦距离, label)，不足 k 个时 label 为 -1。
+    """
+
+    backend = ""
+    file_name = ""
+
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+
+    @property
+    def ntotal(self) -> int:
+        raise NotImplementedError
+
+    def add(self, labels: np.ndarray, vectors: np.ndarray, replace: Sequence[int] = ()) -> None:
+        """写入向量；replace 为索引中已存在、需要替换的 label。"""
+        raise NotImplementedError
+
+    def remove(self, labels: Sequence[int]) -> None:
+        raise NotImplementedError
+
+    def search(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        raise NotImplementedError
+
+    def save(self, path: Path) -> None:
+        raise NotImplementedError
+
+    @classmethod
+    def load(cls, path: Path, dim: int, read_only: bool = False) -> "AnnIndex":
+        raise NotImplementedError
+
+
+def _import_faiss() -> Any:
+    try:
+        import faiss
+    except ImportError as e:
+        raise ImportError("VECTOR_DB_BACKEND=faiss 需要安装 faiss-cpu") from e
+    return faiss
+
+
+def _import_hnswlib() -> Any:
+    try:
+        import hnswlib
+    except ImportError as e:
+        raise ImportError("VECTOR_DB_BACKEND=hnswlib 需要安装 hnswlib") from e
+    return hnswlib
+
+
+class FaissIndex(AnnIndex):
+    """
+    FAISS 索引：精确 Flat 索引起步，落盘时向量数达到训练下限即转为 IVF-PQ。
+
+    Args:
+        dim: 向量维度
+        nlist: IVF 倒排列表数，0 为按向量数自动取 4*sqrt(N)
+        pq_m: PQ 子量化器数（每个向量压缩为 pq_m 字节；取不超过该值的维度约数）
+        nprobe: 查询时探查的倒排列表数
+        ivf_pq: 为 False 时始终保持精确 Flat 索引（基准对照）
+    """
+
+    backend = "faiss"
+    file_name = "index.faiss"
+
+    def __init__(
+        self,
+        dim: int,
+        nlist: Optional[int] = None,
+        pq_m: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        ivf_pq: bool = True,
+        index: Optional[Any] = None,
+    ) -> None:
+        super().__init__(dim)
+        self.faiss = _import_faiss()
+        self.ivf_pq = ivf_pq
+        self.nlist = ANN_FAISS_NLIST if nlist is None else nlist
+        self.pq_m = ANN_FAISS_PQ_M if pq_m is None else pq_m
+        self.nprobe = ANN_FAISS_NPROBE if nprobe is None else nprobe
+        if index is None:
+            index = self.faiss.index_factory(dim, "IDMap2,Flat", self.faiss.METRIC_INNER_PRODUCT)
+        self.index = index
+        self._apply_nprobe()
+
+    @property
+    def is_ivf(self) -> bool:
+        return self._ivf() is not None
+
+    def _ivf(self) -> Optional[Any]:
+        try:
+            return self.faiss.extract_index_ivf(self.index)
+        except RuntimeError:
+            return None
+
+    def _apply_nprobe(self) -> None:
+        ivf = self._ivf()
+        if ivf is not None:
+            ivf.nprobe = self.nprobe
+
+    def set_nprobe(self, nprobe: int) -> None:
+        self.nprobe = nprobe
+        self._apply_nprobe()
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.index.ntotal)
+
+    def add(self, labels: np.ndarray, vectors: np.ndarray, replace: Sequence[int] = ()) -> None:
+        if len(replace):
+            self.remove(replace)
+        self.index.add_with_ids(vectors, np.asarray(labels, dtype=np.int64))
+
+    def remove(self, labels: Sequence[int]) -> None:
+        self.index.remove_ids(np.asarray(labels, dtype=np.int64))
+
+    def search(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores, labels = self.index.search(vectors, k)
+        return 1.0 - scores, labels
+
+    def _pq_m_for_dim(self) -> int:
+        return max(m for m in range(1, min(self.pq_m, self.dim) + 1) if self.dim % m == 0)
+
+    def train_ivf_pq(self) -> None:
+        """把 Flat 索引中的全部向量重建为 IVF-PQ 索引。"""
+        n = self.ntotal
+        nlist = self.nlist or int(4 * math.sqrt(n))
+        nlist = max(1, min(nlist, n // 39))
+        pq_m = self._pq_m_for_dim()
+
+        labels = self.faiss.vector_to_array(self.index.id_map).astype(np.int64)
+        vectors = self.index.index.reconstruct_n(0, n)
+        index = self.faiss.index_factory(
+            self.dim, f"IVF{nlist},PQ{pq_m}x8", self.faiss.METRIC_INNER_PRODUCT
+        )
+        # 训练样本：每个倒排列表约 256 个向量
+        sample_size = min(n, max(nlist * 256, _FAISS_MIN_TRAIN))
+        sample = vectors[np.random.default_rng(0).choice(n, sample_size, replace=False)]
+        logger.info("训练 FAISS IVF%d,PQ%d 索引：%d 条向量，样本 %d 条", nlist, pq_m, n, sample_size)
+        index.train(sample)
+        index.add_with_ids(vectors, labels)
+        self.index = index
+        self._apply_nprobe()
+
+    def save(self, path: Path) -> None:
+        if self.ivf_pq and not self.is_ivf and self.ntotal >= _FAISS_MIN_TRAIN:
+            self.train_ivf_pq()
+        self.faiss.write_index(self.index, str(path))
+
+    @classmethod
+    def load(cls, path: Path, dim: int, read_only: bool = False) -> "FaissIndex":
+        faiss = _import_faiss()
+        index = None
+        if read_only and ANN_FAISS_MMAP:
+            try:
+                index = faiss.read_index(str(path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            except RuntimeError as e:
+                logger.debug("索引不支持内存映射，整体加载：%s", e)
+        if index is None:
+            index = faiss.read_index(str(path))
+        return cls(dim, index=index)
+
+
+class HnswIndex(AnnIndex):
+    """
+    hnswlib HNSW 索引（余弦空间）。
+
+    Args:
+        dim: 向量维度
+        m: 每个节点的邻居数
+        ef_construction: 建图时的候选列表长度
+        ef_search: 查询时的候选列表长度（不小于 k）
+    """
+
+    backend = "hnswlib"
+    file_name = "index.hnsw"
+    _INITIAL_CAPACITY = 1024
+
+    def __init__(
+        self,
+        dim: int,
+        m: Optional[int] = None,
+        ef_construction: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        index: Optional[Any] = None,
+    ) -> None:
+        super().__init__(dim)
+        hnswlib = _import_hnswlib()
+        self.ef_search = ANN_HNSW_EF_SEARCH if ef_search is None else ef_search
+        if index is None:
+            index = hnswlib.Index(space="cosine", dim=dim)
+            index.init_index(
+                max_elements=self._INITIAL_CAPACITY,
+                M=ANN_HNSW_M if m is None else m,
+                ef_construction=(
+                    ANN_HNSW_EF_CONSTRUCTION if ef_construction is None else ef_construction
+                ),
+            )
+        self.index = index
+
+    @property
+    def ntotal(self) -> int:
+        # 含已标记删除的元素
+        return int(self.index.get_current_count())
+
+    def add(self, labels: np.ndarray, vectors: np.ndarray, replace: Sequence[int] = ()) -> None:
+        # 已存在的 label 由 add_items 原地更新（已标记删除的会恢复）
+        needed = self.index.get_current_count() + len(labels) - len(replace)
+        capacity = self.index.get_max_elements()
+        if needed > capacity:
+            self.index.resize_index(max(needed, capacity * 2))
+        self.index.add_items(vectors, np.asarray(labels, dtype=np.int64))
+
+    def remove(self, labels: Sequence[int]) -> None:
+        for label in labels:
+            self.index.mark_deleted(int(label))
+
+    def search(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, self.ntotal)
+        if k <= 0:
+            empty = np.full((len(vectors), 0), -1, dtype=np.int64)
+            return empty.astype(np.float32), empty
+        self.index.set_ef(max(self.ef_search, k))
+        while True:
+            try:
+                labels, distances = self.index.knn_query(vectors, k=k)
+                return distances, labels.astype(np.int64)
+            except RuntimeError:
+                # 有效元素（除去已删除）不足 k 个
+                if k <= 1:
+                    raise
+                k //= 2
+
+    def save(self, path: Path) -> None:
+        self.index.save_index(str(path))
+
+    @classmethod
+    def load(cls, path: Path, dim: int, read_only: bool = False) -> "HnswIndex":
+        hnswlib = _import_hnswlib()
+        index = hnswlib.Index(space="cosine", dim=dim)
+        index.load_index(str(path))
+        return cls(dim, index=index)
+
+
+class FlatIndex(AnnIndex):
+    """
+    精确暴力检索索引，向量按 ANN_VECTOR_DTYPE 量化后常驻内存（float32 / float16 / int8）。
+
+    量化时检索结果为近似排名，LocalAnnVectorStore 按 ANN_RESCORE_FACTOR 多取候选后
+    以 SQLite 中的 float32 向量精确重排。label 按写入顺序递增（LocalAnnVectorStore
+    的分配方式），以二分查找定位；删除只做标记，落盘时压缩。
+
+    int8 的取值范围不以首批写入拟合：有效向量达到 quantizer.min_train 条之前以 float32
+    缓存（可正常检索、落盘），达到后一次性拟合并把已有向量全部转为 int8 编码。
+
+    Args:
+        dim: 向量维度
+        dtype: 存储精度，默认 ANN_VECTOR_DTYPE
+    """
+
+    backend = "flat"
+    file_name = "index.npz"
+
+    def __init__(
+        self,
+        dim: int,
+        dtype: Optional[str] = None,
+        quantizer: Optional[ScalarQuantizer] = None,
+    ) -> None:
+        super().__init__(dim)
+        self.quantizer = quantizer or ScalarQuantizer(dim, dtype or ANN_VECTOR_DTYPE)
+        self._size = 0
+        self._labels = np.empty(0, dtype=np.int64)
+        self._codes = np.empty((0, dim), dtype=self._storage_dtype())
+        self._valid = np.empty(0, dtype=bool)
+        # int8 拟合之前按 float32 打分
+        self._float32 = ScalarQuantizer(dim, "float32")
+
+    def _storage_dtype(self) -> np.dtype:
+        return self.quantizer.code_dtype if self.quantizer.is_trained else np.dtype(np.float32)
+
+    @property
+    def _scorer(self) -> ScalarQuantizer:
+        return self.quantizer if self.quantizer.is_trained else self._float32
+
+    def _maybe_train(self) -> None:
+        """int8 未拟合且有效向量已足够时拟合取值范围，并把缓存的 float32 向量转为编码。"""
+        if self.quantizer.is_trained:
+            return
+        valid = self._valid[: self._size]
+        if int(valid.sum()) < self.quantizer.min_train:
+            return
+        self.quantizer.train(self._codes[: self._size][valid])
+        codes = np.empty((len(self._codes), self.dim), dtype=self.quantizer.code_dtype)
+        codes[: self._size] = self.quantizer.encode(self._codes[: self._size])
+        self._codes = codes
+        logger.info("int8 量化已按 %d 条向量拟合取值范围", int(valid.sum()))
+
+    @property
+    def ntotal(self) -> int:
+        return int(self._valid[: self._size].sum())
+
+    @property
+    def code_bytes(self) -> int:
+        """编码占用的内存字节数（不含预留容量）。"""
+        return self._size * self.dim * self._codes.dtype.itemsize
+
+    def _rows_of(self, labels: np.ndarray) -> np.ndarray:
+        """label 对应的行号，不存在时为 -1。"""
+        labels_view = self._labels[: self._size]
+        rows = np.searchsorted(labels_view, labels)
+        found = rows < self._size
+        found[found] = labels_view[rows[found]] == labels[found]
+        return np.where(found, rows, -1)
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._labels)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 1024)
+        labels = np.empty(capacity, dtype=np.int64)
+        codes = np.empty((capacity, self.dim), dtype=self._codes.dtype)
+        valid = np.zeros(capacity, dtype=bool)
+        labels[: self._size] = self._labels[: self._size]
+        codes[: self._size] = self._codes[: self._size]
+        valid[: self._size] = self._valid[: self._size]
+        self._labels, self._codes, self._valid = labels, codes, valid
+
+    def add(self, labels: np.ndarray, vectors: np.ndarray, replace: Sequence[int] = ()) -> None:
+        labels = np.asarray(labels, dtype=np.int64)
+        codes = self._scorer.encode(vectors)
+        # 已存在的 label 原地覆盖
+        rows = self._rows_of(labels)
+        existing = rows >= 0
+        self._codes[rows[existing]] = codes[existing]
+        self._valid[rows[existing]] = True
+
+        new_labels, new_codes = labels[~existing], codes[~existing]
+        if not len(new_labels):
+            self._maybe_train()
+            return
+        start, end = self._size, self._size + len(new_labels)
+        self._reserve(end)
+        self._labels[start:end] = new_labels
+        self._codes[start:end] = new_codes
+        self._valid[start:end] = True
+        self._size = end
+        # label 不是递增写入时重新排序，保持二分查找成立
+        if (start and new_labels.min() <= self._labels[start - 1]) or np.any(
+            np.diff(new_labels) <= 0
+        ):
+            order = np.argsort(self._labels[:end], kind="stable")
+            self._labels[:end] = self._labels[:end][order]
+            self._codes[:end] = self._codes[:end][order]
+            self._valid[:end] = self._valid[:end][order]
+        self._maybe_train()
+
+    def remove(self, labels: Sequence[int]) -> None:
+        rows = self._rows_of(np.asarray(labels, dtype=np.int64))
+        self._valid[rows[rows >= 0]] = False
+
+    def search(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores, rows = self._scorer.search(
+            vectors, self._codes[: self._size], k, valid=self._valid[: self._size]
+        )
+        labels = np.where(rows >= 0, self._labels[np.maximum(rows, 0)], -1)
+        return 1.0 - scores, labels
+
+    def save(self, path: Path) -> None:
+        keep = self._valid[: self._size]
+        quantizer = self.quantizer
+        arrays = {
+            "dtype": np.array(quantizer.dtype),
+            "labels": self._labels[: self._size][keep],
+            "codes": self._codes[: self._size][keep],
+        }
+        if quantizer.dtype == "int8" and quantizer.is_trained:
+            arrays.update(vmin=quantizer.vmin, scale=quantizer.scale)
+        # 传入文件对象，np.savez 不会在文件名后追加 .npz
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: Path, dim: int, read_only: bool = False) -> "FlatIndex":
+        with np.load(str(path)) as data:
+            quantizer = ScalarQuantizer(dim, str(data["dtype"]))
+            if "scale" in data:
+                quantizer.vmin, quantizer.scale = data["vmin"], data["scale"]
+            index = cls(dim, quantizer=quantizer)
+            index._labels = data["labels"]
+            index._codes = data["codes"]
+        index._size = len(index._labels)
+        index._valid = np.ones(index._size, dtype=bool)
+        return index
+
+
+_BACKENDS = {
+    FaissIndex.backend: FaissIndex,
+    HnswIndex.backend: HnswIndex,
+    FlatIndex.backend: FlatIndex,
+}
+
+
+def get_ann_index_class(backend: str) -> type:
+    try:
+        return _BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"未知的 ANN 后端：{backend}（可选 {', '.join(_BACKENDS)}）") from None
+
+
+# ---------------------- 向量库 ----------------------
+
+
+class LocalAnnVectorStore(VectorStore):
+    """
+    基于进程内 ANN 索引的 LangChain VectorStore。
+
+    方法均为同步调用，内部加锁，可在多个线程中使用；写入以块 id upsert。
+
+    Args:
+        backend: faiss / hnswlib，默认 VECTOR_DB_BACKEND
+        persist_directory: 索引根目录，默认 ANN_INDEX_PATH
+        collection_name: collection 名，默认 VECTOR_DB_COLLECTION_NAME 或 "langchain"
+        embedding_function: LangChain Embeddings（add_texts / 按文本检索时使用）
+        read_only: 只读打开（faiss 索引可内存映射加载）
+        rescore_factor: 精确重排的候选倍数，默认 ANN_RESCORE_FACTOR；大于 0 时写入同时在
+            SQLite 保存 float32 向量，检索取 k*因子 个候选后按原始向量重排（量化索引恢复召回率）
+    """
+
+    def __init__(
+        self,
+        backend: Optional[str] = None,
+        persist_directory: Optional[PathLike] = None,
+        collection_name: Optional[str] = None,
+        embedding_function: Optional[Any] = None,
+        read_only: bool = False,
+        rescore_factor: Optional[int] = None,
+    ) -> None:
+        backend = backend or VECTOR_DB_BACKEND
+        self.index_class = get_ann_index_class(backend)
+        collection_name = collection_name or VECTOR_DB_COLLECTION_NAME or DEFAULT_COLLECTION_NAME
+        self.directory = Path(persist_directory or ANN_INDEX_PATH) / backend / collection_name
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.directory / self.index_class.file_name
+        self.meta_path = self.directory / "meta.json"
+        self._embedding_function = embedding_function
+        self.read_only = read_only
+        self.rescore_factor = ANN_RESCORE_FACTOR if rescore_factor is None else rescore_factor
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.directory / "docs.sqlite3"), check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(vectors)")}
+        if "embedding" not in columns:
+            self._conn.execute("ALTER TABLE vectors ADD COLUMN embedding BLOB")
+        self._conn.commit()
+
+        meta = self._load_meta()
+        self.dim: Optional[int] = meta.get("dim")
+        row = self._conn.execute("SELECT MAX(label) FROM vectors").fetchone()
+        self._next_label = max(int(meta.get("next_label") or 0), (row[0] or -1) + 1)
+        self._unsaved = 0
+        self.index: Optional[AnnIndex] = None
+        if self.dim and self.index_path.is_file():
+            self.index = self.index_class.load(self.index_path, self.dim, read_only=read_only)
+            logger.info(
+                "已加载 %s 索引：%s（%d 条）", backend, self.index_path, self.index.ntotal
+            )
+
+    @property
+    def embeddings(self) -> Optional[Any]:
+        return self._embedding_function
+
+    def _load_meta(self) -> Dict[str, Any]:
+        try:
+            return json.loads(self.meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _save_meta(self) -> None:
+        payload = {
+            "backend": self.index_class.backend,
+            "dim": self.dim,
+            "next_label": self._next_label,
+            "count": self.index.ntotal if self.index is not None else 0,
+        }
+        tmp_path = self.meta_path.with_name(self.meta_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp_path, self.meta_path)
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise RuntimeError(f"向量索引以只读方式打开：{self.directory}")
+
+    # ---------------------- 持久化 ----------------------
+
+    def persist(self) -> None:
+        """
+        索引落盘并提交 SQLite。
+
+        顺序：meta（下一个 label）→ 索引（临时文件原子替换）→ SQLite 提交；
+        中断时索引中可能多出 SQLite 未提交的 label（检索时跳过），label 不会被重复分配。
+        """
+        with self._lock:
+            if self.read_only or self.index is None:
+                return
+            self._save_meta()
+            tmp_path = self.index_path.with_name(f".{self.index_path.name}.tmp")
+            self.index.save(tmp_path)
+            os.replace(tmp_path, self.index_path)
+            self._save_meta()
+            self._conn.commit()
+            self._unsaved = 0
+            logger.info("向量索引已落盘：%s（%d 条）", self.index_path, self.index.ntotal)
+
+    def close(self) -> None:
+        with self._lock:
+            self.persist()
+            self._conn.close()
+
+    # ---------------------- 写入 ----------------------
+
+    def _labels_for(self, ids: Sequence[str]) -> Dict[str, int]:
+        found: Dict[str, int] = {}
+        for start in range(0, len(ids), _SQL_IN_BATCH):
+            batch = list(ids[start : start + _SQL_IN_BATCH])
+            placeholders = ", ".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT id, label FROM vectors WHERE id IN ({placeholders})", batch
+            ).fetchall()
+            found.update(rows)
+        return found
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+    ) -> None:
+        """按 id 写入预先计算的向量（接口与 Chroma collection.upsert 一致）。"""
+        self._check_writable()
+        if not ids:
+            return
+        vectors = normalize(embeddings)
+        with self._lock:
+            if self.index is None:
+                self.dim = vectors.shape[1]
+                self.index = self.index_class(self.dim)
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"向量维度 {vectors.shape[1]} 与索引维度 {self.dim} 不一致")
+
+            # 同一批内重复的 id 只保留最后一条
+            positions = sorted({record_id: i for i, record_id in enumerate(ids)}.values())
+            if len(positions) < len(ids):
+                ids = [ids[i] for i in positions]
+                vectors = vectors[positions]
+                documents = [documents[i] for i in positions] if documents else documents
+                metadatas = [metadatas[i] for i in positions] if metadatas else metadatas
+
+            existing = self._labels_for(ids)
+            labels = np.empty(len(ids), dtype=np.int64)
+            for i, record_id in enumerate(ids):
+                label = existing.get(record_id)
+                if label is None:
+                    label = self._next_label
+                    self._next_label += 1
+                labels[i] = label
+            self.index.add(labels, vectors, replace=sorted(existing.values()))
+
+            # 精确重排用的 float32 原始向量（已归一化）只存磁盘，不进内存索引
+            store_vectors = self.rescore_factor > 0
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors (label, id, document, metadata, embedding) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        int(label),
+                        record_id,
+                        documents[i] if documents is not None else None,
+                        json.dumps(metadatas[i] or {}, ensure_ascii=False)
+                        if metadatas is not None
+                        else None,
+                        vectors[i].tobytes() if store_vectors else None,
+                    )
+                    for i, (record_id, label) in enumerate(zip(ids, labels))
+                ],
+            )
+            self._unsaved += len(ids)
+            if self._unsaved >= ANN_SAVE_EVERY:
+                self.persist()
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if self._embedding_function is None:
+            raise ValueError("add_texts 需要 embedding_function")
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        embeddings = self._embedding_function.embed_documents(texts)
+        self.upsert(ids, embeddings, documents=texts, metadatas=metadatas)
+        return ids
+
+    def _ids_where(self, where: Dict[str, Any]) -> List[str]:
+        """元数据等值条件匹配的 id（doc_id 条件走表达式索引）。"""
+        clauses = []
+        params: List[Any] = []
+        for key, value in where.items():
+            if not key.isidentifier() or isinstance(value, (dict, list)):
+                raise ValueError(f"本地 ANN 后端只支持等值过滤：{where}")
+            clauses.append(f"json_extract(metadata, '$.{key}') = ?")
+            params.append(value)
+        rows = self._conn.execute(
+            f"SELECT id FROM vectors WHERE {' AND '.join(clauses)}", params
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> Optional[bool]:
+        """按 id 或元数据等值条件（如 {"doc_id": ...}，与 Chroma collection.delete 一致）删除。"""
+        self._check_writable()
+        if not ids and not where:
+            return None
+        with self._lock:
+            if where:
+                matched = self._ids_where(where)
+                if ids:
+                    matched_set = set(matched)
+                    matched = [record_id for record_id in ids if record_id in matched_set]
+                ids = matched
+            existing = self._labels_for(ids)
+            if self.index is not None and existing:
+                self.index.remove(sorted(existing.values()))
+            self._conn.executemany(
+                "DELETE FROM vectors WHERE label = ?", [(label,) for label in existing.values()]
+            )
+            self._unsaved += len(existing)
+        return True
+
+    # ---------------------- 检索 ----------------------
+
+    def _documents_for(
+        self, labels: Sequence[int], vectors: Optional[Dict[int, np.ndarray]] = None
+    ) -> Dict[int, Document]:
+        """按 label 取文档；传入 vectors 时同时取回已保存的 float32 向量。"""
+        found: Dict[int, Document] = {}
+        labels = [int(label) for label in labels if label >= 0]
+        column = "embedding" if vectors is not None else "NULL"
+        for start in range(0, len(labels), _SQL_IN_BATCH):
+            batch = labels[start : start + _SQL_IN_BATCH]
+            placeholders = ", ".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT label, id, document, metadata, {column} FROM vectors "
+                f"WHERE label IN ({placeholders})",
+                batch,
+            ).fetchall()
+            for label, record_id, document, metadata, embedding in rows:
+                found[label] = Document(
+                    id=record_id,
+                    page_content=document or "",
+                    metadata=json.loads(metadata) if metadata else {},
+                )
+                if embedding is not None:
+                    vectors[label] = np.frombuffer(embedding, dtype=np.float32)
+        return found
+
+    def _rescore(
+        self,
+        query: np.ndarray,
+        distances: np.ndarray,
+        labels: np.ndarray,
+        vectors: Dict[int, np.ndarray],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """以 float32 原始向量精确重排候选；没有保存原始向量的候选保留索引给出的距离。"""
+        has_vector = np.array([int(label) in vectors for label in labels], dtype=bool)
+        if not has_vector.any():
+            return distances, labels
+        exact = np.zeros((len(labels), self.dim), dtype=np.float32)
+        for i in np.flatnonzero(has_vector):
+            exact[i] = vectors[int(labels[i])]
+        exact_distances, exact_labels = rescore_exact(
+            query, np.where(has_vector, labels, -1), exact, len(labels)
+        )
+        rest = ~has_vector & (labels >= 0)
+        merged_distances = np.concatenate([exact_distances, distances[rest]])
+        merged_labels = np.concatenate([exact_labels, labels[rest]])
+        order = np.argsort(merged_distances, kind="stable")
+        return merged_distances[order], merged_labels[order]
+
+    @staticmethod
+    def _match(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+        """元数据等值过滤（只支持 {"字段": 值} 形式）。"""
+        if not filter:
+            return True
+        for key, value in filter.items():
+            if key.startswith("$") or isinstance(value, dict):
+                raise ValueError(f"本地 ANN 后端只支持等值过滤：{filter}")
+            if metadata.get(key) != value:
+                return False
+        return True
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: Sequence[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        """
+        按向量检索，返回 (Document, 余弦距离)，距离升序。
+
+        有过滤条件时先多取候选再过滤，满足条件的结果不足 k 个时逐步扩大候选数；
+        rescore_factor > 0 时取 k*因子 个候选，以 float32 原始向量重排后再截取。
+        """
+        query = normalize(embedding)
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0:
+                return []
+            total = self.index.ntotal
+            fetch_k = k * max(self.rescore_factor, 1)
+            fetch_k = min(fetch_k * _FILTER_FETCH_FACTOR if filter else fetch_k, total)
+            while True:
+                distances, labels = self.index.search(query, fetch_k)
+                distances, labels = distances[0], labels[0]
+                vectors: Optional[Dict[int, np.ndarray]] = (
+                    {} if self.rescore_factor > 0 else None
+                )
+                documents = self._documents_for(labels.tolist(), vectors)
+                if vectors:
+                    distances, labels = self._rescore(query[0], distances, labels, vectors)
+                results: List[Tuple[Document, float]] = []
+                for distance, label in zip(distances.tolist(), labels.tolist()):
+                    document = documents.get(label)
+                    # 未提交的 label（中断遗留）或不满足过滤条件的结果跳过
+                    if document is None or not self._match(document.metadata, filter):
+                        continue
+                    results.append((document, float(distance)))
+                    if len(results) >= k:
+                        return results
+                if fetch_k >= total:
+                    return results
+                fetch_k = min(fetch_k * _FILTER_FETCH_FACTOR, total)
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        if self._embedding_function is None:
+            raise ValueError("按文本检索需要 embedding_function")
+        embedding = self._embedding_function.embed_query(query)
+        return self.similarity_search_by_vector_with_score(embedding, k, filter=filter)
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter=filter)]
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [
+            doc
+            for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, filter=filter)
+        ]
+
+    def _select_relevance_score_fn(self) -> Any:
+        # 余弦距离 → [0, 1] 相关度
+        return lambda distance: 1.0 - distance / 2.0
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        with self._lock:
+            labels = self._labels_for(list(ids))
+            documents = self._documents_for(list(labels.values()))
+        return [documents[labels[i]] for i in ids if i in labels and labels[i] in documents]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Any,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> "LocalAnnVectorStore":
+        store = cls(embedding_function=embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        store.persist()
+        return store
@@ -0,0 +1,440 @@
+"""
+语料级切分阶段（进程池并行 + JSONL 块存储 + 断点续跑）。
+
+对 json_store 中的全部文档执行结构切分，结果写入块存储供嵌入阶段分批读取：
+
+    chunk_store/
+        <文档名>.jsonl      每行一个块：{"id": ..., "text": ..., "metadata": {...}}
+        <文档名>.parents.jsonl  每行一个父段落（ParentPassage.to_dict()），子块 metadata.parent_id 指向它
+        _manifest.json     各文档的来源指纹（大小、修改时间）、切分配置指纹与块数
+
+- 文档在进程池中并行切分（spawn；每个工作进程初始化时创建一次切分器，
+  token 模式下分词器每进程只加载一次），在途任务数有上限，万级文档也不会堆积 future
+- 块 id 为 {元素 id}_chunk_{n}，同一文档与配置重复切分得到相同的 id
+- 每篇文档的 JSONL 先写临时文件再原子替换，中断不会留下半个文件
+- 续跑：来源文件与切分配置均未变化的文档直接跳过
+- iter_chunks 按文档完成顺序流式产出块；ChunkStore.iter_batches 按批读取块存储
+
+用法：
+
+    stats = CorpusChunker(max_workers=8).run()
+    for batch in ChunkStore().iter_batches(256):
+        ...
+"""
+
+import sys
+from pathlib import Path
+
+# 确保项目根目录在 Python 路径中
+_project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from multiprocessing import get_context
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from src.config.settings import (
+    CHUNK_STORE_PATH,
+    CHUNK_WORKERS,
+    EMBEDDING_PATH,
+    IMG_CHUNK_SON_OVERLAP,
+    IMG_CHUNK_SON_SIZE,
+    PROJECT_ROOT,
+    TEXT_CHUNK_LENGTH_UNIT,
+    TEXT_CHUNK_PARENT_SIZE,
+    TEXT_CHUNK_SON_OVERLAP,
+    TEXT_CHUNK_SON_SIZE,
+)
+from src.rag.splitting.get_splitting_components import get_structural_chunker
+
+# ---------------------- 类型与日志配置 ----------------------
+
+PathLike = Union[str, os.PathLike]
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "_manifest.json"
+# 块存储格式版本：切分逻辑或记录结构变化时递增，使旧结果失效
+CHUNK_STORE_VERSION = 3
+# 每完成多少篇文档保存一次 manifest
+_MANIFEST_SAVE_EVERY = 50
+
+
+# ---------------------- 数据结构 ----------------------
+
+
+@dataclass
+class ChunkingStats:
+    """一次语料切分的统计。"""
+
+    total: int = 0
+    chunked: int = 0
+    skipped: int = 0
+    failed: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+
+# ---------------------- 块存储 ----------------------
+
+
+class ChunkStore:
+    """
+    JSONL 块存储（每篇文档一个文件）及其 manifest。
+
+    Args:
+        store_dir: 存储目录，默认 CHUNK_STORE_PATH
+    """
+
+    def __init__(self, store_dir: Optional[PathLike] = None) -> None:
+        self.store_dir = Path(store_dir or CHUNK_STORE_PATH)
+        self.manifest_path = self.store_dir / MANIFEST_NAME
+        self._lock = threading.Lock()
+        self.manifest: Dict[str, Dict[str, Any]] = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data.get("documents", {}) if isinstance(data, dict) else {}
+
+    def save_manifest(self) -> None:
+        """原子写入 manifest。"""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            payload = {"version": CHUNK_STORE_VERSION, "documents": self.manifest}
+            tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+            tmp_path.write_text(
+                json.dumps(payload, ensure_ascii=False), encoding="utf-8"
+            )
+            os.replace(tmp_path, self.manifest_path)
+
+    def doc_path(self, name: str) -> Path:
+        """文档对应的 JSONL 文件路径。"""
+        return self.store_dir / f"{name}.jsonl"
+
+    def parents_path(self, name: str) -> Path:
+        """文档对应的父段落 JSONL 文件路径。"""
+        return self.store_dir / f"{name}.parents.jsonl"
+
+    @staticmethod
+    def fingerprint(json_path: Path) -> Dict[str, int]:
+        stat = json_path.stat()
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def is_current(self, json_path: Path, config_key: str) -> bool:
+        """文档已按当前配置切分且来源文件未变化。"""
+        entry = self.manifest.get(json_path.stem)
+        if not entry or entry.get("config") != config_key:
+            return False
+        if entry.get("source") != self.fingerprint(json_path):
+            return False
+        return self.doc_path(json_path.stem).is_file()
+
+    def record(
+        self, json_path: Path, config_key: str, doc_id: str, chunks: int
+    ) -> None:
+        with self._lock:
+            self.manifest[json_path.stem] = {
+                "doc_id": doc_id,
+                "source": self.fingerprint(json_path),
+                "config": config_key,
+                "chunks": chunks,
+            }
+
+    def forget(self, name: str) -> None:
+        with self._lock:
+            self.manifest.pop(name, None)
+
+    # ---------------------- 读取 ----------------------
+
+    def iter_doc_chunks(self, name: str) -> Iterator[Dict[str, Any]]:
+        """逐行读取一篇文档的块。"""
+        with self.doc_path(name).open("r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def iter_doc_parents(self, name: str) -> Iterator[Dict[str, Any]]:
+        """逐行读取一篇文档的父段落。"""
+        path = self.parents_path(name)
+        if not path.is_file():
+            return
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def iter_chunks(
+        self, names: Optional[Iterable[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """按文档名顺序逐块读取（默认 manifest 中的全部文档）。"""
+        for name in sorted(self.manifest) if names is None else names:
+            if self.doc_path(name).is_file():
+                yield from self.iter_doc_chunks(name)
+
+    def iter_batches(
+        self, batch_size: int, names: Optional[Iterable[str]] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """按批读取块（供嵌入阶段批量编码与写入向量库）。"""
+        batch: List[Dict[str, Any]] = []
+        for record in self.iter_chunks(names):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+# ---------------------- 工作进程 ----------------------
+
+_worker_chunker = None
+
+
+def _init_worker(config: Dict[str, Any]) -> None:
+    """工作进程初始化：创建一次切分器（token 模式下加载一次分词器）。"""
+    global _worker_chunker
+    _worker_chunker = get_structural_chunker(**config)
+
+
+def _write_jsonl(output: Path, records: Iterable[Dict[str, Any]]) -> None:
+    """先写临时文件再原子替换。"""
+    tmp_path = output.with_name(f".{output.name}.{os.getpid()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+    os.replace(tmp_path, output)
+
+
+def _chunk_to_store(
+    json_path: str, output_path: str, parents_path: str
+) -> Tuple[str, int]:
+    """切分一篇文档，原子写入块与父段落 JSONL，返回 (doc_id, 块数)。"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    chunks, parents = _worker_chunker.chunk_with_parents(doc)
+    # 先写父段落：块文件就位即表示该文档的结果完整
+    _write_jsonl(Path(parents_path), (parent.to_dict() for parent in parents))
+    _write_jsonl(
+        Path(output_path),
+        (
+            {"id": chunk.chunk_id, "text": chunk.text, "metadata": chunk.to_metadata()}
+            for chunk in chunks
+        ),
+    )
+    doc_id = chunks[0].doc_id if chunks else Path(json_path).stem
+    return doc_id, len(chunks)
+
+
+# ---------------------- 语料切分 ----------------------
+
+
+class CorpusChunker:
+    """
+    语料级并行切分。
+
+    Args:
+        store_dir: 块存储目录，默认 CHUNK_STORE_PATH
+        max_workers: 工作进程数，默认 CHUNK_WORKERS 或 CPU 核数；为 1 时在当前进程内执行
+        chunk_size / chunk_overlap / length_unit: 传给 get_structural_chunker
+    """
+
+    def __init__(
+        self,
+        store_dir: Optional[PathLike] = None,
+        max_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+        length_unit: Optional[str] = None,
+    ) -> None:
+        self.store = ChunkStore(store_dir)
+        self.max_workers = max(1, max_workers or CHUNK_WORKERS or os.cpu_count() or 1)
+        self.config: Dict[str, Any] = {
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "length_unit": length_unit,
+        }
+        self.config_key = self._config_key()
+
+    def _config_key(self) -> str:
+        """切分配置指纹（含生效的配置项默认值），配置变化时已有结果失效。"""
+        def effective_value(name: str, default: Any) -> Any:
+            return default if self.config[name] is None else self.config[name]
+
+        length_unit = effective_value("length_unit", TEXT_CHUNK_LENGTH_UNIT)
+        effective = {
+            "version": CHUNK_STORE_VERSION,
+            "chunk_size": effective_value("chunk_size", TEXT_CHUNK_SON_SIZE),
+            "chunk_overlap": effective_value("chunk_overlap", TEXT_CHUNK_SON_OVERLAP),
+            "length_unit": length_unit,
+            "parent_size": TEXT_CHUNK_PARENT_SIZE,
+            "media_chunk_size": IMG_CHUNK_SON_SIZE,
+            "media_chunk_overlap": IMG_CHUNK_SON_OVERLAP,
+            "tokenizer": EMBEDDING_PATH if length_unit == "token" else None,
+        }
+        raw = json.dumps(effective, sort_keys=True)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _find_json_files(json_dir: PathLike) -> List[Path]:
+        return sorted(
+            p
+            for p in Path(json_dir).iterdir()
+            if p.is_file() and p.suffix.lower() == ".json"
+        )
+
+    def _task_args(self, json_path: Path) -> Tuple[str, str, str]:
+        return (
+            str(json_path),
+            str(self.store.doc_path(json_path.stem)),
+            str(self.store.parents_path(json_path.stem)),
+        )
+
+    def _iter_completed(
+        self, json_paths: List[Path]
+    ) -> Iterator[Tuple[Path, Optional[str], int, Optional[BaseException]]]:
+        """并行切分，按完成顺序产出 (json_path, doc_id, 块数, 异常)。"""
+        if self.max_workers == 1 or len(json_paths) <= 1:
+            _init_worker(self.config)
+            for json_path in json_paths:
+                try:
+                    doc_id, count = _chunk_to_store(*self._task_args(json_path))
+                    yield json_path, doc_id, count, None
+                except Exception as e:
+                    yield json_path, None, 0, e
+            return
+
+        # 在途任务数上限：保持进程忙碌的同时不一次性提交全部文档
+        max_in_flight = self.max_workers * 4
+        pending = iter(json_paths)
+        in_flight: Dict[Future, Path] = {}
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.config,),
+        ) as executor:
+
+            def submit_more() -> None:
+                while len(in_flight) < max_in_flight:
+                    json_path = next(pending, None)
+                    if json_path is None:
+                        return
+                    future = executor.submit(
+                        _chunk_to_store, *self._task_args(json_path)
+                    )
+                    in_flight[future] = json_path
+
+            submit_more()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    json_path = in_flight.pop(future)
+                    try:
+                        doc_id, count = future.result()
+                        yield json_path, doc_id, count, None
+                    except Exception as e:
+                        yield json_path, None, 0, e
+                submit_more()
+
+    def iter_documents(
+        self,
+        json_dir: Optional[PathLike] = None,
+        force: bool = False,
+        stats: Optional[ChunkingStats] = None,
+    ) -> Iterator[Tuple[str, int]]:
+        """
+        切分目录下的文档（跳过已是最新的文档），按完成顺序产出 (文档名, 块数)。
+
+        Args:
+            json_dir: 文档目录，默认 json_store
+            force: 为 True 时忽略 manifest，全部重新切分
+            stats: 可选的统计对象（原地累加）
+        """
+        stats = stats if stats is not None else ChunkingStats()
+        if json_dir is None:
+            json_dir = PROJECT_ROOT / "files" / "file_store" / "json_store"
+        self.store.store_dir.mkdir(parents=True, exist_ok=True)
+        # 清理上次中断遗留的临时文件
+        for tmp_path in self.store.store_dir.glob(".*.tmp"):
+            tmp_path.unlink(missing_ok=True)
+
+        json_paths = self._find_json_files(json_dir)
+        stats.total += len(json_paths)
+        todo = [
+            p
+            for p in json_paths
+            if force or not self.store.is_current(p, self.config_key)
+        ]
+        stats.skipped += len(json_paths) - len(todo)
+        logger.info(
+            "语料切分：共 %d 篇，跳过 %d 篇（已是最新），待切分 %d 篇，%d 个进程",
+            len(json_paths),
+            len(json_paths) - len(todo),
+            len(todo),
+            min(self.max_workers, max(1, len(todo))),
+        )
+
+        completed = 0
+        try:
+            for json_path, doc_id, count, error in self._iter_completed(todo):
+                if error is not None:
+                    stats.failed += 1
+                    self.store.forget(json_path.stem)
+                    logger.error("切分失败：%s, 错误：%r", json_path.name, error)
+                    continue
+                self.store.record(json_path, self.config_key, doc_id, count)
+                stats.chunked += 1
+                stats.chunks += count
+                completed += 1
+                if completed % _MANIFEST_SAVE_EVERY == 0:
+                    self.store.save_manifest()
+                yield json_path.stem, count
+        finally:
+            self.store.save_manifest()
+
+    def iter_chunks(
+        self, json_dir: Optional[PathLike] = None, force: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """流式产出块记录：每篇文档切分完成后立即产出其全部块（按文档完成顺序）。"""
+        for name, _ in self.iter_documents(json_dir, force=force):
+            yield from self.store.iter_doc_chunks(name)
+
+    def run(
+        self, json_dir: Optional[PathLike] = None, force: bool = False
+    ) -> ChunkingStats:
+        """切分整个目录并写入块存储，返回统计。"""
+        stats = ChunkingStats()
+        start = time.perf_counter()
+        for _ in self.iter_documents(json_dir, force=force, stats=stats):
+            pass
+        stats.seconds = time.perf_counter() - start
+        logger.info(
+            "语料切分完成：共 %d 篇，切分 %d 篇，跳过 %d 篇，失败 %d 篇，生成 %d 个块，耗时 %.2fs",
+            stats.total,
+            stats.chunked,
+            stats.skipped,
+            stats.failed,
+            stats.chunks,
+            stats.seconds,
+        )
+        return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
+    )
+    CorpusChunker().run()
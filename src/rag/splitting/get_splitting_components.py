@@ -4,14 +4,18 @@
 提供文本分割器的初始化方法，支持中英文混合文档的智能切分。
 
 功能：
-1. 递归字符文本分割器（RecursiveCharacterTextSplitter）
+1. 递归字符文本分割器（RecursiveCharacterTextSplitter），用于无结构的纯文本
 2. 支持中英文混合分隔符，保证不切分完整句子
 3. 从配置文件读取切分参数
+4. 结构感知切分器（StructuralChunker），直接按 json_store 元素切分，块边界与元素对齐
+5. TEXT_CHUNK_LENGTH_UNIT=token 时按嵌入模型分词器的 token 数切分，块长度不超过编码窗口
+6. 图片 / 表格描述按 IMG_CHUNK_SON_SIZE / IMG_CHUNK_SON_OVERLAP 切分
 
 参考：
 - LangChain RecursiveCharacterTextSplitter
 """
 
+import logging
 import sys
 from pathlib import Path
 
@@ -23,9 +27,16 @@ if str(_project_root) not in sys.path:
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from src.config.settings import (
+    IMG_CHUNK_SON_OVERLAP,
+    IMG_CHUNK_SON_SIZE,
     TEXT_CHUNK_SON_SIZE,
     TEXT_CHUNK_SON_OVERLAP,
+    TEXT_CHUNK_LENGTH_UNIT,
 )
+from src.rag.splitting.structural_chunker import StructuralChunker
+from src.rag.splitting.token_length import get_token_counter
+
+logger = logging.getLogger(__name__)
 
 
 # ===================================
@@ -100,6 +111,66 @@ def get_text_splitter(
     )
 
 
+# ===================================
+# 获取 结构感知切分器
+# ===================================
+def get_structural_chunker(
+    chunk_size: int = None,
+    chunk_overlap: int = None,
+    length_unit: str = None,
+) -> StructuralChunker:
+    """
+    获取结构感知切分器（json_store 文档使用）。
+
+    特点：
+    - 单次线性遍历元素，连续段落打包为不超过 chunk_size 的块
+    - 表格、公式、代码、图片整体保留，只切分超长段落
+    - 每个块带元素 id 区间，与可检索的元素边界一致
+    - length_unit 为 token 时按嵌入模型分词器计数，块长度不超过编码窗口
+    - 图片 / 表格描述按 IMG_CHUNK_SON_SIZE / IMG_CHUNK_SON_OVERLAP 切分（token 模式下同样不超过编码窗口）
+
+    Args:
+        chunk_size: 单个块的最大长度。若为 None，使用配置文件中的 TEXT_CHUNK_SON_SIZE
+            （token 模式下未配置时取编码窗口）。
+        chunk_overlap: 超长段落切分时的重叠长度。若为 None，使用配置文件中的 TEXT_CHUNK_SON_OVERLAP
+            （token 模式下未配置时取 chunk_size 的 1/4）。
+        length_unit: char 或 token。若为 None，使用配置文件中的 TEXT_CHUNK_LENGTH_UNIT。
+
+    Returns:
+        StructuralChunker: 配置好的结构切分器实例。
+    """
+    length_unit = length_unit or TEXT_CHUNK_LENGTH_UNIT
+    if length_unit != "token":
+        return StructuralChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    counter = get_token_counter()
+    if chunk_size is None:
+        chunk_size = TEXT_CHUNK_SON_SIZE or counter.max_tokens
+    if chunk_size > counter.max_tokens:
+        logger.warning(
+            "chunk_size=%d 超过嵌入模型编码窗口，按 %d 个 token 切分",
+            chunk_size,
+            counter.max_tokens,
+        )
+        chunk_size = counter.max_tokens
+    if chunk_overlap is None:
+        chunk_overlap = TEXT_CHUNK_SON_OVERLAP
+    if chunk_overlap is None or chunk_overlap >= chunk_size:
+        chunk_overlap = chunk_size // 4
+
+    media_chunk_size = min(IMG_CHUNK_SON_SIZE or chunk_size, counter.max_tokens)
+    media_chunk_overlap = IMG_CHUNK_SON_OVERLAP
+    if media_chunk_overlap is None or media_chunk_overlap >= media_chunk_size:
+        media_chunk_overlap = media_chunk_size // 4
+    return StructuralChunker(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=counter,
+        media_chunk_size=media_chunk_size,
+        media_chunk_overlap=media_chunk_overlap,
+    )
+
+
 if __name__ == "__main__":
     chunk_size = TEXT_CHUNK_SON_SIZE if TEXT_CHUNK_SON_SIZE is not None else 256
     chunk_overlap = TEXT_CHUNK_SON_OVERLAP if TEXT_CHUNK_SON_OVERLAP is not None else 128
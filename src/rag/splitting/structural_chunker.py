@@ -0,0 +1,711 @@
+"""
+结构感知切分模块。
+
+直接在 json_store 的元素序列（layout_json_parser 输出）上切分，而不是对拼接后的纯文本
+逐个分隔符递归扫描：
+
+1. 单次线性遍历元素，把连续的段落 / 列表元素打包为不超过 chunk_size 的块
+2. 标题开启新块（并作为新块的开头），块边界与章节、元素边界对齐
+3. 表格 / 公式 / 代码 / 图片为原子元素，整体放入块中，不做切分
+4. 仅超长的段落按句子切分（必要时按字符硬切），相邻片段保留 chunk_overlap 的重叠
+5. 每个块记录所含元素 id 区间、页码、章节标题与区域（head/body/tail），
+   检索命中后可直接定位回原始元素
+6. 图片 / 表格等元素的描述（content.description，JsonImageDescriptionProcessor 生成）超过
+   media_chunk_size 时，元素主体（标题说明、表格内容）单独成块，描述按句切分为多个块，
+   每块以图注开头；块元数据记录 source.image_path，检索命中后可定位回原图
+7. chunk_with_parents 同时按章节生成父段落（ParentPassage，不超过 parent_size 字符），
+   每个子块记录所属父段落 id：子块用于嵌入检索，父段落作为命中后送入 LLM 的上下文
+
+长度默认按字符数计算，可通过 length_function 替换（如 token_length.TokenCounter 按 token 计数）；
+length_function 带有 batch 方法时，整篇文档的元素长度一次批量计算。
+"""
+
+import sys
+from pathlib import Path
+
+# 确保项目根目录在 Python 路径中
+_project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+import html
+import json
+import logging
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from src.config.settings import (
+    IMG_CHUNK_SON_OVERLAP,
+    IMG_CHUNK_SON_SIZE,
+    TEXT_CHUNK_PARENT_SIZE,
+    TEXT_CHUNK_SON_SIZE,
+    TEXT_CHUNK_SON_OVERLAP,
+)
+
+# ---------------------- 类型与日志配置 ----------------------
+
+PathLike = Union[str, os.PathLike]
+
+logger = logging.getLogger(__name__)
+
+# 可打包、必要时可切分的文本类元素
+TEXT_TYPES = {"paragraph", "list"}
+# 原子元素：整体放入块中，不切分
+ATOMIC_TYPES = {"table", "equation", "code", "image"}
+# 不参与切分的元素（页眉页脚等）
+SKIP_TYPES = {"page_header", "page_footer", "page_number"}
+
+# 元素之间的连接符
+ELEMENT_JOINER = "\n\n"
+
+# 句子切分：句末标点（中英文）之后断开，英文标点需后接空白
+_SENTENCE_END = re.compile(r"(?<=[。！？；])|(?<=[.!?;])(?=\s)")
+
+# 表格 HTML 转文本
+_TABLE_ROW_END = re.compile(r"</tr\s*>", re.IGNORECASE)
+_TABLE_CELL_END = re.compile(r"</t[dh]\s*>", re.IGNORECASE)
+_HTML_TAG = re.compile(r"<[^>]+>")
+_SPACES = re.compile(r"[ \t ]+")
+
+
+# ---------------------- 数据结构 ----------------------
+
+
+@dataclass
+class ElementChunk:
+    """
+    结构切分得到的一个块。
+
+    Attributes:
+        chunk_id: 块 id，{首元素 id}_chunk_{n}（n 为以该元素开头的第几个块）
+        text: 块文本
+        element_ids: 块内元素 id（按文档顺序；超长段落的片段只含该段落）
+        chunk_type: text / table / equation / code / image（含多种元素时为 text）
+        doc_id: 文档 id
+        pages: 块内元素所在页码（去重、升序）
+        section_title: 块首元素所属章节标题
+        region: 块首元素所在区域（head / body / tail，未划分时为空）
+        part: 超长段落切分时的片段序号（从 0 开始），未切分时为 None
+        parent_id: 所属父段落 id（chunk_with_parents 生成时填写）
+        image_paths: 块内元素的 source.image_path（图片、表格截图等）
+    """
+
+    chunk_id: str
+    text: str
+    element_ids: List[str]
+    chunk_type: str
+    doc_id: str = ""
+    pages: List[int] = field(default_factory=list)
+    section_title: str = ""
+    region: str = ""
+    part: Optional[int] = None
+    parent_id: str = ""
+    image_paths: List[str] = field(default_factory=list)
+
+    @property
+    def start_element_id(self) -> str:
+        return self.element_ids[0] if self.element_ids else ""
+
+    @property
+    def end_element_id(self) -> str:
+        return self.element_ids[-1] if self.element_ids else ""
+
+    def to_metadata(self) -> Dict[str, Any]:
+        """向量库元数据（只含标量值，列表以逗号拼接）。"""
+        metadata: Dict[str, Any] = {
+            "chunk_id": self.chunk_id,
+            "doc_id": self.doc_id,
+            "chunk_type": self.chunk_type,
+            "element_ids": ",".join(self.element_ids),
+            "start_element_id": self.start_element_id,
+            "end_element_id": self.end_element_id,
+            "pages": ",".join(str(p) for p in self.pages),
+            "section_title": self.section_title,
+            "region": self.region,
+        }
+        if self.part is not None:
+            metadata["part"] = self.part
+        if self.parent_id:
+            metadata["parent_id"] = self.parent_id
+        if self.image_paths:
+            metadata["image_paths"] = ",".join(self.image_paths)
+        return metadata
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class ParentPassage:
+    """
+    父段落：同一章节内连续元素的完整文本，不参与嵌入，子块命中后按 parent_id 取回。
+
+    Attributes:
+        parent_id: 父段落 id，{首元素 id}_parent
+        text: 父段落文本（元素完整文本，超长段落不切分）
+        element_ids: 所含元素 id（按文档顺序）
+        doc_id: 文档 id
+        section_title: 所属章节标题
+        pages: 所含元素页码（去重、升序）
+    """
+
+    parent_id: str
+    text: str
+    element_ids: List[str]
+    doc_id: str = ""
+    section_title: str = ""
+    pages: List[int] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class _Unit:
+    """切分前的单个元素（或超长段落的一个片段）。"""
+
+    element_id: str
+    element_type: str
+    text: str
+    page: Optional[int]
+    section_title: str
+    region: str
+    part: Optional[int] = None
+    length: int = 0
+    image_path: str = ""
+    description: str = ""  # 原子元素的 content.description
+    body: str = ""  # 有描述时：不含描述的元素文本（图注、表格内容等）
+
+
+# ---------------------- 元素文本 ----------------------
+
+
+def table_html_to_text(table_html: str) -> str:
+    """把表格 HTML 转为按行排列、单元格以 | 分隔的纯文本。"""
+    text = _TABLE_ROW_END.sub("\n", table_html)
+    text = _TABLE_CELL_END.sub(" | ", text)
+    text = html.unescape(_HTML_TAG.sub("", text))
+    lines = []
+    for line in text.splitlines():
+        line = _SPACES.sub(" ", line).strip().rstrip("|").strip()
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def _flatten_text(value: Any) -> str:
+    """content 中的文本字段可能是字符串，也可能是 [{"type": "text", "content": ...}] 列表。"""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return "".join(
+            _flatten_text(item.get("content") if isinstance(item, dict) else item)
+            for item in value
+        )
+    return str(value)
+
+
+def element_text(element: Dict[str, Any], include_description: bool = True) -> str:
+    """
+    返回元素用于检索的文本（按元素类型组合 content 中的字段）。
+
+    include_description 为 False 时不含 content.description（图片、表格等的生成描述）。
+    """
+    element_type = element.get("type", "")
+    content = element.get("content") or {}
+    if not isinstance(content, dict):
+        return str(content).strip()
+
+    def join(parts: Iterable[Any]) -> str:
+        texts = (_flatten_text(p).strip() for p in parts)
+        return "\n".join(t for t in texts if t)
+
+    description = content.get("description") if include_description else None
+
+    if element_type == "table":
+        return join(
+            [
+                *(content.get("captions") or []),
+                description,
+                table_html_to_text(_flatten_text(content.get("html"))),
+            ]
+        )
+
+    if element_type == "image":
+        return join([*(content.get("captions") or []), description])
+
+    if element_type in ("code", "equation"):
+        return join([content.get("text"), description])
+
+    return _flatten_text(content.get("text")).strip()
+
+
+def _region_lookup(metadata: Dict[str, Any]) -> Callable[[int], str]:
+    """根据 metadata.region_division 返回 元素序号（从 1 开始）-> 区域名 的函数。"""
+    division = metadata.get("region_division") or {}
+    spans: List[Tuple[int, int, str]] = []
+    for name, span in division.items():
+        if isinstance(span, dict) and span.get("start_seq") is not None:
+            spans.append((int(span["start_seq"]), int(span.get("end_seq") or 0), name))
+
+    def lookup(seq: int) -> str:
+        for start, end, name in spans:
+            if start <= seq <= end:
+                return name
+        return ""
+
+    return lookup
+
+
+# ---------------------- 结构切分器 ----------------------
+
+
+class StructuralChunker:
+    """
+    基于元素结构的切分器。
+
+    Args:
+        chunk_size: 单个块的最大长度（按 length_function 计算），默认 TEXT_CHUNK_SON_SIZE 或 512
+        chunk_overlap: 超长段落切分时相邻片段的重叠长度，默认 TEXT_CHUNK_SON_OVERLAP 或 128
+        length_function: 长度计算函数，默认按字符数；带 batch(texts) 方法时批量计算
+        skip_regions: 不参与切分的区域（如 {"tail"} 跳过参考文献等尾部内容）
+        media_chunk_size: 元素描述切分的块长度，默认 IMG_CHUNK_SON_SIZE 或 chunk_size
+        media_chunk_overlap: 元素描述切分的重叠长度，默认 IMG_CHUNK_SON_OVERLAP 或 chunk_overlap
+    """
+
+    def __init__(
+        self,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+        length_function: Callable[[str], int] = len,
+        skip_regions: Iterable[str] = (),
+        media_chunk_size: Optional[int] = None,
+        media_chunk_overlap: Optional[int] = None,
+    ) -> None:
+        if chunk_size is None:
+            chunk_size = TEXT_CHUNK_SON_SIZE if TEXT_CHUNK_SON_SIZE is not None else 512
+        if chunk_overlap is None:
+            chunk_overlap = (
+                TEXT_CHUNK_SON_OVERLAP if TEXT_CHUNK_SON_OVERLAP is not None else 128
+            )
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size 必须大于 0: {chunk_size}")
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError(
+                f"chunk_overlap 必须在 [0, chunk_size) 范围内: {chunk_overlap}"
+            )
+        if media_chunk_size is None:
+            media_chunk_size = IMG_CHUNK_SON_SIZE or chunk_size
+        if media_chunk_overlap is None:
+            media_chunk_overlap = (
+                IMG_CHUNK_SON_OVERLAP
+                if IMG_CHUNK_SON_OVERLAP is not None
+                else min(chunk_overlap, media_chunk_size // 4)
+            )
+        if media_chunk_size <= 0:
+            raise ValueError(f"media_chunk_size 必须大于 0: {media_chunk_size}")
+        if not 0 <= media_chunk_overlap < media_chunk_size:
+            raise ValueError(
+                f"media_chunk_overlap 必须在 [0, media_chunk_size) 范围内: "
+                f"{media_chunk_overlap}"
+            )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.media_chunk_size = media_chunk_size
+        self.media_chunk_overlap = media_chunk_overlap
+        self.length_function = length_function
+        self.skip_regions = set(skip_regions)
+        self._joiner_length = length_function(ELEMENT_JOINER)
+
+    def _lengths(self, texts: List[str]) -> List[int]:
+        """批量计算长度（length_function 提供 batch 方法时一次调用）。"""
+        batch = getattr(self.length_function, "batch", None)
+        if batch is not None:
+            return list(batch(texts))
+        return [self.length_function(text) for text in texts]
+
+    # ---------------------- 超长段落切分 ----------------------
+
+    def _hard_split(self, text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+        """按长度硬切（单句超过 chunk_size 时的兜底），相邻片段重叠约 chunk_overlap。"""
+        if self.length_function is len:
+            step = chunk_size - chunk_overlap
+            last = max(0, len(text) - chunk_size)
+            starts = list(range(0, last, step)) + [last]
+            return [
+                text[i : i + chunk_size]
+                for i in starts
+                if text[i : i + chunk_size].strip()
+            ]
+        # 非字符长度（如 token）：二分查找每个片段的最大结束位置
+        pieces: List[str] = []
+        start = 0
+        while start < len(text):
+            lo, hi = start + 1, len(text)
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if self.length_function(text[start:mid]) <= chunk_size:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            pieces.append(text[start:lo])
+            if lo >= len(text):
+                break
+            # 按长度比例折算重叠字符数
+            overlap = (lo - start) * chunk_overlap // chunk_size
+            start = max(start + 1, lo - overlap)
+        return [p for p in pieces if p.strip()]
+
+    def split_text(
+        self,
+        text: str,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+    ) -> List[str]:
+        """把超长文本按句子打包为不超过 chunk_size 的片段，相邻片段保留句子级重叠。"""
+        chunk_size = self.chunk_size if chunk_size is None else chunk_size
+        chunk_overlap = self.chunk_overlap if chunk_overlap is None else chunk_overlap
+        sentences = [s for s in _SENTENCE_END.split(text) if s and s.strip()]
+        sentence_lengths = self._lengths(sentences)
+        pieces: List[str] = []
+        current: List[Tuple[str, int]] = []
+        current_length = 0
+        has_new = False  # current 中是否有尚未输出过的句子
+
+        def flush() -> None:
+            nonlocal current, current_length, has_new
+            if has_new:
+                pieces.append("".join(sentence for sentence, _ in current).strip())
+            # 从末尾保留不超过 chunk_overlap 的若干整句作为下一片段的开头
+            overlap: List[str] = []
+            overlap_length = 0
+            for sentence, length in reversed(current):
+                if overlap_length + length > chunk_overlap:
+                    break
+                overlap.insert(0, (sentence, length))
+                overlap_length += length
+            current, current_length, has_new = overlap, overlap_length, False
+
+        for sentence, length in zip(sentences, sentence_lengths):
+            if length > chunk_size:
+                flush()
+                current, current_length = [], 0
+                pieces.extend(self._hard_split(sentence.strip(), chunk_size, chunk_overlap))
+                continue
+            if current_length + length > chunk_size:
+                flush()
+                # 重叠部分加上新句子仍超长时放弃重叠
+                if current_length + length > chunk_size:
+                    current, current_length = [], 0
+            current.append((sentence, length))
+            current_length += length
+            has_new = True
+        flush()
+        return [p for p in pieces if p]
+
+    # ---------------------- 元素展开 ----------------------
+
+    def _elements(self, doc: Dict[str, Any]) -> List[_Unit]:
+        """按文档顺序收集元素（跳过空元素与页眉页脚等），并批量计算长度。"""
+        metadata = doc.get("metadata") or {}
+        region_of = _region_lookup(metadata)
+        section_title = ""
+
+        units: List[_Unit] = []
+        for seq, element in enumerate(doc.get("elements") or [], start=1):
+            element_type = element.get("type", "")
+            if element_type in SKIP_TYPES:
+                continue
+            region = region_of(seq)
+            if region and region in self.skip_regions:
+                continue
+            text = element_text(element)
+            if not text:
+                continue
+
+            source = element.get("source") or {}
+            content = element.get("content")
+            description = ""
+            if element_type in ATOMIC_TYPES and isinstance(content, dict):
+                description = _flatten_text(content.get("description")).strip()
+            if element_type == "title":
+                section_title = text
+            else:
+                section_title = source.get("section_title") or section_title
+            units.append(
+                _Unit(
+                    element_id=element.get("id") or f"elem_{seq:06d}",
+                    element_type=element_type,
+                    text=text,
+                    page=source.get("page"),
+                    section_title=section_title,
+                    region=region,
+                    image_path=source.get("image_path") or "",
+                    description=description,
+                    body=(
+                        element_text(element, include_description=False)
+                        if description
+                        else ""
+                    ),
+                )
+            )
+
+        # 整篇文档的元素长度批量计算
+        for unit, length in zip(units, self._lengths([u.text for u in units])):
+            unit.length = length
+        return units
+
+    def _expand_media(self, unit: _Unit) -> List[_Unit]:
+        """
+        描述超长的原子元素展开为：元素主体（图注、表格内容等，不切分）+ 描述的各个片段。
+
+        描述片段以元素主体的首行（通常为图注）开头，使每个块单独检索时仍知道描述的对象。
+        """
+        label = unit.body.split("\n", 1)[0].strip() if unit.body else ""
+        label_length = self.length_function(label + "\n") if label else 0
+        if label_length > self.media_chunk_size // 4:
+            label, label_length = "", 0
+        budget = self.media_chunk_size - label_length
+        pieces = self.split_text(
+            unit.description,
+            chunk_size=budget,
+            chunk_overlap=min(self.media_chunk_overlap, budget // 2),
+        )
+        texts = [unit.body] if unit.body else []
+        texts.extend(f"{label}\n{piece}" if label else piece for piece in pieces)
+        return [
+            _Unit(**{**unit.__dict__, "text": text, "part": part, "length": length})
+            for part, (text, length) in enumerate(zip(texts, self._lengths(texts)))
+        ]
+
+    def _expand(self, units: List[_Unit]) -> List[_Unit]:
+        """超长文本元素展开为多个片段；描述超长的原子元素展开为主体与描述片段。"""
+        expanded: List[_Unit] = []
+        for unit in units:
+            if unit.description and unit.length > self.media_chunk_size:
+                expanded.extend(self._expand_media(unit))
+            elif (
+                unit.element_type not in ATOMIC_TYPES
+                and unit.element_type != "title"
+                and unit.length > self.chunk_size
+            ):
+                pieces = self.split_text(unit.text)
+                lengths = self._lengths(pieces)
+                for part, (piece, length) in enumerate(zip(pieces, lengths)):
+                    expanded.append(
+                        _Unit(
+                            **{**unit.__dict__, "text": piece, "part": part, "length": length}
+                        )
+                    )
+            else:
+                expanded.append(unit)
+        return expanded
+
+    # ---------------------- 打包 ----------------------
+
+    def chunk_document(self, doc: Dict[str, Any]) -> List[ElementChunk]:
+        """
+        切分一个 json_store 文档（{"metadata": ..., "elements": [...]}）。
+
+        Returns:
+            按文档顺序排列的块列表
+        """
+        doc_id = (doc.get("metadata") or {}).get("doc_id", "")
+        return self._pack(self._expand(self._elements(doc)), doc_id)
+
+    def _pack(self, units: List[_Unit], doc_id: str) -> List[ElementChunk]:
+        """把展开后的元素打包为块。"""
+        chunks: List[ElementChunk] = []
+        chunk_counts: Dict[str, int] = {}
+        pending: List[_Unit] = []
+        pending_length = 0
+
+        def titles_only() -> bool:
+            return all(u.element_type == "title" for u in pending)
+
+        def emit() -> None:
+            nonlocal pending, pending_length
+            if not pending:
+                return
+            first = pending[0]
+            types = {u.element_type for u in pending if u.element_type != "title"}
+            chunk_type = types.pop() if len(types) == 1 else "text"
+            if chunk_type in TEXT_TYPES:
+                chunk_type = "text"
+            n = chunk_counts.get(first.element_id, 0)
+            chunk_counts[first.element_id] = n + 1
+
+            element_ids: List[str] = []
+            for u in pending:
+                if not element_ids or element_ids[-1] != u.element_id:
+                    element_ids.append(u.element_id)
+            parts = [u.part for u in pending if u.part is not None]
+            image_paths = list(
+                dict.fromkeys(u.image_path for u in pending if u.image_path)
+            )
+            chunks.append(
+                ElementChunk(
+                    chunk_id=f"{first.element_id}_chunk_{n}",
+                    text=ELEMENT_JOINER.join(u.text for u in pending),
+                    element_ids=element_ids,
+                    chunk_type=chunk_type,
+                    doc_id=doc_id,
+                    pages=sorted({u.page for u in pending if u.page is not None}),
+                    section_title=first.section_title,
+                    region=first.region,
+                    part=parts[0] if parts else None,
+                    image_paths=image_paths,
+                )
+            )
+            pending, pending_length = [], 0
+
+        def fits(length: int) -> bool:
+            needed = pending_length + self._joiner_length + length
+            return not pending or needed <= self.chunk_size
+
+        def add(unit: _Unit, length: int) -> None:
+            nonlocal pending_length
+            if pending:
+                pending_length += self._joiner_length
+            pending.append(unit)
+            pending_length += length
+
+        for unit in units:
+            length = unit.length
+
+            if unit.element_type == "title":
+                # 标题开启新块；连续标题合并，作为下一块的开头
+                if not titles_only():
+                    emit()
+            elif unit.part is not None:
+                # 超长段落的片段各自成块；首个片段前可带上待输出的章节标题
+                if not titles_only() or unit.part > 0 or not fits(length):
+                    emit()
+                add(unit, length)
+                emit()
+                continue
+            elif not fits(length):
+                emit()
+
+            add(unit, length)
+
+        emit()
+        logger.debug("文档 %s 切分为 %d 个块", doc_id, len(chunks))
+        return chunks
+
+    # ---------------------- 父段落 ----------------------
+
+    def _group_parents(
+        self, units: List[_Unit], doc_id: str, parent_size: int
+    ) -> List[ParentPassage]:
+        """
+        按章节把元素分组为父段落。
+
+        标题开启新组（连续标题同组）；非标题元素的章节标题与组内已有正文不同时也开启新组；
+        组长度超过 parent_size 时在元素边界处拆分（单个元素超长时独占一组，不切分）。
+        """
+        parents: List[ParentPassage] = []
+        group: List[_Unit] = []
+        group_length = 0
+        joiner_length = len(ELEMENT_JOINER)
+
+        def flush() -> None:
+            nonlocal group, group_length
+            if not group:
+                return
+            body = [u for u in group if u.element_type != "title"]
+            parents.append(
+                ParentPassage(
+                    parent_id=f"{group[0].element_id}_parent",
+                    text=ELEMENT_JOINER.join(u.text for u in group),
+                    element_ids=[u.element_id for u in group],
+                    doc_id=doc_id,
+                    section_title=(body or group)[0].section_title,
+                    pages=sorted({u.page for u in group if u.page is not None}),
+                )
+            )
+            group, group_length = [], 0
+
+        for unit in units:
+            length = len(unit.text)
+            body = [u for u in group if u.element_type != "title"]
+            if unit.element_type == "title":
+                if body:
+                    flush()
+            elif body and unit.section_title != body[0].section_title:
+                flush()
+            elif body and group_length + joiner_length + length > parent_size:
+                flush()
+            if group:
+                group_length += joiner_length
+            group.append(unit)
+            group_length += length
+        flush()
+        return parents
+
+    def chunk_with_parents(
+        self, doc: Dict[str, Any], parent_size: Optional[int] = None
+    ) -> Tuple[List[ElementChunk], List[ParentPassage]]:
+        """
+        切分文档并生成父段落，子块的 parent_id 指向其首元素所在的父段落。
+
+        Args:
+            doc: json_store 文档
+            parent_size: 父段落最大字符数，默认 TEXT_CHUNK_PARENT_SIZE
+
+        Returns:
+            (子块列表, 父段落列表)，均按文档顺序
+        """
+        if parent_size is None:
+            parent_size = TEXT_CHUNK_PARENT_SIZE
+        if parent_size <= 0:
+            raise ValueError(f"parent_size 必须大于 0: {parent_size}")
+        doc_id = (doc.get("metadata") or {}).get("doc_id", "")
+        units = self._elements(doc)
+        chunks = self._pack(self._expand(units), doc_id)
+        parents = self._group_parents(units, doc_id, parent_size)
+
+        parent_of = {
+            element_id: parent.parent_id
+            for parent in parents
+            for element_id in parent.element_ids
+        }
+        for chunk in chunks:
+            chunk.parent_id = parent_of.get(chunk.start_element_id, "")
+        return chunks, parents
+
+    def chunk_json_file(self, json_path: PathLike) -> List[ElementChunk]:
+        """读取 json_store 中的文档并切分。"""
+        with open(json_path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+        return self.chunk_document(doc)
+
+    def create_documents(self, doc: Dict[str, Any]) -> List[Any]:
+        """切分并转为 LangChain Document（page_content + 标量元数据），可直接写入向量库。"""
+        from langchain_core.documents import Document
+
+        return [
+            Document(page_content=chunk.text, metadata=chunk.to_metadata())
+            for chunk in self.chunk_document(doc)
+        ]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    from src.config.settings import PROJECT_ROOT
+
+    json_dir = PROJECT_ROOT / "files" / "file_store" / "json_store"
+    chunker = StructuralChunker()
+    for json_path in sorted(json_dir.glob("*.json")):
+        chunks = chunker.chunk_json_file(json_path)
+        lengths = [len(c.text) for c in chunks]
+        average = sum(lengths) / max(1, len(lengths))
+        print(
+            f"{json_path.name}: {len(chunks)} 个块，"
+            f"平均长度={average:.0f}，最大长度={max(lengths or [0])}"
+        )
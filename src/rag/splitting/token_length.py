@@ -0,0 +1,157 @@
+"""
+按 token 计算切分长度。
+
+TEXT_CHUNK_SON_SIZE / TEXT_CHUNK_SON_OVERLAP 按字符计数时，同样长度的中文块所含 token
+约为英文的 2～3 倍：中文块超出嵌入模型的编码窗口被静默截断，英文块又填不满窗口。
+本模块用嵌入模型自身的分词器计算长度，使每个块恰好落在编码窗口内：
+
+- 分词器按模型路径只加载一次（get_token_counter 进程内缓存）
+- TokenCounter 可直接作为 StructuralChunker 的 length_function；
+  其 batch 方法一次对多段文本分词，切分器整篇文档批量计算长度
+- 已计算过的文本缓存其 token 数（重复的句子、标题不重复分词）
+- 长度不含 [CLS]/[SEP] 等特殊 token；max_tokens 为编码窗口减去特殊 token 数
+
+BERT / MPNet 类分词器先按空白与标点预切分，块内片段以空白或标点相接，
+片段 token 数之和即为整块 token 数。
+"""
+
+import sys
+from pathlib import Path
+
+# 确保项目根目录在 Python 路径中
+_project_root = Path(__file__).resolve().parent.parent.parent.parent
+if str(_project_root) not in sys.path:
+    sys.path.insert(0, str(_project_root))
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Union
+
+from src.config.settings import EMBEDDING_PATH
+
+# ---------------------- 类型与日志配置 ----------------------
+
+PathLike = Union[str, os.PathLike]
+
+logger = logging.getLogger(__name__)
+
+# 单次调用分词器的文本条数
+_TOKENIZE_BATCH_SIZE = 256
+# 无法从模型配置得到编码窗口时的默认值
+_DEFAULT_MAX_SEQ_LENGTH = 512
+
+
+# ---------------------- token 计数 ----------------------
+
+
+def _read_max_seq_length(model_path: Path, tokenizer: Any) -> int:
+    """编码窗口：优先取 sentence-transformers 的 max_seq_length，其次取分词器的 model_max_length。"""
+    config_path = model_path / "sentence_bert_config.json"
+    try:
+        value = json.loads(config_path.read_text(encoding="utf-8")).get("max_seq_length")
+        if value:
+            return int(value)
+    except (OSError, ValueError):
+        pass
+    value = getattr(tokenizer, "model_max_length", None)
+    # 未配置时 transformers 返回一个极大的哨兵值
+    if isinstance(value, int) and 0 < value < 100_000:
+        return value
+    return _DEFAULT_MAX_SEQ_LENGTH
+
+
+class TokenCounter:
+    """
+    以嵌入模型分词器计算文本 token 数，可作为切分器的 length_function。
+
+    Args:
+        tokenizer: transformers 分词器；为 None 时从 model_path 加载
+        model_path: 嵌入模型目录，默认 EMBEDDING_PATH
+        max_seq_length: 编码窗口；为 None 时从模型配置读取
+        cache_size: 缓存的文本条数
+    """
+
+    def __init__(
+        self,
+        tokenizer: Optional[Any] = None,
+        model_path: Optional[PathLike] = None,
+        max_seq_length: Optional[int] = None,
+        cache_size: int = 65536,
+    ) -> None:
+        self.model_path = Path(model_path or EMBEDDING_PATH)
+        if tokenizer is None:
+            from transformers import AutoTokenizer
+
+            logger.info("加载嵌入模型分词器：%s", self.model_path)
+            tokenizer = AutoTokenizer.from_pretrained(str(self.model_path))
+        self.tokenizer = tokenizer
+        self.max_seq_length = max_seq_length or _read_max_seq_length(
+            self.model_path, tokenizer
+        )
+        self.num_special_tokens = tokenizer.num_special_tokens_to_add(pair=False)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_tokens(self) -> int:
+        """单个块可用的 token 数（编码窗口减去特殊 token）。"""
+        return self.max_seq_length - self.num_special_tokens
+
+    def _tokenize_lengths(self, texts: List[str]) -> List[int]:
+        encoded = self.tokenizer(
+            texts,
+            add_special_tokens=False,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            verbose=False,
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def batch(self, texts: Sequence[str]) -> List[int]:
+        """批量计算 token 数；未缓存的文本合并为少量分词器调用。"""
+        lengths: List[Optional[int]] = []
+        missing: "OrderedDict[str, None]" = OrderedDict()
+        with self._lock:
+            for text in texts:
+                length = self._cache.get(text)
+                if length is None:
+                    missing[text] = None
+                else:
+                    self._cache.move_to_end(text)
+                lengths.append(length)
+
+        if missing:
+            pending = list(missing)
+            computed = {}
+            for start in range(0, len(pending), _TOKENIZE_BATCH_SIZE):
+                batch = pending[start : start + _TOKENIZE_BATCH_SIZE]
+                computed.update(zip(batch, self._tokenize_lengths(batch)))
+            with self._lock:
+                for text, length in computed.items():
+                    self._cache[text] = length
+                    self._cache.move_to_end(text)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            lengths = [
+                length if length is not None else computed[text]
+                for text, length in zip(texts, lengths)
+            ]
+        return lengths  # type: ignore[return-value]
+
+    def __call__(self, text: str) -> int:
+        return self.batch([text])[0]
+
+
+@lru_cache(maxsize=None)
+def _get_token_counter(model_path: str) -> TokenCounter:
+    return TokenCounter(model_path=model_path)
+
+
+def get_token_counter(model_path: Optional[PathLike] = None) -> TokenCounter:
+    """获取嵌入模型的 TokenCounter（同一模型路径在进程内只加载一次分词器）。"""
+    return _get_token_counter(str(Path(model_path or EMBEDDING_PATH)))
@@ -0,0 +1,102 @@
+"""查询嵌入缓存（LRU / TTL）、缓存键与在途合并测试。"""
+
+import threading
+
+from langchain_core.embeddings import Embeddings
+
+import src.models.embedding_cache as embedding_cache
+from src.models.embedding_cache import (
+    CachedQueryEmbeddings,
+    QueryEmbeddingCache,
+    normalize_query,
+)
+
+
+class _CountingEmbeddings(Embeddings):
+    """按文本长度返回向量并记录编码调用的假模型。"""
+
+    def __init__(self, gate: threading.Event = None) -> None:
+        self.calls = []
+        self.gate = gate
+
+    def embed_documents(self, texts):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_normalize_query_collapses_whitespace():
+    assert normalize_query("  what   is\n\tRAG?  ") == "what is RAG?"
+    assert normalize_query("a b") == normalize_query("a　b") == "a b"
+
+
+def test_lru_evicts_least_recently_used():
+    cache = QueryEmbeddingCache(max_entries=2, ttl_seconds=None)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    assert cache.get("a") == [1.0]
+    cache.put("c", [3.0])
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0]
+    assert cache.get("c") == [3.0]
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_ttl_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(embedding_cache.time, "monotonic", lambda: now[0])
+    cache = QueryEmbeddingCache(max_entries=10, ttl_seconds=60)
+    cache.put("a", [1.0])
+    now[0] += 59
+    assert cache.get("a") == [1.0]
+    now[0] += 2
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_zero_capacity_cache_stores_nothing():
+    cache = QueryEmbeddingCache(max_entries=0)
+    cache.put("a", [1.0])
+    assert cache.get("a") is None
+
+
+def test_cached_embeddings_hit_after_first_call():
+    model = _CountingEmbeddings()
+    cached = CachedQueryEmbeddings(model, cache=QueryEmbeddingCache(100, None), window_ms=0)
+    first = cached.embed_query("hello  world")
+    second = cached.embed_query(" hello world ")
+    assert first == second == [11.0, 1.0]
+    assert model.calls == [["hello world"]]
+    assert cached.stats()["hits"] == 1
+
+
+def test_concurrent_identical_queries_are_coalesced():
+    gate = threading.Event()
+    model = _CountingEmbeddings(gate)
+    cached = CachedQueryEmbeddings(model, cache=QueryEmbeddingCache(100, None), window_ms=0)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cached.embed_query("same query")))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    # 等所有线程都挂到同一个在途请求上后再放行编码
+    for _ in range(200):
+        if cached.coalesced >= 3:
+            break
+        threading.Event().wait(0.01)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [[10.0, 1.0]] * 4
+    assert sum(len(batch) for batch in model.calls) == 1
+    assert cached.coalesced == 3
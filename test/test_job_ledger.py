@@ -0,0 +1,76 @@
+"""ConversionJobLedger 的续跑键（路径 + 大小 + mtime）测试。"""
+
+import os
+
+import pytest
+
+from src.data_initialization.utils.job_ledger import ConversionJobLedger, JobState
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = ConversionJobLedger(tmp_path / "jobs.db")
+    yield ledger
+    ledger.close()
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"%PDF-1.4 test")
+    return path
+
+
+def test_records_progress_for_unchanged_pdf(ledger, pdf):
+    assert ledger.get(pdf) is None
+    ledger.record_upload(pdf, "https://oss/doc.pdf")
+    ledger.record_task(pdf, "task-1")
+    ledger.record_done(pdf, "https://mineru/doc.zip")
+
+    job = ledger.get(pdf)
+    assert job.state == JobState.DONE
+    assert job.file_url == "https://oss/doc.pdf"
+    assert job.task_id == "task-1"
+    assert job.zip_url == "https://mineru/doc.zip"
+    assert job.attempts == 1
+
+
+def test_same_pdf_via_relative_path_hits_same_record(ledger, pdf, monkeypatch):
+    ledger.record_task(pdf, "task-1")
+    monkeypatch.chdir(pdf.parent)
+    assert ledger.get("doc.pdf").task_id == "task-1"
+
+
+def test_changed_pdf_invalidates_record(ledger, pdf):
+    ledger.record_task(pdf, "task-1")
+    stat = pdf.stat()
+    os.utime(pdf, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert ledger.get(pdf) is None
+
+    # 再次写入时旧记录的其余字段被清空
+    ledger.record_upload(pdf, "https://oss/new.pdf")
+    job = ledger.get(pdf)
+    assert job.task_id is None
+    assert job.file_url == "https://oss/new.pdf"
+
+
+def test_failed_with_clear_task_resubmits(ledger, pdf):
+    ledger.record_upload(pdf, "https://oss/doc.pdf")
+    ledger.record_task(pdf, "task-1")
+    ledger.record_failed(pdf, "boom", clear_task=True)
+    job = ledger.get(pdf)
+    assert job.state == JobState.FAILED
+    assert job.task_id is None
+    assert job.file_url == "https://oss/doc.pdf"
+
+
+def test_forget_and_reopen(tmp_path, pdf):
+    ledger = ConversionJobLedger(tmp_path / "jobs.db")
+    ledger.record_task(pdf, "task-1")
+    ledger.close()
+
+    reopened = ConversionJobLedger(tmp_path / "jobs.db")
+    assert reopened.get(pdf).task_id == "task-1"
+    reopened.forget(pdf)
+    assert reopened.get(pdf) is None
+    reopened.close()
@@ -0,0 +1,66 @@
+"""MinerU 分段结果拼接（页段划分与页码偏移）测试。"""
+
+import json
+
+from src.data_initialization.utils.mineru_stitch import page_ranges, stitch_shard_dirs
+
+
+def test_page_ranges():
+    assert page_ranges(250, 100) == [(0, 100), (100, 200), (200, 250)]
+    assert page_ranges(100, 100) == [(0, 100)]
+    assert page_ranges(0, 100) == [(0, 0)]
+    assert page_ranges(3, 0) == [(0, 1), (1, 2), (2, 3)]
+
+
+def _write_shard(shard_dir, pages, label):
+    shard_dir.mkdir(parents=True)
+    (shard_dir / "full.md").write_text(f"# {label}\n", encoding="utf-8")
+    (shard_dir / "layout.json").write_text(
+        json.dumps(
+            {
+                "_backend": "pipeline",
+                "pdf_info": [{"page_idx": i, "label": label} for i in range(pages)],
+            }
+        ),
+        encoding="utf-8",
+    )
+    (shard_dir / "content_list_v2.json").write_text(
+        json.dumps([[{"label": label, "page": i}] for i in range(pages)]), encoding="utf-8"
+    )
+    (shard_dir / f"{label}_content_list.json").write_text(
+        json.dumps([{"text": f"{label}-{i}", "page_idx": i} for i in range(pages)]),
+        encoding="utf-8",
+    )
+    (shard_dir / f"{label}_model.json").write_text(
+        json.dumps([{"page": i} for i in range(pages)]), encoding="utf-8"
+    )
+    images = shard_dir / "images"
+    images.mkdir()
+    (images / f"{label}.jpg").write_bytes(b"jpg")
+
+
+def test_stitch_offsets_pages(tmp_path):
+    _write_shard(tmp_path / "b", 2, "b")
+    _write_shard(tmp_path / "a", 3, "a")
+    output = tmp_path / "out"
+
+    # 传入顺序与页序无关，按段起始页排序
+    full_md = stitch_shard_dirs([(3, tmp_path / "b"), (0, tmp_path / "a")], output, "doc")
+
+    assert full_md == "# a\n\n# b\n"
+    layout = json.loads((output / "layout.json").read_text(encoding="utf-8"))
+    assert layout["_backend"] == "pipeline"
+    assert [p["page_idx"] for p in layout["pdf_info"]] == [0, 1, 2, 3, 4]
+    assert [p["label"] for p in layout["pdf_info"]] == ["a", "a", "a", "b", "b"]
+
+    content_list = json.loads((output / "doc_content_list.json").read_text(encoding="utf-8"))
+    assert [(c["text"], c["page_idx"]) for c in content_list] == [
+        ("a-0", 0),
+        ("a-1", 1),
+        ("a-2", 2),
+        ("b-0", 3),
+        ("b-1", 4),
+    ]
+    assert len(json.loads((output / "content_list_v2.json").read_text(encoding="utf-8"))) == 5
+    assert len(json.loads((output / "doc_model.json").read_text(encoding="utf-8"))) == 5
+    assert sorted(p.name for p in (output / "images").iterdir()) == ["a.jpg", "b.jpg"]
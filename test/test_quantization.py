@@ -0,0 +1,75 @@
+"""ScalarQuantizer / rescore_exact 的往返与检索测试。"""
+
+import numpy as np
+import pytest
+
+from src.rag.indexing.quantization import ScalarQuantizer, rescore_exact
+
+
+def _unit_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_float32_and_float16_round_trip():
+    vectors = _unit_vectors(100, 16)
+    for dtype, atol in (("float32", 0.0), ("float16", 1e-3)):
+        quantizer = ScalarQuantizer(16, dtype)
+        codes = quantizer.encode(vectors)
+        assert codes.dtype == quantizer.code_dtype
+        np.testing.assert_allclose(quantizer.decode(codes), vectors, atol=atol)
+
+
+def test_int8_round_trip_within_one_step():
+    vectors = _unit_vectors(500, 16)
+    quantizer = ScalarQuantizer(16, "int8", min_train=100)
+    quantizer.train(vectors)
+    codes = quantizer.encode(vectors)
+    assert codes.dtype == np.uint8
+    assert quantizer.bytes_per_vector == 16
+    error = np.abs(quantizer.decode(codes) - vectors)
+    assert np.all(error <= quantizer.scale / 2 + 1e-6)
+
+
+def test_int8_refuses_small_training_sample():
+    quantizer = ScalarQuantizer(8, "int8", min_train=100)
+    with pytest.raises(ValueError):
+        quantizer.train(_unit_vectors(10, 8))
+    assert not quantizer.is_trained
+    with pytest.raises(ValueError):
+        quantizer.encode(_unit_vectors(1, 8))
+
+
+def test_inner_product_matches_decoded_vectors():
+    vectors = _unit_vectors(300, 32, seed=1)
+    queries = _unit_vectors(3, 32, seed=2)
+    quantizer = ScalarQuantizer(32, "int8", min_train=100)
+    quantizer.train(vectors)
+    codes = quantizer.encode(vectors)
+    np.testing.assert_allclose(
+        quantizer.inner_product(queries, codes),
+        queries @ quantizer.decode(codes).T,
+        rtol=1e-4,
+        atol=1e-4,
+    )
+
+
+def test_search_skips_invalid_rows_and_pads_with_minus_one():
+    vectors = _unit_vectors(5, 8, seed=3)
+    quantizer = ScalarQuantizer(8, "float32")
+    valid = np.array([True, False, True, False, False])
+    scores, rows = quantizer.search(vectors[:1], vectors, k=4, valid=valid)
+    assert rows[0, 0] == 0
+    assert set(rows[0, :2].tolist()) == {0, 2}
+    assert rows[0, 2:].tolist() == [-1, -1]
+    assert np.all(np.diff(scores[0, :2]) <= 0)
+
+
+def test_rescore_exact_orders_by_float32_distance():
+    vectors = _unit_vectors(4, 8, seed=4)
+    query = vectors[2]
+    candidates = np.array([0, -1, 2, 3])
+    distances, labels = rescore_exact(query, candidates, vectors, k=2)
+    assert labels[0] == 2
+    assert distances[0] == pytest.approx(0.0, abs=1e-6)
+    assert -1 not in labels.tolist()
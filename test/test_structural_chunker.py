@@ -0,0 +1,69 @@
+"""结构切分的块 id 稳定性测试（块 id 用作向量库 upsert 的键）。"""
+
+import copy
+
+from src.rag.splitting.structural_chunker import StructuralChunker
+
+
+def _doc():
+    return {
+        "metadata": {"doc_id": "doc-1"},
+        "elements": [
+            {"id": "e1", "type": "title", "content": {"text": "Introduction"}},
+            {"id": "e2", "type": "paragraph", "content": {"text": "Short paragraph."}},
+            {"id": "e3", "type": "paragraph", "content": {"text": "Another one."}},
+            {
+                "id": "e4",
+                "type": "paragraph",
+                "content": {"text": " ".join(f"Sentence number {i}." for i in range(20))},
+            },
+            {"id": "e5", "type": "title", "content": {"text": "Method"}},
+            {"id": "e6", "type": "table", "content": {"html": "<tr><td>a</td><td>b</td></tr>"}},
+        ],
+    }
+
+
+def _chunker():
+    return StructuralChunker(
+        chunk_size=80, chunk_overlap=10, media_chunk_size=80, media_chunk_overlap=10
+    )
+
+
+def test_chunk_ids_are_stable_across_runs():
+    first = [c.chunk_id for c in _chunker().chunk_document(_doc())]
+    second = [c.chunk_id for c in _chunker().chunk_document(copy.deepcopy(_doc()))]
+    assert first == second
+    assert len(first) == len(set(first))
+
+
+def test_chunk_ids_follow_first_element():
+    chunks = _chunker().chunk_document(_doc())
+    assert chunks[0].chunk_id == "e1_chunk_0"
+    assert chunks[0].element_ids[:2] == ["e1", "e2"]
+    for chunk in chunks:
+        assert chunk.doc_id == "doc-1"
+        prefix, _, n = chunk.chunk_id.rpartition("_chunk_")
+        assert prefix == chunk.start_element_id
+        assert n.isdigit()
+
+    # 超长段落的片段以同一元素开头，按片段序号编号
+    parts = [c for c in chunks if c.part is not None]
+    assert len(parts) > 1
+    assert [c.chunk_id for c in parts] == [f"e4_chunk_{i}" for i in range(len(parts))]
+
+
+def test_editing_later_element_keeps_earlier_ids():
+    doc = _doc()
+    before = [c.chunk_id for c in _chunker().chunk_document(doc)]
+    doc["elements"][-1]["content"]["html"] = "<tr><td>changed</td></tr>"
+    after = [c.chunk_id for c in _chunker().chunk_document(doc)]
+    assert before == after
+
+
+def test_chunk_with_parents_links_children():
+    chunks, parents = _chunker().chunk_with_parents(_doc(), parent_size=2000)
+    parent_ids = {p.parent_id for p in parents}
+    assert all(chunk.parent_id in parent_ids for chunk in chunks)
+    assert [c.chunk_id for c in chunks] == [
+        c.chunk_id for c in _chunker().chunk_document(_doc())
+    ]
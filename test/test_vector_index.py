@@ -0,0 +1,110 @@
+"""LocalAnnVectorStore（flat 后端）的写入、删除、过滤与落盘重载测试。"""
+
+import numpy as np
+import pytest
+
+from src.rag.indexing.vector_index import FlatIndex, LocalAnnVectorStore
+
+DIM = 8
+
+
+def _vectors(n: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+
+
+def _store(tmp_path, **kwargs) -> LocalAnnVectorStore:
+    return LocalAnnVectorStore(
+        backend="flat", persist_directory=tmp_path, collection_name="test", **kwargs
+    )
+
+
+def _upsert(store: LocalAnnVectorStore, vectors: np.ndarray, doc_of=lambda i: f"doc{i % 2}"):
+    ids = [f"c{i}" for i in range(len(vectors))]
+    store.upsert(
+        ids,
+        vectors,
+        documents=[f"text {i}" for i in range(len(vectors))],
+        metadatas=[{"doc_id": doc_of(i)} for i in range(len(vectors))],
+    )
+    return ids
+
+
+def test_upsert_and_search_returns_nearest(tmp_path):
+    store = _store(tmp_path, rescore_factor=0)
+    vectors = _vectors(20)
+    _upsert(store, vectors)
+    results = store.similarity_search_by_vector_with_score(vectors[7], k=3)
+    assert results[0][0].id == "c7"
+    assert results[0][1] == pytest.approx(0.0, abs=1e-5)
+    assert [r[1] for r in results] == sorted(r[1] for r in results)
+
+
+def test_upsert_same_id_replaces(tmp_path):
+    store = _store(tmp_path, rescore_factor=0)
+    vectors = _vectors(5)
+    _upsert(store, vectors)
+    store.upsert(["c0"], vectors[4:5], documents=["replaced"], metadatas=[{"doc_id": "doc0"}])
+    assert store.index.ntotal == 5
+    top = store.similarity_search_by_vector_with_score(vectors[4], k=2)
+    assert {doc.id for doc, _ in top} == {"c0", "c4"}
+
+
+def test_delete_by_id_and_where(tmp_path):
+    store = _store(tmp_path, rescore_factor=0)
+    vectors = _vectors(10)
+    _upsert(store, vectors)
+    store.delete(["c0"])
+    assert store.index.ntotal == 9
+    store.delete(where={"doc_id": "doc1"})
+    assert store.index.ntotal == 4
+    remaining = store.similarity_search_by_vector_with_score(vectors[2], k=10)
+    assert sorted(doc.id for doc, _ in remaining) == ["c2", "c4", "c6", "c8"]
+
+
+def test_filter_returns_only_matching_documents(tmp_path):
+    store = _store(tmp_path, rescore_factor=0)
+    vectors = _vectors(30)
+    _upsert(store, vectors)
+    results = store.similarity_search_by_vector_with_score(
+        vectors[1], k=5, filter={"doc_id": "doc0"}
+    )
+    assert len(results) == 5
+    assert all(doc.metadata["doc_id"] == "doc0" for doc, _ in results)
+    with pytest.raises(ValueError):
+        store.similarity_search_by_vector_with_score(
+            vectors[1], k=5, filter={"doc_id": {"$in": ["doc0"]}}
+        )
+
+
+def test_persist_and_reload(tmp_path):
+    store = _store(tmp_path, rescore_factor=2)
+    vectors = _vectors(12)
+    _upsert(store, vectors)
+    store.delete(["c3"])
+    store.close()
+
+    reopened = _store(tmp_path, rescore_factor=2)
+    assert reopened.index.ntotal == 11
+    results = reopened.similarity_search_by_vector_with_score(vectors[5], k=1)
+    assert results[0][0].id == "c5"
+    assert results[0][0].page_content == "text 5"
+    # 重新打开后新分配的 label 不与已有记录冲突
+    reopened.upsert(["new"], vectors[3:4], documents=["new"], metadatas=[{"doc_id": "x"}])
+    assert reopened.similarity_search_by_vector_with_score(vectors[3], k=1)[0][0].id == "new"
+
+
+def test_flat_int8_buffers_float32_until_min_train():
+    index = FlatIndex(DIM, dtype="int8")
+    index.quantizer.min_train = 50
+    vectors = _vectors(60, seed=1)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    index.add(np.arange(10), vectors[:10])
+    assert not index.quantizer.is_trained
+    assert index._codes.dtype == np.float32
+
+    index.add(np.arange(10, 60), vectors[10:])
+    assert index.quantizer.is_trained
+    assert index._codes.dtype == np.uint8
+    _, labels = index.search(vectors[:1], 1)
+    assert labels[0, 0] == 0